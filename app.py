@@ -1,5 +1,7 @@
 import streamlit as st
+from db import conexion_por_rerun
 from permisos import PERMISOS_POR_PERFIL
+from servicios.perfilador import perfilar_rerun
 
 # =========================
 # CONFIGURACIÓN GENERAL (SIEMPRE PRIMERO)
@@ -56,7 +58,8 @@ div[data-testid="stDecoration"] {
 # =========================
 if not usuario:
     from modulos.login import render
-    render()
+    with perfilar_rerun("Login"), conexion_por_rerun():
+        render()
     st.stop()
 
 # =========================
@@ -73,39 +76,46 @@ with st.sidebar:
 # =========================
 # ROUTER DE MÓDULOS
 # =========================
-if opcion == "Dashboards":
-    from modulos.dashboards import render
-    render()
-
-elif opcion == "Asignación de Producción":
-    from modulos.asignaciones import render
-    render()
-
-elif opcion == "Cargar Asignaciones":
-    from modulos.cargar_asignaciones import render
-    render()
-
-elif opcion == "Reportes Producción":
-    from modulos.produccion import render
-    render()
-
-elif opcion == "RRHH":
-    from modulos.rrhh import render
-    render()
-
-elif opcion == "Eventos":
-    from modulos.eventos import render
-    render()
-
-elif opcion == "Historial":
-    from modulos.historial import render
-    render()
-
-elif opcion == "Correcciones":
-    from modulos.correcciones import render
-    render()
-
-elif opcion == "Cerrar Sesion":
-    from modulos.cerrar_sesion import render
-    render()
-
+# La conexión del pool se toma en el primer get_connection() del módulo
+# y se devuelve al terminar el rerun (también con st.stop / st.rerun).
+# Con [perfilado] ACTIVO en secrets.toml se mide cada rerun por página.
+with perfilar_rerun(opcion), conexion_por_rerun():
+    if opcion == "Dashboards":
+        from modulos.dashboards import render
+        render()
+
+    elif opcion == "Asignación de Producción":
+        from modulos.asignaciones import render
+        render()
+
+    elif opcion == "Cargar Asignaciones":
+        from modulos.cargar_asignaciones import render
+        render()
+
+    elif opcion == "Reportes Producción":
+        from modulos.produccion import render
+        render()
+
+    elif opcion == "RRHH":
+        from modulos.rrhh import render
+        render()
+
+    elif opcion == "Eventos":
+        from modulos.eventos import render
+        render()
+
+    elif opcion == "Historial":
+        from modulos.historial import render
+        render()
+
+    elif opcion == "Correcciones":
+        from modulos.correcciones import render
+        render()
+
+    elif opcion == "Rendimiento SQL":
+        from modulos.rendimiento import render
+        render()
+
+    elif opcion == "Cerrar Sesion":
+        from modulos.cerrar_sesion import render
+        render()
@@ -6,7 +6,7 @@ def login_usuario(cedula, password):
     cur = conn.cursor()
 
     cur.execute("""
-        SELECT cedula, nombre_completo, perfil, puesto
+        SELECT cedula, nombre_completo, perfil, puesto, supervisor
         FROM personal
         WHERE cedula = %s
           AND contraseña = %s
@@ -20,7 +20,8 @@ def login_usuario(cedula, password):
             "cedula": user[0],
             "nombre": user[1],
             "perfil": user[2],
-            "puesto": user[3]
+            "puesto": user[3],
+            "supervisor": user[4]
         }
         st.rerun()
     
@@ -0,0 +1,172 @@
+"""
+Benchmark de la analítica de producción: instantánea Parquet + DuckDB vs.
+GROUP BY en Postgres.
+
+Siembra un schema con reportes de varios años y mide:
+
+- instantánea: la corrida completa y una incremental después de editar
+  reportes de un solo mes (debe reescribir solo ese mes), y su tamaño
+- consultas: cada agrupación del tablero sobre el último año, en frío
+  (sin la caché de Streamlit) con DuckDB y con la consulta equivalente en
+  Postgres; verifica que den los mismos totales
+- archivo: archiva los meses fuera de la retención, regenera la
+  instantánea (esos meses se leen del Parquet del archivo) y verifica que
+  los totales de todo el período no cambian
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.analitica \
+        --operadores 600 --años 3
+"""
+import argparse
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.comun import cronometrar, eliminar_esquema, imprimir, preparar_esquema, resumen
+from benchmarks.datos import sembrar_catalogos, sembrar_personal, sembrar_reportes
+from servicios import analitica_produccion, archivo_reportes
+
+ESQUEMA = "bench_analitica"
+
+# La misma agrupación, leyendo reportes en Postgres
+SQL_POSTGRES = {
+    "Operador": (["COALESCE(p.nombre_completo, r.cedula_personal)"], "produccion DESC"),
+    "Semana": (["COALESCE(r.año, EXTRACT(YEAR FROM r.fecha_reporte))::int",
+                "COALESCE(r.semana, EXTRACT(WEEK FROM r.fecha_reporte))::int"], "1, 2"),
+    "Región": (["COALESCE(r.region, '—')"], "1"),
+    "Proceso": (["COALESCE(pr.nombre, 'Sin proceso')"], "1"),
+    "Complejidad": (["COALESCE(r.complejidad, '—')"], "1"),
+}
+
+
+def consultar_postgres(conn, agrupacion, inicio, fin):
+    columnas, orden = SQL_POSTGRES[agrupacion]
+    df = pd.read_sql(f"""
+        SELECT
+            {", ".join(columnas)},
+            count(*) AS reportes,
+            sum(r.horas) AS horas,
+            sum(r.produccion) AS produccion,
+            sum(r.aprobados) AS aprobados,
+            sum(r.rechazados) AS rechazados
+        FROM reportes r
+        LEFT JOIN personal p ON p.cedula = r.cedula_personal
+        LEFT JOIN procesos pr ON pr.id = r.proceso_id
+        WHERE r.tipo_reporte = 'produccion'
+          AND r.fecha_reporte BETWEEN %s AND %s
+        GROUP BY {", ".join(str(i + 1) for i in range(len(columnas)))}
+        ORDER BY {orden}
+    """, conn, params=[inicio, fin])
+    conn.rollback()
+    return df
+
+
+def consultar_duckdb(directorio, agrupacion, inicio, fin):
+    analitica_produccion._agrupar.clear()
+    return analitica_produccion.produccion_por(agrupacion, inicio, fin, directorio=directorio)[0]
+
+
+def totales(df):
+    columnas = ("reportes", "horas", "produccion", "aprobados", "rechazados")
+    return {c: round(float(df[c].sum()), 2) for c in columnas}
+
+
+def medir_consultas(conn, directorio, inicio, fin, repeticiones):
+    resultados = []
+    for agrupacion in analitica_produccion.AGRUPACIONES:
+        pg = consultar_postgres(conn, agrupacion, inicio, fin)
+        dk = consultar_duckdb(directorio, agrupacion, inicio, fin)
+        resultados.append({
+            "agrupacion": agrupacion,
+            "grupos": len(dk),
+            "mismos_totales": totales(pg) == totales(dk) and len(pg) == len(dk),
+            "postgres": resumen(cronometrar(
+                lambda: consultar_postgres(conn, agrupacion, inicio, fin), repeticiones
+            )),
+            "duckdb": resumen(cronometrar(
+                lambda: consultar_duckdb(directorio, agrupacion, inicio, fin), repeticiones
+            )),
+        })
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--operadores", type=int, default=600)
+    parser.add_argument("--años", type=float, default=3)
+    parser.add_argument("--desde", default="2022-01-01")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--retencion", type=int, default=12)
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema ni los archivos al terminar")
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, args.operadores)
+    sembrar_reportes(conn, int(args.años * 365), desde=args.desde)
+
+    cur = conn.cursor()
+    cur.execute("SELECT min(fecha_reporte), max(fecha_reporte), count(*) FROM reportes")
+    primero, fin, filas = cur.fetchone()
+    conn.rollback()
+    inicio = fin - timedelta(days=365)
+
+    temporal = Path(tempfile.mkdtemp(prefix="analitica_"))
+    directorio, archivo = temporal / "analitica", temporal / "archivo"
+
+    try:
+        completa = analitica_produccion.generar(conn, directorio)
+        bytes_instantanea = sum(p.stat().st_size for p in directorio.glob("*.parquet"))
+
+        # Edición de un mes: la corrida siguiente reescribe solo ese mes
+        cur.execute("""
+            UPDATE reportes
+            SET produccion = produccion + 1
+            WHERE fecha_reporte BETWEEN %s AND %s
+              AND cedula_personal = 'OP000001'
+        """, (fin - timedelta(days=10), fin))
+        conn.commit()
+        incremental = analitica_produccion.generar(conn, directorio)
+
+        consultas = medir_consultas(conn, directorio, inicio, fin, args.repeticiones)
+
+        antes = totales(consultar_duckdb(directorio, "Región", primero, fin))
+        hechas = archivo_reportes.archivar(conn, args.retencion, archivo, hoy=fin)
+        tras_archivo = analitica_produccion.generar(conn, directorio)
+        despues = totales(consultar_duckdb(directorio, "Región", primero, fin))
+        todo_el_periodo = resumen(cronometrar(
+            lambda: consultar_duckdb(directorio, "Operador", primero, fin), args.repeticiones
+        ))
+    finally:
+        conn.close()
+        if not args.conservar:
+            shutil.rmtree(temporal, ignore_errors=True)
+            eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "analitica",
+        "reportes": filas,
+        "rango_consultas": [inicio, fin],
+        "instantanea": {
+            "completa": {"meses": completa["meses"], "segundos": completa["segundos"]},
+            "mb": round(bytes_instantanea / 1e6, 2),
+            "incremental": {"reescritos": incremental["reescritos"],
+                            "segundos": incremental["segundos"]},
+        },
+        "consultas_ultimo_año": consultas,
+        "archivo": {
+            "meses_archivados": len(hechas),
+            "regenerar_s": tras_archivo["segundos"],
+            "mismos_totales_del_periodo": antes == despues,
+            "operador_todo_el_periodo": todo_el_periodo,
+        },
+        "directorio": str(temporal) if args.conservar else None,
+    })
+
+
+if __name__ == "__main__":
+    main()
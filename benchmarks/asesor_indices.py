@@ -0,0 +1,513 @@
+"""
+Asesor de índices: EXPLAIN ANALYZE de las sentencias de cada módulo.
+
+Siembra un schema con benchmarks.datos (o reutiliza uno con --reusar), le
+aplica las migraciones hasta --hasta-migracion y corre
+EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) sobre las sentencias que ejecutan
+las páginas, cada una en su transacción con rollback (las que escriben no
+dejan rastro). Por sentencia reporta el tiempo de ejecución, los buffers
+leídos y los nodos del plan; marca:
+
+- seq_scan: un Seq Scan que recorre más de --filas-seq filas, salvo en las
+  sentencias que leen la tabla completa a propósito (catálogo, mapa)
+- sugerencia: un CREATE INDEX armado con las columnas del filtro de ese
+  Seq Scan (igualdades primero, rangos al final)
+- regresion (con --comparar): tiempo mayor que --tolerancia y --minimo-ms
+  respecto del resultado anterior, o un Seq Scan nuevo
+
+Termina con código 1 si hay regresiones (o, con --estricto, cualquier
+Seq Scan marcado).
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.asesor_indices \
+        --escala media --hasta-migracion 2 --salida resultados/planes_sin_003.json
+    python -m benchmarks.asesor_indices --escala media \
+        --comparar resultados/planes_sin_003.json
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.comun import conectar, eliminar_esquema, preparar_esquema
+from benchmarks.datos import ESCALAS, conteos, sembrar_todo
+from servicios.cola_asignaciones import (
+    LOCK_COLA_ASIGNACIONES,
+    SQL_RECLAMAR_OPERATIVO,
+    SQL_RECLAMAR_QC,
+)
+from servicios.historial import ORDEN_REPORTES, sql_reportes
+from servicios.migraciones import aplicar as aplicar_migraciones
+from servicios.paginacion import FILAS_POR_PAGINA
+from servicios.transiciones import SQL_TRANSICION
+
+REGION = "R0"
+
+
+def pagina(consulta):
+    """Primera página keyset (servicios.paginacion.consultar_pagina)."""
+    return f"""
+        SELECT *
+        FROM ({consulta}) q
+        ORDER BY q.fecha_reporte DESC, q.id DESC
+        LIMIT {FILAS_POR_PAGINA + 1}
+    """
+
+
+def pagina_historial(where_extra=""):
+    """Primera página de producción del Historial (modulos.historial)."""
+    consulta = sql_reportes(where_extra + " AND r.tipo_reporte = 'produccion'")
+    return f"""
+        SELECT *
+        FROM ({consulta}) q
+        ORDER BY {", ".join(f"q.{columna}" for columna in ORDEN_REPORTES)}
+        LIMIT {FILAS_POR_PAGINA + 1}
+    """
+
+
+# =====================================================
+# SENTENCIAS POR MÓDULO
+# (modulo, nombre, sql, params(ctx), tablas leídas completas a propósito)
+# Las consultas escritas dentro de modulos/*.py están copiadas tal cual.
+# =====================================================
+SENTENCIAS = [
+    ("asignaciones", "regiones", """
+        WITH RECURSIVE r AS (
+            SELECT min(region) AS region
+            FROM asignaciones_resumen
+            UNION ALL
+            SELECT (
+                SELECT min(s.region)
+                FROM asignaciones_resumen s
+                WHERE s.region > r.region
+            )
+            FROM r
+            WHERE r.region IS NOT NULL
+        )
+        SELECT region
+        FROM r
+        WHERE region IS NOT NULL
+    """, lambda ctx: None, ()),
+
+    ("asignaciones", "asignacion_activa", """
+        SELECT 1
+        FROM asignaciones
+        WHERE operador_actual = %s
+          AND estado_actual IN ('asignado', 'proceso', 'corregido')
+          AND proceso_actual = 'operativo'
+        LIMIT 1
+    """, lambda ctx: (ctx["operador"],), ()),
+
+    ("asignaciones", "reclamar_operativo", SQL_RECLAMAR_OPERATIVO, lambda ctx: {
+        "region": REGION, "cedula": ctx["libre"], "puesto": "Operario Catastral",
+        "lock": LOCK_COLA_ASIGNACIONES,
+    }, ()),
+
+    ("asignaciones", "asignaciones_operador", """
+        SELECT DISTINCT asignacion
+        FROM asignaciones
+        WHERE operador_actual = %s AND region = %s
+        ORDER BY asignacion
+    """, lambda ctx: (ctx["operador"], REGION), ()),
+
+    ("asignaciones", "bloques_operador", """
+        SELECT asignacion, bloque, estado_actual, cantidad_rechazos, cantidad_aprobaciones
+        FROM asignaciones
+        WHERE operador_actual = %s AND region = %s AND asignacion = %s
+        ORDER BY bloque
+    """, lambda ctx: (ctx["operador"], REGION, ctx["asignacion"]), ()),
+
+    ("asignaciones", "transicion", SQL_TRANSICION, lambda ctx: {
+        "region": REGION, "asignacion": ctx["asignacion"], "bloques": ctx["bloques"],
+        "destino": "proceso", "origen": "asignado",
+        "cedula": ctx["operador"], "puesto": "Operario Catastral",
+    }, ()),
+
+    ("asignaciones", "reclamar_qc", SQL_RECLAMAR_QC, lambda ctx: {
+        "region": REGION, "cedula": ctx["qc"], "puesto": "Operario Calidad",
+        "lock": LOCK_COLA_ASIGNACIONES,
+    }, ()),
+
+    ("asignaciones", "bloques_qc", """
+        SELECT asignacion, bloque, estado_actual,
+               cantidad_rechazos, cantidad_aprobaciones
+        FROM asignaciones
+        WHERE qc_actual = %s
+          AND region = %s
+        ORDER BY asignacion, bloque
+    """, lambda ctx: (ctx["qc"], REGION), ()),
+
+    ("asignaciones", "lista_manual", """
+        SELECT asignacion
+        FROM asignaciones_resumen
+        WHERE region = %s
+          AND pendientes = bloques
+        ORDER BY asignacion
+    """, lambda ctx: (REGION,), ()),
+
+    ("cargar_asignaciones", "existe_bloque", """
+        SELECT 1
+        FROM asignaciones a
+        WHERE a.region = %s
+          AND a.asignacion = %s
+          AND a.bloque = %s
+    """, lambda ctx: (REGION, ctx["asignacion"], ctx["bloques"][0]), ()),
+
+    ("produccion", "catalogo", """
+        SELECT region, asignacion, bloque, complejidad
+        FROM asignaciones
+        WHERE region IS NOT NULL
+        ORDER BY region, asignacion, bloque
+    """, lambda ctx: None, ("asignaciones",)),
+
+    ("dashboards", "mapa_region", """
+        SELECT
+            a.region,
+            a.asignacion,
+            a.bloque,
+            a.estado_actual,
+            a.proceso_actual,
+            COALESCE(p.nombre_completo, '—') AS operador
+        FROM asignaciones a
+        LEFT JOIN personal p
+            ON p.cedula = a.operador_actual
+        WHERE a.region = %s
+    """, lambda ctx: (REGION,), ("personal",)),
+
+    ("historial", "pagina_operador", pagina_historial(" AND r.cedula_personal = %s"),
+     lambda ctx: (ctx["desde"], ctx["hasta"], ctx["reporta"]), ("personal", "tipos_evento")),
+
+    ("historial", "pagina_supervisor", pagina_historial(" AND r.supervisor_nombre = %s"),
+     lambda ctx: (ctx["desde"], ctx["hasta"], ctx["supervisor"]), ("personal", "tipos_evento")),
+
+    ("historial", "pagina_totales", pagina_historial(),
+     lambda ctx: (ctx["desde"], ctx["hasta"]), ("personal", "tipos_evento")),
+
+    ("historial", "horas_diarias", """
+        SELECT
+            h.fecha_reporte,
+            p.nombre_completo AS persona,
+            SUM(h.total_horas) AS total_horas,
+            SUM(h.reportes_produccion) AS reportes_produccion,
+            SUM(h.reportes_evento) AS reportes_evento
+        FROM horas_diarias h
+        JOIN personal p ON p.cedula = h.cedula_personal
+        WHERE h.fecha_reporte BETWEEN %s AND %s
+          AND h.supervisor_nombre = %s
+        GROUP BY h.fecha_reporte, p.cedula, p.nombre_completo
+        ORDER BY h.fecha_reporte, persona
+    """, lambda ctx: (ctx["desde"], ctx["hasta"], ctx["supervisor"]), ("personal",)),
+
+    ("correcciones", "registros_operador", pagina("""
+            SELECT
+                id,
+                fecha_reporte,
+                cedula_personal,
+                horas,
+                zona,
+                produccion,
+                aprobados,
+                rechazados,
+                observaciones
+            FROM reportes
+            WHERE fecha_reporte BETWEEN %s AND %s
+              AND cedula_personal = %s
+    """), lambda ctx: (ctx["desde"], ctx["hasta"], ctx["reporta"]), ()),
+
+    ("correcciones", "solicitudes_operador", """
+        SELECT
+            fecha,
+            id_asociado,
+            columna,
+            solucion,
+            estado
+        FROM correcciones
+        WHERE cedula = %s
+        ORDER BY fecha DESC
+    """, lambda ctx: (ctx["reporta"],), ()),
+
+    ("correcciones", "pendientes", """
+        SELECT
+            id,
+            fecha,
+            cedula,
+            nombre,
+            id_asociado,
+            columna,
+            nuevo_valor,
+            solucion,
+            estado
+        FROM correcciones
+        WHERE estado = 'pendiente'
+        ORDER BY fecha
+    """, lambda ctx: None, ()),
+
+    ("eventos", "personal_a_cargo", """
+        SELECT cedula, nombre_completo, perfil, puesto, supervisor
+        FROM personal
+        WHERE estado = 'activo'
+          AND (supervisor = %s OR cedula = %s)
+        ORDER BY nombre_completo
+    """, lambda ctx: (ctx["supervisor"], "SUP00001"), ("personal",)),
+]
+
+
+# =====================================================
+# CONTEXTO (valores reales del schema sembrado)
+# =====================================================
+def contexto(conn):
+    cur = conn.cursor()
+
+    cur.execute("SELECT max(fecha_reporte) FROM reportes")
+    hasta = cur.fetchone()[0] or date.today()
+
+    cur.execute("""
+        SELECT asignacion, operador_actual, array_agg(bloque ORDER BY bloque)
+        FROM asignaciones
+        WHERE region = %s
+          AND estado_actual = 'asignado'
+        GROUP BY asignacion, operador_actual
+        ORDER BY asignacion
+        LIMIT 1
+    """, (REGION,))
+    asignacion, operador, bloques = cur.fetchone()
+
+    cur.execute("""
+        SELECT cedula
+        FROM personal p
+        WHERE perfil = 3
+          AND NOT EXISTS (SELECT 1 FROM asignaciones a WHERE a.operador_actual = p.cedula)
+        ORDER BY cedula
+        LIMIT 1
+    """)
+    libre = (cur.fetchone() or (operador,))[0]
+
+    cur.execute("SELECT min(cedula) FROM personal WHERE perfil = 4")
+    qc = cur.fetchone()[0]
+
+    cur.execute("""
+        SELECT cedula_personal, supervisor_nombre
+        FROM reportes
+        WHERE fecha_reporte = %s
+        ORDER BY cedula_personal
+        LIMIT 1
+    """, (hasta,))
+    reporta, supervisor = cur.fetchone()
+    conn.rollback()
+
+    return {
+        "desde": hasta - timedelta(days=30),
+        "hasta": hasta,
+        "asignacion": asignacion,
+        "operador": operador,
+        "bloques": bloques,
+        "libre": libre,
+        "qc": qc,
+        "reporta": reporta,
+        "supervisor": supervisor,
+    }
+
+
+# =====================================================
+# PLANES
+# =====================================================
+_IGUALDAD = re.compile(r"\(?(\w+) = (?:ANY\b|'|\$|\d|\()")
+_RANGO = re.compile(r"\(?(\w+) (?:>=|<=|>|<) ")
+
+
+def nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+
+def sugerir_indice(tabla, filtro):
+    """CREATE INDEX con las columnas del filtro: igualdades y después rangos."""
+    iguales = list(dict.fromkeys(_IGUALDAD.findall(filtro or "")))
+    rangos = [c for c in dict.fromkeys(_RANGO.findall(filtro or "")) if c not in iguales]
+    columnas = iguales + rangos
+    if not columnas:
+        return None
+    return f"CREATE INDEX ON {tabla} ({', '.join(columnas)})"
+
+
+def explicar(conn, sql, params, completas, filas_seq):
+    cur = conn.cursor()
+    try:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        resultado = cur.fetchone()[0]
+    finally:
+        conn.rollback()
+
+    if isinstance(resultado, str):
+        resultado = json.loads(resultado)
+    raiz = resultado[0]
+
+    seq_scans = []
+    sugerencias = []
+    tipos = []
+    for nodo in nodos(raiz["Plan"]):
+        tipos.append(nodo["Node Type"])
+        if nodo["Node Type"] != "Seq Scan":
+            continue
+
+        tabla = nodo["Relation Name"]
+        recorridas = (nodo.get("Actual Rows", 0) + nodo.get("Rows Removed by Filter", 0)) * nodo.get("Actual Loops", 1)
+        if tabla in completas or recorridas <= filas_seq:
+            continue
+
+        seq_scans.append({"tabla": tabla, "filas": int(recorridas), "filtro": nodo.get("Filter")})
+        sugerencia = sugerir_indice(tabla, nodo.get("Filter"))
+        if sugerencia:
+            sugerencias.append(sugerencia)
+
+    plan = raiz["Plan"]
+    return {
+        "ejecucion_ms": round(raiz["Execution Time"], 3),
+        "planificacion_ms": round(raiz["Planning Time"], 3),
+        "filas": plan.get("Actual Rows"),
+        "buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+        "nodos": sorted(set(tipos)),
+        "seq_scans": seq_scans,
+        "sugerencias": sorted(set(sugerencias)),
+    }
+
+
+def correr(conn, ctx, filas_seq, repeticiones):
+    """Mejor de `repeticiones` ejecuciones de cada sentencia (caché caliente)."""
+    resultados = []
+    for modulo, nombre, sql, armar_params, completas in SENTENCIAS:
+        params = armar_params(ctx)
+        corridas = [explicar(conn, sql, params, set(completas), filas_seq) for _ in range(repeticiones)]
+        mejor = min(corridas, key=lambda r: r["ejecucion_ms"])
+        resultados.append({"modulo": modulo, "sentencia": nombre, **mejor})
+    return resultados
+
+
+def comparar(anterior, actual, tolerancia, minimo_ms=1.0):
+    previos = {(s["modulo"], s["sentencia"]): s for s in anterior["sentencias"]}
+    filas = []
+
+    for s in actual["sentencias"]:
+        p = previos.get((s["modulo"], s["sentencia"]))
+        if p is None:
+            continue
+        cambio = s["ejecucion_ms"] / p["ejecucion_ms"] - 1 if p["ejecucion_ms"] else 0.0
+        tablas_antes = {x["tabla"] for x in p["seq_scans"]}
+        nuevos_seq = [x["tabla"] for x in s["seq_scans"] if x["tabla"] not in tablas_antes]
+        filas.append({
+            "modulo": s["modulo"],
+            "sentencia": s["sentencia"],
+            "ms_antes": p["ejecucion_ms"],
+            "ms_ahora": s["ejecucion_ms"],
+            "cambio_%": round(cambio * 100, 1),
+            "buffers_antes": p["buffers"],
+            "buffers_ahora": s["buffers"],
+            "seq_nuevos": ", ".join(nuevos_seq),
+            "regresion": (
+                cambio > tolerancia and s["ejecucion_ms"] - p["ejecucion_ms"] > minimo_ms
+                or bool(nuevos_seq)
+            ),
+        })
+
+    return pd.DataFrame(filas)
+
+
+def tabla(resultados):
+    return pd.DataFrame([
+        {
+            "modulo": r["modulo"],
+            "sentencia": r["sentencia"],
+            "ms": r["ejecucion_ms"],
+            "buffers": r["buffers"],
+            "seq_scan": ", ".join(f"{s['tabla']}({s['filas']})" for s in r["seq_scans"]),
+            "sugerencia": "; ".join(r["sugerencias"]),
+        }
+        for r in resultados
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--esquema", default="bench_planes")
+    parser.add_argument("--escala", choices=ESCALAS, default="media")
+    parser.add_argument("--reusar", action="store_true",
+                        help="Usar el schema ya sembrado sin recrearlo (solo aplica migraciones pendientes)")
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema al terminar")
+    parser.add_argument("--hasta-migracion", type=int,
+                        help="Aplicar las migraciones solo hasta esta versión (planes 'antes')")
+    parser.add_argument("--filas-seq", type=int, default=1000,
+                        help="Seq Scans que recorren más filas que esto se marcan")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    parser.add_argument("--comparar", help="Resultado anterior (JSON) contra el cual comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.20)
+    parser.add_argument("--minimo-ms", type=float, default=1.0)
+    parser.add_argument("--estricto", action="store_true",
+                        help="Código de salida 1 también si queda algún Seq Scan marcado")
+    args = parser.parse_args()
+
+    if args.reusar:
+        conn = conectar(args.esquema)
+    else:
+        conn = preparar_esquema(args.esquema, migrar=False)
+        sembrar_todo(conn, **ESCALAS[args.escala])
+
+    migraciones = aplicar_migraciones(conn, hasta=args.hasta_migracion)
+    cur = conn.cursor()
+    cur.execute("ANALYZE")
+    cur.execute("SELECT max(version) FROM schema_migraciones")
+    version_esquema = cur.fetchone()[0]
+    conn.commit()
+
+    filas = conteos(conn)
+    resultados = correr(conn, contexto(conn), args.filas_seq, args.repeticiones)
+    conn.close()
+
+    if not args.reusar and not args.conservar:
+        eliminar_esquema(args.esquema)
+
+    resultado = {
+        "asesor": "indices",
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "escala": args.escala,
+        "migracion": version_esquema,
+        "migraciones_aplicadas": [f"{v:03d}_{n}" for v, n in migraciones],
+        "filas": filas,
+        "sentencias": resultados,
+    }
+
+    if args.salida:
+        Path(args.salida).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.salida).write_text(
+            json.dumps(resultado, indent=2, ensure_ascii=False, default=str), encoding="utf-8"
+        )
+
+    pd.set_option("display.width", 250)
+    pd.set_option("display.max_colwidth", 90)
+    print(tabla(resultados).to_string(index=False))
+
+    codigo = 0
+    marcadas = [r for r in resultados if r["seq_scans"]]
+    if marcadas:
+        print(f"\n⚠️ {len(marcadas)} sentencias con Seq Scan sobre más de {args.filas_seq} filas", file=sys.stderr)
+        codigo = 1 if args.estricto else 0
+
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        comparacion = comparar(anterior, resultado, args.tolerancia, args.minimo_ms)
+        print(comparacion.to_string(index=False), file=sys.stderr)
+        if comparacion["regresion"].any():
+            codigo = 1
+
+    if codigo:
+        sys.exit(codigo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark de concurrencia de la autoasignación.
+
+Lanza N operadores simulados (un hilo y una conexión por operador) que
+reclaman asignaciones completas de la misma región hasta vaciar la cola.
+Reporta reclamos por segundo, tasa de conflicto (intentos que no obtuvieron
+bloques) y verifica que ninguna asignación quedó repartida entre operadores.
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.autoasignacion \
+        --operadores 60 --asignaciones 2000 --bloques 20
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.comun import conectar, eliminar_esquema, imprimir, preparar_esquema
+from servicios.cola_asignaciones import SQL_RECLAMAR_OPERATIVO, LOCK_COLA_ASIGNACIONES
+
+ESQUEMA = "bench_autoasignacion"
+REGION = "Liguria"
+
+
+def sembrar(conn, asignaciones, bloques):
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO asignaciones (region, asignacion, bloque, complejidad)
+        SELECT %s, 'A' || lpad(a::text, 5, '0'), b, 'media'
+        FROM generate_series(1, %s) a, generate_series(1, %s) b
+    """, (REGION, asignaciones, bloques))
+    cur.execute("ANALYZE asignaciones")
+    conn.commit()
+
+
+def operador(cedula, barrera, resultados):
+    conn = conectar(ESQUEMA)
+    cur = conn.cursor()
+    reclamos = 0
+    conflictos = 0
+    params = {
+        "region": REGION,
+        "cedula": cedula,
+        "puesto": "Operario Catastral",
+        "lock": LOCK_COLA_ASIGNACIONES,
+    }
+
+    barrera.wait()
+    while True:
+        cur.execute(SQL_RECLAMAR_OPERATIVO, params)
+        row = cur.fetchone()
+        conn.commit()
+
+        if row is None:
+            break
+        if row[1] > 0:
+            reclamos += 1
+        else:
+            conflictos += 1
+
+    conn.close()
+    resultados[cedula] = (reclamos, conflictos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--operadores", type=int, default=60)
+    parser.add_argument("--asignaciones", type=int, default=2000)
+    parser.add_argument("--bloques", type=int, default=20)
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema al terminar")
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA)
+    sembrar(conn, args.asignaciones, args.bloques)
+
+    barrera = threading.Barrier(args.operadores + 1)
+    resultados = {}
+    hilos = [
+        threading.Thread(target=operador, args=(f"OP{i:04d}", barrera, resultados))
+        for i in range(args.operadores)
+    ]
+    for h in hilos:
+        h.start()
+
+    barrera.wait()
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM (
+            SELECT asignacion
+            FROM asignaciones
+            GROUP BY asignacion
+            HAVING COUNT(DISTINCT operador_actual) > 1
+                OR COUNT(*) <> COUNT(operador_actual)
+        ) x
+    """)
+    inconsistentes = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM asignaciones_historial")
+    filas_historial = cur.fetchone()[0]
+    conn.close()
+
+    reclamos = sum(r for r, _ in resultados.values())
+    conflictos = sum(c for _, c in resultados.values())
+    intentos = reclamos + conflictos
+
+    imprimir({
+        "benchmark": "autoasignacion",
+        "operadores": args.operadores,
+        "asignaciones": args.asignaciones,
+        "bloques_por_asignacion": args.bloques,
+        "duracion_s": round(duracion, 3),
+        "reclamos": reclamos,
+        "reclamos_por_s": round(reclamos / duracion, 1) if duracion else None,
+        "conflictos": conflictos,
+        "tasa_conflicto": round(conflictos / intentos, 4) if intentos else 0.0,
+        "asignaciones_inconsistentes": inconsistentes,
+        "filas_historial": filas_historial,
+    })
+
+    if not args.conservar:
+        eliminar_esquema(ESQUEMA)
+
+
+if __name__ == "__main__":
+    main()
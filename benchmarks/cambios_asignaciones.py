@@ -0,0 +1,387 @@
+"""
+Benchmark del feed de cambios de asignaciones (LISTEN/NOTIFY, migración 005).
+
+Siembra un schema con asignaciones, levanta servicios.cambios_asignaciones
+.EstadoBloques con su hilo de escucha y mide:
+
+- carga inicial del estado en memoria
+- memoria: bytes por bloque de la copia codificada (arreglos, índices y
+  diccionarios) contra el presupuesto, y lo que ocuparía como DataFrame
+- lecturas por render: la consulta del mapa del dashboard (una región, con
+  el nombre del operador) y la tabla de un operador contra la misma
+  lectura en memoria; la búsqueda por clave de las features de una región
+  contra el join equivalente en pandas (mismo resultado), el estado
+  predominante por asignación, y `cambio_en` tras una transición
+- propagación: desde el inicio de una transición de 10 bloques hasta que
+  el estado en memoria la tiene, y el costo que agrega el trigger a esa
+  transición
+- consistencia: varios hilos transicionan, borran e insertan bloques y uno
+  hace un UPDATE masivo (recarga); a mitad se corta la conexión del hilo de
+  escucha. Al final, tras una barrera, la copia en memoria debe ser igual
+  a la tabla
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.cambios_asignaciones \\
+        --regiones 4 --asignaciones 4000 --bloques 50
+"""
+import argparse
+import random
+import threading
+import time
+
+import pandas as pd
+import psycopg2
+import psycopg2.errors
+
+from benchmarks.comun import (
+    conectar,
+    cronometrar,
+    dsn,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import sembrar_asignaciones, sembrar_personal
+from servicios.cambios_asignaciones import CANAL, COLUMNAS, EstadoBloques
+from servicios.mapa_bloques import predominante_por_asignacion
+
+ESQUEMA = "bench_cambios"
+APLICACION = "bench_cambios_escucha"
+REGION = "R0"
+
+# La consulta del mapa del dashboard antes del feed
+SQL_MAPA = """
+    SELECT
+        a.region,
+        a.asignacion,
+        a.bloque,
+        a.estado_actual,
+        a.proceso_actual,
+        COALESCE(p.nombre_completo, '—') AS operador
+    FROM asignaciones a
+    LEFT JOIN personal p
+        ON p.cedula = a.operador_actual
+    WHERE a.region = %s
+"""
+
+SQL_OPERADOR = """
+    SELECT asignacion, bloque, estado_actual, cantidad_rechazos, cantidad_aprobaciones
+    FROM asignaciones
+    WHERE operador_actual = %s AND region = %s
+    ORDER BY asignacion, bloque
+"""
+
+SQL_TRANSICION = """
+    UPDATE asignaciones
+    SET estado_actual = CASE WHEN estado_actual = 'proceso' THEN 'asignado' ELSE 'proceso' END
+    WHERE id = ANY(%s)
+"""
+
+
+def conectar_escucha():
+    return psycopg2.connect(
+        dsn(), options=f"-c search_path={ESQUEMA}", application_name=APLICACION
+    )
+
+
+def esperar(condicion, timeout=30.0):
+    limite = time.monotonic() + timeout
+    while not condicion():
+        if time.monotonic() > limite:
+            raise TimeoutError("El estado en memoria no se actualizó a tiempo")
+        time.sleep(0.0005)
+
+
+def medir_lecturas(conn, estado, repeticiones):
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT operador_actual
+        FROM asignaciones
+        WHERE region = %s AND operador_actual IS NOT NULL
+        GROUP BY 1
+        ORDER BY count(*) DESC
+        LIMIT 1
+    """, (REGION,))
+    operador = cur.fetchone()[0]
+    cur.execute("SELECT cedula, nombre_completo FROM personal")
+    nombres = dict(cur.fetchall())
+    conn.rollback()
+
+    def mapa_memoria():
+        df, _ = estado.bloques(region=REGION)
+        return df.assign(operador=df["operador_actual"].map(nombres).fillna("—"))
+
+    def operador_memoria():
+        return (
+            estado.bloques(region=REGION, operador=operador)[0]
+            .sort_values(["asignacion", "bloque"])
+        )
+
+    # Búsqueda por clave: las features de una región (desordenadas, como en
+    # el GeoJSON) contra la copia, y el mismo join hecho con pandas
+    df_region = estado.bloques(region=REGION)[0]
+    claves = df_region[["region", "asignacion", "bloque"]].sample(frac=1, random_state=1)
+    claves = pd.concat([claves, claves.head(100).assign(bloque=-1)], ignore_index=True)
+
+    def join_pandas():
+        return claves.merge(mapa_memoria(), on=["region", "asignacion", "bloque"], how="left")
+
+    unidas = join_pandas()
+    encontrados = estado.en_claves(claves)
+    mismas_claves = (
+        (encontrados["encontrado"] == unidas["id"].notna()).all()
+        and encontrados["estado_actual"].equals(unidas["estado_actual"].astype(object)
+                                                .where(unidas["id"].notna(), None))
+    )
+
+    # cambio_en: una transición en REGION se ve en REGION y no en otra región
+    cur.execute("SELECT id FROM asignaciones WHERE region = %s LIMIT 10", (REGION,))
+    ids = [r[0] for r in cur.fetchall()]
+    otra = next(r for r in (f"R{i}" for i in range(1, 100)) if estado.asignaciones(r))
+    version = estado.version
+    cur.execute(SQL_TRANSICION, (ids,))
+    conn.commit()
+    esperar(lambda: estado.version > version)
+    detecta = estado.cambio_en(version, region=REGION) and not estado.cambio_en(version, region=otra)
+
+    return {
+        "filas_region": len(df_region),
+        "mapa_sql": resumen(cronometrar(
+            lambda: pd.read_sql(SQL_MAPA, conn, params=[REGION]), repeticiones
+        )),
+        "mapa_memoria": resumen(cronometrar(mapa_memoria, repeticiones)),
+        "claves_join_pandas": resumen(cronometrar(join_pandas, repeticiones)),
+        "claves_en_memoria": resumen(cronometrar(lambda: estado.en_claves(claves), repeticiones)),
+        "claves_iguales_al_join": bool(mismas_claves),
+        "cambio_en": resumen(cronometrar(
+            lambda: estado.cambio_en(version, region=otra), repeticiones
+        )),
+        "cambio_en_detecta": detecta,
+        "predominante_pandas": resumen(cronometrar(
+            lambda: predominante_por_asignacion(estado.bloques()[0]), repeticiones
+        )),
+        "predominante_memoria": resumen(cronometrar(estado.predominante, repeticiones)),
+        "operador_sql": resumen(cronometrar(
+            lambda: pd.read_sql(SQL_OPERADOR, conn, params=[operador, REGION]), repeticiones
+        )),
+        "operador_memoria": resumen(cronometrar(operador_memoria, repeticiones)),
+    }
+
+
+def medir_memoria(estado):
+    # Con el índice de claves armado (se arma con la primera búsqueda)
+    estado.buscar([], [], [])
+    memoria = estado.memoria()
+    df = estado.bloques()[0]
+    return {
+        **memoria,
+        "bytes_por_bloque_como_dataframe": round(
+            df.memory_usage(deep=True).sum() / max(len(df), 1), 1
+        ),
+    }
+
+
+def medir_propagacion(conn, estado, repeticiones):
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM asignaciones WHERE region = %s", (REGION,))
+    todos = [r[0] for r in cur.fetchall()]
+    conn.rollback()
+    azar = random.Random(1)
+
+    def transicion():
+        ids = azar.sample(todos, 10)
+        inicio = time.perf_counter()
+        cur.execute(SQL_TRANSICION, (ids,))
+        conn.commit()
+        return time.perf_counter() - inicio
+
+    def propagacion():
+        version = estado.version
+        inicio = time.perf_counter()
+        transicion()
+        esperar(lambda: estado.version > version)
+        return time.perf_counter() - inicio
+
+    con_trigger = [transicion() for _ in range(repeticiones)]
+    latencias = [propagacion() for _ in range(repeticiones)]
+
+    cur.execute("ALTER TABLE asignaciones DISABLE TRIGGER asignaciones_cambios_update")
+    conn.commit()
+    sin_trigger = [transicion() for _ in range(repeticiones)]
+    cur.execute("ALTER TABLE asignaciones ENABLE TRIGGER asignaciones_cambios_update")
+    conn.commit()
+
+    # Lo escrito sin trigger no llegó al feed: se pide una recarga
+    cur.execute("SELECT pg_notify(%s, '{\"n\": 0, \"r\": 1}')", (CANAL,))
+    conn.commit()
+
+    return {
+        "escritura_a_memoria": resumen(latencias),
+        "transicion_con_trigger": resumen(con_trigger),
+        "transicion_sin_trigger": resumen(sin_trigger),
+    }
+
+
+# =====================================================
+# CONSISTENCIA CON ESCRITURAS CONCURRENTES
+# =====================================================
+def escritor(parar, ids, errores, semilla):
+    azar = random.Random(semilla)
+    conn = conectar(ESQUEMA)
+    cur = conn.cursor()
+    estados = ["asignado", "proceso", "finalizado", "rechazado 1", "corregido", "aprobado"]
+    try:
+        while not parar.is_set():
+            accion = azar.random()
+            try:
+                escribir(cur, azar, accion, ids, estados)
+                conn.commit()
+            except psycopg2.errors.DeadlockDetected:
+                conn.rollback()
+            time.sleep(azar.random() * 0.005)
+    except Exception as e:
+        conn.rollback()
+        errores.append(str(e))
+    finally:
+        conn.close()
+
+
+def escribir(cur, azar, accion, ids, estados):
+    if accion < 0.8:
+        cur.execute("""
+            UPDATE asignaciones
+            SET estado_actual = %s,
+                operador_actual = %s,
+                cantidad_rechazos = cantidad_rechazos + 1
+            WHERE id = ANY(%s)
+        """, (azar.choice(estados), f"OP{azar.randrange(1, 100):06d}",
+              azar.sample(ids, azar.randint(1, 50))))
+    elif accion < 0.9:
+        cur.execute("DELETE FROM asignaciones WHERE id = %s", (azar.choice(ids),))
+    else:
+        cur.execute("""
+            INSERT INTO asignaciones (region, asignacion, bloque)
+            SELECT %s, 'NUEVA' || %s, b
+            FROM generate_series(1, %s) b
+        """, (REGION, azar.randrange(10**6), azar.randint(1, 20)))
+
+
+def cortar_escucha():
+    conn = psycopg2.connect(dsn())
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT count(pg_terminate_backend(pid))
+        FROM pg_stat_activity
+        WHERE application_name = %s
+    """, (APLICACION,))
+    cortadas = cur.fetchone()[0]
+    conn.commit()
+    conn.close()
+    return cortadas
+
+
+def medir_consistencia(conn, estado, escritores, segundos):
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM asignaciones ORDER BY random() LIMIT 20000")
+    ids = [r[0] for r in cur.fetchall()]
+    conn.rollback()
+
+    parar = threading.Event()
+    errores = []
+    hilos = [
+        threading.Thread(target=escritor, args=(parar, ids, errores, i))
+        for i in range(escritores)
+    ]
+    recargas = estado.estadisticas()["recargas"]
+    for h in hilos:
+        h.start()
+
+    try:
+        time.sleep(segundos / 3)
+        cur.execute("UPDATE asignaciones SET cantidad_aprobaciones = cantidad_aprobaciones + 1 "
+                    "WHERE region = %s", (REGION,))
+        conn.commit()
+        time.sleep(segundos / 3)
+        cortadas = cortar_escucha()
+        time.sleep(segundos / 3)
+    finally:
+        parar.set()
+        for h in hilos:
+            h.join()
+
+    esperar(estado.al_dia)
+    inicio = time.perf_counter()
+    alcanzada = estado.barrera(conn, timeout=30)
+    barrera_ms = round((time.perf_counter() - inicio) * 1000, 1)
+
+    memoria = estado.bloques()[0].sort_values("id", ignore_index=True)
+    tabla = pd.read_sql(f"SELECT {', '.join(COLUMNAS)} FROM asignaciones ORDER BY id", conn)
+    conn.rollback()
+
+    distintas = len(memoria.merge(tabla, how="outer", indicator=True)
+                    .query("_merge != 'both'"))
+    estadisticas = estado.estadisticas()
+
+    return {
+        "escritores": escritores,
+        "errores": errores,
+        "conexiones_cortadas": cortadas,
+        "recargas": estadisticas["recargas"] - recargas,
+        "barrera_alcanzada": alcanzada,
+        "barrera_ms": barrera_ms,
+        "filas_memoria": len(memoria),
+        "filas_tabla": len(tabla),
+        "filas_distintas": distintas,
+        "estadisticas": estadisticas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--regiones", type=int, default=4)
+    parser.add_argument("--asignaciones", type=int, default=4000)
+    parser.add_argument("--bloques", type=int, default=50)
+    parser.add_argument("--operadores", type=int, default=300)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--escritores", type=int, default=4)
+    parser.add_argument("--segundos", type=float, default=6)
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema al terminar")
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_personal(conn, args.operadores)
+    sembrar_asignaciones(conn, args.regiones, args.asignaciones, args.bloques)
+
+    inicio = time.perf_counter()
+    estado = EstadoBloques(conectar_escucha).iniciar()
+    try:
+        esperar(estado.al_dia, timeout=120)
+        carga_s = round(time.perf_counter() - inicio, 2)
+
+        memoria = medir_memoria(estado)
+        lecturas = medir_lecturas(conn, estado, args.repeticiones)
+        propagacion = medir_propagacion(conn, estado, args.repeticiones)
+        consistencia = medir_consistencia(conn, estado, args.escritores, args.segundos)
+        memoria_final = estado.memoria()
+    finally:
+        estado.detener()
+        conn.close()
+        if not args.conservar:
+            eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "cambios_asignaciones",
+        "bloques": args.asignaciones * args.bloques,
+        "carga_inicial_s": carga_s,
+        "memoria": memoria,
+        "memoria_tras_escrituras": memoria_final,
+        "lecturas": lecturas,
+        "propagacion": propagacion,
+        "consistencia": consistencia,
+    })
+
+
+if __name__ == "__main__":
+    main()
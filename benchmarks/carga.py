@@ -0,0 +1,438 @@
+"""
+Prueba de carga de la aplicación completa con usuarios simulados.
+
+Cada usuario virtual es un hilo que maneja su propia sesión de app.py con
+streamlit.testing (AppTest): ingresa con auth.login_usuario desde la
+pantalla de login y repite el recorrido de un operador mientras dure la
+prueba:
+
+    Asignación de Producción → autoasignarse → transición masiva de bloques
+    → Reportes Producción (guardar reporte) → Eventos (guardar evento)
+    → Historial (últimos 30 días)
+
+Todas las sesiones comparten el pool de db.get_pool(), igual que las
+sesiones de un servidor Streamlit real (un proceso, un hilo por rerun), así
+que la contención del pool y del GIL es la misma que en producción.
+
+Se mide cada rerun (login, autoasignar, transicion, reporte_produccion,
+evento, historial y la apertura de cada página). El resultado es JSON con:
+
+- acciones: n, errores, acciones/s y latencias p50 / p95 / p99 por acción
+- pool: entregas, esperas por un cupo, espera total / máxima, agotamientos
+  y máximo de conexiones en uso (db.PoolConexiones.estadisticas)
+- servidor: muestras de pg_stat_activity de las conexiones de la prueba
+  (activas, en transacción, esperando un lock)
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.carga \\
+        --usuarios 20 --duracion 60 --pool-max 10 --salida resultados/carga.json
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from psycopg2.extensions import make_dsn
+from streamlit.testing.v1 import AppTest
+
+import db
+from benchmarks.comun import (
+    conectar,
+    dsn,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import ESCALAS, conteos, sembrar_todo
+from servicios.perfilador import version
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+NOMBRE_APLICACION = "bditalia-carga"
+
+ACCIONES = ("login", "autoasignar", "transicion", "reporte_produccion", "evento", "historial")
+
+
+# =====================================================
+# USUARIO VIRTUAL
+# =====================================================
+class UsuarioVirtual:
+    """Una sesión de app.py manejada por AppTest, con su propio recorrido."""
+
+    def __init__(self, cedula, region, secretos, historial_hasta, pausa, semilla):
+        self.cedula = cedula
+        self.region = region
+        self.historial_hasta = historial_hasta
+        self.pausa = pausa
+        self.secretos = secretos
+        self.azar = random.Random(semilla)
+        self.muestras = []   # [(accion, segundos, error)]
+        self.sesiones = 0
+        self.nueva_sesion()
+
+    def nueva_sesion(self):
+        self.at = AppTest.from_file(str(APP), default_timeout=120)
+        for clave, valor in self.secretos.items():
+            self.at.secrets[clave] = valor
+        self.rota = False
+        self.sesiones += 1
+
+    # =========================
+    # MEDICIÓN
+    # =========================
+    def medir(self, accion):
+        inicio = time.perf_counter()
+        try:
+            self.at.run()
+            error = next((e.value for e in self.at.exception), None)
+        except Exception as e:
+            # Timeout del rerun o estado de AppTest inconsistente: la sesión
+            # no se puede seguir usando y el usuario vuelve a ingresar
+            error = f"{type(e).__name__}: {e}"
+            self.rota = True
+        self.muestras.append((accion, time.perf_counter() - inicio, error))
+        return error is None
+
+    def pensar(self):
+        if self.pausa:
+            time.sleep(self.azar.uniform(0, self.pausa))
+
+    def boton(self, etiqueta):
+        return next((b for b in self.at.button if b.label == etiqueta), None)
+
+    def abrir(self, pagina):
+        self.at.sidebar.radio[0].set_value(pagina)
+        return self.medir(f"abrir:{pagina}")
+
+    # =========================
+    # RECORRIDO
+    # =========================
+    def login(self):
+        self.medir("abrir:Login")
+        self.at.text_input[0].set_value(self.cedula)
+        self.at.text_input[1].set_value("x")
+        self.boton("Ingresar").click()
+        return self.medir("login") and "usuario" in self.at.session_state
+
+    def autoasignar_y_transicionar(self):
+        if not self.abrir("Asignación de Producción"):
+            return
+
+        self.at.selectbox[0].set_value(self.region)
+        self.boton("🧲 Autoasignarme una asignación completa").click()
+        if not self.medir("autoasignar"):
+            return
+        self.pensar()
+
+        # Transición masiva: todos los bloques del primer estado del filtro
+        casillas = [c for c in self.at.checkbox if (c.key or "").startswith("masivo_")]
+        if not casillas:
+            return
+        for casilla in casillas:
+            casilla.check()
+        if not self.medir("seleccionar_bloques"):
+            return
+
+        aplicar = self.boton("💾 Aplicar cambio masivo")
+        if aplicar is not None:
+            aplicar.click()
+            self.medir("transicion")
+
+    def reportar_produccion(self):
+        if not self.abrir("Reportes Producción"):
+            return
+        boton = self.boton("Guardar reporte")
+        if boton is None:
+            return
+
+        horas, produccion = self.at.number_input[0], self.at.number_input[1]
+        horas.set_value(self.azar.choice([2.0, 4.0, 4.5]))
+        produccion.set_value(self.azar.randint(1, 40))
+        boton.click()
+        self.medir("reporte_produccion")
+
+    def reportar_evento(self):
+        if not self.abrir("Eventos"):
+            return
+        boton = self.boton("Guardar evento")
+        if boton is None:
+            return
+
+        self.at.number_input[0].set_value(1.0)
+        boton.click()
+        self.medir("evento")
+
+    def consultar_historial(self):
+        if not self.abrir("Historial"):
+            return
+        self.at.date_input[0].set_value(self.historial_hasta - timedelta(days=30))
+        self.at.date_input[1].set_value(self.historial_hasta)
+        self.medir("historial")
+
+    def correr(self, hasta, iteraciones=None):
+        if not self.login():
+            return
+
+        pasos = (
+            self.autoasignar_y_transicionar,
+            self.reportar_produccion,
+            self.reportar_evento,
+            self.consultar_historial,
+        )
+        vuelta = 0
+        while time.monotonic() < hasta and (iteraciones is None or vuelta < iteraciones):
+            for paso in pasos:
+                self.pensar()
+                paso()
+                if self.rota:
+                    self.nueva_sesion()
+                    if not self.login():
+                        return
+                if time.monotonic() >= hasta:
+                    break
+            vuelta += 1
+
+
+# =====================================================
+# MONITOR DEL SERVIDOR
+# =====================================================
+class MonitorConexiones(threading.Thread):
+    """Muestrea pg_stat_activity de las conexiones de la prueba."""
+
+    def __init__(self, esquema, intervalo=0.25):
+        super().__init__(daemon=True)
+        self.esquema = esquema
+        self.intervalo = intervalo
+        self.muestras = []
+        self._parar = threading.Event()
+
+    def run(self):
+        conn = conectar(self.esquema)
+        conn.autocommit = True
+        cur = conn.cursor()
+
+        while not self._parar.wait(self.intervalo):
+            cur.execute("""
+                SELECT
+                    count(*),
+                    count(*) FILTER (WHERE state = 'active'),
+                    count(*) FILTER (WHERE state LIKE 'idle in transaction%%'),
+                    count(*) FILTER (WHERE wait_event_type = 'Lock')
+                FROM pg_stat_activity
+                WHERE application_name = %s
+                  AND datname = current_database()
+            """, (NOMBRE_APLICACION,))
+            self.muestras.append(cur.fetchone())
+
+        conn.close()
+
+    def detener(self):
+        self._parar.set()
+        self.join()
+
+    def resumen(self):
+        if not self.muestras:
+            return {}
+        conexiones, activas, en_transaccion, esperando_lock = zip(*self.muestras)
+        return {
+            "muestras": len(self.muestras),
+            "conexiones_max": max(conexiones),
+            "activas_media": round(statistics.mean(activas), 2),
+            "activas_max": max(activas),
+            "en_transaccion_max": max(en_transaccion),
+            "esperando_lock_max": max(esperando_lock),
+            "muestras_con_lock_%": round(
+                100 * sum(1 for n in esperando_lock if n) / len(esperando_lock), 1
+            ),
+        }
+
+
+# =====================================================
+# PREPARACIÓN / EJECUCIÓN
+# =====================================================
+def secretos(esquema, pool_max, pool_timeout):
+    uri = make_dsn(
+        dsn(),
+        options=f"-c search_path={esquema}",
+        application_name=NOMBRE_APLICACION,
+    )
+    return {
+        "db_credentials": {
+            "URI": uri,
+            "POOL_MIN": min(2, pool_max),
+            "POOL_MAX": pool_max,
+            "POOL_TIMEOUT": pool_timeout,
+        }
+    }
+
+
+def operadores(conn, cantidad):
+    """
+    `cantidad` operadores (perfil 3) con la región donde trabajan: la de su
+    asignación activa o, si no tienen, una por turno.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT region FROM asignaciones ORDER BY region")
+    regiones = [row[0] for row in cur.fetchall()]
+
+    cur.execute("""
+        SELECT p.cedula, min(a.region)
+        FROM personal p
+        LEFT JOIN asignaciones a
+            ON a.operador_actual = p.cedula
+        WHERE p.perfil = 3
+          AND p.estado = 'activo'
+        GROUP BY p.cedula
+        ORDER BY p.cedula
+        LIMIT %s
+    """, (cantidad,))
+    filas = cur.fetchall()
+
+    cur.execute("SELECT max(fecha_reporte) FROM reportes")
+    ultimo_dia = cur.fetchone()[0]
+    conn.rollback()
+
+    if len(filas) < cantidad:
+        raise RuntimeError(f"Solo hay {len(filas)} operadores activos para {cantidad} usuarios")
+
+    return [
+        (cedula, region or regiones[i % len(regiones)])
+        for i, (cedula, region) in enumerate(filas)
+    ], ultimo_dia
+
+
+def correr_carga(usuarios, duracion, rampa, iteraciones=None):
+    """Arranca los usuarios escalonados en `rampa` segundos y espera a todos."""
+    inicio = time.monotonic()
+    hasta = inicio + rampa + duracion
+    hilos = []
+
+    for i, usuario in enumerate(usuarios):
+        hilo = threading.Thread(target=usuario.correr, args=(hasta, iteraciones), daemon=True)
+        hilos.append(hilo)
+        hilo.start()
+        if rampa and i < len(usuarios) - 1:
+            time.sleep(rampa / len(usuarios))
+
+    for hilo in hilos:
+        hilo.join()
+
+    return time.monotonic() - inicio
+
+
+def resumir_acciones(usuarios, segundos):
+    tiempos = defaultdict(list)
+    errores = defaultdict(list)
+
+    for usuario in usuarios:
+        for accion, duracion, error in usuario.muestras:
+            tiempos[accion].append(duracion)
+            if error is not None:
+                errores[accion].append(error)
+
+    def orden(accion):
+        return (ACCIONES.index(accion) if accion in ACCIONES else len(ACCIONES), accion)
+
+    return [
+        {
+            "accion": accion,
+            "errores": len(errores[accion]),
+            "por_s": round(len(tiempos[accion]) / segundos, 2),
+            **resumen(tiempos[accion]),
+            "ejemplo_error": errores[accion][0][:300] if errores[accion] else None,
+        }
+        for accion in sorted(tiempos, key=orden)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--esquema", default="bench_carga")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--reusar", action="store_true",
+                        help="Usar el schema ya sembrado (benchmarks.datos) sin recrearlo")
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema al terminar")
+    parser.add_argument("--usuarios", type=int, default=10)
+    parser.add_argument("--duracion", type=float, default=60, help="segundos de carga sostenida")
+    parser.add_argument("--rampa", type=float, default=5, help="segundos para arrancar a todos")
+    parser.add_argument("--iteraciones", type=int, help="recorridos por usuario (en vez de --duracion)")
+    parser.add_argument("--pausa", type=float, default=0.5,
+                        help="pausa máxima entre acciones (s), uniforme; 0 = sin pausa")
+    parser.add_argument("--pool-max", type=int, default=10)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    escala = ESCALAS[args.escala]
+
+    if not args.reusar:
+        conn = preparar_esquema(args.esquema)
+        sembrar_todo(conn, **escala)
+        conn.close()
+
+    conn = conectar(args.esquema)
+    filas = conteos(conn)
+    elegidos, ultimo_dia = operadores(conn, args.usuarios)
+    conn.close()
+
+    config = secretos(args.esquema, args.pool_max, args.pool_timeout)
+    usuarios = [
+        UsuarioVirtual(cedula, region, config, ultimo_dia, args.pausa, semilla=i)
+        for i, (cedula, region) in enumerate(elegidos)
+    ]
+
+    monitor = MonitorConexiones(args.esquema)
+    monitor.start()
+    duracion = correr_carga(
+        usuarios, float("inf") if args.iteraciones else args.duracion, args.rampa, args.iteraciones
+    )
+    monitor.detener()
+
+    # El pool lo creó el primer rerun; es el mismo objeto cacheado
+    pool = db.get_pool()
+    estadisticas_pool = pool.estadisticas()
+    pool.cerrar()
+
+    if not args.reusar and not args.conservar:
+        eliminar_esquema(args.esquema)
+
+    acciones = resumir_acciones(usuarios, duracion)
+    total = sum(a["n"] for a in acciones)
+
+    resultado = {
+        "prueba": "carga",
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "version": version(),
+        "escala": {"nombre": args.escala, **escala},
+        "filas": filas,
+        "usuarios": args.usuarios,
+        "sesiones_con_login": sum(
+            1 for u in usuarios for a, _, e in u.muestras if a == "login" and e is None
+        ),
+        "sesiones_reiniciadas": sum(u.sesiones - 1 for u in usuarios),
+        "duracion_s": round(duracion, 1),
+        "pausa_s": args.pausa,
+        "acciones_total": total,
+        "acciones_por_s": round(total / duracion, 2),
+        "acciones": acciones,
+        "pool": estadisticas_pool,
+        "servidor": monitor.resumen(),
+    }
+
+    if args.salida:
+        Path(args.salida).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.salida).write_text(
+            json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+    imprimir(resultado)
+
+
+if __name__ == "__main__":
+    main()
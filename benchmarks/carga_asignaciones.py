@@ -0,0 +1,209 @@
+"""
+Benchmark de la carga masiva de asignaciones (servicios.carga_asignaciones).
+
+Escribe en disco un CSV grande (por bloques, sin tenerlo en memoria) con
+una fracción de filas inválidas de cada tipo, lo carga en un schema y mide:
+
+- filas/s de la carga completa (lectura, validación, COPY e INSERT) y de
+  la lectura + validación sola
+- memoria: crecimiento del pico de RSS del proceso durante la carga, que
+  debe depender de --filas-por-bloque y no del tamaño del archivo
+- rechazos: el reporte debe contar exactamente las filas inválidas
+  sembradas, con la línea correcta
+- lo mismo para un XLSX más chico (openpyxl read_only)
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.carga_asignaciones \\
+        --filas 5000000 --xlsx 200000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import eliminar_esquema, imprimir, preparar_esquema
+from servicios.carga_asignaciones import (
+    FILAS_POR_BLOQUE,
+    cargar_asignaciones,
+    leer_por_bloques,
+    validar,
+)
+
+ESQUEMA = "bench_carga_asignaciones"
+BLOQUES_POR_ASIGNACION = 50
+PAGINA = os.sysconf("SC_PAGE_SIZE")
+
+# valor inválido → motivo esperado
+INVALIDAS = {
+    ("A", "x", "alta"): "bloque no numérico",
+    ("A", "3.5", "alta"): "bloque no entero",
+    ("A", "-4", "alta"): "bloque fuera de rango",
+    ("", "1", "alta"): "asignacion vacía",
+    ("A", "", "alta"): "bloque vacío",
+    ("A", "1", ""): "complejidad vacía",
+}
+
+
+def tabla_sintetica(inicio, filas, cada, azar):
+    """`filas` filas desde la `inicio`; una de cada `cada` es inválida."""
+    i = np.arange(inicio, inicio + filas)
+    df = pd.DataFrame({
+        "asignacion": np.char.add("A", (i // BLOQUES_POR_ASIGNACION).astype(str)),
+        "bloque": (i % BLOQUES_POR_ASIGNACION + 1).astype(str),
+        "complejidad": azar.choice(["baja", "media", "alta"], filas),
+    })
+
+    malas = np.flatnonzero(i % cada == cada - 1)
+    casos = list(INVALIDAS)
+    elegidos = azar.integers(0, len(casos), len(malas))
+    df.iloc[malas, :] = [casos[k] for k in elegidos]
+
+    motivos = pd.DataFrame({
+        "linea": i[malas] + 2,
+        "motivo": [INVALIDAS[casos[k]] for k in elegidos],
+    })
+    return df, motivos
+
+
+def escribir_csv(ruta, filas, cada):
+    azar = np.random.default_rng(1)
+    esperados = []
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        f.write("Asignacion;Bloque;Complejidad\n")
+        for inicio in range(0, filas, 500_000):
+            df, motivos = tabla_sintetica(inicio, min(500_000, filas - inicio), cada, azar)
+            df.to_csv(f, sep=";", header=False, index=False)
+            esperados.append(motivos)
+    return pd.concat(esperados, ignore_index=True)
+
+
+def escribir_xlsx(ruta, filas, cada):
+    from openpyxl import Workbook
+
+    azar = np.random.default_rng(2)
+    df, motivos = tabla_sintetica(0, filas, cada, azar)
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(["asignacion", "bloque", "complejidad"])
+    for asignacion, bloque, complejidad in df.itertuples(index=False):
+        hoja.append([asignacion, int(bloque) if bloque.isdigit() else bloque, complejidad])
+    libro.save(ruta)
+    return motivos
+
+
+class MedidorRSS(threading.Thread):
+    """Muestrea el RSS actual del proceso y guarda el máximo."""
+
+    def __init__(self, intervalo=0.02):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.inicial = self.maximo = rss_mb()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            self.maximo = max(self.maximo, rss_mb())
+
+    def detener(self):
+        self._parar.set()
+        self.join()
+        return round(self.maximo - self.inicial, 1)
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGINA / 1e6
+
+
+def solo_validar(ruta, filas_por_bloque):
+    inicio = time.perf_counter()
+    filas = rechazadas = 0
+    with open(ruta, "rb") as archivo:
+        for df in leer_por_bloques(archivo, filas_por_bloque):
+            rechazadas += len(validar(df)[1])
+            filas += len(df)
+    segundos = time.perf_counter() - inicio
+    return {"filas_por_s": round(filas / segundos), "rechazadas": rechazadas}
+
+
+def cargar(conn, ruta, region, esperados, filas_por_bloque):
+    medidor = MedidorRSS()
+    medidor.start()
+    with open(ruta, "rb") as archivo:
+        resultado = cargar_asignaciones(
+            conn, region, leer_por_bloques(archivo, filas_por_bloque)
+        )
+    crecimiento = medidor.detener()
+
+    rechazos = resultado.pop("rechazos")
+    muestra = rechazos.muestra()
+    comparados = esperados.head(len(muestra)).reset_index(drop=True)
+
+    return {
+        **resultado,
+        "mb_archivo": round(Path(ruta).stat().st_size / 1e6, 1),
+        "pico_rss_crecimiento_mb": crecimiento,
+        "rechazos_por_motivo": rechazos.por_motivo,
+        "rechazos_esperados": len(esperados),
+        "rechazos_correctos": (
+            rechazos.total == len(esperados)
+            and muestra["linea"].tolist() == comparados["linea"].tolist()
+            and muestra["motivo"].tolist() == comparados["motivo"].tolist()
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=2_000_000)
+    parser.add_argument("--xlsx", type=int, default=100_000,
+                        help="Filas del XLSX (0 para omitirlo)")
+    parser.add_argument("--invalida-cada", type=int, default=997)
+    parser.add_argument("--filas-por-bloque", type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema ni los archivos al terminar")
+    args = parser.parse_args()
+
+    temporal = Path(tempfile.mkdtemp(prefix="carga_asignaciones_"))
+    conn = preparar_esquema(ESQUEMA)
+
+    try:
+        ruta_csv = temporal / "asignaciones.csv"
+        esperados_csv = escribir_csv(ruta_csv, args.filas, args.invalida_cada)
+
+        resultados = {
+            "csv_validacion": solo_validar(ruta_csv, args.filas_por_bloque),
+            "csv": cargar(conn, ruta_csv, "CSV", esperados_csv, args.filas_por_bloque),
+        }
+
+        if args.xlsx:
+            ruta_xlsx = temporal / "asignaciones.xlsx"
+            esperados_xlsx = escribir_xlsx(ruta_xlsx, args.xlsx, args.invalida_cada)
+            resultados["xlsx"] = cargar(
+                conn, ruta_xlsx, "XLSX", esperados_xlsx, args.filas_por_bloque
+            )
+    finally:
+        conn.close()
+        if not args.conservar:
+            shutil.rmtree(temporal, ignore_errors=True)
+            eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "carga_asignaciones",
+        "filas_csv": args.filas,
+        "filas_xlsx": args.xlsx,
+        "filas_por_bloque": args.filas_por_bloque,
+        **resultados,
+        "directorio": str(temporal) if args.conservar else None,
+    })
+
+
+if __name__ == "__main__":
+    main()
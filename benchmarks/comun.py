@@ -0,0 +1,123 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Todos los benchmarks corren contra un Postgres local indicado por la
+variable de entorno BENCH_DSN (por defecto `dbname=bditalia_bench`) y
+trabajan dentro de un schema propio para no tocar datos reales.
+"""
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import psycopg2
+
+from servicios.migraciones import aplicar as aplicar_migraciones
+
+DSN_POR_DEFECTO = "dbname=bditalia_bench"
+ESQUEMA_SQL = Path(__file__).with_name("esquema.sql")
+
+
+def dsn():
+    return os.environ.get("BENCH_DSN", DSN_POR_DEFECTO)
+
+
+def conectar(esquema):
+    return psycopg2.connect(dsn(), options=f"-c search_path={esquema}")
+
+
+def preparar_esquema(esquema, migrar=True):
+    """
+    Crea (desde cero) el schema de trabajo con las tablas de esquema.sql y,
+    salvo `migrar=False`, le aplica las migraciones del repositorio.
+    """
+    conn = psycopg2.connect(dsn())
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {esquema} CASCADE")
+    cur.execute(f"CREATE SCHEMA {esquema}")
+    cur.execute(f"SET search_path = {esquema}")
+    cur.execute(ESQUEMA_SQL.read_text(encoding="utf-8"))
+    conn.commit()
+    conn.close()
+
+    conn = conectar(esquema)
+    if migrar:
+        aplicar_migraciones(conn)
+
+    return conn
+
+
+def eliminar_esquema(esquema):
+    conn = psycopg2.connect(dsn())
+    conn.cursor().execute(f"DROP SCHEMA IF EXISTS {esquema} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def cronometrar(funcion, repeticiones=5):
+    """Ejecuta `funcion` varias veces y devuelve los tiempos en segundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def resumen(tiempos):
+    ordenados = sorted(tiempos)
+    return {
+        "n": len(ordenados),
+        "media_ms": round(statistics.mean(ordenados) * 1000, 3),
+        "p50_ms": round(_percentil(ordenados, 50) * 1000, 3),
+        "p95_ms": round(_percentil(ordenados, 95) * 1000, 3),
+        "p99_ms": round(_percentil(ordenados, 99) * 1000, 3),
+        "max_ms": round(ordenados[-1] * 1000, 3),
+    }
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    k = (len(ordenados) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(ordenados) - 1)
+    return ordenados[f] + (ordenados[c] - ordenados[f]) * (k - f)
+
+
+def imprimir(resultado):
+    print(json.dumps(resultado, indent=2, ensure_ascii=False, default=str))
+
+
+# =====================================================
+# CONTEO DE SENTENCIAS
+# =====================================================
+class CursorContado(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        self.connection.sentencias += 1
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        self.connection.sentencias += 1
+        return super().executemany(query, vars_list)
+
+
+class ConexionContada(psycopg2.extensions.connection):
+    """Conexión que cuenta las sentencias enviadas (viajes a la base)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sentencias = 0
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault("cursor_factory", CursorContado)
+        return super().cursor(*args, **kwargs)
+
+
+def conectar_contada(esquema):
+    return psycopg2.connect(
+        dsn(),
+        options=f"-c search_path={esquema}",
+        connection_factory=ConexionContada,
+    )
@@ -0,0 +1,140 @@
+"""
+Benchmark del guardado de la grilla de reportes en Correcciones.
+
+Carga una grilla de N reportes, modifica una celda y compara el guardado
+anterior (un UPDATE de todas las columnas por fila) con el UPDATE por
+diferencias de servicios.ediciones. También verifica que una grilla vieja
+no pise una edición más reciente.
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.correcciones --filas 500
+"""
+import argparse
+
+import pandas as pd
+
+from benchmarks.comun import (
+    conectar_contada,
+    cronometrar,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import sembrar_catalogos, sembrar_personal, sembrar_reportes
+from servicios.ediciones import ConflictoEdicion, aplicar_cambios, cambios_editor
+
+ESQUEMA = "bench_correcciones"
+
+
+def guardar_anterior(conn, df_rep_edit):
+    """El guardado del render anterior, tal cual."""
+    cur = conn.cursor()
+
+    columnas = [c for c in df_rep_edit.columns if c != "id"]
+
+    for _, row in df_rep_edit.iterrows():
+        set_clause = ", ".join([f"{c} = %s" for c in columnas])
+        valores = [row[c] for c in columnas]
+        valores.append(int(row["id"]))
+
+        cur.execute(
+            f"UPDATE reportes SET {set_clause} WHERE id = %s",
+            valores
+        )
+
+    conn.commit()
+
+
+def leer_grilla(conn, filas):
+    return pd.read_sql(
+        "SELECT * FROM reportes ORDER BY id LIMIT %s", conn, params=[filas]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, 50)
+    sembrar_reportes(conn, max(10, args.filas // 80))
+    conn.close()
+
+    conn = conectar_contada(ESQUEMA)
+    resultados = []
+
+    # Guardado anterior: la grilla entera vuelve a la base
+    def anterior():
+        df = leer_grilla(conn, args.filas)
+        editado = df.copy()
+        editado.loc[0, "observaciones"] = "corregido"
+        conn.sentencias = 0
+        guardar_anterior(conn, editado)
+
+    tiempos = cronometrar(anterior, args.repeticiones)
+    resultados.append({
+        "variante": "anterior", "sentencias": conn.sentencias, **resumen(tiempos)
+    })
+
+    # Guardado por diferencias: solo la celda modificada
+    def diferencias():
+        df = leer_grilla(conn, args.filas)
+        editado = df.copy()
+        editado.loc[0, "observaciones"] = f"corregido {conn.sentencias}"
+        conn.sentencias = 0
+        aplicar_cambios(conn, "reportes", cambios_editor(df, editado))
+
+    tiempos = cronometrar(diferencias, args.repeticiones)
+    resultados.append({
+        "variante": "diferencias", "sentencias": conn.sentencias, **resumen(tiempos)
+    })
+
+    # Concurrencia: dos grillas cargadas a la vez editan la misma celda
+    grilla_a = leer_grilla(conn, args.filas)
+    grilla_b = grilla_a.copy()
+
+    editada_a = grilla_a.copy()
+    editada_a.loc[1, "horas"] = 7.5
+    aplicar_cambios(conn, "reportes", cambios_editor(grilla_a, editada_a))
+
+    editada_b = grilla_b.copy()
+    editada_b.loc[1, "horas"] = 6.0
+    try:
+        aplicar_cambios(conn, "reportes", cambios_editor(grilla_b, editada_b))
+        conflicto = None
+    except ConflictoEdicion as e:
+        conflicto = e.ids
+
+    # Otra columna de la misma fila no es conflicto
+    editada_b = grilla_b.copy()
+    editada_b.loc[1, "zona"] = "A99999"
+    aplicar_cambios(conn, "reportes", cambios_editor(grilla_b, editada_b))
+
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT horas, zona FROM reportes WHERE id = %s",
+        (int(grilla_a.loc[1, "id"]),)
+    )
+    horas, zona = cur.fetchone()
+
+    conn.close()
+    eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "correcciones",
+        "filas": args.filas,
+        "resultados": resultados,
+        "concurrencia": {
+            "conflicto_detectado": conflicto,
+            "horas_final": float(horas),
+            "zona_final": zona,
+        },
+    })
+
+
+if __name__ == "__main__":
+    main()
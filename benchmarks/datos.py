@@ -0,0 +1,376 @@
+"""
+Siembra de datos sintéticos para los benchmarks.
+
+Las tablas se generan del lado del servidor con generate_series y una
+semilla fija (setseed), y el GeoJSON con numpy y una semilla fija, así que
+el mismo comando produce siempre los mismos datos.
+
+Convenciones compartidas por tablas y GeoJSON: la asignación `a` se llama
+A000123 (6 dígitos), pertenece a la región R{a % regiones} y sus bloques
+van de 0 a bloques-1. Los operadores son OP000001…, los supervisores
+SUP00001… ("Supervisor N").
+
+Para llenar un schema persistente a escala de producción:
+
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.datos \
+        --esquema bditalia_sintetico --escala produccion --geojson bloques.geojson
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from servicios.particiones_reportes import asegurar_particiones
+
+PUESTOS = ["Operario Catastral", "Operario Calidad", "Supervisor", "Coordinador"]
+
+
+def sembrar_catalogos(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO procesos (id, nombre) VALUES
+            (0, 'Sin proceso'), (1, 'Operativo'), (2, 'Control de Calidad'), (3, 'Omisiones')
+        ON CONFLICT DO NOTHING
+    """)
+    cur.execute("""
+        INSERT INTO tipos_evento (id, nombre)
+        SELECT i, 'Evento ' || i FROM generate_series(1, 20) i
+        ON CONFLICT DO NOTHING
+    """)
+    conn.commit()
+
+
+def sembrar_personal(conn, operadores, supervisores=None, semilla=0.42):
+    supervisores = supervisores or max(1, operadores // 20)
+    cur = conn.cursor()
+    cur.execute("SELECT setseed(%s)", (semilla,))
+
+    cur.execute("""
+        INSERT INTO personal (cedula, nombre_completo, contraseña, puesto, perfil, estado, fecha_vinculacion)
+        SELECT 'SUP' || lpad(i::text, 5, '0'), 'Supervisor ' || i, 'x', 'Supervisor', 5, 'activo', DATE '2022-01-01'
+        FROM generate_series(1, %s) i
+    """, (supervisores,))
+
+    cur.execute("""
+        INSERT INTO personal (cedula, nombre_completo, contraseña, puesto, perfil, estado, supervisor, fecha_vinculacion)
+        SELECT
+            'OP' || lpad(i::text, 6, '0'),
+            'Operador ' || i,
+            'x',
+            CASE WHEN i %% 5 = 0 THEN 'Operario Calidad' ELSE 'Operario Catastral' END,
+            CASE WHEN i %% 5 = 0 THEN 4 ELSE 3 END,
+            'activo',
+            'Supervisor ' || (1 + (i %% %s)),
+            DATE '2022-01-01'
+        FROM generate_series(1, %s) i
+    """, (supervisores, operadores))
+    cur.execute("ANALYZE personal")
+    conn.commit()
+
+
+def sembrar_reportes(conn, dias, desde="2024-01-01", semilla=0.42, regiones=5, asignaciones=1000):
+    """
+    Para cada operador activo y cada día hábil: 2 reportes de producción y,
+    con 15 % de probabilidad, un evento; la jornada suma ~8.5 h. Cada
+    operador trabaja en una región y reporta asignaciones de esa región.
+    Si reportes está particionada se crean antes los meses del rango.
+    """
+    asegurar_particiones(conn, desde, pd.Timestamp(desde) + pd.Timedelta(days=dias - 1))
+
+    cur = conn.cursor()
+    cur.execute("SELECT setseed(%s)", (semilla,))
+
+    cur.execute("""
+        WITH dias AS (
+            SELECT d::date AS fecha
+            FROM generate_series(%(desde)s::date, %(desde)s::date + (%(dias)s - 1), INTERVAL '1 day') d
+            WHERE EXTRACT(ISODOW FROM d) < 6
+        ),
+        operadores AS (
+            SELECT cedula, supervisor, perfil, puesto
+            FROM personal
+            WHERE cedula LIKE 'OP%%'
+        )
+        INSERT INTO reportes (
+            tipo_reporte, cedula_personal, cedula_quien_reporta, supervisor_nombre,
+            fecha_reporte, semana, año, horas, proceso_id, region, zona, complejidad,
+            produccion, aprobados, rechazados, estado, tipo_evento_id, observaciones,
+            perfil, puesto
+        )
+        SELECT
+            CASE WHEN n = 3 THEN 'evento' ELSE 'produccion' END,
+            o.cedula, o.cedula, o.supervisor,
+            d.fecha, EXTRACT(WEEK FROM d.fecha), EXTRACT(YEAR FROM d.fecha),
+            CASE n WHEN 3 THEN 1.0 ELSE 4.25 END,
+            CASE WHEN n = 3 THEN 0 WHEN o.perfil = 4 THEN 2 ELSE 1 END,
+            CASE WHEN n = 3 THEN NULL ELSE 'R' || (abs(hashtext(o.cedula)) %% %(regiones)s) END,
+            CASE WHEN n = 3 THEN NULL ELSE 'A' || lpad((
+                abs(hashtext(o.cedula)) %% %(regiones)s
+                + %(regiones)s * floor(random() * greatest(%(asignaciones)s / %(regiones)s, 1))
+            )::int::text, 6, '0') END,
+            CASE WHEN n = 3 THEN NULL ELSE (ARRAY['baja', 'media', 'alta'])[1 + (random() * 2)::int] END,
+            CASE WHEN n = 3 OR o.perfil = 4 THEN 0 ELSE (random() * 30)::int END,
+            CASE WHEN o.perfil = 4 AND n < 3 THEN (random() * 20)::int ELSE 0 END,
+            CASE WHEN o.perfil = 4 AND n < 3 THEN (random() * 5)::int ELSE 0 END,
+            CASE WHEN n = 3 THEN NULL ELSE 'finalizado' END,
+            CASE WHEN n = 3 THEN 1 + (random() * 19)::int END,
+            '',
+            o.perfil, o.puesto
+        FROM dias d
+        CROSS JOIN operadores o
+        CROSS JOIN generate_series(1, 3) n
+        -- hash y no random(): el planner empuja el filtro al generate_series de n
+        WHERE n < 3 OR abs(hashtext(o.cedula || d.fecha)) %% 100 < 15
+    """, {"desde": desde, "dias": dias, "regiones": regiones, "asignaciones": asignaciones})
+    cur.execute("ANALYZE reportes")
+    conn.commit()
+
+
+def sembrar_asignaciones(conn, regiones, asignaciones, bloques, semilla=0.42):
+    """
+    `asignaciones` asignaciones de `bloques` bloques repartidas en `regiones`.
+
+    Cada asignación avanza como un todo por el flujo (un solo operador):
+    ~40 % pendientes, y el resto entre asignado / proceso / finalizado /
+    control de calidad / rechazado / corregido / aprobado. Los bloques no
+    pendientes dejan 1 a 3 filas en asignaciones_historial.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT setseed(%s)", (semilla,))
+
+    cur.execute("""
+        WITH operadores AS (
+            SELECT array_agg(cedula ORDER BY cedula) FILTER (WHERE perfil = 3) AS operativos,
+                   array_agg(cedula ORDER BY cedula) FILTER (WHERE perfil = 4) AS qc
+            FROM personal
+            WHERE cedula LIKE 'OP%%'
+        ),
+        estado AS (
+            SELECT
+                a,
+                (ARRAY['pendiente', 'pendiente', 'pendiente', 'pendiente', 'asignado', 'proceso',
+                       'finalizado', 'finalizado', 'rechazado 1', 'corregido', 'aprobado', 'aprobado']
+                )[1 + floor(random() * 12)::int] AS estado,
+                random() AS r1,
+                random() AS r2,
+                (ARRAY['baja', 'media', 'alta'])[1 + floor(random() * 3)::int] AS complejidad
+            FROM generate_series(0, %(asignaciones)s - 1) a
+        )
+        INSERT INTO asignaciones (
+            region, asignacion, bloque, complejidad, estado_actual, proceso_actual,
+            operador_actual, qc_actual, cantidad_rechazos, cantidad_aprobaciones
+        )
+        SELECT
+            'R' || (e.a %% %(regiones)s),
+            'A' || lpad(e.a::text, 6, '0'),
+            b,
+            e.complejidad,
+            e.estado,
+            CASE WHEN e.estado IN ('finalizado', 'corregido', 'aprobado', 'rechazado 1')
+                 THEN 'control_calidad' ELSE 'operativo' END,
+            CASE WHEN e.estado <> 'pendiente'
+                 THEN o.operativos[1 + floor(e.r1 * cardinality(o.operativos))::int] END,
+            CASE WHEN e.estado IN ('rechazado 1', 'corregido', 'aprobado') AND cardinality(o.qc) > 0
+                 THEN o.qc[1 + floor(e.r2 * cardinality(o.qc))::int] END,
+            CASE WHEN e.estado IN ('rechazado 1', 'corregido') THEN 1 ELSE 0 END,
+            CASE WHEN e.estado = 'aprobado' THEN 1 ELSE 0 END
+        FROM estado e
+        CROSS JOIN operadores o
+        CROSS JOIN generate_series(0, %(bloques)s - 1) b
+    """, {"regiones": regiones, "asignaciones": asignaciones, "bloques": bloques})
+
+    cur.execute("""
+        INSERT INTO asignaciones_historial
+            (asignacion_id, asignacion, bloque, region, usuario, puesto, proceso, estado, fecha)
+        SELECT
+            a.id, a.asignacion, a.bloque, a.region, a.operador_actual, 'Operario Catastral',
+            'operativo', paso.estado,
+            TIMESTAMP '2024-01-01' + random() * INTERVAL '365 days'
+        FROM asignaciones a
+        CROSS JOIN LATERAL (
+            SELECT unnest(ARRAY['asignado', 'proceso', 'finalizado']) AS estado
+        ) paso
+        WHERE a.estado_actual <> 'pendiente'
+          AND (paso.estado = 'asignado'
+               OR a.estado_actual <> 'asignado' AND paso.estado = 'proceso'
+               OR a.estado_actual NOT IN ('asignado', 'proceso'))
+    """)
+    cur.execute("ANALYZE asignaciones")
+    cur.execute("ANALYZE asignaciones_historial")
+    conn.commit()
+
+
+def sembrar_correcciones(conn, solicitudes, pendientes=0.3, semilla=0.42):
+    """
+    Solicitudes de corrección sobre reportes al azar; una fracción
+    `pendientes` queda pendiente y el resto corregida.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT setseed(%s)", (semilla,))
+    cur.execute("""
+        WITH objetivo AS (
+            SELECT r.id, r.cedula_personal, c.columna
+            FROM (
+                SELECT 1 + floor(random() * (SELECT max(id) FROM reportes))::int AS id
+                FROM generate_series(1, %(solicitudes)s)
+            ) x
+            JOIN reportes r ON r.id = x.id
+            CROSS JOIN LATERAL (
+                SELECT (ARRAY['horas', 'produccion', 'zona', 'observaciones'])[1 + floor(random() * 4 + 0 * r.id)::int] AS columna
+            ) c
+        )
+        INSERT INTO correcciones
+            (cedula, nombre, fecha, id_asociado, tipo_error, solucion, tabla, columna, nuevo_valor, estado)
+        SELECT
+            o.cedula_personal,
+            'Operador ' || ltrim(substr(o.cedula_personal, 3), '0'),
+            (TIMESTAMP '2024-01-01' + random() * INTERVAL '365 days')::text,
+            o.id::text,
+            o.columna,
+            CASE WHEN random() < 0.05 THEN 'Eliminar' ELSE 'Modificar' END,
+            'reportes',
+            o.columna,
+            CASE o.columna
+                WHEN 'horas' THEN (1 + floor(random() * 8))::text
+                WHEN 'produccion' THEN floor(random() * 40)::text
+                WHEN 'zona' THEN 'A' || lpad(floor(random() * 1000)::text, 6, '0')
+                ELSE 'corregido'
+            END,
+            CASE WHEN random() < %(pendientes)s THEN 'pendiente' ELSE 'corregido' END
+        FROM objetivo o
+    """, {"solicitudes": solicitudes, "pendientes": pendientes})
+    cur.execute("ANALYZE correcciones")
+    conn.commit()
+
+
+def geojson_sintetico(n, bloques_por_asignacion=50, vertices=4, regiones=5, semilla=0):
+    """
+    N bloques poligonales de `vertices` lados (con ruido, como un catastro
+    digitalizado) agrupados en asignaciones contiguas de cada región.
+    """
+    rng = np.random.default_rng(semilla)
+    asignaciones = (n + bloques_por_asignacion - 1) // bloques_por_asignacion
+    centro_lon = 7.0 + rng.random(asignaciones) * 6
+    centro_lat = 43.0 + rng.random(asignaciones) * 3
+    radio = 0.001
+    angulos = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+
+    features = []
+    for i in range(n):
+        a = i // bloques_por_asignacion
+        b = i % bloques_por_asignacion
+        x = centro_lon[a] + (b % 10) * 2.2 * radio
+        y = centro_lat[a] + (b // 10) * 2.2 * radio
+        r = radio * (1 + rng.normal(0, 0.02, vertices))
+        anillo = np.column_stack([x + r * np.cos(angulos), y + r * np.sin(angulos)])
+        anillo = np.vstack([anillo, anillo[:1]]).tolist()
+
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [anillo]},
+            "properties": {
+                "region": f"R{a % regiones}",
+                "Asignacion": f"A{a:06d}",
+                "BLOQUE": b,
+            },
+        })
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+# =====================================================
+# ESCALAS
+# =====================================================
+ESCALAS = {
+    "pequena": {
+        "regiones": 3, "asignaciones": 300, "bloques": 20,
+        "operadores": 60, "años": 0.25, "correcciones": 200,
+    },
+    "media": {
+        "regiones": 5, "asignaciones": 2_000, "bloques": 30,
+        "operadores": 200, "años": 1, "correcciones": 1_000,
+    },
+    "produccion": {
+        "regiones": 20, "asignaciones": 10_000, "bloques": 50,
+        "operadores": 600, "años": 3, "correcciones": 5_000,
+    },
+}
+
+
+def sembrar_todo(conn, regiones, asignaciones, bloques, operadores, años, correcciones,
+                 desde="2022-01-01", semilla=0.42):
+    """Llena todas las tablas. Devuelve segundos por tabla."""
+    tiempos = {}
+
+    def paso(nombre, funcion, *args, **kwargs):
+        inicio = time.perf_counter()
+        funcion(conn, *args, **kwargs)
+        tiempos[nombre] = round(time.perf_counter() - inicio, 2)
+
+    paso("catalogos", sembrar_catalogos)
+    paso("personal", sembrar_personal, operadores, semilla=semilla)
+    paso("asignaciones", sembrar_asignaciones, regiones, asignaciones, bloques, semilla=semilla)
+    paso(
+        "reportes", sembrar_reportes, int(años * 365), desde=desde, semilla=semilla,
+        regiones=regiones, asignaciones=asignaciones
+    )
+    paso("correcciones", sembrar_correcciones, correcciones, semilla=semilla)
+
+    return tiempos
+
+
+def conteos(conn):
+    cur = conn.cursor()
+    resultado = {}
+    for tabla in ("personal", "asignaciones", "asignaciones_historial", "reportes", "correcciones"):
+        cur.execute(f"SELECT count(*) FROM {tabla}")
+        resultado[tabla] = cur.fetchone()[0]
+    conn.rollback()
+    return resultado
+
+
+def escribir_geojson(ruta, regiones, asignaciones, bloques, vertices=4, semilla=0):
+    """GeoJSON con un polígono por cada bloque de sembrar_asignaciones."""
+    geojson = geojson_sintetico(
+        asignaciones * bloques, bloques_por_asignacion=bloques,
+        vertices=vertices, regiones=regiones, semilla=semilla
+    )
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(geojson, f)
+
+
+def main():
+    from benchmarks.comun import imprimir, preparar_esquema
+
+    parser = argparse.ArgumentParser(description="Llena un schema con datos sintéticos")
+    parser.add_argument("--esquema", default="bditalia_sintetico")
+    parser.add_argument("--escala", choices=ESCALAS, default="media")
+    for clave, tipo in (("regiones", int), ("asignaciones", int), ("bloques", int),
+                        ("operadores", int), ("años", float), ("correcciones", int)):
+        parser.add_argument(f"--{clave}", type=tipo, help="sobrescribe el valor de la escala")
+    parser.add_argument("--geojson", help="escribe también el GeoJSON de los bloques")
+    parser.add_argument("--semilla", type=float, default=0.42)
+    args = parser.parse_args()
+
+    escala = {
+        clave: getattr(args, clave) if getattr(args, clave) is not None else valor
+        for clave, valor in ESCALAS[args.escala].items()
+    }
+
+    conn = preparar_esquema(args.esquema)
+    tiempos = sembrar_todo(conn, **escala, semilla=args.semilla)
+    filas = conteos(conn)
+    conn.close()
+
+    if args.geojson:
+        inicio = time.perf_counter()
+        escribir_geojson(args.geojson, escala["regiones"], escala["asignaciones"], escala["bloques"])
+        tiempos["geojson"] = round(time.perf_counter() - inicio, 2)
+
+    imprimir({"esquema": args.esquema, "escala": escala, "filas": filas, "segundos": tiempos})
+
+
+if __name__ == "__main__":
+    main()
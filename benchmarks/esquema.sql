@@ -0,0 +1,95 @@
+-- =====================================================
+-- ESQUEMA MÍNIMO PARA BENCHMARKS
+-- Reproduce las tablas que usan los módulos (solo columnas usadas).
+-- Se ejecuta dentro de un schema temporal con search_path propio.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS personal (
+    id SERIAL PRIMARY KEY,
+    cedula TEXT UNIQUE NOT NULL,
+    nombre_completo TEXT NOT NULL,
+    contraseña TEXT,
+    puesto TEXT,
+    perfil INTEGER,
+    horario TEXT,
+    estado TEXT DEFAULT 'activo',
+    supervisor TEXT,
+    fecha_vinculacion DATE,
+    fecha_desvinculacion DATE
+);
+
+CREATE TABLE IF NOT EXISTS procesos (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tipos_evento (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS asignaciones (
+    id SERIAL PRIMARY KEY,
+    region TEXT NOT NULL,
+    asignacion TEXT NOT NULL,
+    bloque INTEGER NOT NULL,
+    complejidad TEXT,
+    estado_actual TEXT NOT NULL DEFAULT 'pendiente',
+    proceso_actual TEXT NOT NULL DEFAULT 'operativo',
+    operador_actual TEXT,
+    qc_actual TEXT,
+    cantidad_rechazos INTEGER NOT NULL DEFAULT 0,
+    cantidad_aprobaciones INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS asignaciones_historial (
+    id SERIAL PRIMARY KEY,
+    asignacion_id INTEGER,
+    asignacion TEXT,
+    bloque INTEGER,
+    region TEXT,
+    usuario TEXT,
+    puesto TEXT,
+    proceso TEXT,
+    estado TEXT,
+    observacion TEXT,
+    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS reportes (
+    id SERIAL PRIMARY KEY,
+    tipo_reporte TEXT NOT NULL,
+    cedula_personal TEXT NOT NULL,
+    cedula_quien_reporta TEXT,
+    supervisor_nombre TEXT,
+    fecha_reporte DATE NOT NULL,
+    semana INTEGER,
+    año INTEGER,
+    horas NUMERIC(5, 2) DEFAULT 0,
+    proceso_id INTEGER,
+    region TEXT,
+    zona TEXT,
+    complejidad TEXT,
+    produccion INTEGER DEFAULT 0,
+    aprobados INTEGER DEFAULT 0,
+    rechazados INTEGER DEFAULT 0,
+    estado TEXT,
+    tipo_evento_id INTEGER,
+    observaciones TEXT,
+    perfil INTEGER,
+    puesto TEXT
+);
+
+CREATE TABLE IF NOT EXISTS correcciones (
+    id SERIAL PRIMARY KEY,
+    cedula TEXT,
+    nombre TEXT,
+    fecha TEXT,
+    id_asociado TEXT,
+    tipo_error TEXT,
+    solucion TEXT,
+    tabla TEXT,
+    columna TEXT,
+    nuevo_valor TEXT,
+    estado TEXT DEFAULT 'pendiente'
+);
@@ -0,0 +1,102 @@
+"""
+Benchmark del registro de eventos por grupo de personas.
+
+Compara el bucle anterior (un SELECT de supervisor + un INSERT por persona)
+con el INSERT multi-fila de servicios.eventos, para varios tamaños de grupo.
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.eventos --grupos 1 10 50 200
+"""
+import argparse
+from datetime import date
+
+from benchmarks.comun import (
+    conectar_contada,
+    cronometrar,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import sembrar_catalogos, sembrar_personal
+from servicios.eventos import registrar_eventos
+
+ESQUEMA = "bench_eventos"
+FECHA = date(2024, 8, 15)
+
+
+def registrar_anterior(conn, personas, cedula_reporta, fecha_reporte, horas,
+                       tipo_evento_id, observaciones):
+    """El bucle del render anterior."""
+    cur = conn.cursor()
+    semana = fecha_reporte.isocalendar()[1]
+    año = fecha_reporte.year
+
+    for p in personas:
+        cur.execute("SELECT supervisor FROM personal WHERE cedula = %s", (p["cedula"],))
+        row_sup = cur.fetchone()
+        supervisor_nombre = row_sup[0] if row_sup else None
+
+        cur.execute("""
+            INSERT INTO reportes (
+                tipo_reporte, cedula_personal, cedula_quien_reporta, supervisor_nombre,
+                fecha_reporte, semana, año, horas, proceso_id, zona, produccion,
+                aprobados, rechazados, tipo_evento_id, observaciones, perfil, puesto
+            )
+            VALUES ('evento', %s, %s, %s, %s, %s, %s, %s, 0, 0, 0, 0, 0, %s, %s, %s, %s)
+        """, (
+            p["cedula"], cedula_reporta, supervisor_nombre, fecha_reporte, semana, año,
+            horas, tipo_evento_id, observaciones, p["perfil"], p["puesto"],
+        ))
+
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--grupos", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, max(args.grupos))
+    conn.close()
+
+    conn = conectar_contada(ESQUEMA)
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT cedula, perfil, puesto, supervisor
+        FROM personal
+        WHERE cedula LIKE 'OP%%'
+        ORDER BY cedula
+    """)
+    personal = [
+        {"cedula": c, "perfil": pf, "puesto": pu, "supervisor": s}
+        for c, pf, pu, s in cur.fetchall()
+    ]
+
+    resultados = []
+    for n in args.grupos:
+        personas = personal[:n]
+        for variante, funcion in (("anterior", registrar_anterior), ("masivo", registrar_eventos)):
+            conn.sentencias = 0
+            tiempos = cronometrar(
+                lambda: funcion(conn, personas, "SUP00001", FECHA, 8.5, 1, "feriado"),
+                args.repeticiones,
+            )
+            resultados.append({
+                "personas": n,
+                "variante": variante,
+                "sentencias": conn.sentencias // args.repeticiones,
+                **resumen(tiempos),
+            })
+
+    conn.close()
+    eliminar_esquema(ESQUEMA)
+
+    imprimir({"benchmark": "eventos", "resultados": resultados})
+
+
+if __name__ == "__main__":
+    main()
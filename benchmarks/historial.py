@@ -0,0 +1,129 @@
+"""
+Benchmark del Historial: tres consultas separadas vs. consulta única.
+
+Siembra personal y reportes, y para el alcance "Totales" y "Propios" mide
+el número de sentencias enviadas y la latencia de armar las tres tablas.
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.historial \
+        --operadores 200 --dias 90
+"""
+import argparse
+from datetime import date, timedelta
+
+import pandas as pd
+
+from benchmarks.comun import (
+    conectar_contada,
+    cronometrar,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import sembrar_catalogos, sembrar_personal, sembrar_reportes
+from servicios.historial import consultar_reportes, resumen_horas, tabla_eventos, tabla_produccion
+
+ESQUEMA = "bench_historial"
+
+
+def historial_anterior(conn, fecha_inicio, fecha_fin, where_extra, params_extra):
+    """Las tres consultas del render anterior, tal cual."""
+    params = [fecha_inicio, fecha_fin, *params_extra]
+
+    df_prod = pd.read_sql(f"""
+        SELECT r.id, r.fecha_reporte, p.nombre_completo AS persona,
+               r.supervisor_nombre AS supervisor, r.zona, r.horas, r.produccion,
+               r.aprobados, r.rechazados, r.observaciones
+        FROM reportes r
+        JOIN personal p ON p.cedula = r.cedula_personal
+        WHERE r.tipo_reporte = 'produccion'
+          AND r.fecha_reporte BETWEEN %s AND %s
+          {where_extra}
+        ORDER BY r.fecha_reporte, persona
+    """, conn, params=params)
+
+    df_eventos = pd.read_sql(f"""
+        SELECT r.id, r.fecha_reporte, p.nombre_completo AS persona,
+               r.supervisor_nombre AS supervisor, r.horas,
+               te.nombre AS tipo_evento, r.observaciones
+        FROM reportes r
+        JOIN personal p ON p.cedula = r.cedula_personal
+        LEFT JOIN tipos_evento te ON te.id = r.tipo_evento_id
+        WHERE r.tipo_reporte = 'evento'
+          AND r.fecha_reporte BETWEEN %s AND %s
+          {where_extra}
+        ORDER BY r.fecha_reporte, persona
+    """, conn, params=params)
+
+    df_horas = pd.read_sql(f"""
+        SELECT r.fecha_reporte, p.nombre_completo AS persona, SUM(r.horas) AS total_horas
+        FROM reportes r
+        JOIN personal p ON p.cedula = r.cedula_personal
+        WHERE r.fecha_reporte BETWEEN %s AND %s
+          {where_extra}
+        GROUP BY r.fecha_reporte, p.nombre_completo
+        ORDER BY r.fecha_reporte, persona
+    """, conn, params=params)
+    df_horas["estado"] = df_horas["total_horas"].apply(
+        lambda x: "✅ OK" if 8.4 <= float(x) <= 8.6 else "⚠️ Revisar"
+    )
+
+    return df_prod, df_eventos, df_horas
+
+
+def historial_unico(conn, fecha_inicio, fecha_fin, where_extra, params_extra):
+    df = consultar_reportes(conn, fecha_inicio, fecha_fin, where_extra, params_extra)
+    return tabla_produccion(df), tabla_eventos(df), resumen_horas(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--operadores", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=90)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, args.operadores)
+    sembrar_reportes(conn, args.dias)
+    conn.close()
+
+    conn = conectar_contada(ESQUEMA)
+    inicio = date(2024, 1, 1)
+    fin = inicio + timedelta(days=args.dias)
+
+    alcances = {
+        "totales": ("", ()),
+        "propios": (" AND r.cedula_personal = %s", ("OP000001",)),
+        "a_cargo": (" AND r.supervisor_nombre = %s", ("Supervisor 1",)),
+    }
+
+    resultados = []
+    for nombre, (where_extra, params) in alcances.items():
+        for variante, funcion in (("anterior", historial_anterior), ("unico", historial_unico)):
+            conn.sentencias = 0
+            tiempos = cronometrar(
+                lambda: funcion(conn, inicio, fin, where_extra, params), args.repeticiones
+            )
+            resultados.append({
+                "alcance": nombre,
+                "variante": variante,
+                "sentencias_por_render": conn.sentencias // args.repeticiones,
+                **resumen(tiempos),
+            })
+
+    conn.close()
+    eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "historial",
+        "operadores": args.operadores,
+        "dias": args.dias,
+        "resultados": resultados,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Costo de la instrumentación SQL por sentencia.
+
+Ejecuta las mismas consultas cortas con un cursor normal y con
+CursorInstrumentado y reporta la diferencia por sentencia, junto con el
+informe que generaría la página Rendimiento SQL.
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.instrumentacion --sentencias 5000
+"""
+import argparse
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from benchmarks.comun import cronometrar, dsn, imprimir, resumen
+from servicios import instrumentacion
+
+
+def carga(conn, sentencias):
+    cur = conn.cursor()
+    for i in range(sentencias):
+        cur.execute("SELECT %s::int + 1, 'x' WHERE %s > 0", (i, i))
+        cur.fetchall()
+    execute_values(cur, "SELECT * FROM (VALUES %s) v(a, b)", [(i, "y") for i in range(100)])
+    conn.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sentencias", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    normal = psycopg2.connect(dsn())
+    medida = psycopg2.connect(dsn(), cursor_factory=instrumentacion.CursorInstrumentado)
+
+    t_normal = cronometrar(lambda: carga(normal, args.sentencias), args.repeticiones)
+    instrumentacion.ESTADISTICAS.reiniciar()
+    t_medida = cronometrar(lambda: carga(medida, args.sentencias), args.repeticiones)
+
+    normal.close()
+    medida.close()
+
+    por_sentencia = lambda t: min(t) / (args.sentencias + 1) * 1e6
+    informe = instrumentacion.informe(instrumentacion.ESTADISTICAS.volcar())
+
+    imprimir({
+        "benchmark": "instrumentacion",
+        "sentencias": args.sentencias,
+        "normal": resumen(t_normal),
+        "instrumentado": resumen(t_medida),
+        "sobrecosto_us_por_sentencia": round(por_sentencia(t_medida) - por_sentencia(t_normal), 2),
+        "informe": informe.drop(columns=["huella"]).assign(
+            huella=informe["huella"].str.slice(0, 80)
+        ).to_dict("records"),
+    })
+
+
+if __name__ == "__main__":
+    main()
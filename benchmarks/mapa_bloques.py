@@ -0,0 +1,108 @@
+"""
+Benchmark del mapa de bloques de Dashboards.
+
+Genera un GeoJSON sintético con N bloques cuadrados y mide:
+- original_ms: json.load + bucle por feature del render anterior.
+- carga_ms: parseo e indexado único (lo que queda cacheado por proceso).
+- rerun_ms: join vectorizado de estado/color + armado de features por rerun.
+
+No requiere base de datos.
+
+Uso:
+    python -m benchmarks.mapa_bloques --bloques 10000 100000 500000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import imprimir
+from benchmarks.datos import geojson_sintetico
+from servicios.mapa_bloques import features_mapa, indexar_geojson, propiedades_por_bloque
+
+ESTADOS = ["pendiente", "asignado", "proceso", "finalizado", "aprobado", "rechazado 1"]
+
+
+def asignaciones_sinteticas(geojson, fraccion=0.8, semilla=0):
+    rng = np.random.default_rng(semilla)
+    props = [f["properties"] for f in geojson["features"]]
+    df = pd.DataFrame(props).rename(columns={"Asignacion": "asignacion", "BLOQUE": "bloque"})
+    df = df.sample(frac=fraccion, random_state=semilla)
+    df["estado_actual"] = rng.choice(ESTADOS, len(df))
+    df["proceso_actual"] = "operativo"
+    df["operador"] = "Operador " + (df["bloque"] % 60).astype(str)
+    return df.reset_index(drop=True)
+
+
+def render_original(ruta, df_asig):
+    """Copia del algoritmo previo (iterrows + json.load + bucle)."""
+    info = {
+        (row["region"], row["asignacion"], int(row["bloque"])): str(row["estado_actual"]).lower().strip()
+        for _, row in df_asig.iterrows()
+    }
+    with open(ruta, "r", encoding="utf-8") as f:
+        geojson = json.load(f)
+    for feature in geojson["features"]:
+        p = feature["properties"]
+        key = (str(p["region"]).strip(), str(p["Asignacion"]).strip(), int(p["BLOQUE"]))
+        p["estado_actual"] = info.get(key, "—")
+    return geojson
+
+
+def medir(n, repeticiones, con_original):
+    geojson = geojson_sintetico(n)
+    df_asig = asignaciones_sinteticas(geojson)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".geojson", delete=False) as f:
+        json.dump(geojson, f)
+        ruta = f.name
+    del geojson
+
+    try:
+        resultado = {"bloques": n, "archivo_mb": round(os.path.getsize(ruta) / 1e6, 1)}
+
+        if con_original:
+            inicio = time.perf_counter()
+            render_original(ruta, df_asig)
+            resultado["original_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        inicio = time.perf_counter()
+        with open(ruta, "r", encoding="utf-8") as f:
+            capa = indexar_geojson(json.load(f))
+        resultado["carga_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            props = propiedades_por_bloque(capa, df_asig)
+            features_mapa(capa, props)
+            tiempos.append(time.perf_counter() - inicio)
+        resultado["rerun_ms"] = round(min(tiempos) * 1000, 1)
+
+        return resultado
+    finally:
+        os.unlink(ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bloques", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-original", action="store_true",
+                        help="No medir el algoritmo anterior (más lento)")
+    args = parser.parse_args()
+
+    imprimir({
+        "benchmark": "mapa_bloques",
+        "resultados": [
+            medir(n, args.repeticiones, not args.sin_original) for n in args.bloques
+        ],
+    })
+
+
+if __name__ == "__main__":
+    main()
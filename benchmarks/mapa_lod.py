@@ -0,0 +1,119 @@
+"""
+Benchmark de payload y tiempo de armado del mapa por nivel de detalle.
+
+Genera un GeoJSON sintético, ejecuta el preprocesamiento de
+servicios.lod_mapa y mide, para cada vista del dashboard, el tamaño del
+JSON que pydeck envía al navegador y el tiempo de armarlo y serializarlo.
+
+Uso:
+    python -m benchmarks.mapa_lod --bloques 500000 --vertices 24
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.comun import imprimir
+from benchmarks.datos import geojson_sintetico
+from benchmarks.mapa_bloques import asignaciones_sinteticas
+from servicios.lod_mapa import preprocesar
+from servicios.mapa_bloques import (
+    deck_asignaciones,
+    deck_bloques,
+    features_mapa,
+    indexar_geojson,
+    predominante_por_asignacion,
+    propiedades_por_bloque,
+    puntos_por_asignacion,
+    subcapa,
+    vista_para,
+)
+import pandas as pd
+
+
+def medir(nombre, armar):
+    inicio = time.perf_counter()
+    payload = armar().to_json()
+    return {
+        "vista": nombre,
+        "payload_mb": round(len(payload.encode("utf-8")) / 1e6, 3),
+        "armado_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bloques", type=int, default=100_000)
+    parser.add_argument("--vertices", type=int, default=24)
+    parser.add_argument("--regiones", type=int, default=20)
+    args = parser.parse_args()
+
+    geojson = geojson_sintetico(args.bloques, vertices=args.vertices, regiones=args.regiones)
+    df_asig = asignaciones_sinteticas(geojson)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "italia.geojson"
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(geojson, f)
+
+        inicio = time.perf_counter()
+        preprocesar(ruta, Path(tmp) / "lod")
+        preproceso_s = time.perf_counter() - inicio
+
+        capa = indexar_geojson(geojson)
+        centroides = pd.read_csv(Path(tmp) / "lod" / "asignaciones.csv",
+                                 dtype={"region": str, "asignacion": str})
+        indice = json.loads((Path(tmp) / "lod" / "regiones.json").read_text(encoding="utf-8"))
+
+        region = "R0"
+        with open(Path(tmp) / "lod" / indice[region], "r", encoding="utf-8") as f:
+            capa_simple = indexar_geojson(json.load(f))
+        asignacion = capa_simple.claves["asignacion"].iloc[0]
+
+        df_region = df_asig[df_asig["region"] == region]
+        df_una = df_region[df_region["asignacion"] == asignacion]
+
+        resultados = [
+            medir("todas_sin_lod", lambda: deck_bloques(
+                features_mapa(capa, propiedades_por_bloque(capa, df_asig)), vista_para(None)
+            )),
+            medir("todas_lod", lambda: deck_asignaciones(
+                puntos_por_asignacion(centroides, predominante_por_asignacion(df_asig)),
+                vista_para(centroides)
+            )),
+            medir("region_sin_lod", lambda: deck_bloques(
+                features_mapa(*_region(capa, region, df_region)), vista_para(None)
+            )),
+            medir("region_lod", lambda: deck_bloques(
+                features_mapa(capa_simple, propiedades_por_bloque(capa_simple, df_region)),
+                vista_para(None)
+            )),
+            medir("asignacion", lambda: deck_bloques(
+                features_mapa(*_asignacion(capa, region, asignacion, df_una)), vista_para(None)
+            )),
+        ]
+
+    imprimir({
+        "benchmark": "mapa_lod",
+        "bloques": args.bloques,
+        "vertices": args.vertices,
+        "asignaciones": len(centroides),
+        "preproceso_s": round(preproceso_s, 1),
+        "resultados": resultados,
+    })
+
+
+def _region(capa, region, df):
+    sub = subcapa(capa, capa.claves["region"] == region)
+    return sub, propiedades_por_bloque(sub, df)
+
+
+def _asignacion(capa, region, asignacion, df):
+    claves = capa.claves
+    sub = subcapa(capa, (claves["region"] == region) & (claves["asignacion"] == asignacion))
+    return sub, propiedades_por_bloque(sub, df)
+
+
+if __name__ == "__main__":
+    main()
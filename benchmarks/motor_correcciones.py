@@ -0,0 +1,164 @@
+"""
+Benchmark del motor de correcciones.
+
+Siembra reportes y N solicitudes pendientes (modificaciones válidas, valores
+inválidos, conflictos y eliminaciones) y compara la aplicación una a una
+(UPDATE del reporte + UPDATE de la solicitud, como en la grilla) con el
+motor por lotes. Verifica además qué solicitudes quedaron rechazadas.
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.motor_correcciones --solicitudes 1000
+"""
+import argparse
+import time
+
+from benchmarks.comun import (
+    conectar_contada,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+)
+from benchmarks.datos import sembrar_catalogos, sembrar_personal, sembrar_reportes
+from servicios import motor_correcciones
+
+ESQUEMA = "bench_motor_correcciones"
+
+
+def sembrar_solicitudes(conn, n, semilla=0.42):
+    """
+    Solicitudes sobre reportes distintos; ~5 % con valor inválido, ~2 % con
+    una segunda solicitud en conflicto y ~5 % de eliminaciones.
+    """
+    cur = conn.cursor()
+    cur.execute("DELETE FROM correcciones")
+    cur.execute("SELECT setseed(%s)", (semilla,))
+    cur.execute("""
+        WITH objetivo AS (
+            SELECT id, row_number() OVER (ORDER BY id) AS i
+            FROM reportes
+            WHERE tipo_reporte = 'produccion'
+            ORDER BY id
+            LIMIT %s
+        )
+        INSERT INTO correcciones
+            (cedula, nombre, fecha, id_asociado, tipo_error, solucion, tabla, columna, nuevo_valor, estado)
+        SELECT
+            'OP000001', 'Operador 1', now()::text, o.id::text,
+            c.columna,
+            CASE WHEN o.i %% 20 = 0 THEN 'Eliminar' ELSE 'Modificar' END,
+            'reportes',
+            c.columna,
+            CASE
+                WHEN o.i %% 20 IN (5, 6) THEN 'abc'
+                WHEN c.columna = 'horas' THEN (1 + (random() * 7)::int)::text || ',5'
+                WHEN c.columna = 'produccion' THEN (random() * 40)::int::text
+                WHEN c.columna = 'fecha_reporte' THEN '2024-02-0' || (1 + (random() * 8)::int)
+                ELSE 'corregido ' || o.i
+            END,
+            'pendiente'
+        FROM objetivo o
+        CROSS JOIN LATERAL (
+            SELECT (ARRAY['horas', 'produccion', 'fecha_reporte', 'observaciones'])[1 + o.i %% 4] AS columna
+        ) c
+    """, (n,))
+
+    # Segunda solicitud para la misma celda con otro valor
+    cur.execute("""
+        INSERT INTO correcciones
+            (cedula, nombre, fecha, id_asociado, tipo_error, solucion, tabla, columna, nuevo_valor, estado)
+        SELECT cedula, nombre, fecha, id_asociado, tipo_error, solucion, tabla, columna,
+               'otro valor', 'pendiente'
+        FROM correcciones
+        WHERE columna = 'observaciones' AND solucion = 'Modificar' AND id % 50 = 3
+    """)
+    conn.commit()
+
+
+def aplicar_una_a_una(conn):
+    """Lo que hace el administrador a mano: una celda y una solicitud a la vez."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, id_asociado, columna, nuevo_valor, solucion
+        FROM correcciones WHERE estado = 'pendiente'
+    """)
+    for id_corr, id_asociado, columna, valor, solucion in cur.fetchall():
+        try:
+            if solucion == "Eliminar":
+                cur.execute("DELETE FROM reportes WHERE id = %s", (int(id_asociado),))
+            else:
+                cur.execute(
+                    f"UPDATE reportes SET {columna} = %s WHERE id = %s",
+                    (valor.replace(",", "."), int(id_asociado))
+                )
+            cur.execute("UPDATE correcciones SET estado = 'corregido' WHERE id = %s", (id_corr,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--solicitudes", type=int, default=1000)
+    parser.add_argument("--lote", type=int, default=motor_correcciones.TAMANO_LOTE)
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, 100)
+    sembrar_reportes(conn, max(10, args.solicitudes // 150))
+    conn.close()
+
+    conn = conectar_contada(ESQUEMA)
+    resultados = []
+
+    sembrar_solicitudes(conn, args.solicitudes)
+    conn.sentencias = 0
+    inicio = time.perf_counter()
+    aplicar_una_a_una(conn)
+    resultados.append({
+        "variante": "una_a_una",
+        "sentencias": conn.sentencias,
+        "ms": round((time.perf_counter() - inicio) * 1000, 1),
+    })
+
+    # Mismas solicitudes, reportes ya distintos: se re-siembra el schema
+    conn.close()
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, 100)
+    sembrar_reportes(conn, max(10, args.solicitudes // 150))
+    conn.close()
+
+    conn = conectar_contada(ESQUEMA)
+    sembrar_solicitudes(conn, args.solicitudes)
+    conn.sentencias = 0
+    inicio = time.perf_counter()
+    resumen, rechazadas = motor_correcciones.aplicar(conn, tamano_lote=args.lote)
+    resultados.append({
+        "variante": "motor",
+        "sentencias": conn.sentencias,
+        "ms": round((time.perf_counter() - inicio) * 1000, 1),
+        **resumen,
+    })
+
+    cur = conn.cursor()
+    cur.execute("SELECT count(*) FROM correcciones WHERE estado = 'pendiente'")
+    pendientes = cur.fetchone()[0]
+
+    conn.close()
+    eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "motor_correcciones",
+        "solicitudes": args.solicitudes,
+        "resultados": resultados,
+        "rechazadas": {
+            "total": len(rechazadas),
+            "pendientes_en_base": pendientes,
+            "por_motivo": rechazadas["motivo"].value_counts().to_dict(),
+        },
+    })
+
+
+if __name__ == "__main__":
+    main()
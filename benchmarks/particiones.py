@@ -0,0 +1,330 @@
+"""
+Benchmark de reportes particionada y del archivo de meses antiguos.
+
+Siembra un schema con reportes sin particionar (migraciones hasta 003) y:
+
+- mide las consultas de Historial y Correcciones (primera página keyset y
+  conteo) sobre el último mes y el último año, con los buffers leídos
+- aplica la 004 y convierte en línea (servicios.particiones_reportes.migrar)
+  mientras varios hilos insertan, editan (cambiando la fecha) y borran
+  reportes; reporta la latencia de esas escrituras durante la copia y
+  verifica conteo final y rollup horas_diarias
+- repite las mediciones con particiones (cuántas recorre cada plan)
+- archiva los meses fuera de la retención: tamaño en la base vs. Parquet,
+  tiempo, las mediciones otra vez (solo con los meses retenidos), consulta
+  bajo demanda de un mes archivado y restauración
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.particiones \
+        --operadores 300 --años 3 --retencion 12
+"""
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from benchmarks.comun import (
+    conectar,
+    cronometrar,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import sembrar_catalogos, sembrar_personal, sembrar_reportes
+from servicios import archivo_reportes, horas_diarias, particiones_reportes
+from servicios.historial import sql_reportes
+from servicios.migraciones import aplicar as aplicar_migraciones
+from servicios.paginacion import FILAS_POR_PAGINA
+
+ESQUEMA = "bench_particiones"
+
+SQL_REGISTROS_CORRECCIONES = """
+    SELECT
+        id,
+        fecha_reporte,
+        cedula_personal,
+        horas,
+        zona,
+        produccion,
+        aprobados,
+        rechazados,
+        observaciones
+    FROM reportes
+    WHERE fecha_reporte BETWEEN %s AND %s
+      AND cedula_personal = %s
+"""
+
+
+def pagina(consulta):
+    return f"""
+        SELECT *
+        FROM ({consulta}) q
+        ORDER BY q.fecha_reporte DESC, q.id DESC
+        LIMIT {FILAS_POR_PAGINA + 1}
+    """
+
+
+def consultas(fin):
+    """(nombre, sql, params) de las páginas sobre el último mes y el último año."""
+    mes, año = fin - timedelta(days=30), fin - timedelta(days=365)
+    operador, supervisor = "OP000001", "Supervisor 2"
+    lista = []
+    for rango, inicio in (("mes", mes), ("año", año)):
+        lista += [
+            (f"historial_operador_{rango}",
+             pagina(sql_reportes(" AND r.cedula_personal = %s")), [inicio, fin, operador]),
+            (f"historial_supervisor_{rango}",
+             pagina(sql_reportes(" AND r.supervisor_nombre = %s")), [inicio, fin, supervisor]),
+            (f"historial_totales_{rango}", pagina(sql_reportes()), [inicio, fin]),
+            (f"historial_conteo_{rango}",
+             f"SELECT COUNT(*) FROM ({sql_reportes()}) q", [inicio, fin]),
+            (f"correcciones_registros_{rango}",
+             pagina(SQL_REGISTROS_CORRECCIONES), [inicio, fin, operador]),
+        ]
+    return lista
+
+
+def plan(conn, consulta, params):
+    """(buffers, particiones de reportes recorridas) del EXPLAIN ANALYZE."""
+    cur = conn.cursor()
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + consulta, params)
+    raiz = cur.fetchone()[0]
+    conn.rollback()
+    if isinstance(raiz, str):
+        raiz = json.loads(raiz)
+    raiz = raiz[0]["Plan"]
+
+    tablas, pendientes = set(), [raiz]
+    while pendientes:
+        nodo = pendientes.pop()
+        if nodo.get("Relation Name", "").startswith("reportes"):
+            tablas.add(nodo["Relation Name"])
+        pendientes.extend(nodo.get("Plans", []))
+
+    buffers = raiz.get("Shared Hit Blocks", 0) + raiz.get("Shared Read Blocks", 0)
+    return buffers, len(tablas)
+
+
+def medir_consultas(conn, fin, repeticiones):
+    resultados = []
+    for nombre, consulta, params in consultas(fin):
+        cur = conn.cursor()
+
+        def ejecutar():
+            cur.execute(consulta, params)
+            cur.fetchall()
+            conn.rollback()
+
+        ejecutar()  # calentamiento
+        buffers, tablas = plan(conn, consulta, params)
+        resultados.append({
+            "consulta": nombre,
+            "buffers": buffers,
+            "tablas_reportes": tablas,
+            **resumen(cronometrar(ejecutar, repeticiones)),
+        })
+    return resultados
+
+
+# =====================================================
+# CONVERSIÓN EN LÍNEA CON ESCRITURAS CONCURRENTES
+# =====================================================
+def escritor(parar, fin, latencias, netos, errores, semilla):
+    azar = random.Random(semilla)
+    conn = conectar(ESQUEMA)
+    cur = conn.cursor()
+    insertados = borrados = 0
+    try:
+        while not parar.is_set():
+            accion = azar.choice(("insertar", "insertar", "editar", "borrar"))
+            fecha = fin - timedelta(days=azar.randrange(365 * 2))
+            inicio = time.perf_counter()
+
+            if accion == "insertar":
+                cur.execute("""
+                    INSERT INTO reportes (tipo_reporte, cedula_personal, supervisor_nombre,
+                                          fecha_reporte, horas, produccion)
+                    VALUES ('produccion', %s, 'Supervisor 1', %s, 4.25, 10)
+                """, (f"OP{azar.randrange(1, 100):06d}", fecha))
+                insertados += 1
+            elif accion == "editar":
+                # Mueve el reporte de mes (de partición, una vez convertida)
+                cur.execute("""
+                    UPDATE reportes
+                    SET fecha_reporte = %s, horas = horas + 0.25
+                    WHERE id = (SELECT max(id) - %s FROM reportes)
+                """, (fecha, azar.randrange(100_000)))
+            else:
+                cur.execute("""
+                    DELETE FROM reportes
+                    WHERE id = (SELECT max(id) - %s FROM reportes)
+                """, (azar.randrange(100_000),))
+                borrados += cur.rowcount
+
+            conn.commit()
+            latencias.append(time.perf_counter() - inicio)
+    except Exception as e:
+        conn.rollback()
+        errores.append(str(e))
+    finally:
+        netos.append(insertados - borrados)
+        conn.close()
+
+
+def convertir_en_linea(conn, fin, escritores, lote):
+    cur = conn.cursor()
+    cur.execute("SELECT count(*) FROM reportes")
+    filas_iniciales = cur.fetchone()[0]
+    conn.rollback()
+
+    aplicar_migraciones(conn)
+
+    parar = threading.Event()
+    latencias, netos, errores = [], [], []
+    hilos = [
+        threading.Thread(target=escritor, args=(parar, fin, latencias, netos, errores, i))
+        for i in range(escritores)
+    ]
+    for h in hilos:
+        h.start()
+
+    try:
+        migracion = particiones_reportes.migrar(conn, lote=lote, progreso=lambda _: None)
+    finally:
+        parar.set()
+        for h in hilos:
+            h.join()
+
+    cur.execute("SELECT count(*) FROM reportes")
+    filas_finales = cur.fetchone()[0]
+    conn.rollback()
+
+    return {
+        **migracion,
+        "escritores": escritores,
+        "escrituras": len(latencias),
+        "latencia_escrituras": resumen(latencias) if latencias else None,
+        "errores": errores,
+        "conteo_esperado": filas_iniciales + sum(netos),
+        "conteo_final": filas_finales,
+        "horas_diarias_con_deriva": len(horas_diarias.verificar(conn)),
+        "particiones": len(particiones_reportes.particiones(conn)),
+    }
+
+
+# =====================================================
+# ARCHIVO
+# =====================================================
+def medir_archivo(conn, fin, retencion, repeticiones):
+    directorio = tempfile.mkdtemp(prefix="archivo_reportes_")
+    try:
+        en_base = particiones_reportes.particiones(conn)
+
+        inicio = time.perf_counter()
+        hechas = archivo_reportes.archivar(conn, retencion, directorio, hoy=fin)
+        segundos = time.perf_counter() - inicio
+
+        archivadas = {m["particion"] for m in hechas}
+        bytes_base = int(en_base.loc[en_base["particion"].isin(archivadas), "bytes"].sum())
+        bytes_parquet = sum(m["bytes"] for m in hechas)
+
+        resultado = {
+            "retencion_meses": retencion,
+            "meses_archivados": len(hechas),
+            "filas_archivadas": sum(m["filas"] for m in hechas),
+            "segundos": round(segundos, 2),
+            "mb_en_base": round(bytes_base / 1e6, 1),
+            "mb_parquet": round(bytes_parquet / 1e6, 1),
+            "compresion": round(bytes_base / max(bytes_parquet, 1), 1),
+            "horas_diarias_con_deriva": len(horas_diarias.verificar(conn)),
+            "consultas": medir_consultas(conn, fin, repeticiones),
+        }
+        if not hechas:
+            return resultado
+
+        # Un mes archivado bajo demanda, como lo pide el Historial
+        mes = hechas[-1]
+        filtros = {"cedula_personal": "OP000001"}
+        resultado["consulta_operador_mes"] = {
+            "filas": len(archivo_reportes.consultar(conn, mes["desde"], mes["hasta"], filtros)),
+            **resumen(cronometrar(
+                lambda: archivo_reportes.consultar(conn, mes["desde"], mes["hasta"], filtros), 5
+            )),
+        }
+        resultado["consulta_totales_mes"] = resumen(cronometrar(
+            lambda: archivo_reportes.consultar(conn, mes["desde"], mes["hasta"]), 3
+        ))
+
+        inicio = time.perf_counter()
+        restauradas = archivo_reportes.restaurar(conn, mes["particion"])
+        resultado["restauracion"] = {
+            "particion": mes["particion"],
+            "filas": restauradas,
+            "segundos": round(time.perf_counter() - inicio, 2),
+            "horas_diarias_con_deriva": len(horas_diarias.verificar(conn)),
+        }
+        return resultado
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--operadores", type=int, default=300)
+    parser.add_argument("--años", type=float, default=3)
+    parser.add_argument("--desde", default="2022-01-01")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--escritores", type=int, default=4)
+    parser.add_argument("--lote", type=int, default=particiones_reportes.LOTE)
+    parser.add_argument("--retencion", type=int, default=12,
+                        help="Meses que quedan en la base al archivar")
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema al terminar")
+    args = parser.parse_args()
+
+    conn = preparar_esquema(ESQUEMA, migrar=False)
+    aplicar_migraciones(conn, hasta=3)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, args.operadores)
+    sembrar_reportes(conn, int(args.años * 365), desde=args.desde)
+
+    cur = conn.cursor()
+    cur.execute("SELECT max(fecha_reporte), count(*) FROM reportes")
+    fin, filas = cur.fetchone()
+    conn.rollback()
+
+    antes = medir_consultas(conn, fin, args.repeticiones)
+    conversion = convertir_en_linea(conn, fin, args.escritores, args.lote)
+    particiones_reportes.limpiar(conn)
+    despues = medir_consultas(conn, fin, args.repeticiones)
+    archivo = medir_archivo(conn, fin, args.retencion, args.repeticiones)
+    con_retencion = archivo.pop("consultas")
+    conn.close()
+
+    if not args.conservar:
+        eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "particiones",
+        "reportes": filas,
+        "ultimo_dia": fin,
+        "consultas": [
+            {"consulta": a["consulta"],
+             "ms_sin_particiones": a["p50_ms"], "ms_particionada": d["p50_ms"],
+             "ms_con_retencion": r["p50_ms"],
+             "buffers_sin_particiones": a["buffers"], "buffers_particionada": d["buffers"],
+             "particiones_recorridas": d["tablas_reportes"]}
+            for a, d, r in zip(antes, despues, con_retencion)
+        ],
+        "conversion": conversion,
+        "archivo": archivo,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Benchmark del resumen por asignación: GROUP BY/HAVING vs. asignaciones_resumen.
+
+Siembra dos schemas idénticos, uno sin la migración 002 ("antes") y otro
+con ella ("despues"), con regiones de 50k+ bloques, y mide:
+
+- lecturas: las cuatro listas (asignación manual, candidatas de la
+  autoasignación operativa y de QC, desasignación) con la consulta anterior
+  y con el resumen
+- escrituras: el costo que agregan los triggers a una transición, a una
+  desasignación y a la carga de una región completa (con rollback)
+- consistencia: operadores concurrentes reclaman y transicionan
+  asignaciones, se desasigna y se borra; al final
+  servicios.resumen_asignaciones.verificar() debe volver vacío
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.resumen_asignaciones \
+        --regiones 2 --asignaciones 2000 --bloques 50
+"""
+import argparse
+import threading
+
+from benchmarks.comun import (
+    conectar,
+    cronometrar,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import sembrar_asignaciones, sembrar_personal
+from servicios.cola_asignaciones import reclamar_asignacion_operativa, reclamar_asignacion_qc
+from servicios.migraciones import aplicar as aplicar_migraciones
+from servicios.resumen_asignaciones import asignaciones_completas, verificar
+from servicios.transiciones import SQL_TRANSICION, aplicar_transicion
+
+ANTES = "bench_resumen_antes"
+DESPUES = "bench_resumen_despues"
+REGION = "R0"
+
+# Las consultas del render anterior, tal cual
+LISTAS_ANTERIORES = {
+    "lista_manual": """
+        SELECT asignacion
+        FROM asignaciones
+        WHERE region = %(region)s
+        GROUP BY asignacion
+        HAVING COUNT(*) = COUNT(
+            CASE WHEN estado_actual = 'pendiente' THEN 1 END
+        )
+        ORDER BY asignacion
+    """,
+    "candidatas_operativo": """
+        SELECT asignacion
+        FROM asignaciones
+        WHERE region = %(region)s
+        GROUP BY asignacion
+        HAVING COUNT(*) = COUNT(
+            CASE WHEN estado_actual = 'pendiente'
+                 AND proceso_actual = 'operativo'
+            THEN 1 END
+        )
+        ORDER BY asignacion
+    """,
+    "candidatas_qc": """
+        SELECT a.asignacion
+        FROM asignaciones a
+        WHERE a.region = %(region)s
+        GROUP BY a.asignacion, a.region
+        HAVING COUNT(*) = COUNT(
+            CASE WHEN a.estado_actual = 'finalizado' THEN 1 END
+        )
+        AND NOT EXISTS (
+            SELECT 1
+            FROM asignaciones_historial h
+            WHERE h.asignacion = a.asignacion
+              AND h.region = a.region
+              AND h.usuario = %(cedula)s
+              AND h.proceso = 'operativo'
+              AND h.estado = 'asignado'
+        )
+        ORDER BY a.asignacion
+    """,
+    "lista_desasignar": """
+        SELECT asignacion
+        FROM asignaciones
+        WHERE region = %(region)s
+        GROUP BY asignacion
+        HAVING COUNT(DISTINCT estado_actual) = 1
+           AND MAX(estado_actual) = 'asignado'
+        ORDER BY asignacion
+    """,
+}
+
+CANDIDATAS_QC = """
+    SELECT r.asignacion
+    FROM asignaciones_resumen r
+    WHERE r.region = %(region)s
+      AND r.finalizados = r.bloques
+      AND NOT EXISTS (
+          SELECT 1
+          FROM asignaciones_historial h
+          WHERE h.asignacion = r.asignacion
+            AND h.region = r.region
+            AND h.usuario = %(cedula)s
+            AND h.proceso = 'operativo'
+            AND h.estado = 'asignado'
+      )
+    ORDER BY r.asignacion
+"""
+
+
+def sembrar(esquema, con_resumen, regiones, asignaciones, bloques, operadores):
+    conn = preparar_esquema(esquema, migrar=False)
+    aplicar_migraciones(conn, hasta=None if con_resumen else 1)
+    sembrar_personal(conn, operadores)
+    sembrar_asignaciones(conn, regiones, asignaciones, bloques)
+    cur = conn.cursor()
+    cur.execute("ANALYZE")
+    conn.commit()
+    return conn
+
+
+def consultar(conn, consulta, params):
+    cur = conn.cursor()
+    cur.execute(consulta, params)
+    asignaciones = [row[0] for row in cur.fetchall()]
+    conn.rollback()
+    return asignaciones
+
+
+# =====================================================
+# LECTURAS
+# =====================================================
+def medir_lecturas(antes, despues, repeticiones):
+    params = {"region": REGION, "cedula": "OP000001"}
+    nuevas = {
+        "lista_manual": lambda: asignaciones_completas(despues, REGION, "pendientes"),
+        "candidatas_operativo": lambda: asignaciones_completas(despues, REGION, "pendientes_operativo"),
+        "candidatas_qc": lambda: consultar(despues, CANDIDATAS_QC, params),
+        "lista_desasignar": lambda: asignaciones_completas(despues, REGION, "asignados"),
+    }
+
+    resultados = []
+    for nombre, consulta in LISTAS_ANTERIORES.items():
+        anterior = consultar(antes, consulta, params)
+        nueva = nuevas[nombre]()
+
+        for variante, funcion in (
+            ("group_by", lambda: consultar(antes, consulta, params)),
+            ("resumen", nuevas[nombre]),
+        ):
+            funcion()  # calentamiento
+            resultados.append({
+                "consulta": nombre,
+                "variante": variante,
+                "asignaciones": len(anterior),
+                "mismo_resultado": anterior == nueva,
+                **resumen(cronometrar(funcion, repeticiones)),
+            })
+
+    return resultados
+
+
+# =====================================================
+# ESCRITURAS (costo de los triggers)
+# =====================================================
+def escrituras(conn, bloques):
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT asignacion, operador_actual, array_agg(bloque)
+        FROM asignaciones
+        WHERE region = %s
+          AND estado_actual = 'asignado'
+        GROUP BY asignacion, operador_actual
+        ORDER BY asignacion
+        LIMIT 1
+    """, (REGION,))
+    asignacion, operador, lista = cur.fetchone()
+    conn.rollback()
+
+    def transicion():
+        cur.execute(SQL_TRANSICION, {
+            "region": REGION, "asignacion": asignacion, "bloques": lista,
+            "destino": "proceso", "origen": "asignado",
+            "cedula": operador, "puesto": "Operario Catastral",
+        })
+        conn.rollback()
+
+    def desasignar():
+        cur.execute("""
+            UPDATE asignaciones
+            SET operador_actual = NULL,
+                estado_actual = 'pendiente'
+            WHERE asignacion = %s
+              AND region = %s
+        """, (asignacion, REGION))
+        conn.rollback()
+
+    def cargar_region():
+        cur.execute("""
+            INSERT INTO asignaciones (region, asignacion, bloque, complejidad)
+            SELECT 'CARGA', 'C' || lpad(a::text, 6, '0'), b, 'media'
+            FROM generate_series(1, 50000 / %(bloques)s) a,
+                 generate_series(0, %(bloques)s - 1) b
+        """, {"bloques": bloques})
+        conn.rollback()
+
+    return {"transicion": transicion, "desasignar": desasignar, "cargar_region_50k": cargar_region}
+
+
+def medir_escrituras(antes, despues, bloques, repeticiones):
+    resultados = []
+    por_variante = {"sin_resumen": escrituras(antes, bloques), "con_resumen": escrituras(despues, bloques)}
+
+    for operacion in por_variante["sin_resumen"]:
+        for variante, funciones in por_variante.items():
+            funciones[operacion]()  # calentamiento
+            resultados.append({
+                "operacion": operacion,
+                "variante": variante,
+                **resumen(cronometrar(funciones[operacion], repeticiones)),
+            })
+
+    return resultados
+
+
+# =====================================================
+# CONSISTENCIA BAJO CONCURRENCIA
+# =====================================================
+def operador(cedula, regiones, reclamos, errores):
+    conn = conectar(DESPUES)
+    try:
+        for i in range(reclamos):
+            region = f"R{i % regiones}"
+            tomada = reclamar_asignacion_operativa(conn, region, cedula, "Operario Catastral")
+            if not tomada:
+                continue
+
+            asignacion, _ = tomada
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT array_agg(bloque)
+                FROM asignaciones
+                WHERE region = %s AND asignacion = %s
+            """, (region, asignacion))
+            bloques = cur.fetchone()[0]
+            conn.rollback()
+
+            aplicar_transicion(conn, region, asignacion, bloques, "proceso", cedula, "Operario Catastral")
+            # La mitad de los bloques llega a finalizado: asignación mixta
+            aplicar_transicion(
+                conn, region, asignacion, bloques[: len(bloques) // 2],
+                "finalizado", cedula, "Operario Catastral"
+            )
+    except Exception as e:
+        errores.append(f"{cedula}: {e}")
+    finally:
+        conn.close()
+
+
+def medir_consistencia(regiones, operadores, reclamos):
+    errores = []
+    hilos = [
+        threading.Thread(target=operador, args=(f"OP{i:06d}", regiones, reclamos, errores))
+        for i in range(1, operadores + 1)
+    ]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    conn = conectar(DESPUES)
+    cur = conn.cursor()
+
+    # QC sobre asignaciones completamente finalizadas
+    qc = reclamar_asignacion_qc(conn, REGION, "OP000005", "Operario Calidad")
+
+    # Desasignar una asignación completa
+    asignados = asignaciones_completas(conn, REGION, "asignados")
+    if asignados:
+        cur.execute("""
+            UPDATE asignaciones
+            SET operador_actual = NULL,
+                estado_actual = 'pendiente'
+            WHERE asignacion = %s
+              AND region = %s
+        """, (asignados[0], REGION))
+
+    # Borrar una asignación y mover otra de región
+    cur.execute("""
+        DELETE FROM asignaciones
+        WHERE region = %s
+          AND asignacion = (SELECT min(asignacion) FROM asignaciones WHERE region = %s)
+    """, (REGION, REGION))
+    cur.execute("""
+        UPDATE asignaciones
+        SET region = 'MOVIDA'
+        WHERE region = %s
+          AND asignacion = (SELECT max(asignacion) FROM asignaciones WHERE region = %s)
+    """, (REGION, REGION))
+    conn.commit()
+
+    deriva = verificar(conn)
+    conn.close()
+
+    return {
+        "operadores": operadores,
+        "reclamos_por_operador": reclamos,
+        "errores": errores,
+        "reclamo_qc": qc is not None,
+        "asignaciones_con_deriva": len(deriva),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--regiones", type=int, default=2)
+    parser.add_argument("--asignaciones", type=int, default=2000)
+    parser.add_argument("--bloques", type=int, default=50)
+    parser.add_argument("--operadores", type=int, default=60)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--concurrentes", type=int, default=16)
+    parser.add_argument("--reclamos", type=int, default=10)
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar los schemas al terminar")
+    args = parser.parse_args()
+
+    sembrado = (args.regiones, args.asignaciones, args.bloques, args.operadores)
+    antes = sembrar(ANTES, False, *sembrado)
+    despues = sembrar(DESPUES, True, *sembrado)
+
+    cur = despues.cursor()
+    cur.execute("SELECT count(*) FROM asignaciones WHERE region = %s", (REGION,))
+    bloques_region = cur.fetchone()[0]
+    despues.rollback()
+
+    lecturas = medir_lecturas(antes, despues, args.repeticiones)
+    escritas = medir_escrituras(antes, despues, args.bloques, args.repeticiones)
+    antes.close()
+    despues.close()
+
+    consistencia = medir_consistencia(args.regiones, args.concurrentes, args.reclamos)
+
+    if not args.conservar:
+        eliminar_esquema(ANTES)
+        eliminar_esquema(DESPUES)
+
+    imprimir({
+        "benchmark": "resumen_asignaciones",
+        "regiones": args.regiones,
+        "asignaciones": args.asignaciones,
+        "bloques_por_asignacion": args.bloques,
+        "bloques_en_region": bloques_region,
+        "lecturas": lecturas,
+        "escrituras": escritas,
+        "consistencia": consistencia,
+    })
+
+
+if __name__ == "__main__":
+    main()
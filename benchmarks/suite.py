@@ -0,0 +1,361 @@
+"""
+Suite de benchmarks de las rutas de consulta de cada módulo.
+
+Llena un schema con benchmarks.datos a la escala pedida (o reutiliza uno ya
+sembrado con --reusar) y mide, con la misma conexión contada, cada camino
+que ejecutan las páginas: autoasignación, transición masiva, historial,
+rollup de horas, mapa del dashboard, carga CSV, motor de correcciones,
+catálogo de producción y eventos por grupo.
+
+El resultado es JSON (versión, escala, filas por tabla y por caso: latencias
+y sentencias por ejecución). Con --comparar se contrasta contra un
+resultado anterior y el proceso termina con código 1 si algún caso empeoró
+más que --tolerancia.
+
+Los casos que escriben (reclamos, transiciones, cargas, eventos) modifican
+el schema; con --reusar conviene volver a sembrarlo entre corridas.
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.suite \
+        --escala media --salida resultados/suite.json
+    python -m benchmarks.suite --escala media --comparar resultados/suite.json
+"""
+import argparse
+import io
+import itertools
+import json
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.comun import (
+    conectar_contada,
+    cronometrar,
+    eliminar_esquema,
+    imprimir,
+    preparar_esquema,
+    resumen,
+)
+from benchmarks.datos import ESCALAS, conteos, geojson_sintetico, sembrar_todo
+from servicios import motor_correcciones
+from servicios.carga_asignaciones import cargar_asignaciones, leer_por_bloques
+from servicios.catalogos import CatalogoAsignaciones
+from servicios.cola_asignaciones import reclamar_asignacion_operativa
+from servicios.eventos import registrar_eventos
+from servicios.historial import consultar_reportes, sql_reportes
+from servicios.horas_diarias import consultar_horas_diarias
+from servicios.mapa_bloques import features_mapa, indexar_geojson, propiedades_por_bloque, subcapa
+from servicios.paginacion import consultar_pagina
+from servicios.perfilador import version
+from servicios.transiciones import aplicar_transicion
+
+DESDE = date(2022, 1, 1)
+
+
+# =====================================================
+# CASOS
+# Cada caso recibe el contexto y devuelve la función a cronometrar.
+# =====================================================
+def caso_autoasignacion(ctx):
+    operadores = itertools.cycle(ctx["operativos"])
+
+    def correr():
+        reclamar_asignacion_operativa(ctx["conn"], "R0", next(operadores), "Operario Catastral")
+
+    return correr
+
+
+def caso_transicion_masiva(ctx):
+    df = pd.read_sql("""
+        SELECT region, asignacion, operador_actual, array_agg(bloque) AS bloques
+        FROM asignaciones
+        WHERE estado_actual = 'asignado'
+        GROUP BY region, asignacion, operador_actual
+        ORDER BY region, asignacion
+    """, ctx["conn"])
+    if len(df) <= ctx["repeticiones"]:
+        raise RuntimeError("No hay suficientes asignaciones en estado 'asignado' para transicion_masiva")
+    filas = iter(df.itertuples(index=False))
+
+    def correr():
+        f = next(filas)
+        aplicar_transicion(
+            ctx["conn"], f.region, f.asignacion, f.bloques, "proceso",
+            f.operador_actual, "Operario Catastral"
+        )
+
+    return correr
+
+
+def caso_historial_supervisor(ctx):
+    fin = ctx["ultimo_dia"]
+
+    def correr():
+        consultar_reportes(
+            ctx["conn"], fin - timedelta(days=30), fin,
+            " AND r.supervisor_nombre = %s", ["Supervisor 1"]
+        )
+
+    return correr
+
+
+def caso_historial_pagina(ctx):
+    fin = ctx["ultimo_dia"]
+
+    def correr():
+        consultar_pagina(ctx["conn"], sql_reportes(), [fin - timedelta(days=365), fin], descendente=True)
+
+    return correr
+
+
+def caso_horas_diarias(ctx):
+    fin = ctx["ultimo_dia"]
+
+    def correr():
+        consultar_horas_diarias(ctx["conn"], fin - timedelta(days=30), fin)
+
+    return correr
+
+
+def caso_dashboard_mapa(ctx):
+    capa = subcapa(ctx["capa"], ctx["capa"].claves["region"] == "R0")
+
+    def correr():
+        df_asig = pd.read_sql("""
+            SELECT
+                a.region,
+                a.asignacion,
+                a.bloque,
+                a.estado_actual,
+                a.proceso_actual,
+                COALESCE(p.nombre_completo, '—') AS operador
+            FROM asignaciones a
+            LEFT JOIN personal p
+                ON p.cedula = a.operador_actual
+            WHERE a.region = %s
+        """, ctx["conn"], params=["R0"])
+        features_mapa(capa, propiedades_por_bloque(capa, df_asig))
+
+    return correr
+
+
+def caso_carga_csv(ctx):
+    escala = ctx["escala"]
+    filas = min(escala["asignaciones"] * escala["bloques"], 100_000)
+    csv = pd.DataFrame({
+        "asignacion": [f"C{i // 50:06d}" for i in range(filas)],
+        "bloque": [i % 50 for i in range(filas)],
+        "complejidad": "media",
+    }).to_csv(index=False)
+    regiones = iter(range(1_000_000))
+
+    def correr():
+        archivo = io.StringIO(csv)
+        cargar_asignaciones(ctx["conn"], f"CARGA{next(regiones)}", leer_por_bloques(archivo))
+
+    return correr
+
+
+def caso_motor_correcciones(ctx):
+    def correr():
+        motor_correcciones.revisar(ctx["conn"])
+        ctx["conn"].rollback()
+
+    return correr
+
+
+def caso_catalogo(ctx):
+    def correr():
+        CatalogoAsignaciones().asegurar(ctx["conn"])
+        ctx["conn"].rollback()
+
+    return correr
+
+
+def caso_eventos_grupo(ctx):
+    personas = ctx["personal"][:50]
+    dias = iter(range(10_000))
+
+    def correr():
+        registrar_eventos(
+            ctx["conn"], personas, "SUP00001",
+            ctx["ultimo_dia"] + timedelta(days=1 + next(dias)), 8.5, 1, "suite"
+        )
+
+    return correr
+
+
+CASOS = [
+    ("autoasignacion", caso_autoasignacion),
+    ("transicion_masiva", caso_transicion_masiva),
+    ("historial_supervisor", caso_historial_supervisor),
+    ("historial_pagina", caso_historial_pagina),
+    ("horas_diarias", caso_horas_diarias),
+    ("dashboard_mapa", caso_dashboard_mapa),
+    ("carga_csv", caso_carga_csv),
+    ("motor_correcciones", caso_motor_correcciones),
+    ("catalogo", caso_catalogo),
+    ("eventos_grupo", caso_eventos_grupo),
+]
+
+
+# =====================================================
+# CONTEXTO / EJECUCIÓN
+# =====================================================
+def contexto(conn, escala, repeticiones):
+    cur = conn.cursor()
+    cur.execute("SELECT max(fecha_reporte) FROM reportes")
+    ultimo_dia = cur.fetchone()[0] or DESDE
+
+    cur.execute("SELECT cedula FROM personal WHERE perfil = 3 ORDER BY cedula")
+    operativos = [row[0] for row in cur.fetchall()]
+
+    cur.execute("""
+        SELECT cedula, perfil, puesto, supervisor
+        FROM personal
+        WHERE cedula LIKE 'OP%'
+        ORDER BY cedula
+    """)
+    personal = [
+        {"cedula": c, "perfil": pf, "puesto": pu, "supervisor": s}
+        for c, pf, pu, s in cur.fetchall()
+    ]
+    conn.rollback()
+
+    # Mismo GeoJSON que escribiría `python -m benchmarks.datos --geojson`
+    capa = indexar_geojson(geojson_sintetico(
+        escala["asignaciones"] * escala["bloques"],
+        bloques_por_asignacion=escala["bloques"],
+        regiones=escala["regiones"],
+    ))
+
+    return {
+        "conn": conn,
+        "escala": escala,
+        "ultimo_dia": ultimo_dia,
+        "repeticiones": repeticiones,
+        "operativos": operativos,
+        "personal": personal,
+        "capa": capa,
+    }
+
+
+def correr_casos(ctx, repeticiones, solo=None):
+    conn = ctx["conn"]
+    resultados = []
+
+    for nombre, armar in CASOS:
+        if solo and nombre not in solo:
+            continue
+
+        funcion = armar(ctx)
+        funcion()  # calentamiento (planes, caches del servidor)
+
+        conn.sentencias = 0
+        tiempos = cronometrar(funcion, repeticiones)
+        resultados.append({
+            "caso": nombre,
+            "sentencias": round(conn.sentencias / repeticiones, 1),
+            **resumen(tiempos),
+        })
+
+    return resultados
+
+
+def comparar(anterior, actual, tolerancia, minimo_ms=2.0):
+    """
+    p50 por caso contra un resultado anterior. Es regresión si el p50 creció
+    más que `tolerancia` y más que `minimo_ms` (ruido de casos de pocos ms),
+    o si el caso envía más sentencias que antes.
+    """
+    previos = {c["caso"]: c for c in anterior["casos"]}
+    filas = []
+
+    for c in actual["casos"]:
+        p = previos.get(c["caso"])
+        if p is None:
+            continue
+        cambio = c["p50_ms"] / p["p50_ms"] - 1 if p["p50_ms"] else 0.0
+        filas.append({
+            "caso": c["caso"],
+            "p50_antes_ms": p["p50_ms"],
+            "p50_ahora_ms": c["p50_ms"],
+            "cambio_%": round(cambio * 100, 1),
+            "sentencias_antes": p["sentencias"],
+            "sentencias_ahora": c["sentencias"],
+            "regresion": (
+                cambio > tolerancia and c["p50_ms"] - p["p50_ms"] > minimo_ms
+                or c["sentencias"] > p["sentencias"]
+            ),
+        })
+
+    return pd.DataFrame(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--esquema", default="bench_suite")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--reusar", action="store_true",
+                        help="Usar el schema ya sembrado (benchmarks.datos) sin recrearlo")
+    parser.add_argument("--conservar", action="store_true",
+                        help="No eliminar el schema al terminar")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--casos", nargs="+", choices=[n for n, _ in CASOS])
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    parser.add_argument("--comparar", help="Resultado anterior (JSON) contra el cual comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.20)
+    parser.add_argument("--minimo-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    escala = ESCALAS[args.escala]
+
+    if not args.reusar:
+        conn = preparar_esquema(args.esquema)
+        sembrar_todo(conn, **escala)
+        conn.close()
+
+    conn = conectar_contada(args.esquema)
+    filas = conteos(conn)
+    cur = conn.cursor()
+    cur.execute("SHOW server_version")
+    servidor = cur.fetchone()[0]
+    conn.rollback()
+
+    resultados = correr_casos(contexto(conn, escala, args.repeticiones), args.repeticiones, args.casos)
+    conn.close()
+
+    if not args.reusar and not args.conservar:
+        eliminar_esquema(args.esquema)
+
+    resultado = {
+        "suite": "bditalia",
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "version": version(),
+        "postgres": servidor,
+        "escala": {"nombre": args.escala, **escala},
+        "filas": filas,
+        "repeticiones": args.repeticiones,
+        "casos": resultados,
+    }
+
+    if args.salida:
+        Path(args.salida).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.salida).write_text(
+            json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+    imprimir(resultado)
+
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        tabla = comparar(anterior, resultado, args.tolerancia, args.minimo_ms)
+        print(tabla.to_string(index=False), file=sys.stderr)
+        if tabla["regresion"].any():
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Benchmark de los trabajos en segundo plano (servicios.trabajos).
+
+Levanta el pool de trabajadores (`python -m servicios.trabajos`) contra un
+schema propio y, desde este proceso (el papel de la página), mide:
+
+- latencia de toma (de encolar a en_curso) con el pool ocioso y trabajos/s
+  en una ráfaga, con trabajos vacíos (desasignar una asignación inexistente)
+- una carga de asignaciones grande: duración, cantidad de
+  actualizaciones de progreso vistas y latencia de `consultar` (lo único
+  que hace la página) mientras el trabajador carga
+- desasignación y aplicación de correcciones como trabajos
+- cancelación de una carga en curso: tiempo hasta 'cancelado' y que no
+  quede ninguna fila de esa región (rollback)
+- reintento: un trabajo que falla vuelve a la cola con espera; con
+  max_intentos=1 queda fallido
+
+Uso:
+    BENCH_DSN="dbname=bditalia_bench" python -m benchmarks.trabajos \\
+        --procesos 2 --vacios 200 --filas 2000000
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.carga_asignaciones import escribir_csv
+from benchmarks.comun import dsn, eliminar_esquema, imprimir, preparar_esquema, resumen
+from benchmarks.datos import (
+    sembrar_asignaciones,
+    sembrar_catalogos,
+    sembrar_correcciones,
+    sembrar_personal,
+    sembrar_reportes,
+)
+from servicios import trabajos
+
+ESQUEMA = "bench_trabajos"
+SONDEO_S = 0.05
+
+
+def esperar(conn, trabajo_id, estados=trabajos.FINALES, limite_s=600):
+    """Sondea como la página hasta que el trabajo llegue a `estados`; devuelve (trabajo, tiempos de consultar)."""
+    tiempos, progresos = [], set()
+    fin = time.monotonic() + limite_s
+    while time.monotonic() < fin:
+        inicio = time.perf_counter()
+        trabajo = trabajos.consultar(conn, trabajo_id)
+        conn.rollback()
+        tiempos.append(time.perf_counter() - inicio)
+
+        progresos.add(round(trabajo["progreso"], 4))
+        if trabajo["estado"] in estados:
+            trabajo["progresos_vistos"] = len(progresos)
+            return trabajo, tiempos
+        time.sleep(SONDEO_S)
+    raise TimeoutError(f"El trabajo {trabajo_id} no llegó a {estados}")
+
+
+def iniciar_pool(procesos):
+    entorno = {**os.environ, "DATABASE_URL": f"{dsn()} options='-c search_path={ESQUEMA}'"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "servicios.trabajos", "--procesos", str(procesos)],
+        env=entorno,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def latencias_toma(conn, ids):
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT EXTRACT(EPOCH FROM iniciado_en - creado_en)
+        FROM trabajos
+        WHERE id = ANY(%s)
+    """, (ids,))
+    latencias = [float(fila[0]) for fila in cur.fetchall()]
+    conn.rollback()
+    return resumen(latencias)
+
+
+def trabajos_vacios(conn, n):
+    def vacio(i):
+        return trabajos.encolar(conn, "desasignar", {"region": "R0", "asignacion": f"no-existe-{i}"})
+
+    # Uno a la vez, con el pool ocioso: lo que tarda en despertar por NOTIFY
+    uno_a_uno = []
+    for i in range(n // 4):
+        uno_a_uno.append(vacio(i))
+        esperar(conn, uno_a_uno[-1])
+
+    # Ráfaga: todos encolados de una vez
+    inicio = time.perf_counter()
+    rafaga = [vacio(i) for i in range(n)]
+    for trabajo_id in rafaga:
+        esperar(conn, trabajo_id)
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "latencia_toma_ocioso": latencias_toma(conn, uno_a_uno),
+        "rafaga": n,
+        "rafaga_trabajos_por_s": round(n / segundos, 1),
+    }
+
+
+def carga(conn, ruta, region):
+    inicio = time.perf_counter()
+    trabajo_id = trabajos.encolar(conn, "carga_asignaciones", {"region": region, "ruta": str(ruta)})
+    trabajo, tiempos = esperar(conn, trabajo_id)
+
+    resultado = trabajo["resultado"] or {}
+    return {
+        "estado": trabajo["estado"],
+        "error": trabajo["error"],
+        "segundos": round(time.perf_counter() - inicio, 2),
+        "insertados": resultado.get("insertados"),
+        "rechazadas": resultado.get("rechazadas"),
+        "filas_por_s": resultado.get("filas_por_s"),
+        "progresos_vistos": trabajo["progresos_vistos"],
+        "archivo_borrado": not Path(ruta).exists(),
+        "consultar_pagina": resumen(tiempos),
+    }
+
+
+def cancelar_carga(conn, ruta, region):
+    trabajo_id = trabajos.encolar(conn, "carga_asignaciones", {"region": region, "ruta": str(ruta)})
+    esperar(conn, trabajo_id, estados=("en_curso",))
+    time.sleep(2 * trabajos.PROGRESO_S)
+
+    inicio = time.perf_counter()
+    trabajos.cancelar(conn, trabajo_id)
+    trabajo, _ = esperar(conn, trabajo_id)
+
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM asignaciones WHERE region = %s", (region,))
+    filas = cur.fetchone()[0]
+    conn.rollback()
+
+    return {
+        "estado": trabajo["estado"],
+        "progreso_al_cancelar": round(trabajo["progreso"], 3),
+        "hasta_cancelado_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        "filas_de_la_region": filas,
+    }
+
+
+def reintentos(conn, temporal):
+    ausente = str(temporal / "no-existe.csv")
+
+    con_reintento = trabajos.encolar(
+        conn, "carga_asignaciones", {"region": "X", "ruta": ausente}, max_intentos=2
+    )
+    # Falla en milisegundos: se espera directamente a verlo de vuelta en la cola
+    fin = time.monotonic() + 30
+    while time.monotonic() < fin:
+        trabajo = trabajos.consultar(conn, con_reintento)
+        conn.rollback()
+        if trabajo["estado"] == "pendiente" and trabajo["intentos"] == 1:
+            break
+        time.sleep(SONDEO_S)
+
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT round(EXTRACT(EPOCH FROM disponible_en - CURRENT_TIMESTAMP))
+        FROM trabajos
+        WHERE id = %s
+    """, (con_reintento,))
+    espera = float(cur.fetchone()[0])
+    conn.rollback()
+    trabajos.cancelar(conn, con_reintento)
+
+    sin_reintento = trabajos.encolar(
+        conn, "carga_asignaciones", {"region": "X", "ruta": ausente}, max_intentos=1
+    )
+    fallido, _ = esperar(conn, sin_reintento)
+
+    return {
+        "reencolado": trabajo["estado"] == "pendiente",
+        "error": trabajo["error"],
+        "reintento_en_s": espera,
+        "con_max_intentos_1": fallido["estado"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--procesos", type=int, default=2)
+    parser.add_argument("--vacios", type=int, default=200)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--solicitudes", type=int, default=5000)
+    args = parser.parse_args()
+
+    temporal = Path(tempfile.mkdtemp(prefix="trabajos_"))
+    conn = preparar_esquema(ESQUEMA)
+    sembrar_catalogos(conn)
+    sembrar_personal(conn, 100)
+    sembrar_asignaciones(conn, regiones=2, asignaciones=200, bloques=50)
+    sembrar_reportes(conn, max(10, args.solicitudes // 150))
+    sembrar_correcciones(conn, args.solicitudes)
+
+    pool = iniciar_pool(args.procesos)
+    try:
+        resultados = {"vacios": trabajos_vacios(conn, args.vacios)}
+
+        escribir_csv(temporal / "carga.csv", args.filas, 997)
+        shutil.copy(temporal / "carga.csv", temporal / "cancelar.csv")
+        resultados["carga"] = carga(conn, temporal / "carga.csv", "CARGA")
+        resultados["cancelacion"] = cancelar_carga(conn, temporal / "cancelar.csv", "CANCELADA")
+
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT region, asignacion
+            FROM asignaciones_resumen
+            WHERE asignados = bloques
+            LIMIT 1
+        """)
+        region, asignacion = cur.fetchone()
+        conn.rollback()
+        trabajo, _ = esperar(conn, trabajos.encolar(
+            conn, "desasignar", {"region": region, "asignacion": asignacion}
+        ))
+        resultados["desasignar"] = {"estado": trabajo["estado"], **(trabajo["resultado"] or {})}
+
+        trabajo, _ = esperar(conn, trabajos.encolar(conn, "correcciones"))
+        resultado = trabajo["resultado"] or {}
+        resultados["correcciones"] = {
+            "estado": trabajo["estado"],
+            "error": trabajo["error"],
+            **{k: resultado.get(k) for k in ("aplicadas", "modificados", "eliminados", "pendientes")},
+        }
+
+        resultados["reintentos"] = reintentos(conn, temporal)
+    finally:
+        pool.terminate()
+        pool.wait()
+        conn.close()
+        shutil.rmtree(temporal, ignore_errors=True)
+        eliminar_esquema(ESQUEMA)
+
+    imprimir({
+        "benchmark": "trabajos",
+        "procesos": args.procesos,
+        "filas": args.filas,
+        **resultados,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,256 @@
 import psycopg2
 import streamlit as st
 import os
+import threading
+import time
+from contextlib import contextmanager
+from psycopg2 import extensions, pool
+from servicios import instrumentacion
+
+
+# =====================================================
+# POOL DE CONEXIONES
+# =====================================================
+class PoolAgotado(pool.PoolError):
+    pass
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones psycopg2 compartido por todo el servidor.
+
+    - Entrega una conexión por rerun (checkout) y la recibe de vuelta al final.
+    - Bloquea hasta `timeout` segundos cuando se alcanzó el máximo.
+    - Verifica la conexión antes de entregarla (health check) y descarta las rotas.
+    - Hace rollback de cualquier transacción abierta o abortada al devolverla.
+    - Sus cursores miden cada sentencia (servicios.instrumentacion).
+    - Lleva estadísticas de contención (esperas por un cupo, agotamientos,
+      máximo en uso) para las pruebas de carga y la página de rendimiento.
+    """
+
+    def __init__(self, dsn, minimo=1, maximo=10, timeout=30, ping_despues=60):
+        self.dsn = dsn
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self.ping_despues = ping_despues
+
+        self._libres = []          # [(conn, momento_devolucion)]
+        self._lock = threading.Lock()
+        self._cupos = threading.BoundedSemaphore(maximo)
+        self._reiniciar_estadisticas()
+
+        for _ in range(minimo):
+            self._libres.append((self._nueva(), time.monotonic()))
+
+    def _nueva(self):
+        return psycopg2.connect(
+            self.dsn, cursor_factory=instrumentacion.CursorInstrumentado
+        )
+
+    def _sana(self, conn, inactiva):
+        if conn.closed:
+            return False
+
+        if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+
+        # Solo se hace ping a conexiones que llevan tiempo inactivas
+        if inactiva < self.ping_despues:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def obtener(self):
+        if not self._cupos.acquire(blocking=False):
+            # Sin cupo libre: se espera (y se mide la espera)
+            inicio = time.perf_counter()
+            obtenido = self._cupos.acquire(timeout=self.timeout)
+            espera = time.perf_counter() - inicio
+
+            with self._lock:
+                self._esperas += 1
+                self._espera_total += espera
+                self._espera_max = max(self._espera_max, espera)
+                self._agotamientos += not obtenido
+
+            if not obtenido:
+                raise PoolAgotado(
+                    f"No hay conexiones disponibles (máximo {self.maximo})"
+                )
+
+        with self._lock:
+            self._entregas += 1
+            self._en_uso += 1
+            self._en_uso_max = max(self._en_uso_max, self._en_uso)
+
+        try:
+            while True:
+                with self._lock:
+                    libre = self._libres.pop() if self._libres else None
+
+                if libre is None:
+                    return self._nueva()
+
+                conn, devuelta = libre
+                if self._sana(conn, time.monotonic() - devuelta):
+                    return conn
+
+                _cerrar(conn)
+
+        except Exception:
+            with self._lock:
+                self._en_uso -= 1
+            self._cupos.release()
+            raise
+
+    def devolver(self, conn):
+        try:
+            if not conn.closed:
+                estado = conn.get_transaction_status()
+
+                if estado == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    _cerrar(conn)
+                elif estado != extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        _cerrar(conn)
+
+            if not conn.closed:
+                with self._lock:
+                    self._libres.append((conn, time.monotonic()))
+        finally:
+            with self._lock:
+                self._en_uso -= 1
+            self._cupos.release()
+
+    # =========================
+    # ESTADÍSTICAS DE CONTENCIÓN
+    # =========================
+    def _reiniciar_estadisticas(self):
+        self._entregas = 0
+        self._esperas = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._agotamientos = 0
+        self._en_uso = getattr(self, "_en_uso", 0)
+        self._en_uso_max = self._en_uso
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "maximo": self.maximo,
+                "en_uso": self._en_uso,
+                "en_uso_max": self._en_uso_max,
+                "libres": len(self._libres),
+                "entregas": self._entregas,
+                "esperas": self._esperas,
+                "espera_total_ms": round(self._espera_total * 1000, 1),
+                "espera_max_ms": round(self._espera_max * 1000, 1),
+                "agotamientos": self._agotamientos,
+            }
+
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            self._reiniciar_estadisticas()
+
+    def cerrar(self):
+        with self._lock:
+            libres, self._libres = self._libres, []
+
+        for conn, _ in libres:
+            _cerrar(conn)
+
+
+def _cerrar(conn):
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+
 
 @st.cache_resource
+def get_pool():
+    credenciales = st.secrets["db_credentials"]
+
+    instrumentacion.configurar(
+        float(credenciales.get("SQL_LENTO_MS", instrumentacion.UMBRAL_LENTO_MS))
+    )
+
+    return PoolConexiones(
+        credenciales["URI"],
+        minimo=int(credenciales.get("POOL_MIN", 2)),
+        maximo=int(credenciales.get("POOL_MAX", 20)),
+        timeout=float(credenciales.get("POOL_TIMEOUT", 30)),
+    )
+
+
+# =====================================================
+# CONEXIÓN POR RERUN
+# =====================================================
+_local = threading.local()
+
+
 def get_connection():
-    return psycopg2.connect(st.secrets["db_credentials"]["URI"])
+    """
+    Devuelve la conexión asignada al rerun actual.
+
+    La primera llamada del rerun la toma del pool; las siguientes reutilizan
+    la misma. `liberar_conexion()` (o `conexion_por_rerun()`) la devuelve.
+    """
+    conn = getattr(_local, "conn", None)
+
+    if conn is not None and conn.closed:
+        # Conexión rota durante el rerun: se libera su cupo y se toma otra
+        liberar_conexion()
+        conn = None
+
+    if conn is None:
+        conn = get_pool().obtener()
+        _local.conn = conn
+
+    return conn
+
+
+def liberar_conexion():
+    conn = getattr(_local, "conn", None)
+    _local.conn = None
+
+    if conn is not None:
+        get_pool().devolver(conn)
+
+
+@contextmanager
+def conexion_por_rerun():
+    """
+    Devuelve al salir la conexión del rerun. Anidable: solo la devuelve si
+    la tomó este bloque, así un st.fragment que se re-ejecuta solo libera
+    la suya sin soltar la del rerun completo que lo contiene.
+    """
+    propia = getattr(_local, "conn", None) is None
+    try:
+        yield
+    finally:
+        if propia:
+            liberar_conexion()
+
+
+# =====================================================
+# CONEXIÓN DIRECTA (scripts de línea de comandos)
+# =====================================================
+def conectar_directo():
+    """
+    Conexión sin pool para herramientas `python -m ...`.
+
+    Usa DATABASE_URL si está definida y, si no, el mismo secrets.toml de la app.
+    """
+    return psycopg2.connect(
+        os.environ.get("DATABASE_URL") or st.secrets["db_credentials"]["URI"]
+    )
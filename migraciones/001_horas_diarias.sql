@@ -0,0 +1,117 @@
+-- =====================================================
+-- 001 · Rollup diario de horas por persona
+-- Mantenido por triggers de sentencia sobre reportes (tablas de transición),
+-- así que cualquier INSERT / UPDATE / DELETE lo actualiza en la misma
+-- transacción, venga de Producción, Eventos, Correcciones o de un script.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS horas_diarias (
+    cedula_personal TEXT NOT NULL,
+    fecha_reporte DATE NOT NULL,
+    total_horas NUMERIC NOT NULL DEFAULT 0,
+    reportes_produccion INTEGER NOT NULL DEFAULT 0,
+    reportes_evento INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cedula_personal, fecha_reporte)
+);
+
+CREATE INDEX IF NOT EXISTS horas_diarias_fecha_idx
+    ON horas_diarias (fecha_reporte);
+
+
+CREATE OR REPLACE FUNCTION horas_diarias_aplicar() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE horas_diarias h
+        SET total_horas = h.total_horas - v.total_horas,
+            reportes_produccion = h.reportes_produccion - v.reportes_produccion,
+            reportes_evento = h.reportes_evento - v.reportes_evento
+        FROM (
+            SELECT
+                cedula_personal,
+                fecha_reporte,
+                COALESCE(SUM(horas), 0) AS total_horas,
+                COUNT(*) FILTER (WHERE tipo_reporte = 'produccion') AS reportes_produccion,
+                COUNT(*) FILTER (WHERE tipo_reporte = 'evento') AS reportes_evento
+            FROM viejas
+            GROUP BY cedula_personal, fecha_reporte
+        ) v
+        WHERE h.cedula_personal = v.cedula_personal
+          AND h.fecha_reporte = v.fecha_reporte;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO horas_diarias AS h (
+            cedula_personal, fecha_reporte, total_horas,
+            reportes_produccion, reportes_evento
+        )
+        SELECT
+            cedula_personal,
+            fecha_reporte,
+            COALESCE(SUM(horas), 0),
+            COUNT(*) FILTER (WHERE tipo_reporte = 'produccion'),
+            COUNT(*) FILTER (WHERE tipo_reporte = 'evento')
+        FROM nuevas
+        GROUP BY cedula_personal, fecha_reporte
+        ON CONFLICT (cedula_personal, fecha_reporte) DO UPDATE
+        SET total_horas = h.total_horas + EXCLUDED.total_horas,
+            reportes_produccion = h.reportes_produccion + EXCLUDED.reportes_produccion,
+            reportes_evento = h.reportes_evento + EXCLUDED.reportes_evento;
+    END IF;
+
+    -- Días que quedaron sin reportes
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM horas_diarias h
+        USING (SELECT DISTINCT cedula_personal, fecha_reporte FROM viejas) v
+        WHERE h.cedula_personal = v.cedula_personal
+          AND h.fecha_reporte = v.fecha_reporte
+          AND h.reportes_produccion <= 0
+          AND h.reportes_evento <= 0
+          AND NOT EXISTS (
+              SELECT 1
+              FROM reportes r
+              WHERE r.cedula_personal = v.cedula_personal
+                AND r.fecha_reporte = v.fecha_reporte
+          );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS horas_diarias_insert ON reportes;
+CREATE TRIGGER horas_diarias_insert
+    AFTER INSERT ON reportes
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION horas_diarias_aplicar();
+
+DROP TRIGGER IF EXISTS horas_diarias_update ON reportes;
+CREATE TRIGGER horas_diarias_update
+    AFTER UPDATE ON reportes
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION horas_diarias_aplicar();
+
+DROP TRIGGER IF EXISTS horas_diarias_delete ON reportes;
+CREATE TRIGGER horas_diarias_delete
+    AFTER DELETE ON reportes
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION horas_diarias_aplicar();
+
+
+-- Carga inicial (se bloquean escrituras mientras se copia)
+LOCK TABLE reportes IN SHARE MODE;
+
+DELETE FROM horas_diarias;
+
+INSERT INTO horas_diarias (
+    cedula_personal, fecha_reporte, total_horas,
+    reportes_produccion, reportes_evento
+)
+SELECT
+    cedula_personal,
+    fecha_reporte,
+    COALESCE(SUM(horas), 0),
+    COUNT(*) FILTER (WHERE tipo_reporte = 'produccion'),
+    COUNT(*) FILTER (WHERE tipo_reporte = 'evento')
+FROM reportes
+GROUP BY cedula_personal, fecha_reporte;
@@ -0,0 +1,158 @@
+-- =====================================================
+-- 002 · Resumen de estados por asignación
+-- Conteo de bloques por estado de cada (región, asignación), mantenido por
+-- triggers de sentencia sobre asignaciones (tablas de transición). Las
+-- preguntas "¿está toda pendiente / asignada / finalizada?" de la
+-- asignación manual, las autoasignaciones y la desasignación pasan a ser
+-- lecturas de este resumen por índice, sin GROUP BY sobre la región.
+-- Los bloques sin región o sin asignación no se cuentan (las páginas
+-- tampoco los muestran); un TRUNCATE de asignaciones vacía el resumen.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS asignaciones_resumen (
+    region TEXT NOT NULL,
+    asignacion TEXT NOT NULL,
+    bloques INTEGER NOT NULL DEFAULT 0,
+    pendientes INTEGER NOT NULL DEFAULT 0,
+    pendientes_operativo INTEGER NOT NULL DEFAULT 0,
+    asignados INTEGER NOT NULL DEFAULT 0,
+    finalizados INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (region, asignacion)
+);
+
+-- Un índice parcial por cada lista que se consulta
+CREATE INDEX IF NOT EXISTS asignaciones_resumen_pendientes_idx
+    ON asignaciones_resumen (region, asignacion)
+    WHERE pendientes = bloques;
+
+CREATE INDEX IF NOT EXISTS asignaciones_resumen_operativo_idx
+    ON asignaciones_resumen (region, asignacion)
+    WHERE pendientes_operativo = bloques;
+
+CREATE INDEX IF NOT EXISTS asignaciones_resumen_asignados_idx
+    ON asignaciones_resumen (region, asignacion)
+    WHERE asignados = bloques;
+
+CREATE INDEX IF NOT EXISTS asignaciones_resumen_finalizados_idx
+    ON asignaciones_resumen (region, asignacion)
+    WHERE finalizados = bloques;
+
+
+CREATE OR REPLACE FUNCTION asignaciones_resumen_aplicar() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    -- Bloques que salen (-1) y entran (+1) al resumen según la operación
+    cambios TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM asignaciones_resumen;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        cambios := 'SELECT region, asignacion, estado_actual, proceso_actual, 1 AS signo
+                    FROM nuevas';
+
+    ELSIF TG_OP = 'DELETE' THEN
+        cambios := 'SELECT region, asignacion, estado_actual, proceso_actual, -1 AS signo
+                    FROM viejas';
+
+    ELSE
+        -- Solo las filas que cambiaron algo que el resumen cuenta
+        cambios := 'SELECT x.*
+                    FROM viejas v
+                    JOIN nuevas n ON n.id = v.id
+                    CROSS JOIN LATERAL (VALUES
+                        (v.region, v.asignacion, v.estado_actual, v.proceso_actual, -1),
+                        (n.region, n.asignacion, n.estado_actual, n.proceso_actual, 1)
+                    ) x (region, asignacion, estado_actual, proceso_actual, signo)
+                    WHERE (v.region, v.asignacion, v.estado_actual, v.proceso_actual)
+                          IS DISTINCT FROM (n.region, n.asignacion, n.estado_actual, n.proceso_actual)';
+    END IF;
+
+    EXECUTE format($sql$
+        INSERT INTO asignaciones_resumen AS r (
+            region, asignacion, bloques, pendientes,
+            pendientes_operativo, asignados, finalizados
+        )
+        SELECT
+            c.region,
+            c.asignacion,
+            SUM(c.signo),
+            COALESCE(SUM(c.signo) FILTER (WHERE c.estado_actual = 'pendiente'), 0),
+            COALESCE(SUM(c.signo) FILTER (WHERE c.estado_actual = 'pendiente'
+                                            AND c.proceso_actual = 'operativo'), 0),
+            COALESCE(SUM(c.signo) FILTER (WHERE c.estado_actual = 'asignado'), 0),
+            COALESCE(SUM(c.signo) FILTER (WHERE c.estado_actual = 'finalizado'), 0)
+        FROM (%s) c
+        WHERE c.region IS NOT NULL
+          AND c.asignacion IS NOT NULL
+        GROUP BY c.region, c.asignacion
+        -- Siempre en el mismo orden: evita deadlocks entre transacciones
+        ORDER BY c.region, c.asignacion
+        ON CONFLICT (region, asignacion) DO UPDATE
+        SET bloques = r.bloques + EXCLUDED.bloques,
+            pendientes = r.pendientes + EXCLUDED.pendientes,
+            pendientes_operativo = r.pendientes_operativo + EXCLUDED.pendientes_operativo,
+            asignados = r.asignados + EXCLUDED.asignados,
+            finalizados = r.finalizados + EXCLUDED.finalizados
+    $sql$, cambios);
+
+    -- Asignaciones que quedaron sin bloques
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM asignaciones_resumen r
+        USING (SELECT DISTINCT region, asignacion FROM viejas) v
+        WHERE r.region = v.region
+          AND r.asignacion = v.asignacion
+          AND r.bloques <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS asignaciones_resumen_insert ON asignaciones;
+CREATE TRIGGER asignaciones_resumen_insert
+    AFTER INSERT ON asignaciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_resumen_aplicar();
+
+DROP TRIGGER IF EXISTS asignaciones_resumen_update ON asignaciones;
+CREATE TRIGGER asignaciones_resumen_update
+    AFTER UPDATE ON asignaciones
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_resumen_aplicar();
+
+DROP TRIGGER IF EXISTS asignaciones_resumen_delete ON asignaciones;
+CREATE TRIGGER asignaciones_resumen_delete
+    AFTER DELETE ON asignaciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_resumen_aplicar();
+
+DROP TRIGGER IF EXISTS asignaciones_resumen_truncate ON asignaciones;
+CREATE TRIGGER asignaciones_resumen_truncate
+    AFTER TRUNCATE ON asignaciones
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_resumen_aplicar();
+
+
+-- Carga inicial (se bloquean escrituras mientras se copia)
+LOCK TABLE asignaciones IN SHARE MODE;
+
+DELETE FROM asignaciones_resumen;
+
+INSERT INTO asignaciones_resumen (
+    region, asignacion, bloques, pendientes,
+    pendientes_operativo, asignados, finalizados
+)
+SELECT
+    region,
+    asignacion,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE estado_actual = 'pendiente'),
+    COUNT(*) FILTER (WHERE estado_actual = 'pendiente' AND proceso_actual = 'operativo'),
+    COUNT(*) FILTER (WHERE estado_actual = 'asignado'),
+    COUNT(*) FILTER (WHERE estado_actual = 'finalizado')
+FROM asignaciones
+WHERE region IS NOT NULL
+  AND asignacion IS NOT NULL
+GROUP BY region, asignacion;
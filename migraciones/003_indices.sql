@@ -0,0 +1,78 @@
+-- =====================================================
+-- 003 · Índices para los accesos de los módulos
+-- Cada índice corresponde a un filtro u orden que usan las páginas
+-- (ver benchmarks/asesor_indices.py, que verifica los planes). Los
+-- parciales cubren solo los estados activos, que son los que se consultan.
+-- CREATE INDEX sin CONCURRENTLY bloquea escrituras en la tabla mientras se
+-- construye: conviene aplicar la migración fuera del horario de carga.
+-- =====================================================
+
+-- -----------------------------------------------------
+-- asignaciones
+-- -----------------------------------------------------
+
+-- Bloques de una asignación (transiciones, mapa, carga: NOT EXISTS por bloque)
+CREATE INDEX IF NOT EXISTS asignaciones_region_asignacion_bloque_idx
+    ON asignaciones (region, asignacion, bloque);
+
+-- Panel del operador: sus asignaciones y bloques en la región
+CREATE INDEX IF NOT EXISTS asignaciones_operador_region_idx
+    ON asignaciones (operador_actual, region, asignacion)
+    WHERE operador_actual IS NOT NULL;
+
+-- "¿Tiene una asignación activa?" antes de autoasignarse
+CREATE INDEX IF NOT EXISTS asignaciones_operador_activo_idx
+    ON asignaciones (operador_actual)
+    WHERE estado_actual IN ('asignado', 'proceso', 'corregido')
+      AND proceso_actual = 'operativo';
+
+-- Panel de control de calidad
+CREATE INDEX IF NOT EXISTS asignaciones_qc_region_idx
+    ON asignaciones (qc_actual, region, asignacion)
+    WHERE qc_actual IS NOT NULL;
+
+-- -----------------------------------------------------
+-- asignaciones_historial
+-- -----------------------------------------------------
+
+-- NOT EXISTS de la autoasignación de QC: "¿este usuario fue su operador?"
+CREATE INDEX IF NOT EXISTS asignaciones_historial_operador_idx
+    ON asignaciones_historial (asignacion, region, usuario)
+    WHERE proceso = 'operativo'
+      AND estado = 'asignado';
+
+-- -----------------------------------------------------
+-- reportes
+-- Las páginas filtran por rango de fechas (y persona o supervisor) y
+-- paginan por (fecha_reporte, id): el id al final permite recorrer el
+-- índice en el orden de la página sin ordenar. El Historial pagina por
+-- (fecha_reporte, persona, id): el índice da el orden por fecha y solo se
+-- ordena cada día (Incremental Sort). tipo_reporte se filtra sobre el
+-- mismo recorrido, así que no lleva índice propio.
+-- -----------------------------------------------------
+CREATE INDEX IF NOT EXISTS reportes_fecha_idx
+    ON reportes (fecha_reporte, id);
+
+CREATE INDEX IF NOT EXISTS reportes_cedula_fecha_idx
+    ON reportes (cedula_personal, fecha_reporte, id);
+
+CREATE INDEX IF NOT EXISTS reportes_supervisor_fecha_idx
+    ON reportes (supervisor_nombre, fecha_reporte, id);
+
+-- -----------------------------------------------------
+-- correcciones
+-- -----------------------------------------------------
+
+-- Solicitudes del operador
+CREATE INDEX IF NOT EXISTS correcciones_cedula_fecha_idx
+    ON correcciones (cedula, fecha);
+
+-- Pendientes (página del administrador y motor de correcciones)
+CREATE INDEX IF NOT EXISTS correcciones_pendientes_idx
+    ON correcciones (fecha, id)
+    WHERE estado = 'pendiente';
+
+ANALYZE asignaciones;
+ANALYZE asignaciones_historial;
+ANALYZE reportes;
+ANALYZE correcciones;
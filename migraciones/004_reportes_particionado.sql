@@ -0,0 +1,253 @@
+-- =====================================================
+-- 004 · reportes particionada por mes (fecha_reporte)
+-- Las páginas filtran siempre por rango de fecha_reporte, así que con
+-- particiones mensuales el planner descarta los meses fuera del rango
+-- (semana y año no sirven para eso: nadie filtra por ellos).
+--
+-- Esta migración instala las funciones de la conversión y:
+-- - si reportes está vacía (instalación nueva) la convierte aquí mismo;
+-- - si tiene datos no la toca: la conversión en línea (trigger espejo,
+--   copia por lotes y cambio de nombre al final) la hace
+--   `python -m servicios.particiones_reportes --migrar`.
+--
+-- La clave primaria pasa a ser (id, fecha_reporte): una tabla particionada
+-- solo admite claves únicas que incluyan la columna de partición. El id
+-- sigue saliendo de la misma secuencia.
+-- =====================================================
+
+-- Meses archivados fuera de la base (servicios.archivo_reportes)
+CREATE TABLE IF NOT EXISTS reportes_archivo (
+    particion TEXT PRIMARY KEY,
+    desde DATE NOT NULL,
+    hasta DATE NOT NULL,
+    filas BIGINT NOT NULL,
+    bytes BIGINT NOT NULL,
+    ruta TEXT NOT NULL,
+    archivada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- -----------------------------------------------------
+-- Partición de un mes
+-- Se crea suelta con un CHECK del rango, recibe las filas de ese mes que
+-- hubieran caído en la partición por defecto y se adjunta: ATTACH toma un
+-- bloqueo más liviano que CREATE ... PARTITION OF y, con el CHECK, no
+-- vuelve a recorrer la tabla. Devuelve false si ya existía.
+-- -----------------------------------------------------
+CREATE OR REPLACE FUNCTION reportes_crear_particion(padre REGCLASS, mes DATE)
+RETURNS BOOLEAN
+LANGUAGE plpgsql AS $$
+DECLARE
+    desde DATE := date_trunc('month', mes)::date;
+    hasta DATE := (date_trunc('month', mes) + INTERVAL '1 month')::date;
+    esquema TEXT;
+    nombre TEXT := 'reportes_' || to_char(mes, 'YYYY_MM');
+    defecto REGCLASS;
+BEGIN
+    SELECT n.nspname INTO esquema
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = padre;
+
+    IF to_regclass(format('%I.%I', esquema, nombre)) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I.%I (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        esquema, nombre, padre
+    );
+    EXECUTE format(
+        'ALTER TABLE %I.%I ADD CONSTRAINT %I CHECK (fecha_reporte >= %L AND fecha_reporte < %L)',
+        esquema, nombre, nombre || '_rango', desde, hasta
+    );
+
+    SELECT i.inhrelid::regclass INTO defecto
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = padre
+      AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT';
+
+    IF defecto IS NOT NULL THEN
+        -- Nadie escribe ese mes en la partición por defecto mientras se mueve
+        EXECUTE format('LOCK TABLE %s IN ACCESS EXCLUSIVE MODE', defecto);
+        EXECUTE format($sql$
+            WITH movidas AS (
+                DELETE FROM %s
+                WHERE fecha_reporte >= %L AND fecha_reporte < %L
+                RETURNING *
+            )
+            INSERT INTO %I.%I SELECT * FROM movidas
+        $sql$, defecto, desde, hasta, esquema, nombre);
+    END IF;
+
+    EXECUTE format(
+        'ALTER TABLE %s ATTACH PARTITION %I.%I FOR VALUES FROM (%L) TO (%L)',
+        padre, esquema, nombre, desde, hasta
+    );
+    EXECUTE format('ALTER TABLE %I.%I DROP CONSTRAINT %I', esquema, nombre, nombre || '_rango');
+
+    RETURN true;
+END;
+$$;
+
+
+-- -----------------------------------------------------
+-- Conversión, paso 1: tabla nueva con los meses [desde, hasta] + trigger espejo
+-- Desde aquí toda escritura en reportes se repite en reportes_particionada
+-- dentro de la misma transacción; la copia de lo anterior va por lotes.
+-- Los meses se crean antes que el trigger: mientras nadie escribe en la
+-- tabla nueva, ATTACH no compite con el espejo.
+-- -----------------------------------------------------
+CREATE OR REPLACE FUNCTION reportes_espejo_aplicar() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM reportes_particionada p
+        USING viejas v
+        WHERE p.id = v.id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO reportes_particionada
+        SELECT * FROM nuevas
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION reportes_preparar_particionada(desde DATE, hasta DATE) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    CREATE TABLE reportes_particionada (
+        LIKE reportes INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    ) PARTITION BY RANGE (fecha_reporte);
+
+    ALTER TABLE reportes_particionada
+        ADD CONSTRAINT reportes_particionada_pkey PRIMARY KEY (id, fecha_reporte);
+
+    -- Los índices de reportes (003); se propagan a cada partición
+    CREATE INDEX reportes_particionada_fecha_idx
+        ON reportes_particionada (fecha_reporte, id);
+    CREATE INDEX reportes_particionada_cedula_fecha_idx
+        ON reportes_particionada (cedula_personal, fecha_reporte, id);
+    CREATE INDEX reportes_particionada_supervisor_fecha_idx
+        ON reportes_particionada (supervisor_nombre, fecha_reporte, id);
+
+    -- Fechas sin partición (p. ej. mal digitadas): no se pierden, y
+    -- reportes_crear_particion las mueve cuando se crea su mes
+    CREATE TABLE reportes_fuera_de_rango
+        PARTITION OF reportes_particionada DEFAULT;
+
+    PERFORM reportes_crear_particion('reportes_particionada', m::date)
+    FROM generate_series(date_trunc('month', desde), hasta, INTERVAL '1 month') m;
+
+    CREATE TRIGGER reportes_espejo_insert
+        AFTER INSERT ON reportes
+        REFERENCING NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION reportes_espejo_aplicar();
+
+    CREATE TRIGGER reportes_espejo_update
+        AFTER UPDATE ON reportes
+        REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION reportes_espejo_aplicar();
+
+    CREATE TRIGGER reportes_espejo_delete
+        AFTER DELETE ON reportes
+        REFERENCING OLD TABLE AS viejas
+        FOR EACH STATEMENT EXECUTE FUNCTION reportes_espejo_aplicar();
+END;
+$$;
+
+
+-- -----------------------------------------------------
+-- Conversión, paso 2: cambio de nombre
+-- Un bloqueo exclusivo corto (solo catálogo: el ANALYZE de la tabla nueva
+-- va antes): la tabla anterior queda como reportes_anterior (sin triggers)
+-- hasta que se elimine a mano.
+-- -----------------------------------------------------
+CREATE OR REPLACE FUNCTION reportes_activar_particionada() RETURNS VOID
+LANGUAGE plpgsql AS $$
+DECLARE
+    indice RECORD;
+    secuencia TEXT := pg_get_serial_sequence('reportes', 'id');
+BEGIN
+    LOCK TABLE reportes IN ACCESS EXCLUSIVE MODE;
+
+    DROP TRIGGER reportes_espejo_insert ON reportes;
+    DROP TRIGGER reportes_espejo_update ON reportes;
+    DROP TRIGGER reportes_espejo_delete ON reportes;
+    DROP TRIGGER IF EXISTS horas_diarias_insert ON reportes;
+    DROP TRIGGER IF EXISTS horas_diarias_update ON reportes;
+    DROP TRIGGER IF EXISTS horas_diarias_delete ON reportes;
+
+    ALTER TABLE reportes RENAME TO reportes_anterior;
+    FOR indice IN
+        SELECT i.indexrelid::regclass AS oid, c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'reportes_anterior'::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %s RENAME TO %I', indice.oid,
+                       regexp_replace(indice.relname, '^reportes_', 'reportes_anterior_'));
+    END LOOP;
+
+    ALTER TABLE reportes_particionada RENAME TO reportes;
+    FOR indice IN
+        SELECT i.indexrelid::regclass AS oid, c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'reportes'::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %s RENAME TO %I', indice.oid,
+                       regexp_replace(indice.relname, '^reportes_particionada_', 'reportes_'));
+    END LOOP;
+
+    -- La secuencia del id pasa a la tabla nueva (si no, se borraría con la anterior)
+    IF secuencia IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY reportes.id', secuencia);
+    END IF;
+
+    -- Rollup de horas (001) sobre la tabla nueva
+    CREATE TRIGGER horas_diarias_insert
+        AFTER INSERT ON reportes
+        REFERENCING NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION horas_diarias_aplicar();
+
+    CREATE TRIGGER horas_diarias_update
+        AFTER UPDATE ON reportes
+        REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION horas_diarias_aplicar();
+
+    CREATE TRIGGER horas_diarias_delete
+        AFTER DELETE ON reportes
+        REFERENCING OLD TABLE AS viejas
+        FOR EACH STATEMENT EXECUTE FUNCTION horas_diarias_aplicar();
+END;
+$$;
+
+
+-- -----------------------------------------------------
+-- Instalación nueva: conversión inmediata
+-- -----------------------------------------------------
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'reportes'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM reportes) THEN
+        RAISE NOTICE 'reportes tiene datos: convertir con python -m servicios.particiones_reportes --migrar';
+        RETURN;
+    END IF;
+
+    PERFORM reportes_preparar_particionada(
+        (current_date - INTERVAL '1 month')::date,
+        (current_date + INTERVAL '3 months')::date
+    );
+    PERFORM reportes_activar_particionada();
+    DROP TABLE reportes_anterior;
+END;
+$$;
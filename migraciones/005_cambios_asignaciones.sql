@@ -0,0 +1,127 @@
+-- =====================================================
+-- 005 · Feed de cambios de asignaciones (LISTEN/NOTIFY)
+-- Triggers de sentencia sobre asignaciones publican en el canal
+-- asignaciones_cambios el estado nuevo de cada bloque que cambió, para que
+-- servicios.cambios_asignaciones mantenga el estado de bloques en memoria
+-- sin volver a consultar la tabla.
+--
+-- Mensajes (JSON; cada uno < 8000 bytes, el límite de NOTIFY):
+--   {"n": k, "u": [[id, region, asignacion, bloque, estado_actual,
+--                   proceso_actual, operador_actual, qc_actual,
+--                   cantidad_rechazos, cantidad_aprobaciones], ...]}
+--   {"n": k, "d": [id, ...]}         bloques borrados
+--   {"n": k, "r": 1}                 demasiados cambios o TRUNCATE: recargar
+--
+-- "n" sale de una secuencia: NOTIFY descarta los mensajes idénticos de una
+-- misma transacción, y un bloque que vuelve a un estado anterior generaría
+-- uno repetido. Los mensajes llegan al confirmar la transacción, en orden
+-- de commit.
+-- =====================================================
+
+CREATE SEQUENCE IF NOT EXISTS asignaciones_cambios_seq;
+
+
+CREATE OR REPLACE FUNCTION asignaciones_notificar() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    -- Más filas que esto en una sentencia (p. ej. una carga) → recargar
+    maximo CONSTANT INTEGER := 5000;
+    bytes_por_mensaje CONSTANT INTEGER := 7000;
+    estado_nuevo CONSTANT TEXT := 'json_build_array(
+        n.id, n.region, n.asignacion, n.bloque, n.estado_actual,
+        n.proceso_actual, n.operador_actual, n.qc_actual,
+        n.cantidad_rechazos, n.cantidad_aprobaciones
+    )::text';
+    -- (id, fila del mensaje) de cada bloque que cambió
+    cambios TEXT;
+    filas INTEGER;
+    lote RECORD;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('asignaciones_cambios', json_build_object(
+            'n', nextval('asignaciones_cambios_seq'), 'r', 1
+        )::text);
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        cambios := format('SELECT n.id, %s AS fila FROM nuevas n', estado_nuevo);
+
+    ELSIF TG_OP = 'DELETE' THEN
+        cambios := 'SELECT v.id, v.id::text AS fila FROM viejas v';
+
+    ELSE
+        -- Solo las filas que cambiaron algo que se publica
+        cambios := format('SELECT n.id, %s AS fila
+                           FROM viejas v
+                           JOIN nuevas n ON n.id = v.id
+                           WHERE (v.region, v.asignacion, v.bloque, v.estado_actual,
+                                  v.proceso_actual, v.operador_actual, v.qc_actual,
+                                  v.cantidad_rechazos, v.cantidad_aprobaciones)
+                                 IS DISTINCT FROM
+                                 (n.region, n.asignacion, n.bloque, n.estado_actual,
+                                  n.proceso_actual, n.operador_actual, n.qc_actual,
+                                  n.cantidad_rechazos, n.cantidad_aprobaciones)', estado_nuevo);
+    END IF;
+
+    EXECUTE format('SELECT count(*) FROM (%s) c', cambios) INTO filas;
+
+    IF filas = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    IF filas > maximo THEN
+        PERFORM pg_notify('asignaciones_cambios', json_build_object(
+            'n', nextval('asignaciones_cambios_seq'), 'r', 1
+        )::text);
+        RETURN NULL;
+    END IF;
+
+    -- Mensajes de hasta ~bytes_por_mensaje, cortando entre filas
+    FOR lote IN EXECUTE format($sql$
+        SELECT string_agg(fila, ',' ORDER BY id) AS filas
+        FROM (
+            SELECT
+                c.id,
+                c.fila,
+                (sum(octet_length(c.fila) + 1) OVER (ORDER BY c.id) - 1) / %s AS grupo
+            FROM (%s) c
+        ) x
+        GROUP BY grupo
+        ORDER BY grupo
+    $sql$, bytes_por_mensaje, cambios)
+    LOOP
+        PERFORM pg_notify('asignaciones_cambios', format(
+            '{"n": %s, "%s": [%s]}',
+            nextval('asignaciones_cambios_seq'),
+            CASE WHEN TG_OP = 'DELETE' THEN 'd' ELSE 'u' END,
+            lote.filas
+        ));
+    END LOOP;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS asignaciones_cambios_insert ON asignaciones;
+CREATE TRIGGER asignaciones_cambios_insert
+    AFTER INSERT ON asignaciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_notificar();
+
+DROP TRIGGER IF EXISTS asignaciones_cambios_update ON asignaciones;
+CREATE TRIGGER asignaciones_cambios_update
+    AFTER UPDATE ON asignaciones
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_notificar();
+
+DROP TRIGGER IF EXISTS asignaciones_cambios_delete ON asignaciones;
+CREATE TRIGGER asignaciones_cambios_delete
+    AFTER DELETE ON asignaciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_notificar();
+
+DROP TRIGGER IF EXISTS asignaciones_cambios_truncate ON asignaciones;
+CREATE TRIGGER asignaciones_cambios_truncate
+    AFTER TRUNCATE ON asignaciones
+    FOR EACH STATEMENT EXECUTE FUNCTION asignaciones_notificar();
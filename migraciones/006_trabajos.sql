@@ -0,0 +1,69 @@
+-- =====================================================
+-- 006 · Cola de trabajos en segundo plano
+-- Las operaciones largas (carga de asignaciones, aplicación de
+-- correcciones, desasignación) se encolan aquí desde las páginas y las
+-- ejecuta el pool de trabajadores (python -m servicios.trabajos). Las
+-- páginas solo consultan el estado de la fila.
+--
+-- Ciclo de vida:
+--   pendiente → en_curso → terminado | fallido | cancelado
+--   en_curso  → pendiente             (error con reintentos disponibles,
+--                                      o trabajador sin latido)
+--
+-- Un trabajador toma el pendiente más antiguo con FOR UPDATE SKIP LOCKED
+-- y renueva `latido` mientras lo ejecuta. `cancelar` lo pide la página y
+-- lo atiende el trabajador. Cada vez que una fila queda pendiente se
+-- publica su id en el canal trabajos para despertar a los que esperan.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS trabajos (
+    id BIGSERIAL PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    parametros JSONB NOT NULL DEFAULT '{}',
+    estado TEXT NOT NULL DEFAULT 'pendiente'
+        CHECK (estado IN ('pendiente', 'en_curso', 'terminado', 'fallido', 'cancelado')),
+    progreso REAL NOT NULL DEFAULT 0,
+    mensaje TEXT,
+    resultado JSONB,
+    error TEXT,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    max_intentos INTEGER NOT NULL DEFAULT 3,
+    cancelar BOOLEAN NOT NULL DEFAULT FALSE,
+    creado_por TEXT,
+    trabajador TEXT,
+    creado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    disponible_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    iniciado_en TIMESTAMP,
+    latido TIMESTAMP,
+    terminado_en TIMESTAMP
+);
+
+-- La cola: solo las filas pendientes, en el orden en que se toman
+CREATE INDEX IF NOT EXISTS trabajos_pendientes_idx
+    ON trabajos (disponible_en, id)
+    WHERE estado = 'pendiente';
+
+-- Recuperación de trabajadores caídos
+CREATE INDEX IF NOT EXISTS trabajos_en_curso_idx
+    ON trabajos (latido)
+    WHERE estado = 'en_curso';
+
+-- Los trabajos de cada usuario (las páginas retoman el último)
+CREATE INDEX IF NOT EXISTS trabajos_creado_por_idx
+    ON trabajos (creado_por, tipo, id DESC);
+
+
+CREATE OR REPLACE FUNCTION trabajos_notificar() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('trabajos', NEW.id::text);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trabajos_pendiente ON trabajos;
+CREATE TRIGGER trabajos_pendiente
+    AFTER INSERT OR UPDATE OF estado ON trabajos
+    FOR EACH ROW
+    WHEN (NEW.estado = 'pendiente')
+    EXECUTE FUNCTION trabajos_notificar();
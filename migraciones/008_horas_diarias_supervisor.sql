@@ -0,0 +1,122 @@
+-- =====================================================
+-- 008 · Rollup de horas por supervisor del reporte
+-- El alcance "Operadores a cargo" del Historial filtra los reportes por
+-- reportes.supervisor_nombre (el supervisor al momento del reporte), pero
+-- el resumen de horas filtraba el rollup por personal.supervisor (el
+-- actual): después de una reasignación las tres tablas no coincidían.
+-- supervisor_nombre pasa a ser parte de la clave de horas_diarias ('' si
+-- el reporte no lo tiene) y el alcance se filtra por esa columna.
+--
+-- Los días ya archivados no están en reportes: quedan con
+-- supervisor_nombre = '' (solo los ven los alcances por persona y
+-- totales, igual que las tablas de reportes, que tampoco los muestran).
+-- =====================================================
+
+ALTER TABLE horas_diarias
+    ADD COLUMN IF NOT EXISTS supervisor_nombre TEXT NOT NULL DEFAULT '';
+
+ALTER TABLE horas_diarias DROP CONSTRAINT IF EXISTS horas_diarias_pkey;
+ALTER TABLE horas_diarias
+    ADD PRIMARY KEY (cedula_personal, fecha_reporte, supervisor_nombre);
+
+CREATE INDEX IF NOT EXISTS horas_diarias_supervisor_fecha_idx
+    ON horas_diarias (supervisor_nombre, fecha_reporte);
+
+
+CREATE OR REPLACE FUNCTION horas_diarias_aplicar() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE horas_diarias h
+        SET total_horas = h.total_horas - v.total_horas,
+            reportes_produccion = h.reportes_produccion - v.reportes_produccion,
+            reportes_evento = h.reportes_evento - v.reportes_evento
+        FROM (
+            SELECT
+                cedula_personal,
+                fecha_reporte,
+                COALESCE(supervisor_nombre, '') AS supervisor_nombre,
+                COALESCE(SUM(horas), 0) AS total_horas,
+                COUNT(*) FILTER (WHERE tipo_reporte = 'produccion') AS reportes_produccion,
+                COUNT(*) FILTER (WHERE tipo_reporte = 'evento') AS reportes_evento
+            FROM viejas
+            GROUP BY 1, 2, 3
+        ) v
+        WHERE h.cedula_personal = v.cedula_personal
+          AND h.fecha_reporte = v.fecha_reporte
+          AND h.supervisor_nombre = v.supervisor_nombre;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO horas_diarias AS h (
+            cedula_personal, fecha_reporte, supervisor_nombre, total_horas,
+            reportes_produccion, reportes_evento
+        )
+        SELECT
+            cedula_personal,
+            fecha_reporte,
+            COALESCE(supervisor_nombre, ''),
+            COALESCE(SUM(horas), 0),
+            COUNT(*) FILTER (WHERE tipo_reporte = 'produccion'),
+            COUNT(*) FILTER (WHERE tipo_reporte = 'evento')
+        FROM nuevas
+        GROUP BY 1, 2, 3
+        ON CONFLICT (cedula_personal, fecha_reporte, supervisor_nombre) DO UPDATE
+        SET total_horas = h.total_horas + EXCLUDED.total_horas,
+            reportes_produccion = h.reportes_produccion + EXCLUDED.reportes_produccion,
+            reportes_evento = h.reportes_evento + EXCLUDED.reportes_evento;
+    END IF;
+
+    -- Días que quedaron sin reportes
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM horas_diarias h
+        USING (
+            SELECT DISTINCT cedula_personal, fecha_reporte,
+                   COALESCE(supervisor_nombre, '') AS supervisor_nombre
+            FROM viejas
+        ) v
+        WHERE h.cedula_personal = v.cedula_personal
+          AND h.fecha_reporte = v.fecha_reporte
+          AND h.supervisor_nombre = v.supervisor_nombre
+          AND h.reportes_produccion <= 0
+          AND h.reportes_evento <= 0
+          AND NOT EXISTS (
+              SELECT 1
+              FROM reportes r
+              WHERE r.cedula_personal = v.cedula_personal
+                AND r.fecha_reporte = v.fecha_reporte
+                AND COALESCE(r.supervisor_nombre, '') = v.supervisor_nombre
+          );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+
+-- Recuento de los días que siguen en reportes (se bloquean escrituras mientras se copia)
+LOCK TABLE reportes IN SHARE MODE;
+
+CREATE TEMP TABLE horas_diarias_desde ON COMMIT DROP AS
+SELECT COALESCE(
+    (SELECT max(hasta) FROM reportes_archivo),
+    '-infinity'::date
+) AS desde;
+
+DELETE FROM horas_diarias
+WHERE fecha_reporte >= (SELECT desde FROM horas_diarias_desde);
+
+INSERT INTO horas_diarias (
+    cedula_personal, fecha_reporte, supervisor_nombre, total_horas,
+    reportes_produccion, reportes_evento
+)
+SELECT
+    cedula_personal,
+    fecha_reporte,
+    COALESCE(supervisor_nombre, ''),
+    COALESCE(SUM(horas), 0),
+    COUNT(*) FILTER (WHERE tipo_reporte = 'produccion'),
+    COUNT(*) FILTER (WHERE tipo_reporte = 'evento')
+FROM reportes
+WHERE fecha_reporte >= (SELECT desde FROM horas_diarias_desde)
+GROUP BY 1, 2, 3;
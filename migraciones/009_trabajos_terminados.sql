@@ -0,0 +1,10 @@
+-- =====================================================
+-- 009 · Cargas de asignaciones terminadas
+-- Cada proceso del servidor revisa cada pocos segundos qué trabajos
+-- carga_asignaciones terminaron (servicios.catalogos) para recargar esas
+-- regiones del catálogo compartido.
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS trabajos_terminados_idx
+    ON trabajos (tipo, terminado_en)
+    WHERE estado = 'terminado';
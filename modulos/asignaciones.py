@@ -2,6 +2,13 @@ import streamlit as st
 import pandas as pd
 from db import get_connection
 from permisos import validar_acceso
+from servicios.cambios_asignaciones import barrera, bloques
+from servicios.cola_asignaciones import (
+    reclamar_asignacion_operativa,
+    reclamar_asignacion_qc,
+)
+from servicios.resumen_asignaciones import asignaciones_completas, regiones as listar_regiones
+from servicios.transiciones import aplicar_transicion, siguientes_estados
 
 
 def render():
@@ -56,16 +63,13 @@ def render():
         st.success(st.session_state.msg_ok)
         st.session_state.msg_ok = None
 
+        # Viene de guardar: las tablas deben mostrar ya lo escrito
+        barrera(conn)
+
     # =====================================================
     # REGIONES
     # =====================================================
-    cur.execute("""
-        SELECT DISTINCT region
-        FROM asignaciones
-        WHERE region IS NOT NULL
-        ORDER BY region
-    """)
-    regiones = [r[0] for r in cur.fetchall()]
+    regiones = listar_regiones(conn)
 
     if not regiones:
         st.warning("⚠️ No existen regiones registradas")
@@ -101,24 +105,15 @@ def render():
             df_operadores["nombre_completo"] == operador_sel
         ]["cedula"].iloc[0]
 
-        df_asignaciones = pd.read_sql("""
-            SELECT asignacion
-            FROM asignaciones
-            WHERE region = %s
-            GROUP BY asignacion
-            HAVING COUNT(*) = COUNT(
-                CASE WHEN estado_actual = 'pendiente' THEN 1 END
-            )
-            ORDER BY asignacion
-        """, conn, params=[region_sel])
-
-        if df_asignaciones.empty:
+        asignaciones_pendientes = asignaciones_completas(conn, region_sel, "pendientes")
+
+        if not asignaciones_pendientes:
             st.info("No hay asignaciones completamente pendientes en esta región")
             return
 
         asignacion_sel = st.selectbox(
             "📦 Seleccione asignación pendiente",
-            df_asignaciones["asignacion"]
+            asignaciones_pendientes
         )
 
         if st.button("📌 Asignar manualmente"):
@@ -165,66 +160,33 @@ def render():
             if cur.fetchone():
                 st.warning("⚠️ Ya tiene una asignación activa. Debe finalizar todos sus bloques antes de autoasignarse otra.")
             else:
-                cur.execute("""
-                    SELECT asignacion
-                    FROM asignaciones
-                    WHERE region = %s
-                    GROUP BY asignacion
-                    HAVING COUNT(*) = COUNT(
-                        CASE WHEN estado_actual = 'pendiente'
-                             AND proceso_actual = 'operativo'
-                        THEN 1 END
-                    )
-                    ORDER BY asignacion
-                    LIMIT 1
-                """, (region_sel,))
-                row = cur.fetchone()
-                if not row:
+                tomada = reclamar_asignacion_operativa(conn, region_sel, cedula, puesto)
+                if not tomada:
                     st.info("No hay asignaciones elegibles para autoasignación en esta región")
                 else:
-                    asignacion_sel = row[0]
-                    cur.execute("""
-                        UPDATE asignaciones
-                        SET operador_actual = %s,
-                            proceso_actual = 'operativo',
-                            estado_actual = 'asignado'
-                        WHERE asignacion = %s
-                          AND region = %s
-                          AND estado_actual = 'pendiente'
-                    """, (cedula, asignacion_sel, region_sel))
-                    cur.execute("""
-                        INSERT INTO asignaciones_historial
-                        (asignacion_id, asignacion, bloque, region, usuario, puesto, proceso, estado)
-                        SELECT id, asignacion, bloque, region, %s, %s, 'operativo', 'asignado'
-                        FROM asignaciones
-                        WHERE asignacion = %s AND region = %s
-                    """, (cedula, puesto, asignacion_sel, region_sel))
-                    conn.commit()
                     st.session_state.msg_ok = "✅ Autoasignación realizada correctamente"
                     st.rerun()
     
         # --- 2. Mostrar tabla de bloques del operador ---
-        df_asignaciones = pd.read_sql("""
-            SELECT DISTINCT asignacion
-            FROM asignaciones
-            WHERE operador_actual = %s AND region = %s
-            ORDER BY asignacion
-        """, conn, params=(cedula, region_sel))
+        # Del estado en memoria (servicios.cambios_asignaciones), sin consultar la base
+        df_operador = bloques(conn, region=region_sel, operador=cedula)
     
-        if df_asignaciones.empty:
+        if df_operador.empty:
             st.info("No tienes ninguna asignación activa en esta región.")
             return
     
         # Selector de asignación (se usará tanto para individual como para masiva)
-        asignacion_sel = st.selectbox("📦 Seleccione la asignación a trabajar", df_asignaciones["asignacion"])
+        asignacion_sel = st.selectbox(
+            "📦 Seleccione la asignación a trabajar",
+            sorted(df_operador["asignacion"].unique())
+        )
     
-        # Obtener bloques de esa asignación (incluyendo la columna 'asignacion')
-        df_bloques = pd.read_sql("""
-            SELECT asignacion, bloque, estado_actual, cantidad_rechazos, cantidad_aprobaciones
-            FROM asignaciones
-            WHERE operador_actual = %s AND region = %s AND asignacion = %s
-            ORDER BY bloque
-        """, conn, params=(cedula, region_sel, asignacion_sel))
+        # Bloques de esa asignación (incluyendo la columna 'asignacion')
+        df_bloques = (
+            df_operador[df_operador["asignacion"] == asignacion_sel]
+            [["asignacion", "bloque", "estado_actual", "cantidad_rechazos", "cantidad_aprobaciones"]]
+            .sort_values("bloque", ignore_index=True)
+        )
     
         if df_bloques.empty:
             st.warning("No hay bloques para esta asignación")
@@ -248,41 +210,21 @@ def render():
             estado_actual = fila["estado_actual"]
     
             # Determinar nuevo estado según lógica de negocio
-            if estado_actual.startswith("rechazado"):
-                opciones_estado = ["corregido"]
-            elif estado_actual == "asignado":
-                opciones_estado = ["proceso"]
-            elif estado_actual == "proceso":
-                opciones_estado = ["finalizado"]
-            else:
-                opciones_estado = []
+            opciones_estado = siguientes_estados(estado_actual)
     
             if opciones_estado:
                 nuevo_estado = st.selectbox("Nuevo estado (individual)", opciones_estado, key="individual")
                 if st.button("💾 Guardar cambio individual"):
-                    if nuevo_estado == "corregido":
-                        cur.execute("""
-                            UPDATE asignaciones
-                            SET estado_actual = 'corregido',
-                                proceso_actual = 'control_calidad'
-                            WHERE asignacion = %s AND bloque = %s AND region = %s
-                        """, (fila["asignacion"], int(fila["bloque"]), region_sel))
-                    else:
-                        cur.execute("""
-                            UPDATE asignaciones
-                            SET estado_actual = %s
-                            WHERE asignacion = %s AND bloque = %s AND region = %s
-                        """, (nuevo_estado, fila["asignacion"], int(fila["bloque"]), region_sel))
-    
-                    cur.execute("""
-                        INSERT INTO asignaciones_historial
-                        (asignacion, bloque, region, usuario, puesto, proceso, estado)
-                        VALUES (%s, %s, %s, %s, %s, 'operativo', %s)
-                    """, (fila["asignacion"], int(fila["bloque"]), region_sel, cedula, puesto, nuevo_estado))
+                    cambiados = aplicar_transicion(
+                        conn, region_sel, fila["asignacion"], [fila["bloque"]],
+                        nuevo_estado, cedula, puesto
+                    )
     
-                    conn.commit()
-                    st.session_state.msg_ok = "✅ Estado actualizado correctamente"
-                    st.rerun()
+                    if not cambiados:
+                        st.warning("⚠️ El bloque cambió de estado mientras tanto; recargue la página")
+                    else:
+                        st.session_state.msg_ok = "✅ Estado actualizado correctamente"
+                        st.rerun()
             else:
                 st.info("Este bloque no puede ser modificado individualmente (estado no permite transición).")
         else:
@@ -314,43 +256,24 @@ def render():
                     st.info("Seleccione al menos un bloque para actualizar")
                 else:
                     estado_comun = estado_filtro
-                    if estado_comun.startswith("rechazado"):
-                        opciones_estado_masivo = ["corregido"]
-                    elif estado_comun == "asignado":
-                        opciones_estado_masivo = ["proceso"]
-                    elif estado_comun == "proceso":
-                        opciones_estado_masivo = ["finalizado"]
-                    else:
-                        opciones_estado_masivo = []
+                    opciones_estado_masivo = siguientes_estados(estado_comun)
     
                     if not opciones_estado_masivo:
                         st.info(f"El estado '{estado_comun}' no permite transiciones masivas")
                     else:
                         nuevo_estado_masivo = st.selectbox("🚀 Nuevo estado para los bloques seleccionados", opciones_estado_masivo)
                         if st.button("💾 Aplicar cambio masivo"):
-                            for bloque in bloques_seleccionados:
-                                if nuevo_estado_masivo == "corregido":
-                                    cur.execute("""
-                                        UPDATE asignaciones
-                                        SET estado_actual = 'corregido',
-                                            proceso_actual = 'control_calidad'
-                                        WHERE asignacion = %s AND bloque = %s AND region = %s
-                                    """, (asignacion_sel, int(bloque), region_sel))
-                                else:
-                                    cur.execute("""
-                                        UPDATE asignaciones
-                                        SET estado_actual = %s
-                                        WHERE asignacion = %s AND bloque = %s AND region = %s
-                                    """, (nuevo_estado_masivo, asignacion_sel, int(bloque), region_sel))
-    
-                                cur.execute("""
-                                    INSERT INTO asignaciones_historial
-                                    (asignacion, bloque, region, usuario, puesto, proceso, estado)
-                                    VALUES (%s, %s, %s, %s, %s, 'operativo', %s)
-                                """, (asignacion_sel, int(bloque), region_sel, cedula, puesto, nuevo_estado_masivo))
+                            # Un UPDATE con ANY(array) + un INSERT ... SELECT para todos los bloques
+                            cambiados = aplicar_transicion(
+                                conn, region_sel, asignacion_sel, bloques_seleccionados,
+                                nuevo_estado_masivo, cedula, puesto
+                            )
     
-                            conn.commit()
-                            st.session_state.msg_ok = f"✅ {len(bloques_seleccionados)} bloque(s) actualizado(s) a '{nuevo_estado_masivo}'"
+                            omitidos = len(bloques_seleccionados) - len(cambiados)
+                            mensaje = f"✅ {len(cambiados)} bloque(s) actualizado(s) a '{nuevo_estado_masivo}'"
+                            if omitidos:
+                                mensaje += f" · {omitidos} omitido(s) por haber cambiado de estado"
+                            st.session_state.msg_ok = mensaje
                             st.rerun()
     # =====================================================
     # PERFIL CONTROL DE CALIDAD
@@ -362,73 +285,19 @@ def render():
         # 🔒 AUTOASIGNACIÓN CON VALIDACIÓN DE HISTORIAL--------------------------------------------------------------------------
         if st.button("🧲 Autoasignar para QC"):
     
-            cur.execute("""
-                SELECT a.asignacion
-                FROM asignaciones a
-                WHERE a.region = %s
-                GROUP BY a.asignacion, a.region
-                HAVING COUNT(*) = COUNT(
-                    CASE WHEN a.estado_actual = 'finalizado' THEN 1 END
-                )
-                AND NOT EXISTS (
-                    SELECT 1
-                    FROM asignaciones_historial h
-                    WHERE h.asignacion = a.asignacion
-                      AND h.region = a.region
-                      AND h.usuario = %s
-                      AND h.proceso = 'operativo'
-                      AND h.estado = 'asignado'
-                )
-                ORDER BY a.asignacion
-                LIMIT 1
-            """, (region_sel, cedula))
+            tomada = reclamar_asignacion_qc(conn, region_sel, cedula, puesto)
     
-            row = cur.fetchone()
-    
-            if not row:
+            if not tomada:
                 st.warning("No hay asignaciones disponibles para QC (o usted fue operador).")
             else:
-                asignacion_sel = row[0]
-    
-                #Almacenando en asignaciones la asignacion de QC y el estado pasa de finalizado a proceso
-                cur.execute("""
-                    UPDATE asignaciones
-                    SET qc_actual = %s,
-                        proceso_actual = 'control_calidad',
-                        estado_actual = 'pendienteqc'
-                    WHERE asignacion = %s
-                        AND region = %s
-                        AND estado_actual = 'finalizado'
-                        AND qc_actual IS NULL
-                """, (cedula, asignacion_sel, region_sel))
-
-                #Almacenamiento en historial
-                cur.execute("""
-                INSERT INTO asignaciones_historial
-                (asignacion_id, asignacion, bloque, region, usuario, puesto, proceso, estado)
-                SELECT id, asignacion, bloque, region, %s, %s, 'control_calidad', 'asignado'
-                FROM asignaciones
-                WHERE asignacion = %s
-                AND region = %s
-                """, (
-                    cedula,
-                    puesto,
-                    asignacion_sel,
-                    region_sel
-                ))
-    
-                conn.commit()
                 st.session_state.msg_ok = "✅ Asignación tomada para Control de Calidad"
                 st.rerun()
 
-        df = pd.read_sql("""
-            SELECT asignacion, bloque, estado_actual,
-                   cantidad_rechazos, cantidad_aprobaciones
-            FROM asignaciones
-            WHERE qc_actual = %s
-              AND region = %s
-            ORDER BY asignacion, bloque
-        """, conn, params=(cedula, region_sel))
+        df = (
+            bloques(conn, region=region_sel, qc=cedula)
+            [["asignacion", "bloque", "estado_actual", "cantidad_rechazos", "cantidad_aprobaciones"]]
+            .sort_values(["asignacion", "bloque"], ignore_index=True)
+        )
 
         st.dataframe(df, use_container_width=True)
 
@@ -1,7 +1,10 @@
-import streamlit as st
 import pandas as pd
+import streamlit as st
 from db import get_connection
 from permisos import validar_acceso
+from servicios.carga_asignaciones import COLUMNAS, validar, vista_previa
+from servicios.resumen_asignaciones import asignaciones_completas, regiones as listar_regiones
+from servicios.trabajos import ACTIVOS, encolar, guardar_archivo, seguimiento
 
 
 def render():
@@ -27,22 +30,14 @@ def render():
     """)
 
     # ============================
-    # CONEXIÓN LIMPIA
+    # CONEXIÓN (el pool la entrega limpia)
     # ============================
     conn = get_connection()
-    conn.rollback()
-    cur = conn.cursor()
 
     # ============================
     # REGIÓN
     # ============================
-    cur.execute("""
-        SELECT DISTINCT region
-        FROM asignaciones
-        WHERE region IS NOT NULL
-        ORDER BY region
-    """)
-    regiones = [r[0] for r in cur.fetchall()]
+    regiones = listar_regiones(conn)
 
     region_sel = st.selectbox("🌍 Región", regiones + ["➕ Nueva región"])
 
@@ -55,21 +50,17 @@ def render():
 
     # =====================================================
     # 🔄 DESASIGNAR ASIGNACIÓN COMPLETA (NUEVO BLOQUE)
+    # Corre como trabajo en segundo plano (servicios.trabajos)
     # =====================================================
     st.divider()
     st.subheader("🔄 Desasignar asignación completa")
 
-    cur.execute("""
-        SELECT asignacion
-        FROM asignaciones
-        WHERE region = %s
-        GROUP BY asignacion
-        HAVING COUNT(DISTINCT estado_actual) = 1
-           AND MAX(estado_actual) = 'asignado'
-        ORDER BY asignacion
-    """, (region_sel,))
+    trabajo_des = seguimiento(
+        "trabajo_desasignar", ["desasignar"], cedula, al_terminar=mostrar_desasignacion
+    )
+    desasignando = trabajo_des is not None and trabajo_des["estado"] in ACTIVOS
 
-    asignaciones_des = [row[0] for row in cur.fetchall()]
+    asignaciones_des = asignaciones_completas(conn, region_sel, "asignados")
 
     if not asignaciones_des:
         st.info("No hay asignaciones completamente en estado 'asignado'")
@@ -84,29 +75,25 @@ def render():
         )
 
         if confirmar:
-            if st.button("🚨 Desasignar"):
-
-                try:
-                    cur.execute("""
-                        UPDATE asignaciones
-                        SET operador_actual = NULL,
-                            estado_actual = 'pendiente'
-                        WHERE asignacion = %s
-                          AND region = %s
-                    """, (asignacion_sel, region_sel))
-
-                    conn.commit()
-
-                    st.success("✅ Asignación devuelta a pendiente correctamente")
-                    st.rerun()
-
-                except Exception as e:
-                    conn.rollback()
-                    st.error("❌ Error al desasignar")
-                    st.exception(e)
+            if st.button("🚨 Desasignar", disabled=desasignando):
+                st.session_state["trabajo_desasignar"] = encolar(
+                    conn,
+                    "desasignar",
+                    {"region": region_sel, "asignacion": asignacion_sel},
+                    creado_por=cedula
+                )
+                st.rerun()
 
     st.divider()
 
+    # ============================
+    # CARGA EN CURSO O ÚLTIMA CARGA
+    # ============================
+    trabajo_carga = seguimiento(
+        "trabajo_carga", ["carga_asignaciones"], cedula, al_terminar=mostrar_carga
+    )
+    cargando = trabajo_carga is not None and trabajo_carga["estado"] in ACTIVOS
+
     # ============================
     # ARCHIVO
     # ============================
@@ -118,96 +105,101 @@ def render():
     if not archivo:
         return
 
+    # ============================
+    # VISTA PREVIA (solo las primeras filas)
+    # ============================
     try:
-        df = pd.read_csv(archivo)
-    except Exception:
-        df = pd.read_excel(archivo)
-
-    df.columns = df.columns.str.lower().str.strip()
+        df = vista_previa(archivo)
+    except Exception as e:
+        st.error("❌ No se pudo leer el archivo")
+        st.exception(e)
+        st.stop()
 
-    if not {"asignacion", "bloque", "complejidad"}.issubset(df.columns):
+    if not set(COLUMNAS).issubset(df.columns):
         st.error("❌ El archivo debe tener asignacion, bloque y complejidad")
         st.stop()
 
-    # ============================
-    # LIMPIEZA
-    # ============================
-    df["asignacion"] = df["asignacion"].astype(str).str.strip()
-    df["bloque"] = df["bloque"].astype(int)
-    df["complejidad"] = df["complejidad"].astype(str).str.strip()
+    validas, rechazadas = validar(df)
 
-    # ============================
-    # 1️⃣ ELIMINAR DUPLICADOS EN EL ARCHIVO
-    # ============================
-    df = df.drop_duplicates(subset=["asignacion", "bloque"])
+    st.subheader("📄 Vista previa (primeras filas)")
+    st.dataframe(validas[COLUMNAS], width="stretch")
 
-    st.subheader("📄 Vista previa (sin duplicados)")
-    st.dataframe(df, width="stretch")
+    if not rechazadas.empty:
+        st.warning(f"⚠️ {len(rechazadas)} de las primeras {len(df)} filas se van a rechazar")
+        st.dataframe(rechazadas, width="stretch", hide_index=True)
 
     # ============================
-    # CARGA
+    # CARGA POR BLOQUES (validación + COPY + INSERT ... SELECT)
+    # La ejecuta un trabajador: el archivo se copia al directorio
+    # compartido y la página solo sigue el progreso
     # ============================
-    if st.button("🚀 Cargar asignaciones"):
-        with st.spinner("⏳ Procesando archivo..."):
-
-            # ============================
-            # 2️⃣ CONSULTAR EXISTENTES EN BD
-            # ============================
-            cur.execute("""
-                SELECT asignacion, bloque
-                FROM asignaciones
-                WHERE region = %s
-            """, (region_sel,))
-
-            existentes = set(cur.fetchall())
-
-            # ============================
-            # 3️⃣ FILTRAR SOLO NUEVOS
-            # ============================
-            nuevos = []
-            omitidos = 0
-
-            for _, row in df.iterrows():
-                key = (row["asignacion"], row["bloque"])
-                if key in existentes:
-                    omitidos += 1
-                else:
-                    nuevos.append((
-                        region_sel,
-                        row["asignacion"],
-                        row["bloque"],
-                        row["complejidad"]
-                    ))
-
-            if not nuevos:
-                st.info("No hay nuevas asignaciones para insertar")
-                return
-
-            # ============================
-            # 4️⃣ INSERTAR (SIN ON CONFLICT)
-            # ============================
-            try:
-                cur.executemany("""
-                    INSERT INTO asignaciones (
-                        region,
-                        asignacion,
-                        bloque,
-                        complejidad
-                    )
-                    VALUES (%s, %s, %s, %s)
-                """, nuevos)
-
-                conn.commit()
-
-            except Exception as e:
-                conn.rollback()
-                st.error("❌ Error al insertar en la base de datos")
-                st.exception(e)
-                return
-
-        st.success(f"""
-        ✅ Carga finalizada  
-        🌍 Región: {region_sel}  
-        ➕ Insertados: {len(nuevos)}  
-        ⏭️ Omitidos (ya existentes): {omitidos}
-        """)
+    if st.button("🚀 Cargar asignaciones", disabled=cargando):
+        st.session_state["trabajo_carga"] = encolar(
+            conn,
+            "carga_asignaciones",
+            {"region": region_sel, "ruta": guardar_archivo(archivo)},
+            creado_por=cedula
+        )
+        st.rerun()
+
+
+def mostrar_desasignacion(trabajo, primera):
+    resultado = trabajo["resultado"]
+    omitidos = resultado.get("omitidos") or {}
+
+    if not omitidos:
+        st.success(
+            f"✅ Asignación {resultado['asignacion']} ({resultado['bloques']:,} bloques) "
+            f"devuelta a pendiente correctamente"
+        )
+        return
+
+    detalle = ", ".join(f"{n:,} en {estado}" for estado, n in sorted(omitidos.items()))
+    st.warning(
+        f"⚠️ Asignación {resultado['asignacion']}: {resultado['bloques']:,} bloques "
+        f"devueltos a pendiente. No se tocaron {sum(omitidos.values()):,} bloques "
+        f"que ya no estaban asignados ({detalle})"
+    )
+
+
+def mostrar_carga(trabajo, primera):
+    resultado = trabajo["resultado"]
+    region = resultado["region"]
+
+    st.caption(
+        f"{resultado['filas']:,} filas procesadas "
+        f"({resultado['filas_por_s']:,} filas/s)"
+    )
+
+    mostrar_rechazos(resultado)
+
+    if not resultado["insertados"]:
+        st.info("No hay nuevas asignaciones para insertar")
+        return
+
+    st.success(f"""
+    ✅ Carga finalizada  
+    🌍 Región: {region}  
+    ➕ Insertados: {resultado['insertados']}  
+    ⏭️ Omitidos: {resultado['omitidos']} (ya existentes: {resultado.get('ya_existentes', '—')} · duplicados en el archivo: {resultado.get('duplicados_en_archivo', '—')})  
+    🚫 Rechazados (datos inválidos): {resultado['rechazadas']}
+    """)
+
+
+def mostrar_rechazos(resultado):
+    if not resultado["rechazadas"]:
+        return
+
+    st.warning(f"⚠️ {resultado['rechazadas']:,} filas rechazadas")
+    st.dataframe(
+        [{"motivo": m, "filas": n} for m, n in resultado["rechazos_por_motivo"].items()],
+        hide_index=True
+    )
+
+    muestra = pd.DataFrame(resultado["rechazos"], columns=["linea", "motivo", "valor"])
+    st.download_button(
+        f"⬇️ Descargar rechazos (primeras {len(muestra):,})",
+        muestra.to_csv(index=False).encode("utf-8"),
+        file_name="rechazos_asignaciones.csv",
+        mime="text/csv"
+    )
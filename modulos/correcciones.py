@@ -3,6 +3,16 @@ import pandas as pd
 from datetime import datetime
 from db import get_connection
 from permisos import validar_acceso
+from servicios.ediciones import (
+    ConflictoEdicion,
+    aplicar_cambios,
+    base_editor,
+    cambios_editor,
+    descartar_editor,
+)
+from servicios.paginacion import paginar
+from servicios.trabajos import ACTIVOS, encolar, seguimiento
+from servicios import motor_correcciones
 
 
 def render():
@@ -28,7 +38,7 @@ def render():
         with col2:
             fecha_fin = st.date_input("Hasta")
 
-        df_registros = pd.read_sql("""
+        df_registros = paginar(conn, "correcciones_registros", """
             SELECT
                 id,
                 fecha_reporte,
@@ -42,8 +52,7 @@ def render():
             FROM reportes
             WHERE fecha_reporte BETWEEN %s AND %s 
               AND cedula_personal = %s
-            ORDER BY fecha_reporte DESC
-        """, conn, params=[fecha_inicio, fecha_fin, cedula])
+        """, [fecha_inicio, fecha_fin, cedula], descendente=True)
 
         st.info("Seleccione visualmente el registro con error y copie el ID")
         st.dataframe(df_registros, use_container_width=True)
@@ -146,6 +155,12 @@ def render():
 
         st.subheader("🧾 Correcciones pendientes")
 
+        # Aplicación automática en curso o última (servicios.trabajos)
+        trabajo = seguimiento(
+            "trabajo_correcciones", ["correcciones"], cedula, al_terminar=mostrar_aplicacion
+        )
+        aplicando = trabajo is not None and trabajo["estado"] in ACTIVOS
+
         # =====================================================
         # TABLA 1: CORRECCIONES
         # =====================================================
@@ -169,6 +184,40 @@ def render():
             st.info("No hay correcciones pendientes")
             return
 
+        # =====================================================
+        # APLICACIÓN AUTOMÁTICA
+        # La ejecuta un trabajador; la página solo sigue el progreso
+        # =====================================================
+        with st.expander("⚙️ Aplicar correcciones automáticamente"):
+            df_revision = motor_correcciones.revisar(conn)
+            validas = df_revision["motivo"].isna()
+
+            col1, col2 = st.columns(2)
+            col1.metric("Listas para aplicar", int(validas.sum()))
+            col2.metric("Con problemas", int((~validas).sum()))
+
+            if (~validas).any():
+                st.dataframe(
+                    df_revision.loc[
+                        ~validas,
+                        ["id", "id_asociado", "columna", "nuevo_valor", "solucion", "motivo"]
+                    ],
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+            if validas.any() and st.button(
+                f"🚀 Aplicar {int(validas.sum())} correcciones válidas", disabled=aplicando
+            ):
+                st.session_state["trabajo_correcciones"] = encolar(
+                    conn, "correcciones", creado_por=cedula
+                )
+                st.rerun()
+
+        st.divider()
+
+        df_corr = base_editor("editor_correcciones", df_corr)
+
         df_corr_edit = st.data_editor(
             df_corr,
             use_container_width=True,
@@ -194,16 +243,11 @@ def render():
         )
 
         if st.button("💾 Guardar cambios de correcciones"):
-            cur = conn.cursor()
-            for _, row in df_corr_edit.iterrows():
-                cur.execute("""
-                    UPDATE correcciones
-                    SET estado = %s
-                    WHERE id = %s
-                """, (row["estado"], int(row["id"])))
-            conn.commit()
-            st.success("✅ Estados actualizados")
-            st.rerun()
+            guardar_edicion(
+                conn, "correcciones", "editor_correcciones",
+                cambios_editor(df_corr, df_corr_edit),
+                "✅ Estados actualizados"
+            )
 
         st.divider()
 
@@ -225,6 +269,8 @@ def render():
             st.info("No hay reportes asociados")
             return
 
+        df_rep = base_editor("editor_reportes", df_rep)
+
         df_rep_edit = st.data_editor(
             df_rep,
             use_container_width=True,
@@ -235,23 +281,11 @@ def render():
         )
 
         if st.button("💾 Guardar cambios en reportes"):
-            cur = conn.cursor()
-
-            columnas = [c for c in df_rep_edit.columns if c != "id"]
-
-            for _, row in df_rep_edit.iterrows():
-                set_clause = ", ".join([f"{c} = %s" for c in columnas])
-                valores = [row[c] for c in columnas]
-                valores.append(int(row["id"]))
-
-                cur.execute(
-                    f"UPDATE reportes SET {set_clause} WHERE id = %s",
-                    valores
-                )
-
-            conn.commit()
-            st.success("✅ Reportes actualizados correctamente")
-            st.rerun()
+            guardar_edicion(
+                conn, "reportes", "editor_reportes",
+                cambios_editor(df_rep, df_rep_edit),
+                "✅ Reportes actualizados correctamente"
+            )
 
         st.divider()
 
@@ -298,3 +332,48 @@ def render():
             except:
                 st.error("ID inválido")
 
+
+
+def guardar_edicion(conn, tabla, clave_editor, cambios, mensaje):
+    """Envía solo las celdas modificadas de una grilla y recarga la página."""
+    if not cambios:
+        st.info("No hay cambios para guardar")
+        return
+
+    try:
+        aplicar_cambios(conn, tabla, cambios)
+    except ConflictoEdicion as e:
+        descartar_editor(clave_editor)
+        st.error(
+            "⚠️ Otro usuario modificó estos registros mientras editaba: "
+            f"{', '.join(map(str, e.ids))}. Se descartaron los cambios; "
+            "revise los datos actualizados y vuelva a editarlos."
+        )
+        return
+    except Exception as e:
+        st.error(f"Error al guardar: {e}")
+        return
+
+    descartar_editor(clave_editor)
+    st.success(mensaje)
+    st.rerun()
+
+
+def mostrar_aplicacion(trabajo, primera):
+    resultado = trabajo["resultado"]
+
+    # Las grillas se vuelven a armar con los datos ya corregidos
+    if primera:
+        descartar_editor("editor_correcciones")
+        descartar_editor("editor_reportes")
+
+    st.success(
+        f"✅ {resultado['aplicadas']} solicitudes aplicadas "
+        f"({resultado['modificados']} reportes modificados, "
+        f"{resultado['eliminados']} eliminados)"
+    )
+    if resultado["pendientes"]:
+        st.warning(f"{resultado['pendientes']} solicitudes quedaron pendientes")
+        st.dataframe(
+            pd.DataFrame(resultado["rechazadas"]), use_container_width=True, hide_index=True
+        )
@@ -1,9 +1,32 @@
+from datetime import date, datetime, timedelta
+
 import streamlit as st
 import pandas as pd
-import json
-import pydeck as pdk
-from db import get_connection
+from db import conexion_por_rerun, get_connection
 from permisos import validar_acceso
+from servicios.analitica_produccion import AGRUPACIONES, produccion_por, tasas
+from servicios.cambios_asignaciones import (
+    bloques,
+    con_operador,
+    configuracion as configuracion_cambios,
+    estado_al_dia,
+    nombres_operadores,
+)
+from servicios.mapa_bloques import (
+    capa_bloques,
+    capa_region,
+    centroides_asignaciones,
+    deck_asignaciones,
+    deck_bloques,
+    features_mapa,
+    predominante_por_asignacion,
+    propiedades_en_memoria,
+    propiedades_por_bloque,
+    puntos_por_asignacion,
+    subcapa,
+    vista_para,
+)
+from servicios.resumen_asignaciones import regiones as listar_regiones
 
 
 def render():
@@ -47,157 +70,235 @@ def render():
     st.divider()
 
     # =====================================================
-    # FILTRO GLOBAL DE FECHAS (INFORMATIVO)
+    # FILTRO GLOBAL DE FECHAS
     # =====================================================
     st.subheader("📅 Filtro de fechas")
 
     col1, col2 = st.columns(2)
     with col1:
-        fecha_inicio = st.date_input("Desde")
+        fecha_inicio = st.date_input("Desde", value=date.today() - timedelta(days=30))
     with col2:
         fecha_fin = st.date_input("Hasta")
 
+    lista_regiones = ["Todas"] + listar_regiones(conn)
+
     st.divider()
 
     # =====================================================
-    # MAPA – ESTADO POR BLOQUES (ASIGNACIONES)
+    # PRODUCCIÓN (instantánea columnar, sin consultar Postgres)
     # =====================================================
-    st.subheader("🗺️ Estado por bloques")
-
-    df_regiones = pd.read_sql("""
-        SELECT DISTINCT region
-        FROM asignaciones
-        WHERE region IS NOT NULL
-        ORDER BY region
-    """, conn)
+    st.subheader("📈 Producción")
 
-    lista_regiones = ["Todas"] + df_regiones["region"].tolist()
-
-    col1, col2, col3 = st.columns(3)
+    col1, col2 = st.columns(2)
     with col1:
-        st.date_input("Desde (mapa)", value=fecha_inicio, key="map_ini", disabled=True)
+        agrupacion = st.selectbox("Agrupar por", list(AGRUPACIONES))
     with col2:
-        st.date_input("Hasta (mapa)", value=fecha_fin, key="map_fin", disabled=True)
-    with col3:
-        region_seleccionada = st.selectbox("Región", lista_regiones)
-
-    where_region = ""
-    params = []
-
-    if region_seleccionada != "Todas":
-        where_region = " WHERE a.region = %s"
-        params.append(region_seleccionada)
-
-    df_asig = pd.read_sql(f"""
-        SELECT
-            a.region,
-            a.asignacion,
-            a.bloque,
-            a.estado_actual,
-            a.proceso_actual,
-            COALESCE(p.nombre_completo, '—') AS operador
-        FROM asignaciones a
-        LEFT JOIN personal p
-            ON p.cedula = a.operador_actual
-        {where_region}
-    """, conn, params=params)
-
-    info_por_bloque = {
-        (row["region"], row["asignacion"], int(row["bloque"])): {
-            "estado": str(row["estado_actual"]).lower().strip(),
-            "estado_raw": row["estado_actual"],
-            "proceso": row["proceso_actual"],
-            "operador": row["operador"]
-        }
-        for _, row in df_asig.iterrows()
-    }
-
-    with open("italia.geojson", "r", encoding="utf-8") as f:
-        geojson = json.load(f)
-
-    for feature in geojson["features"]:
-        region_geo = str(feature["properties"]["region"]).strip()
-        asignacion_geo = str(feature["properties"]["Asignacion"]).strip()
-        bloque_geo = int(feature["properties"]["BLOQUE"])
-
-        key = (region_geo, asignacion_geo, bloque_geo)
-
-        if key in info_por_bloque:
-            info = info_por_bloque[key]
-            estado = info["estado"]
-
-            if estado == "finalizado" or estado == "aprobado":
-                color = [52, 152, 219, 180] 
-            elif estado == "asignado":
-                color = [241, 196, 15, 180]  
-            elif estado == "pendiente":
-                color = [200, 200, 200, 180]
-            elif estado == "proceso":
-                color = [46, 204, 113, 180]
-            elif estado.startswith("rechazado"):
-                color = [255, 0, 0, 180]
-            else:
-                color = [241, 196, 15, 180]
-
-            feature["properties"]["color"] = color
-            feature["properties"]["operador"] = info["operador"]
-            feature["properties"]["estado_actual"] = info["estado_raw"]
-            feature["properties"]["proceso_actual"] = info["proceso"]
-        else:
-            feature["properties"]["color"] = [220, 220, 220, 140]
-            feature["properties"]["operador"] = "—"
-            feature["properties"]["estado_actual"] = "—"
-            feature["properties"]["proceso_actual"] = "—"
-
-    layer = pdk.Layer(
-        "GeoJsonLayer",
-        data=geojson,
-        filled=True,
-        get_fill_color="properties.color",
-        stroked=True,
-        get_line_color=[60, 60, 60, 255],
-        line_width_min_pixels=1,
-        pickable=True,
-        auto_highlight=True,
+        region_produccion = st.selectbox("Región", lista_regiones, key="region_produccion")
+
+    df_prod, generado_en = produccion_por(
+        agrupacion,
+        fecha_inicio,
+        fecha_fin,
+        None if region_produccion == "Todas" else region_produccion
     )
 
-    deck = pdk.Deck(
-        layers=[layer],
-        initial_view_state=pdk.ViewState(
-            latitude=44.2,
-            longitude=9.44,
-            zoom=6.5
-        ),
-        map_style=None,
-        views=[pdk.View(type="MapView", controller=True)],
-        tooltip={
-            "html": """
-            <b>Región:</b> {region}<br/>
-            <b>Asignación:</b> {Asignacion}<br/>
-            <b>Bloque:</b> {BLOQUE}<br/>
-            <b>Operador:</b> {operador}<br/>
-            <b>Estado:</b> {estado_actual}<br/>
-            <b>Proceso:</b> {proceso_actual}
-            """,
-            "style": {"backgroundColor": "#333", "color": "white"}
-        }
+    if df_prod is None:
+        st.info(
+            "Aún no hay instantánea de producción "
+            "(python -m servicios.analitica_produccion)"
+        )
+    elif df_prod.empty:
+        st.caption(f"Datos al {generado_en}")
+        st.info("No hay reportes de producción en el rango seleccionado.")
+    else:
+        st.caption(f"Datos al {generado_en}")
+
+        total = tasas(
+            df_prod[["reportes", "horas", "produccion", "aprobados", "rechazados"]]
+            .sum().to_frame().T
+        ).iloc[0]
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Producción", f"{int(total['produccion']):,}")
+        col2.metric("Aprobados", f"{int(total['aprobados']):,}")
+        col3.metric("Rechazados", f"{int(total['rechazados']):,}")
+        col4.metric(
+            "Tasa de aprobación",
+            "—" if pd.isna(total["tasa_aprobacion"]) else f"{total['tasa_aprobacion']:.1%}"
+        )
+
+        if agrupacion == "Semana":
+            etiquetas = (
+                df_prod["año"].astype(str) + "-S"
+                + df_prod["semana"].astype(str).str.zfill(2)
+            )
+        else:
+            etiquetas = df_prod.iloc[:, 0].astype(str)
+
+        st.bar_chart(
+            df_prod.assign(grupo=etiquetas)
+            .set_index("grupo")[["produccion", "aprobados", "rechazados"]]
+        )
+        st.dataframe(df_prod, use_container_width=True, hide_index=True)
+
+    st.divider()
+
+    # =====================================================
+    # MAPA Y TABLA – ESTADO POR BLOQUES
+    # Se re-ejecutan solos cada AUTO_REFRESCO_S ([cambios] en secrets.toml)
+    # leyendo el estado en memoria (servicios.cambios_asignaciones): el mapa
+    # busca cada bloque por clave, y si no cambió ningún bloque de la
+    # selección desde el render anterior se reutiliza el ya armado.
+    # =====================================================
+    refresco = configuracion_cambios()["auto_refresco_s"]
+    st.fragment(estado_por_bloques, run_every=refresco or None)(
+        lista_regiones, fecha_inicio, fecha_fin
     )
 
-    st.pydeck_chart(deck, use_container_width=True)
+
+def estado_por_bloques(lista_regiones, fecha_inicio, fecha_fin):
+    # En las re-ejecuciones del fragmento no hay rerun que devuelva la conexión
+    with conexion_por_rerun():
+        conn = get_connection()
+
+        st.subheader("🗺️ Estado por bloques")
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.date_input("Desde (mapa)", value=fecha_inicio, key="map_ini", disabled=True)
+        with col2:
+            st.date_input("Hasta (mapa)", value=fecha_fin, key="map_fin", disabled=True)
+        with col3:
+            region_seleccionada = st.selectbox("Región", lista_regiones)
+
+        region = None if region_seleccionada == "Todas" else region_seleccionada
+        estado = estado_al_dia()
+
+        if estado is None:
+            df_region = bloques(conn, region=region)
+            asignaciones = sorted(df_region["asignacion"].astype(str).unique().tolist())
+        else:
+            asignaciones = estado.asignaciones(region) if region is not None else []
+
+        with col4:
+            asignacion_seleccionada = st.selectbox(
+                "Asignación",
+                ["Todas"] + asignaciones,
+                disabled=region_seleccionada == "Todas"
+            )
+
+        asignacion = None if asignacion_seleccionada == "Todas" else asignacion_seleccionada
+        previo = st.session_state.get("estado_bloques")
+
+        if estado is None:
+            df_asig = df_region
+            if asignacion is not None:
+                df_asig = df_asig[df_asig["asignacion"].astype(str) == asignacion]
+            df_asig = con_operador(conn, df_asig)
+            deck = deck_estado(df_asig, region_seleccionada, asignacion_seleccionada)
+
+        elif (
+            previo is not None
+            and previo["seleccion"] == (region, asignacion)
+            and not estado.cambio_en(previo["version"], region=region, asignacion=asignacion)
+        ):
+            deck, df_asig = previo["deck"], previo["tabla"]
+
+        else:
+            df_asig, version = estado.bloques(region=region, asignacion=asignacion)
+            df_asig = con_operador(conn, df_asig)
+            deck = deck_estado(
+                df_asig, region_seleccionada, asignacion_seleccionada,
+                estado=estado, nombres=lambda cedulas: nombres_operadores(conn, cedulas)
+            )
+            st.session_state["estado_bloques"] = {
+                "seleccion": (region, asignacion),
+                "version": version,
+                "deck": deck,
+                "tabla": df_asig,
+            }
+
+        st.pydeck_chart(deck, use_container_width=True)
+
+        # =====================================================
+        # TABLA – ESTADO ACTUAL
+        # =====================================================
+        st.subheader("📋 Estado actual por bloque")
+
+        if df_asig.empty:
+            st.info("No hay asignaciones para los filtros seleccionados.")
+        else:
+            st.dataframe(
+                df_asig[
+                    ["region", "asignacion", "bloque",
+                     "operador", "estado_actual", "proceso_actual"]
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+
+        if estado is not None:
+            st.caption(f"Actualizado a las {datetime.now():%H:%M:%S}")
+
+
+def deck_estado(df_asig, region_seleccionada, asignacion_seleccionada, estado=None, nombres=None):
+    """
+    Con `estado` (EstadoBloques al día) las propiedades de cada bloque se
+    buscan por clave en memoria; sin él se unen contra `df_asig`.
+    """
+    def propiedades(capa):
+        if estado is None:
+            return propiedades_por_bloque(capa, df_asig)
+        return propiedades_en_memoria(capa, estado, nombres)
 
     # =====================================================
-    # TABLA – ESTADO ACTUAL
+    # NIVEL DE DETALLE DEL MAPA
+    #   Todas        → un punto por asignación
+    #   Región       → bloques simplificados de la región
+    #   Asignación   → bloques con geometría original
+    # Sin preprocesamiento (mapa_lod/) se envían todos los bloques.
     # =====================================================
-    st.subheader("📋 Estado actual por bloque")
+    centroides = centroides_asignaciones()
 
-    if df_asig.empty:
-        st.info("No hay asignaciones para los filtros seleccionados.")
-    else:
-        st.dataframe(
-            df_asig[
-                ["region", "asignacion", "bloque",
-                 "operador", "estado_actual", "proceso_actual"]
-            ],
-            use_container_width=True,
-            hide_index=True
+    if centroides is not None and region_seleccionada == "Todas":
+        return deck_asignaciones(
+            puntos_por_asignacion(
+                centroides,
+                predominante_por_asignacion(df_asig) if estado is None else estado.predominante()
+            ),
+            vista_para(centroides)
+        )
+
+    if centroides is not None and asignacion_seleccionada == "Todas":
+        capa = capa_region(region_seleccionada)
+        if capa is None:
+            capa = subcapa(
+                capa_bloques(), capa_bloques().claves["region"] == region_seleccionada
+            )
+        return deck_bloques(
+            features_mapa(capa, propiedades(capa)),
+            vista_para(centroides, centroides["region"] == region_seleccionada, zoom=9)
+        )
+
+    if centroides is not None:
+        claves = capa_bloques().claves
+        capa = subcapa(
+            capa_bloques(),
+            (claves["region"] == region_seleccionada)
+            & (claves["asignacion"] == asignacion_seleccionada)
         )
+        return deck_bloques(
+            features_mapa(capa, propiedades(capa)),
+            vista_para(
+                centroides,
+                (centroides["region"] == region_seleccionada)
+                & (centroides["asignacion"] == asignacion_seleccionada),
+                zoom=13
+            )
+        )
+
+    capa = capa_bloques()
+    return deck_bloques(
+        features_mapa(capa, propiedades(capa)),
+        vista_para(None)
+    )
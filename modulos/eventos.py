@@ -2,6 +2,7 @@ import streamlit as st
 from datetime import date
 from db import get_connection
 from permisos import validar_acceso
+from servicios.eventos import registrar_eventos
 
 def render():
     # =========================
@@ -148,72 +149,21 @@ def render():
             st.warning("Debe seleccionar al menos una persona")
             st.stop()
 
-        semana = fecha_reporte.isocalendar()[1]
-        año = fecha_reporte.year
         tipo_evento_id = tipos_evento_dict[tipo_evento_nombre]
 
         try:
-            for persona in personal_seleccionado:
-                datos = personal_dict[persona]
-
-                cedula_personal = datos["cedula"]
-                perfil_personal = datos["perfil"]
-                puesto_personal = datos["puesto"]
-
-                # Obtener supervisor REAL del reportado
-                cur.execute("""
-                    SELECT supervisor
-                    FROM personal
-                    WHERE cedula = %s
-                """, (cedula_personal,))
-
-                row_sup = cur.fetchone()
-                supervisor_nombre = row_sup[0] if row_sup else None
-
-                cur.execute("""
-                    INSERT INTO reportes (
-                        tipo_reporte,
-                        cedula_personal,
-                        cedula_quien_reporta,
-                        supervisor_nombre,
-                        fecha_reporte,
-                        semana,
-                        año,
-                        horas,
-                        proceso_id,
-                        zona,
-                        produccion,
-                        aprobados,
-                        rechazados,
-                        tipo_evento_id,
-                        observaciones,
-                        perfil,
-                        puesto
-                    )
-                    VALUES (
-                        'evento',
-                        %s, %s, %s, %s, %s, %s,
-                        %s, 0, 0, 0, 0, 0,
-                        %s, %s, %s, %s
-                    )
-                """, (
-                    cedula_personal,
-                    cedula_reporta,
-                    supervisor_nombre,
-                    fecha_reporte,
-                    semana,
-                    año,
-                    horas,
-                    tipo_evento_id,
-                    observaciones,
-                    perfil_personal,
-                    puesto_personal
-                ))
-
-            conn.commit()
+            # Un solo INSERT multi-fila; el supervisor ya viene en personal_dict
+            registrar_eventos(
+                conn,
+                [personal_dict[persona] for persona in personal_seleccionado],
+                cedula_reporta,
+                fecha_reporte,
+                horas,
+                tipo_evento_id,
+                observaciones
+            )
             st.success("✅ Evento(s) registrado(s) correctamente")
 
         except Exception as e:
-            conn.rollback()
             st.error("❌ Error al guardar el evento")
             st.exception(e)
@@ -1,7 +1,19 @@
+from datetime import timedelta
+
 import streamlit as st
-import pandas as pd
 from db import get_connection
 from permisos import validar_acceso
+from servicios.archivo_reportes import consultar as consultar_archivo
+from servicios.archivo_reportes import horizonte
+from servicios.historial import (
+    ORDEN_REPORTES,
+    marcar_jornada,
+    sql_reportes,
+    tabla_eventos,
+    tabla_produccion,
+)
+from servicios.horas_diarias import consultar_horas_diarias
+from servicios.paginacion import paginar
 
 def render():
     # =========================
@@ -37,13 +49,19 @@ def render():
     # =========================
     # Selector de alcance según perfil
     # =========================
+    # where_extra filtra reportes (r.*); where_horas filtra el rollup horas_diarias;
+    # filtros_archivo es el mismo filtro para los meses archivados
     where_extra = ""
-    params_base = [fecha_inicio, fecha_fin]
+    where_horas = ""
+    params_base = []
+    filtros_archivo = {}
 
     # -------- OPERADOR --------
     if perfil == 3 or perfil == 4 and puesto == "operario catastral":
         where_extra = " AND r.cedula_personal = %s"
+        where_horas = " AND h.cedula_personal = %s"
         params_base.append(cedula_usuario)
+        filtros_archivo = {"cedula_personal": cedula_usuario}
 
     # -------- SUPERVISOR --------
     elif perfil == 3:
@@ -55,10 +73,14 @@ def render():
 
         if opcion == "Propios":
             where_extra = " AND r.cedula_personal = %s"
+            where_horas = " AND h.cedula_personal = %s"
             params_base.append(cedula_usuario)
+            filtros_archivo = {"cedula_personal": cedula_usuario}
         else:
             where_extra = " AND r.supervisor_nombre = %s"
+            where_horas = " AND h.supervisor_nombre = %s"
             params_base.append(nombre_usuario)
+            filtros_archivo = {"supervisor_nombre": nombre_usuario}
 
     # -------- ADMIN / COORDINADOR --------
     elif perfil == 1:
@@ -70,36 +92,28 @@ def render():
 
         if opcion == "Propios":
             where_extra = " AND r.cedula_personal = %s"
+            where_horas = " AND h.cedula_personal = %s"
             params_base.append(cedula_usuario)
+            filtros_archivo = {"cedula_personal": cedula_usuario}
         else:
             where_extra = ""
+            where_horas = ""
+
+    # Cada tabla se pagina por separado, por fecha y persona
+    params_reportes = [fecha_inicio, fecha_fin, *params_base]
 
     # =========================
     # REPORTES DE PRODUCCIÓN
     # =========================
     st.subheader("📊 Reportes de Producción")
 
-    query_prod = f"""
-    SELECT 
-        r.id,
-        r.fecha_reporte,
-        p.nombre_completo AS persona,
-        r.supervisor_nombre AS supervisor,
-        r.zona,
-        r.horas,
-        r.produccion,
-        r.aprobados,
-        r.rechazados,
-        r.observaciones
-    FROM reportes r
-    JOIN personal p ON p.cedula = r.cedula_personal
-    WHERE r.tipo_reporte = 'produccion'
-      AND r.fecha_reporte BETWEEN %s AND %s
-      {where_extra}
-    ORDER BY r.fecha_reporte, persona
-    """
-
-    df_prod = pd.read_sql(query_prod, conn, params=params_base)
+    df_prod = tabla_produccion(paginar(
+        conn,
+        "historial_produccion",
+        sql_reportes(where_extra + " AND r.tipo_reporte = 'produccion'"),
+        params_reportes,
+        orden=ORDEN_REPORTES
+    ))
     st.dataframe(df_prod, use_container_width=True, hide_index=True)
 
     # =========================
@@ -107,49 +121,45 @@ def render():
     # =========================
     st.subheader("🗂️ Reportes de Eventos")
 
-    query_eventos = f"""
-    SELECT 
-        r.id,
-        r.fecha_reporte,
-        p.nombre_completo AS persona,
-        r.supervisor_nombre AS supervisor,
-        r.horas,
-        te.nombre AS tipo_evento,
-        r.observaciones
-    FROM reportes r
-    JOIN personal p ON p.cedula = r.cedula_personal
-    LEFT JOIN tipos_evento te ON te.id = r.tipo_evento_id
-    WHERE r.tipo_reporte = 'evento'
-      AND r.fecha_reporte BETWEEN %s AND %s
-      {where_extra}
-    ORDER BY r.fecha_reporte, persona
-    """
-
-    df_eventos = pd.read_sql(query_eventos, conn, params=params_base)
+    df_eventos = tabla_eventos(paginar(
+        conn,
+        "historial_eventos",
+        sql_reportes(where_extra + " AND r.tipo_reporte = 'evento'"),
+        params_reportes,
+        orden=ORDEN_REPORTES
+    ))
     st.dataframe(df_eventos, use_container_width=True, hide_index=True)
 
+    # =========================
+    # REPORTES ARCHIVADOS (bajo demanda)
+    # =========================
+    primer_dia_vivo = horizonte(conn)
+
+    if primer_dia_vivo and fecha_inicio < primer_dia_vivo:
+        st.info(f"Los reportes anteriores a {primer_dia_vivo} están archivados")
+
+        if st.checkbox("📦 Consultar reportes archivados"):
+            df_archivo = consultar_archivo(
+                conn,
+                fecha_inicio,
+                min(fecha_fin, primer_dia_vivo - timedelta(days=1)),
+                filtros_archivo
+            )
+
+            st.subheader("📦 Producción archivada")
+            st.dataframe(tabla_produccion(df_archivo), use_container_width=True, hide_index=True)
+
+            st.subheader("📦 Eventos archivados")
+            st.dataframe(tabla_eventos(df_archivo), use_container_width=True, hide_index=True)
+
     # =========================
     # RESUMEN DIARIO DE HORAS (POR PERSONA)
     # =========================
     st.subheader("⏱️ Resumen Diario de Horas por Persona")
 
-    query_horas = f"""
-    SELECT 
-        r.fecha_reporte,
-        p.nombre_completo AS persona,
-        SUM(r.horas) AS total_horas
-    FROM reportes r
-    JOIN personal p ON p.cedula = r.cedula_personal
-    WHERE r.fecha_reporte BETWEEN %s AND %s
-      {where_extra}
-    GROUP BY r.fecha_reporte, p.nombre_completo
-    ORDER BY r.fecha_reporte, persona
-    """
-
-    df_horas = pd.read_sql(query_horas, conn, params=params_base)
-
-    df_horas["estado"] = df_horas["total_horas"].apply(
-        lambda x: "✅ OK" if 8.4 <= float(x) <= 8.6 else "⚠️ Revisar"
+    # Lectura del rollup mantenido por triggers (sin escanear reportes)
+    df_horas = marcar_jornada(
+        consultar_horas_diarias(conn, fecha_inicio, fecha_fin, where_horas, params_base)
     )
 
     st.dataframe(df_horas, use_container_width=True)
@@ -2,6 +2,20 @@ import streamlit as st
 from datetime import date
 from db import get_connection
 from permisos import validar_acceso
+from servicios.catalogos import catalogo_asignaciones
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _supervisor_de(_conn, cedula):
+    """Supervisor actual de `cedula`, el que se guarda con cada reporte."""
+    cur = _conn.cursor()
+    cur.execute("""
+        SELECT supervisor
+        FROM personal
+        WHERE cedula = %s
+    """, (cedula,))
+    row_sup = cur.fetchone()
+    return row_sup[0] if row_sup else None
 
 
 def render():
@@ -26,38 +40,24 @@ def render():
     conn = get_connection()
     cur = conn.cursor()
 
+    # Catálogos compartidos por todo el servidor (sin consultas en el caso común)
+    catalogo = catalogo_asignaciones()
+
     # =========================
     # Cargar procesos
     # =========================
-    cur.execute("""
-        SELECT id, nombre
-        FROM procesos
-        WHERE id <> 0
-        ORDER BY id
-    """)
-    procesos = cur.fetchall()
+    procesos = catalogo.procesos(conn)
     procesos_dict = {nombre: pid for pid, nombre in procesos}
 
     # =========================
-    # Obtener supervisor real
+    # Obtener supervisor real (caché corta: una reasignación se ve en un minuto)
     # =========================
-    cur.execute("""
-        SELECT supervisor
-        FROM personal
-        WHERE cedula = %s
-    """, (cedula_usuario,))
-    row_sup = cur.fetchone()
-    supervisor_nombre = row_sup[0] if row_sup else None
+    supervisor_nombre = _supervisor_de(conn, cedula_usuario)
 
     # =========================
     # Cargar REGIONES reales
     # =========================
-    cur.execute("""
-        SELECT DISTINCT region
-        FROM asignaciones
-        ORDER BY region
-    """)
-    lista_regiones = [row[0] for row in cur.fetchall()]
+    lista_regiones = catalogo.regiones(conn)
 
     if not lista_regiones:
         st.error("No existen regiones registradas en la tabla asignaciones")
@@ -103,13 +103,7 @@ def render():
 
     else :
         # Asignaciones según región
-        cur.execute("""
-            SELECT DISTINCT asignacion
-            FROM asignaciones
-            WHERE region = %s
-            ORDER BY asignacion
-        """, (region,))
-        lista_asignaciones = [row[0] for row in cur.fetchall()]
+        lista_asignaciones = catalogo.asignaciones(conn, region)
     
         if not lista_asignaciones:
             st.warning("No hay asignaciones para esta región")
@@ -123,14 +117,7 @@ def render():
             )
     
         # Bloques según región + asignación
-        cur.execute("""
-            SELECT bloque
-            FROM asignaciones
-            WHERE region = %s
-              AND asignacion = %s
-            ORDER BY bloque
-        """, (region, asignacion))
-        lista_bloques = [row[0] for row in cur.fetchall()]
+        lista_bloques = catalogo.bloques(conn, region, asignacion)
     
         if not lista_bloques:
             st.warning("No hay bloques para esta asignación")
@@ -146,17 +133,7 @@ def render():
         # =========================
         # Obtener complejidad real
         # =========================
-        cur.execute("""
-            SELECT complejidad
-            FROM asignaciones
-            WHERE region = %s
-              AND asignacion = %s
-              AND bloque = %s
-            LIMIT 1
-        """, (region, asignacion, bloque))
-    
-        row_comp = cur.fetchone()
-        complejidad = row_comp[0] if row_comp else None
+        complejidad = catalogo.complejidad(conn, region, asignacion, bloque)
     
         zona = f"{asignacion}{str(bloque).zfill(3)}"
 
@@ -0,0 +1,145 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from db import get_pool
+from permisos import validar_acceso
+from servicios import instrumentacion
+from servicios.cambios_asignaciones import estado_bloques
+
+
+def render():
+    # =========================
+    # Control de acceso
+    # =========================
+    validar_acceso("Rendimiento SQL")
+
+    st.title("⏱️ Rendimiento SQL")
+
+    volcado = instrumentacion.ESTADISTICAS.volcar()
+    desde = datetime.fromtimestamp(volcado["desde"]).strftime("%Y-%m-%d %H:%M")
+
+    st.caption(
+        f"Estadísticas de este servidor desde {desde}. "
+        f"Umbral de sentencia lenta: {instrumentacion.UMBRAL_LENTO_MS:.0f} ms."
+    )
+
+    # =====================================================
+    # RESUMEN
+    # =====================================================
+    df = instrumentacion.informe(volcado)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Sentencias", int(df["llamadas"].sum()))
+    col2.metric("Tiempo total (s)", round(df["total_ms"].sum() / 1000, 1))
+    col3.metric("Lentas", int(df["lentas"].sum()))
+    col4.metric("Con error", int(df["errores"].sum()))
+
+    # =====================================================
+    # POOL DE CONEXIONES
+    # =====================================================
+    pool = get_pool().estadisticas()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Conexiones en uso (máx.)", f"{pool['en_uso_max']} / {pool['maximo']}")
+    col2.metric("Esperas por conexión", pool["esperas"], help=f"de {pool['entregas']} entregas")
+    col3.metric("Espera máxima (ms)", pool["espera_max_ms"])
+    col4.metric("Pool agotado", pool["agotamientos"])
+
+    # =====================================================
+    # FEED DE CAMBIOS DE ASIGNACIONES
+    # =====================================================
+    cambios = estado_bloques()
+    if cambios is not None:
+        feed = cambios.estadisticas()
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Feed de asignaciones", "al día" if feed["al_dia"] else "sin conexión")
+        col2.metric("Bloques en memoria", feed["bloques"])
+        col3.metric("Lotes aplicados", feed["lotes"], help=f"{feed['filas_aplicadas']} filas")
+        col4.metric("Recargas / reconexiones", f"{feed['recargas']} / {feed['reconexiones']}")
+
+        memoria = feed["memoria"]
+        texto = (
+            f"Estado en memoria: {memoria['bytes'] / 1e6:.1f} MB, "
+            f"{memoria['bytes_por_bloque']} bytes por bloque "
+            f"(presupuesto {memoria['presupuesto']})"
+        )
+        if memoria["dentro_del_presupuesto"]:
+            st.caption(texto)
+        else:
+            st.warning(texto)
+
+        if feed["ultimo_error"]:
+            st.caption(f"Último error del feed: {feed['ultimo_error']}")
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        orden = st.selectbox(
+            "Ordenar por",
+            ["total_ms", "media_ms", "p95_ms", "max_ms", "llamadas", "lentas"]
+        )
+    with col2:
+        top = st.number_input("Mostrar", min_value=5, max_value=500, value=25, step=5)
+
+    # =====================================================
+    # TOP DE SENTENCIAS
+    # =====================================================
+    st.subheader("📋 Sentencias")
+
+    if df.empty:
+        st.info("Todavía no se registraron sentencias")
+        return
+
+    df = df.sort_values(orden, ascending=False, ignore_index=True).head(int(top))
+
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "huella": st.column_config.TextColumn("huella", width="large")
+        }
+    )
+
+    # =====================================================
+    # HISTOGRAMA DE UNA SENTENCIA
+    # =====================================================
+    st.subheader("📊 Distribución de latencia")
+
+    fila = st.selectbox(
+        "Sentencia",
+        df.index,
+        format_func=lambda i: f"{df.at[i, 'origen']} · {df.at[i, 'huella'][:90]}"
+    )
+
+    sentencia = next(
+        s for s in volcado["sentencias"]
+        if s["huella"] == df.at[fila, "huella"] and s["origen"] == df.at[fila, "origen"]
+    )
+    etiquetas = [f"≤{l} ms" for l in volcado["limites_ms"]] + [f">{volcado['limites_ms'][-1]} ms"]
+
+    st.bar_chart(
+        pd.DataFrame({"intervalo": etiquetas, "llamadas": sentencia["histograma"]})
+        .set_index("intervalo"),
+        use_container_width=True
+    )
+    st.code(sentencia["huella"], language="sql")
+
+    # =====================================================
+    # VOLCADO / REINICIO
+    # =====================================================
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "⬇️ Descargar volcado (JSON)",
+            json.dumps(volcado, ensure_ascii=False),
+            file_name=f"sql_{datetime.now():%Y%m%d_%H%M}.json",
+            mime="application/json"
+        )
+    with col2:
+        if st.button("🧹 Reiniciar estadísticas"):
+            instrumentacion.ESTADISTICAS.reiniciar()
+            get_pool().reiniciar_estadisticas()
+            st.rerun()
@@ -14,6 +14,7 @@ PERMISOS_POR_PERFIL = {
         "Eventos",
         "Historial",
         "Correcciones",
+        "Rendimiento SQL",
         "Cerrar Sesion"
     ],
 
@@ -0,0 +1,262 @@
+"""
+Analítica de producción sobre instantáneas columnares de reportes.
+
+`python -m servicios.analitica_produccion` (periódico, p. ej. cada hora)
+escribe en `analitica/`:
+
+- reportes_AAAA_MM.parquet: un archivo por mes con las columnas que usa el
+  tablero. Solo se reescriben los meses cuya huella (conteo + hash de las
+  filas) cambió desde la corrida anterior.
+- personal.parquet y procesos.parquet: dimensiones para los nombres.
+- manifiesto.json: archivo y rango de cada mes (los meses archivados
+  apuntan al Parquet de servicios.archivo_reportes) y la fecha de la
+  instantánea. Se escribe al final: el tablero nunca ve una corrida a medias.
+
+El tablero de Dashboards consulta esos archivos con DuckDB embebido, solo
+los meses del rango pedido, sin tocar Postgres.
+
+Uso:
+    python -m servicios.analitica_produccion [--directorio analitica]
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import streamlit as st
+
+from servicios.archivo_reportes import archivadas
+
+DIRECTORIO_ANALITICA = "analitica"
+COMPRESION = "zstd"
+
+COLUMNAS = [
+    "id", "tipo_reporte", "cedula_personal", "fecha_reporte", "semana", "año",
+    "horas", "proceso_id", "region", "complejidad", "produccion", "aprobados",
+    "rechazados",
+]
+
+# Agrupaciones del tablero: etiqueta → (columnas del SELECT, orden)
+AGRUPACIONES = {
+    "Operador": (
+        ["COALESCE(p.nombre_completo, h.cedula_personal) AS operador"],
+        "produccion DESC",
+    ),
+    "Semana": (
+        [
+            "COALESCE(h.año, year(h.fecha_reporte))::INTEGER AS año",
+            "COALESCE(h.semana, week(h.fecha_reporte))::INTEGER AS semana",
+        ],
+        "año, semana",
+    ),
+    "Región": (["COALESCE(h.region, '—') AS region"], "region"),
+    "Proceso": (["COALESCE(pr.nombre, 'Sin proceso') AS proceso"], "proceso"),
+    "Complejidad": (["COALESCE(h.complejidad, '—') AS complejidad"], "complejidad"),
+}
+
+
+# =====================================================
+# INSTANTÁNEA (lee Postgres)
+# =====================================================
+def huellas(conn):
+    """Conteo y hash de las filas de cada mes de reportes, en una pasada."""
+    columnas = ", ".join(f'"{c}"' for c in COLUMNAS)
+    df = pd.read_sql(f"""
+        SELECT
+            to_char(fecha_reporte, 'YYYY_MM') AS mes,
+            date_trunc('month', fecha_reporte)::date AS desde,
+            count(*) AS filas,
+            sum(hashtext(ROW({columnas})::text)::bigint) AS huella
+        FROM reportes
+        GROUP BY 1, 2
+        ORDER BY 1
+    """, conn)
+    conn.rollback()
+    return df
+
+
+def _escribir(df, ruta):
+    temporal = ruta.with_suffix(".parquet.tmp")
+    df.to_parquet(temporal, compression=COMPRESION, index=False)
+    temporal.replace(ruta)
+
+
+def generar(conn, directorio=DIRECTORIO_ANALITICA):
+    """Actualiza la instantánea. Devuelve un resumen de lo escrito."""
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    anterior = leer_manifiesto(directorio) or {"meses": {}}
+    inicio = time.perf_counter()
+
+    meses, escritos = {}, []
+    for fila in huellas(conn).itertuples():
+        ruta = directorio / f"reportes_{fila.mes}.parquet"
+        huella = f"{fila.filas}:{fila.huella}"
+        previo = anterior["meses"].get(fila.mes, {})
+
+        if previo.get("huella") != huella or not ruta.exists():
+            hasta = (pd.Timestamp(fila.desde) + pd.DateOffset(months=1)).date()
+            df = pd.read_sql(f"""
+                SELECT {", ".join(f'"{c}"' for c in COLUMNAS)}
+                FROM reportes
+                WHERE fecha_reporte >= %s AND fecha_reporte < %s
+            """, conn, params=[fila.desde, hasta])
+            conn.rollback()
+            _escribir(df, ruta)
+            escritos.append(fila.mes)
+
+        meses[fila.mes] = {
+            "ruta": str(ruta),
+            "desde": str(fila.desde),
+            "filas": int(fila.filas),
+            "huella": huella,
+        }
+
+    # Meses que ya no están en la base: se leen del archivo
+    for fila in archivadas(conn).itertuples():
+        mes = f"{fila.desde:%Y_%m}"
+        if mes not in meses:
+            meses[mes] = {"ruta": fila.ruta, "desde": str(fila.desde), "filas": int(fila.filas),
+                          "huella": "archivo"}
+
+    for mes in set(anterior["meses"]) - set(meses):
+        (directorio / f"reportes_{mes}.parquet").unlink(missing_ok=True)
+    for mes, datos in meses.items():
+        if datos["huella"] == "archivo":
+            (directorio / f"reportes_{mes}.parquet").unlink(missing_ok=True)
+
+    _escribir(pd.read_sql("SELECT cedula, nombre_completo FROM personal", conn),
+              directorio / "personal.parquet")
+    _escribir(pd.read_sql("SELECT id, nombre FROM procesos", conn),
+              directorio / "procesos.parquet")
+    conn.rollback()
+
+    manifiesto = {
+        "generado_en": datetime.now().isoformat(timespec="seconds"),
+        "meses": dict(sorted(meses.items())),
+    }
+    temporal = directorio / "manifiesto.json.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    temporal.replace(directorio / "manifiesto.json")
+
+    return {
+        "meses": len(meses),
+        "reescritos": escritos,
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+
+
+# =====================================================
+# CONSULTAS (solo Parquet + DuckDB)
+# =====================================================
+def leer_manifiesto(directorio=DIRECTORIO_ANALITICA):
+    ruta = Path(directorio) / "manifiesto.json"
+    if not ruta.exists():
+        return None
+
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _archivos(manifiesto, fecha_inicio, fecha_fin):
+    """Rutas de los meses que tocan [fecha_inicio, fecha_fin]."""
+    desde = pd.Timestamp(fecha_inicio).replace(day=1)
+    hasta = pd.Timestamp(fecha_fin)
+    return [
+        datos["ruta"]
+        for datos in manifiesto["meses"].values()
+        if desde <= pd.Timestamp(datos["desde"]) <= hasta
+    ]
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _agrupar(generado_en, directorio, agrupacion, fecha_inicio, fecha_fin, region):
+    # generado_en solo forma parte de la clave: una instantánea nueva invalida
+    manifiesto = leer_manifiesto(directorio)
+    archivos = _archivos(manifiesto, fecha_inicio, fecha_fin)
+    columnas, orden = AGRUPACIONES[agrupacion]
+    claves = [c.rsplit(" AS ", 1)[1] for c in columnas]
+
+    if not archivos:
+        return pd.DataFrame(columns=claves + [
+            "reportes", "horas", "produccion", "aprobados", "rechazados",
+        ])
+
+    filtro_region = "AND h.region = $region" if region else ""
+    params = {
+        "archivos": archivos,
+        "personal": str(Path(directorio) / "personal.parquet"),
+        "procesos": str(Path(directorio) / "procesos.parquet"),
+        "inicio": pd.Timestamp(fecha_inicio).date(),
+        "fin": pd.Timestamp(fecha_fin).date(),
+    }
+    if region:
+        params["region"] = region
+
+    with duckdb.connect() as con:
+        return con.execute(f"""
+            SELECT
+                {", ".join(columnas)},
+                count(*) AS reportes,
+                sum(h.horas) AS horas,
+                sum(h.produccion) AS produccion,
+                sum(h.aprobados) AS aprobados,
+                sum(h.rechazados) AS rechazados
+            FROM read_parquet($archivos, union_by_name = true) h
+            LEFT JOIN read_parquet($personal) p ON p.cedula = h.cedula_personal
+            LEFT JOIN read_parquet($procesos) pr ON pr.id = h.proceso_id
+            WHERE h.tipo_reporte = 'produccion'
+              AND h.fecha_reporte BETWEEN $inicio AND $fin
+              {filtro_region}
+            GROUP BY ALL
+            ORDER BY {orden}
+        """, params).df()
+
+
+def tasas(df):
+    """Agrega tasa de aprobación / rechazo y producción por hora."""
+    df = df.copy()
+    revisados = (df["aprobados"] + df["rechazados"]).astype(float)
+    df["tasa_aprobacion"] = (df["aprobados"] / revisados.where(revisados > 0)).round(4)
+    df["tasa_rechazo"] = (df["rechazados"] / revisados.where(revisados > 0)).round(4)
+    horas = df["horas"].astype(float)
+    df["produccion_por_hora"] = (df["produccion"] / horas.where(horas > 0)).round(2)
+    return df
+
+
+def produccion_por(agrupacion, fecha_inicio, fecha_fin, region=None,
+                   directorio=DIRECTORIO_ANALITICA):
+    """
+    Producción, aprobados, rechazados, horas y tasas por `agrupacion` (ver
+    AGRUPACIONES) entre dos fechas. Devuelve (df, generado_en), o
+    (None, None) si todavía no hay instantánea.
+    """
+    manifiesto = leer_manifiesto(directorio)
+    if manifiesto is None:
+        return None, None
+
+    df = _agrupar(
+        manifiesto["generado_en"], str(directorio), agrupacion,
+        fecha_inicio, fecha_fin, region
+    )
+    return tasas(df), manifiesto["generado_en"]
+
+
+def main():
+    from db import conectar_directo
+
+    parser = argparse.ArgumentParser(description="Instantánea columnar de reportes")
+    parser.add_argument("--directorio", default=DIRECTORIO_ANALITICA)
+    args = parser.parse_args()
+
+    resumen = generar(conectar_directo(), args.directorio)
+    print(f"✅ {resumen['meses']} meses, {len(resumen['reescritos'])} reescritos "
+          f"en {resumen['segundos']} s")
+
+
+if __name__ == "__main__":
+    main()
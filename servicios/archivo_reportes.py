@@ -0,0 +1,269 @@
+"""
+Archivo de reportes antiguos (fuera de la base, migración 004).
+
+Los meses más viejos que la retención se separan de reportes (DETACH), se
+escriben a Parquet comprimido con zstd (un archivo por mes) y se borran de
+la base; el catálogo reportes_archivo guarda qué meses están archivados y
+dónde. El rollup horas_diarias conserva esos días, así que el resumen de
+horas del Historial no cambia.
+
+Lo archivado se consulta bajo demanda (consultar: solo se leen los meses
+del rango, con el filtro empujado al Parquet) o se devuelve a la base
+(restaurar). Configuración en secrets.toml:
+
+    [archivo]
+    DIRECTORIO = "archivo/reportes"   # compartido por la app y los scripts
+    RETENCION_MESES = 24
+
+Uso:
+    python -m servicios.archivo_reportes --estado
+    python -m servicios.archivo_reportes --archivar [--retencion 24]
+    python -m servicios.archivo_reportes --restaurar reportes_2022_01
+"""
+import argparse
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+from servicios.particiones_reportes import particiones
+
+COMPRESION = "zstd"
+
+
+def configuracion():
+    try:
+        config = st.secrets.get("archivo", {})
+    except Exception:
+        config = {}
+
+    return {
+        "directorio": Path(config.get("DIRECTORIO", "archivo/reportes")),
+        "retencion_meses": int(config.get("RETENCION_MESES", 24)),
+    }
+
+
+def _catalogo_existe(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass('reportes_archivo') IS NOT NULL")
+    existe = cur.fetchone()[0]
+    conn.rollback()
+    return existe
+
+
+def archivadas(conn):
+    if not _catalogo_existe(conn):
+        return pd.DataFrame(columns=["particion", "desde", "hasta", "filas", "bytes", "ruta"])
+
+    df = pd.read_sql("""
+        SELECT particion, desde, hasta, filas, bytes, ruta, archivada_en
+        FROM reportes_archivo
+        ORDER BY desde
+    """, conn)
+    conn.rollback()
+    return df
+
+
+def horizonte(conn):
+    """Primer día que sigue en la base (None si no hay nada archivado)."""
+    if not _catalogo_existe(conn):
+        return None
+
+    cur = conn.cursor()
+    cur.execute("SELECT max(hasta) FROM reportes_archivo")
+    fecha = cur.fetchone()[0]
+    conn.rollback()
+    return fecha
+
+
+# =====================================================
+# ARCHIVAR
+# =====================================================
+def archivar_particion(conn, particion, desde, hasta, directorio):
+    """
+    DETACH (bloqueo corto), exportación a Parquet y DROP. Si la exportación
+    falla la partición se vuelve a adjuntar. Devuelve la fila del catálogo.
+    """
+    tabla = sql.Identifier(particion)
+    cur = conn.cursor()
+    try:
+        cur.execute("SET LOCAL lock_timeout = '10s'")
+        cur.execute(sql.SQL("ALTER TABLE reportes DETACH PARTITION {}").format(tabla))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    ruta = Path(directorio) / f"{particion}.parquet"
+    try:
+        df = pd.read_sql(
+            sql.SQL("SELECT * FROM {} ORDER BY fecha_reporte, id").format(tabla).as_string(conn),
+            conn,
+        )
+        conn.rollback()
+
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_suffix(".parquet.tmp")
+        df.to_parquet(temporal, compression=COMPRESION, index=False)
+        temporal.replace(ruta)
+
+        if len(pd.read_parquet(ruta, columns=["id"])) != len(df):
+            raise RuntimeError(f"{ruta}: el archivo no tiene las {len(df)} filas de {particion}")
+
+        cur.execute("""
+            INSERT INTO reportes_archivo (particion, desde, hasta, filas, bytes, ruta)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (particion) DO UPDATE
+            SET desde = EXCLUDED.desde,
+                hasta = EXCLUDED.hasta,
+                filas = EXCLUDED.filas,
+                bytes = EXCLUDED.bytes,
+                ruta = EXCLUDED.ruta,
+                archivada_en = CURRENT_TIMESTAMP
+        """, (particion, desde, hasta, len(df), ruta.stat().st_size, str(ruta)))
+        cur.execute(sql.SQL("DROP TABLE {}").format(tabla))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        cur.execute(sql.SQL("ALTER TABLE reportes ATTACH PARTITION {} FOR VALUES FROM (%s) TO (%s)")
+                    .format(tabla), (desde, hasta))
+        conn.commit()
+        raise
+
+    return {"particion": particion, "desde": desde, "hasta": hasta,
+            "filas": len(df), "bytes": ruta.stat().st_size, "ruta": str(ruta)}
+
+
+def archivar(conn, retencion_meses=None, directorio=None, hoy=None):
+    """
+    Archiva los meses que terminan antes de la retención (contada desde el
+    primer día del mes actual). Devuelve la lista de meses archivados.
+    """
+    config = configuracion()
+    retencion_meses = config["retencion_meses"] if retencion_meses is None else retencion_meses
+    directorio = directorio or config["directorio"]
+    hoy = hoy or date.today()
+
+    limite = (pd.Timestamp(hoy.year, hoy.month, 1) - pd.DateOffset(months=retencion_meses)).date()
+    vencidas = particiones(conn).dropna(subset=["hasta"])
+    vencidas = vencidas[vencidas["hasta"] <= limite]
+
+    return [
+        archivar_particion(conn, fila.particion, fila.desde, fila.hasta, directorio)
+        for fila in vencidas.itertuples()
+    ]
+
+
+# =====================================================
+# CONSULTAR / RESTAURAR
+# =====================================================
+def consultar(conn, fecha_inicio, fecha_fin, filtros=None):
+    """
+    Reportes archivados entre `fecha_inicio` y `fecha_fin` con las columnas
+    de servicios.historial.sql_reportes. `filtros` es {columna: valor}
+    sobre columnas de reportes (cedula_personal, supervisor_nombre).
+    """
+    meses = archivadas(conn)
+    meses = meses[(meses["desde"] <= fecha_fin) & (meses["hasta"] > fecha_inicio)]
+
+    condiciones = [
+        ("fecha_reporte", ">=", pd.Timestamp(fecha_inicio).date()),
+        ("fecha_reporte", "<=", pd.Timestamp(fecha_fin).date()),
+        *((columna, "==", valor) for columna, valor in (filtros or {}).items()),
+    ]
+    partes = [pd.read_parquet(ruta, filters=condiciones) for ruta in meses["ruta"]]
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=[
+        "id", "tipo_reporte", "fecha_reporte", "cedula_personal", "supervisor_nombre",
+        "zona", "horas", "produccion", "aprobados", "rechazados", "tipo_evento_id",
+        "observaciones",
+    ])
+
+    # Nombres actuales de personas y tipos de evento (como el JOIN de la consulta viva)
+    personas = pd.read_sql("""
+        SELECT cedula AS cedula_personal, nombre_completo AS persona
+        FROM personal
+        WHERE cedula = ANY(%s)
+    """, conn, params=[df["cedula_personal"].dropna().unique().tolist()])
+    tipos = pd.read_sql("SELECT id AS tipo_evento_id, nombre AS tipo_evento FROM tipos_evento", conn)
+    conn.rollback()
+
+    df = (
+        df.merge(personas, on="cedula_personal")
+        .merge(tipos, on="tipo_evento_id", how="left")
+        .rename(columns={"supervisor_nombre": "supervisor"})
+        .sort_values(["fecha_reporte", "persona"], ignore_index=True)
+    )
+    return df[[
+        "id", "tipo_reporte", "fecha_reporte", "persona", "supervisor", "zona", "horas",
+        "produccion", "aprobados", "rechazados", "tipo_evento", "observaciones",
+    ]]
+
+
+def restaurar(conn, particion):
+    """Devuelve un mes archivado a reportes. Devuelve las filas restauradas."""
+    cur = conn.cursor()
+    cur.execute("SELECT desde, hasta, ruta FROM reportes_archivo WHERE particion = %s", (particion,))
+    fila = cur.fetchone()
+    if fila is None:
+        conn.rollback()
+        raise ValueError(f"{particion} no está archivada")
+    desde, hasta, ruta = fila
+
+    df = pd.read_parquet(ruta)
+    df = df.astype(object).where(df.notna(), None)
+    tabla = sql.Identifier(particion)
+    columnas = sql.SQL(", ").join(map(sql.Identifier, df.columns))
+
+    try:
+        # Se carga suelta y se adjunta: no pasa por los triggers de reportes
+        # (horas_diarias ya tiene esos días)
+        cur.execute(sql.SQL("""
+            CREATE TABLE {} (LIKE reportes INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        """).format(tabla))
+        execute_values(
+            cur,
+            sql.SQL("INSERT INTO {} ({}) VALUES %s").format(tabla, columnas).as_string(conn),
+            df.itertuples(index=False, name=None),
+            page_size=5_000,
+        )
+        cur.execute(sql.SQL("""
+            ALTER TABLE reportes ATTACH PARTITION {} FOR VALUES FROM (%s) TO (%s)
+        """).format(tabla), (desde, hasta))
+        cur.execute("DELETE FROM reportes_archivo WHERE particion = %s", (particion,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return len(df)
+
+
+def main():
+    from db import conectar_directo
+
+    parser = argparse.ArgumentParser(description="Archivo de reportes antiguos")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--estado", action="store_true")
+    grupo.add_argument("--archivar", action="store_true")
+    grupo.add_argument("--restaurar", metavar="PARTICION")
+    parser.add_argument("--retencion", type=int, help="Meses que se conservan en la base")
+    args = parser.parse_args()
+
+    conn = conectar_directo()
+
+    if args.archivar:
+        hechas = archivar(conn, retencion_meses=args.retencion)
+        print(f"✅ {len(hechas)} meses archivados")
+        for mes in hechas:
+            print(f"   {mes['particion']}: {mes['filas']} filas, {mes['bytes'] / 1e6:.1f} MB")
+    elif args.restaurar:
+        print(f"✅ {restaurar(conn, args.restaurar)} filas restauradas en {args.restaurar}")
+    else:
+        print(archivadas(conn).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,757 @@
+"""
+Estado de bloques en memoria, al día por LISTEN/NOTIFY (migración 005).
+
+Un hilo por proceso escucha el canal asignaciones_cambios con una conexión
+propia (fuera del pool): al conectarse hace LISTEN, carga la tabla una vez
+y desde ahí solo aplica los deltas que publican los triggers de
+asignaciones. Las páginas leen de esa copia en lugar de consultar la base
+en cada rerun.
+
+- La copia son arreglos NumPy por columna. Los textos (region, asignacion,
+  estado, proceso, operador, qc) se guardan como códigos enteros que
+  apuntan a un diccionario de valores, y los enteros en el tipo más chico
+  en que caben: `memoria()` mide los bytes por bloque, índices incluidos,
+  contra un presupuesto fijo ([cambios] BYTES_POR_BLOQUE).
+- Un delta escribe en su lugar solo las posiciones de los ids que
+  cambiaron, un borrado marca la fila y las inserciones se agregan al
+  final. Se compacta (filas borradas y valores que ya nadie usa) cuando se
+  acumulan borradas o cuando la copia se pasa del presupuesto.
+- Las búsquedas por (region, asignacion, bloque) son vectorizadas sobre un
+  índice ordenado de claves (`en_claves`), así que el mapa se arma sin
+  copiar la región a un DataFrame.
+- Cada lote aplicado sube la versión y se recuerda qué ids cambiaron:
+  `cambio_en()` dice si algo de una selección cambió desde una versión.
+- Si se pierde la conexión, se reconecta y se recarga completo (los
+  mensajes enviados mientras tanto no se recuperan). Mientras no está al
+  día, las lecturas van a la base como antes.
+- Las lecturas trabajan bajo el mismo lock que los deltas, así que nunca
+  ven un lote a medias.
+- `barrera()` publica un mensaje propio y espera a verlo: como los
+  mensajes llegan en orden de commit, al volver ya se aplicó todo lo
+  confirmado antes (p. ej. lo que acaba de escribir la misma sesión).
+"""
+import json
+import select
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import streamlit as st
+
+CANAL = "asignaciones_cambios"
+
+COLUMNAS = [
+    "id", "region", "asignacion", "bloque", "estado_actual", "proceso_actual",
+    "operador_actual", "qc_actual", "cantidad_rechazos", "cantidad_aprobaciones",
+]
+
+# Columnas de texto guardadas como códigos de diccionario (-1 = NULL)
+CODIFICADAS = [
+    "region", "asignacion", "estado_actual", "proceso_actual", "operador_actual", "qc_actual",
+]
+
+# filtro de las lecturas → columna
+FILTROS = {
+    "region": "region",
+    "asignacion": "asignacion",
+    "operador": "operador_actual",
+    "qc": "qc_actual",
+}
+
+# Lotes de cambios recordados para `cambio_en`
+REGISTRO_MAXIMO = 512
+# Fracción de filas borradas a partir de la cual se compactan los arreglos
+BORRADAS_MAXIMO = 0.2
+# Bytes por bloque vivo: arreglos, índices y diccionarios
+PRESUPUESTO_BYTES_POR_BLOQUE = 64
+SONDEO_S = 5.0
+PING_S = 30.0
+ESPERA_MAXIMA_S = 30.0
+
+
+def configuracion():
+    try:
+        config = st.secrets.get("cambios", {})
+    except Exception:
+        config = {}
+
+    return {
+        "activo": bool(config.get("ACTIVO", True)),
+        "auto_refresco_s": float(config.get("AUTO_REFRESCO_S", 15)),
+        "bytes_por_bloque": int(config.get("BYTES_POR_BLOQUE", PRESUPUESTO_BYTES_POR_BLOQUE)),
+    }
+
+
+def _entero_compacto(valores, minimo=np.int8):
+    """El entero con signo más chico (desde `minimo`) en que caben `valores`."""
+    if len(valores) == 0:
+        return np.dtype(minimo)
+
+    menor, mayor = int(np.min(valores)), int(np.max(valores))
+    for tipo in (np.int8, np.int16, np.int32, np.int64):
+        limites = np.iinfo(tipo)
+        if (np.dtype(tipo).itemsize >= np.dtype(minimo).itemsize
+                and limites.min <= menor and mayor <= limites.max):
+            return np.dtype(tipo)
+    raise OverflowError(f"Valores fuera de int64: {menor}..{mayor}")
+
+
+def _con_lugar(arreglo, valores):
+    """`arreglo`, ampliado a un tipo más grande si `valores` no cabe en el suyo."""
+    tipo = np.promote_types(arreglo.dtype, _entero_compacto(valores))
+    return arreglo if tipo == arreglo.dtype else arreglo.astype(tipo)
+
+
+class Diccionario:
+    """Valores de texto ↔ códigos enteros (posición en `valores`); -1 es NULL."""
+
+    def __init__(self, valores=()):
+        self.valores = list(valores)
+        self.codigos = {v: i for i, v in enumerate(self.valores)}
+        self.bytes_valores = sum(sys.getsizeof(v) for v in self.valores)
+        self._tabla = None    # valores + [None], para decodificar con take
+        self._indice = None   # pd.Index de valores, para codificar en lote
+
+    def __len__(self):
+        return len(self.valores)
+
+    def agregar(self, valores):
+        """Códigos de `valores` (pocos, los de un delta), agregando los nuevos."""
+        codigos = np.empty(len(valores), dtype=np.int64)
+        for i, valor in enumerate(valores):
+            if valor is None:
+                codigos[i] = -1
+                continue
+
+            codigo = self.codigos.get(valor)
+            if codigo is None:
+                codigo = self.codigos[valor] = len(self.valores)
+                self.valores.append(valor)
+                self.bytes_valores += sys.getsizeof(valor)
+                self._tabla = self._indice = None
+            codigos[i] = codigo
+        return codigos
+
+    def codificar(self, valores):
+        """Códigos de `valores` sin agregar nada: -1 para los desconocidos."""
+        if self._indice is None:
+            self._indice = pd.Index(self.valores, dtype=object)
+        return self._indice.get_indexer(pd.Index(valores, dtype=object))
+
+    def decodificar(self, codigos):
+        """ndarray object con el valor de cada código (None para -1)."""
+        if self._tabla is None:
+            self._tabla = np.array(self.valores + [None], dtype=object)
+        return self._tabla.take(codigos)
+
+    def recodificar(self, codigos):
+        """(códigos, Diccionario) solo con los valores que `codigos` usa."""
+        usados = np.unique(codigos[codigos >= 0])
+        mapa = np.full(len(self.valores) + 1, -1, dtype=np.int64)
+        mapa[usados] = np.arange(len(usados))
+
+        nuevos = mapa.take(codigos)
+        return (
+            nuevos.astype(_entero_compacto(nuevos)),
+            Diccionario(self.valores[i] for i in usados),
+        )
+
+    def bytes(self):
+        tablas = 0
+        if self._tabla is not None:
+            tablas += self._tabla.nbytes
+        if self._indice is not None:
+            tablas += self._indice.memory_usage()
+        return (
+            self.bytes_valores + tablas
+            + sys.getsizeof(self.valores) + sys.getsizeof(self.codigos)
+        )
+
+
+class EstadoBloques:
+    """
+    Copia en memoria de asignaciones mantenida por el hilo de escucha.
+    `conectar` es una función sin argumentos que devuelve una conexión nueva.
+    """
+
+    def __init__(self, conectar, presupuesto=PRESUPUESTO_BYTES_POR_BLOQUE):
+        self._conectar = conectar
+        self.presupuesto = presupuesto
+        self._columnas = None       # {columna: ndarray de enteros}, una fila por bloque
+        self._diccionarios = None   # {columna de CODIFICADAS: Diccionario}
+        self._vivas = None          # False = fila borrada
+        self._ids = None            # (ids ordenados, posición de cada uno)
+        self._claves = None         # (claves ordenadas, posición, tamaños); None = rearmar
+        self._version = 0
+        self._al_dia = False
+
+        self._registro = deque(maxlen=REGISTRO_MAXIMO)   # [(version, ids)]
+        self._version_base = 0                            # última recarga completa
+        self._lock = threading.Lock()
+        self._barreras = threading.Condition(self._lock)
+        self._esperadas = set()   # barreras propias pendientes
+        self._vistas = set()
+
+        self._parar = threading.Event()
+        self._hilo = None
+        self._reiniciar_estadisticas()
+
+    def _reiniciar_estadisticas(self):
+        self._mensajes = 0
+        self._filas_aplicadas = 0
+        self._lotes = 0
+        self._recargas = 0
+        self._compactaciones = 0
+        self._reconexiones = 0
+        self._ultimo_error = None
+        self._aplicar_s = 0.0
+
+    # -------------------------
+    # Hilo de escucha
+    # -------------------------
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(
+                target=self._escuchar, name="cambios_asignaciones", daemon=True
+            )
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def _escuchar(self):
+        espera = 1.0
+        while not self._parar.is_set():
+            conn = None
+            try:
+                conn = self._conectar()
+                conn.autocommit = True
+                cur = conn.cursor()
+
+                cur.execute("SELECT to_regproc('asignaciones_notificar') IS NOT NULL")
+                if not cur.fetchone()[0]:
+                    raise RuntimeError("Falta la migración 005 (asignaciones_notificar)")
+
+                # Primero LISTEN y después la carga: lo que se confirme en el
+                # medio llega también como mensaje y se vuelve a aplicar igual
+                cur.execute(f"LISTEN {CANAL}")
+                self._recargar(conn)
+                espera = 1.0
+                ultimo = time.monotonic()
+
+                while not self._parar.is_set():
+                    if select.select([conn], [], [], SONDEO_S) == ([], [], []):
+                        if time.monotonic() - ultimo > PING_S:
+                            cur.execute("SELECT 1")
+                            ultimo = time.monotonic()
+                        continue
+
+                    conn.poll()
+                    ultimo = time.monotonic()
+                    if conn.notifies:
+                        mensajes = [n.payload for n in conn.notifies]
+                        conn.notifies.clear()
+                        self._procesar(conn, mensajes)
+
+            except Exception as e:
+                self._al_dia = False
+                self._reconexiones += 1
+                self._ultimo_error = f"{type(e).__name__}: {e}"
+                self._parar.wait(espera)
+                espera = min(espera * 2, ESPERA_MAXIMA_S)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
+
+    def _recargar(self, conn):
+        df = pd.read_sql(f"SELECT {', '.join(COLUMNAS)} FROM asignaciones ORDER BY id", conn)
+
+        columnas, diccionarios = {}, {}
+        for c in COLUMNAS:
+            if c in CODIFICADAS:
+                codigos, valores = pd.factorize(df[c].to_numpy(dtype=object))
+                diccionarios[c] = Diccionario(valores)
+            else:
+                codigos = df[c].to_numpy(dtype=np.int64)
+            columnas[c] = codigos.astype(_entero_compacto(codigos))
+
+        with self._lock:
+            self._columnas = columnas
+            self._diccionarios = diccionarios
+            self._vivas = np.ones(len(df), dtype=bool)
+            self._indexar_ids()
+            self._claves = None
+            self._version += 1
+            self._registro.clear()
+            self._version_base = self._version
+        self._al_dia = True
+        self._recargas += 1
+
+    def _procesar(self, conn, mensajes):
+        """Aplica un grupo de mensajes como un solo lote (el último estado de cada id gana)."""
+        inicio = time.perf_counter()
+        cambios, barreras, recargar = {}, [], False
+
+        for texto in mensajes:
+            mensaje = json.loads(texto)
+            self._mensajes += 1
+            if "b" in mensaje:
+                barreras.append(mensaje["b"])
+            elif "r" in mensaje:
+                recargar = True
+            elif "d" in mensaje:
+                cambios.update(dict.fromkeys(mensaje["d"]))
+            else:
+                cambios.update((fila[0], fila[1:]) for fila in mensaje["u"])
+
+        if recargar:
+            # La recarga ya incluye todo lo confirmado hasta ahora
+            self._recargar(conn)
+        elif cambios:
+            self._aplicar(cambios)
+
+        self._aplicar_s += time.perf_counter() - inicio
+        if barreras:
+            with self._barreras:
+                # Solo las propias: las de otros procesos también llegan aquí
+                self._vistas.update(self._esperadas.intersection(barreras))
+                self._barreras.notify_all()
+
+    def _aplicar(self, cambios):
+        """`cambios` es {id: valores (sin id) o None si se borró}."""
+        ids = np.fromiter(cambios, dtype=np.int64, count=len(cambios))
+        filas = [(i, *v) for i, v in cambios.items() if v is not None]
+        borrados = np.array([i for i, v in cambios.items() if v is None], dtype=np.int64)
+
+        with self._lock:
+            columnas, diccionarios = self._columnas, self._diccionarios
+            tamaños = (len(diccionarios["region"]), len(diccionarios["asignacion"]))
+
+            valores = {}
+            for j, c in enumerate(COLUMNAS):
+                datos = [f[j] for f in filas]
+                if c in CODIFICADAS:
+                    valores[c] = diccionarios[c].agregar(datos)
+                else:
+                    valores[c] = np.array(datos, dtype=np.int64)
+                columnas[c] = _con_lugar(columnas[c], valores[c])
+
+            posiciones = self._posiciones_de(valores["id"])
+            existentes = posiciones >= 0
+            en_lugar = posiciones[existentes]
+
+            # El índice de claves sigue valiendo si ningún bloque cambió de clave
+            if self._claves is not None and (
+                len(borrados)
+                or not existentes.all()
+                or tamaños != (len(diccionarios["region"]), len(diccionarios["asignacion"]))
+                or any(
+                    (columnas[c][en_lugar] != valores[c][existentes]).any()
+                    for c in ("region", "asignacion", "bloque")
+                )
+            ):
+                self._claves = None
+
+            for c in COLUMNAS[1:]:
+                columnas[c][en_lugar] = valores[c][existentes]
+
+            if len(borrados):
+                posiciones = self._posiciones_de(borrados)
+                self._vivas[posiciones[posiciones >= 0]] = False
+
+            if not existentes.all():
+                nuevas = ~existentes
+                for c in COLUMNAS:
+                    columnas[c] = np.concatenate(
+                        [columnas[c], valores[c][nuevas].astype(columnas[c].dtype)]
+                    )
+                self._vivas = np.concatenate([self._vivas, np.ones(nuevas.sum(), dtype=bool)])
+                self._indexar_ids()
+
+            vivas = int(self._vivas.sum())
+            if vivas < len(self._vivas) and (
+                len(self._vivas) - vivas > BORRADAS_MAXIMO * len(self._vivas)
+                or self._bytes() > self.presupuesto * vivas
+            ):
+                self._compactar()
+
+            self._version += 1
+            self._registro.append((self._version, ids))
+
+        self._lotes += 1
+        self._filas_aplicadas += len(cambios)
+
+    def _compactar(self):
+        """Quita las filas borradas y los valores de diccionario que ya no se usan."""
+        vivas = self._vivas
+        columnas = {c: a[vivas] for c, a in self._columnas.items()}
+
+        for c in COLUMNAS:
+            if c in CODIFICADAS:
+                columnas[c], self._diccionarios[c] = self._diccionarios[c].recodificar(columnas[c])
+            else:
+                columnas[c] = columnas[c].astype(_entero_compacto(columnas[c]))
+
+        self._columnas = columnas
+        self._vivas = np.ones(len(columnas["id"]), dtype=bool)
+        self._indexar_ids()
+        self._claves = None
+        self._compactaciones += 1
+
+    # -------------------------
+    # Índices (bajo el lock)
+    # -------------------------
+    def _indexar_ids(self):
+        ids = self._columnas["id"]
+        orden = np.argsort(ids, kind="stable")
+        self._ids = (ids[orden], orden.astype(_entero_compacto([len(ids)], np.int32)))
+
+    def _posiciones_de(self, ids):
+        """Posición en los arreglos de cada id, o -1 si no está."""
+        ordenados, orden = self._ids
+        if len(ordenados) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+
+        i = np.minimum(np.searchsorted(ordenados, ids), len(ordenados) - 1)
+        return np.where(ordenados[i] == ids, orden[i], -1)
+
+    @staticmethod
+    def _clave(regiones, asignaciones, bloques, tamaños):
+        """(region, asignacion, bloque) en códigos → un int64, o -1 si no puede estar."""
+        n_asignaciones, n_bloques = tamaños
+        bloques = np.asarray(bloques, dtype=np.int64)
+        validas = (regiones >= 0) & (asignaciones >= 0) & (bloques >= 0) & (bloques < n_bloques)
+
+        claves = (
+            (np.asarray(regiones, dtype=np.int64) * n_asignaciones + asignaciones) * n_bloques
+            + bloques
+        )
+        return np.where(validas, claves, -1)
+
+    def _indice_claves(self):
+        """Claves de los bloques vivos, ordenadas; se rearma solo si alguna cambió."""
+        if self._claves is None:
+            columnas = self._columnas
+            tamaños = (
+                len(self._diccionarios["asignacion"]),
+                int(columnas["bloque"].max(initial=0)) + 1,
+            )
+            if len(self._diccionarios["region"]) * tamaños[0] * tamaños[1] > np.iinfo(np.int64).max:
+                raise OverflowError("Las claves de bloque no caben en int64")
+
+            claves = self._clave(
+                columnas["region"], columnas["asignacion"], columnas["bloque"], tamaños
+            )
+            claves[~self._vivas] = -1
+            orden = np.argsort(claves, kind="stable")
+            self._claves = (claves[orden], orden.astype(self._ids[1].dtype), tamaños)
+        return self._claves
+
+    def _buscar(self, regiones, asignaciones, bloques):
+        ordenadas, orden, tamaños = self._indice_claves()
+        claves = self._clave(
+            self._diccionarios["region"].codificar(regiones),
+            self._diccionarios["asignacion"].codificar(asignaciones),
+            bloques,
+            tamaños,
+        )
+        if len(ordenadas) == 0:
+            return np.full(len(claves), -1, dtype=np.int64)
+
+        i = np.minimum(np.searchsorted(ordenadas, claves), len(ordenadas) - 1)
+        return np.where((ordenadas[i] == claves) & (claves >= 0), orden[i], -1)
+
+    # -------------------------
+    # Lecturas
+    # -------------------------
+    def al_dia(self):
+        return self._al_dia and self._columnas is not None
+
+    @property
+    def version(self):
+        return self._version
+
+    def _mascara(self, filtros):
+        """Filas vivas que cumplen `filtros`, comparando códigos."""
+        mascara = self._vivas.copy()
+
+        for nombre, valor in filtros.items():
+            if valor is None:
+                continue
+
+            columna = FILTROS[nombre]
+            codigo = self._diccionarios[columna].codigos.get(valor)
+            if codigo is None:
+                return np.zeros_like(mascara)
+            mascara &= self._columnas[columna] == codigo
+
+        return mascara
+
+    def _valores(self, columna, posiciones):
+        """Valores de `columna` en `posiciones`; las -1 quedan None (o 0 si es entera)."""
+        arreglo = self._columnas[columna]
+        validas = posiciones >= 0
+        if len(arreglo):
+            codigos = arreglo.take(np.where(validas, posiciones, 0))
+        else:
+            codigos = np.zeros(len(posiciones), dtype=arreglo.dtype)
+
+        if columna in CODIFICADAS:
+            return self._diccionarios[columna].decodificar(np.where(validas, codigos, -1))
+        return codigos.astype(np.int64)
+
+    def _marco(self, posiciones, columnas=COLUMNAS):
+        # dtype explícito: inferir el tipo del texto cuesta más que copiarlo
+        return pd.DataFrame({
+            c: pd.Series(
+                self._valores(c, posiciones),
+                dtype=object if c in CODIFICADAS else np.int64,
+                copy=False,
+            )
+            for c in columnas
+        })
+
+    def bloques(self, **filtros):
+        """(DataFrame con COLUMNAS, versión) de los bloques que cumplen `filtros`."""
+        with self._lock:
+            return self._marco(np.flatnonzero(self._mascara(filtros))), self._version
+
+    def asignaciones(self, region=None):
+        """Asignaciones con al menos un bloque en `region`, ordenadas."""
+        with self._lock:
+            codigos = np.unique(self._columnas["asignacion"][self._mascara({"region": region})])
+            valores = self._diccionarios["asignacion"].decodificar(codigos)
+        return sorted(v for v in valores if v is not None)
+
+    def buscar(self, regiones, asignaciones, bloques):
+        """
+        Posición de cada (region, asignacion, bloque) en los arreglos, o -1 si
+        no hay un bloque vivo con esa clave. Vectorizado: recibe secuencias.
+        """
+        with self._lock:
+            return self._buscar(regiones, asignaciones, bloques)
+
+    def en_claves(self, claves, columnas=("estado_actual", "proceso_actual", "operador_actual")):
+        """
+        `columnas` del bloque de cada fila de `claves` (region, asignacion,
+        bloque), en el mismo orden; `encontrado` indica si existe.
+        """
+        with self._lock:
+            posiciones = self._buscar(claves["region"], claves["asignacion"], claves["bloque"])
+            df = self._marco(posiciones, list(columnas))
+        df["encontrado"] = posiciones >= 0
+        return df
+
+    def predominante(self, region=None):
+        """region, asignacion, estado_actual: el estado con más bloques de cada asignación."""
+        with self._lock:
+            mascara = self._mascara({"region": region})
+            diccionarios = self._diccionarios
+            n_asignaciones = len(diccionarios["asignacion"])
+            n_estados = len(diccionarios["estado_actual"]) + 1   # +1: NULL
+
+            grupos = (
+                self._columnas["region"][mascara].astype(np.int64) * n_asignaciones
+                + self._columnas["asignacion"][mascara]
+            )
+            pares, cantidades = np.unique(
+                grupos * n_estados + self._columnas["estado_actual"][mascara] + 1,
+                return_counts=True,
+            )
+            grupos = pares // n_estados
+
+            # Dentro de cada asignación, el estado con más bloques queda último
+            orden = np.lexsort((cantidades, grupos))
+            ultimos = orden[np.append(grupos[orden][1:] != grupos[orden][:-1], True)]
+
+            return pd.DataFrame({
+                "region": diccionarios["region"].decodificar(grupos[ultimos] // n_asignaciones),
+                "asignacion": diccionarios["asignacion"].decodificar(grupos[ultimos] % n_asignaciones),
+                "estado_actual": diccionarios["estado_actual"].decodificar(
+                    pares[ultimos] % n_estados - 1
+                ),
+            })
+
+    def _cambios_desde(self, version):
+        """Ids cambiados después de `version`, o None si el registro ya no llega."""
+        if version < self._version_base:
+            return None
+
+        lotes = [ids for v, ids in self._registro if v > version]
+        if len(lotes) != self._version - version:
+            return None
+
+        return np.unique(np.concatenate(lotes)) if lotes else np.empty(0, dtype=np.int64)
+
+    def cambio_en(self, version, **filtros):
+        """
+        Si algún bloque que cumple `filtros` cambió después de `version`.
+        Ante la duda (registro agotado, filas compactadas) responde True.
+        """
+        with self._lock:
+            if version == self._version:
+                return False
+
+            ids = self._cambios_desde(version)
+            if ids is None:
+                return True
+
+            posiciones = self._posiciones_de(ids)
+            if (posiciones < 0).any():
+                return True
+
+            # Sin mirar _vivas: un bloque borrado también cambió
+            mascara = np.ones(len(posiciones), dtype=bool)
+            for nombre, valor in filtros.items():
+                if valor is not None:
+                    columna = FILTROS[nombre]
+                    codigo = self._diccionarios[columna].codigos.get(valor, -2)
+                    mascara &= self._columnas[columna][posiciones] == codigo
+            return bool(mascara.any())
+
+    def barrera(self, conn, timeout=2.0):
+        """
+        Espera hasta que esta copia haya aplicado todo lo confirmado antes
+        de la llamada. Devuelve False si no se alcanzó en `timeout` segundos.
+        """
+        if not self.al_dia():
+            return False
+
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._esperadas.add(token)
+
+        cur = conn.cursor()
+        cur.execute("SELECT pg_notify(%s, %s)", (CANAL, json.dumps({"b": token})))
+        conn.commit()
+
+        with self._barreras:
+            vista = self._barreras.wait_for(lambda: token in self._vistas, timeout)
+            self._esperadas.discard(token)
+            self._vistas.discard(token)
+        return vista
+
+    # -------------------------
+    # Memoria y estadísticas
+    # -------------------------
+    def _bytes(self):
+        arreglos = [*self._columnas.values(), self._vivas, *self._ids]
+        if self._claves is not None:
+            arreglos += self._claves[:2]
+        return (
+            sum(a.nbytes for a in arreglos)
+            + sum(d.bytes() for d in self._diccionarios.values())
+        )
+
+    def memoria(self):
+        """Bytes de la copia y por bloque vivo, contra el presupuesto."""
+        with self._lock:
+            if self._columnas is None:
+                total, vivas, tipos = 0, 0, {}
+            else:
+                total, vivas = self._bytes(), int(self._vivas.sum())
+                tipos = {c: a.dtype.name for c, a in self._columnas.items()}
+
+        por_bloque = total / vivas if vivas else 0.0
+        return {
+            "bytes": total,
+            "bytes_por_bloque": round(por_bloque, 1),
+            "presupuesto": self.presupuesto,
+            "dentro_del_presupuesto": por_bloque <= self.presupuesto,
+            "tipos": tipos,
+        }
+
+    def estadisticas(self):
+        return {
+            "al_dia": self.al_dia(),
+            "version": self._version,
+            "bloques": 0 if self._vivas is None else int(self._vivas.sum()),
+            "mensajes": self._mensajes,
+            "lotes": self._lotes,
+            "filas_aplicadas": self._filas_aplicadas,
+            "aplicar_total_ms": round(self._aplicar_s * 1000, 1),
+            "recargas": self._recargas,
+            "compactaciones": self._compactaciones,
+            "reconexiones": self._reconexiones,
+            "ultimo_error": self._ultimo_error,
+            "memoria": self.memoria(),
+        }
+
+
+@st.cache_resource
+def estado_bloques():
+    """El estado compartido del proceso, o None si el feed está desactivado."""
+    config = configuracion()
+    if not config["activo"]:
+        return None
+
+    uri = st.secrets["db_credentials"]["URI"]
+    return EstadoBloques(
+        lambda: psycopg2.connect(uri), presupuesto=config["bytes_por_bloque"]
+    ).iniciar()
+
+
+def estado_al_dia():
+    """El estado compartido si está activo y al día; si no, None (se lee de la base)."""
+    estado = estado_bloques()
+    return estado if estado is not None and estado.al_dia() else None
+
+
+# =====================================================
+# LECTURAS DE LAS PÁGINAS (con respaldo en la base)
+# =====================================================
+def _bloques_sql(conn, filtros):
+    condiciones, params = [], []
+    for nombre, valor in filtros.items():
+        if valor is not None:
+            condiciones.append(f"{FILTROS[nombre]} = %s")
+            params.append(valor)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    return pd.read_sql(
+        f"SELECT {', '.join(COLUMNAS)} FROM asignaciones {where}", conn, params=params
+    )
+
+
+def bloques(conn, region=None, asignacion=None, operador=None, qc=None):
+    """Bloques (COLUMNAS) que cumplen los filtros, desde memoria si está al día."""
+    filtros = {"region": region, "asignacion": asignacion, "operador": operador, "qc": qc}
+    estado = estado_al_dia()
+
+    if estado is not None:
+        return estado.bloques(**filtros)[0]
+    return _bloques_sql(conn, filtros)
+
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def _nombres_personal(_conn):
+    df = pd.read_sql("SELECT cedula, nombre_completo FROM personal", _conn)
+    return dict(zip(df["cedula"], df["nombre_completo"]))
+
+
+def nombres_operadores(conn, cedulas):
+    """Nombre de cada cédula de `cedulas` (Series), o '—'."""
+    return cedulas.map(_nombres_personal(conn)).fillna("—")
+
+
+def con_operador(conn, df):
+    """`df` con la columna operador: nombre del operador_actual, o '—'."""
+    return df.assign(operador=nombres_operadores(conn, df["operador_actual"]))
+
+
+def barrera(conn, timeout=2.0):
+    """`EstadoBloques.barrera` del estado compartido, si está activo."""
+    estado = estado_bloques()
+    return estado is not None and estado.barrera(conn, timeout)
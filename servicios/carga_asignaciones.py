@@ -0,0 +1,356 @@
+"""
+Carga masiva de asignaciones por streaming.
+
+El archivo se lee por bloques de filas (CSV con `chunksize`, XLSX con
+openpyxl en modo read_only), cada bloque se valida y normaliza de forma
+vectorizada, las filas válidas se envían con COPY FROM STDIN a una tabla
+temporal y al final un único INSERT ... SELECT deduplica contra el archivo
+y contra lo ya existente en la región. La memoria usada depende del tamaño
+del bloque, no del tamaño del archivo.
+
+- El formato se detecta por el contenido (firma ZIP de XLSX), no por la
+  extensión; en los CSV también el separador y la codificación.
+- Las filas inválidas no abortan la carga: se descartan y quedan en un
+  reporte de rechazos con su línea (conteo por motivo y las primeras
+  MUESTRA_RECHAZOS filas).
+- La línea es la física del archivo: el índice de cada bloque la lleva,
+  contando las líneas en blanco y los saltos dentro de campos entre
+  comillas del CSV.
+"""
+import codecs
+import csv
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS = ["asignacion", "bloque", "complejidad"]
+FILAS_POR_BLOQUE = 50_000
+MUESTRA_RECHAZOS = 1_000
+
+FIRMA_XLSX = b"PK\x03\x04"
+FIRMA_XLS = b"\xd0\xcf\x11\xe0"
+BYTES_MUESTRA = 64 * 1024
+BLOQUE_MAXIMO = np.iinfo(np.int32).max
+
+
+# =====================================================
+# DETECCIÓN DE FORMATO
+# =====================================================
+def formato(archivo):
+    """'xlsx' o 'csv' según los primeros bytes del archivo."""
+    archivo.seek(0)
+    inicio = archivo.read(8)
+    archivo.seek(0)
+
+    if isinstance(inicio, str):
+        return "csv"
+    if inicio.startswith(FIRMA_XLSX):
+        return "xlsx"
+    if inicio.startswith(FIRMA_XLS):
+        raise ValueError("Excel 97-2003 (.xls) no soportado: guárdelo como .xlsx o CSV")
+    return "csv"
+
+
+def _dialecto_csv(archivo):
+    """(separador, codificación) a partir del comienzo del archivo."""
+    archivo.seek(0)
+    muestra = archivo.read(BYTES_MUESTRA)
+    archivo.seek(0)
+
+    codificacion = None
+    if isinstance(muestra, bytes):
+        try:
+            # final=False: tolera un carácter cortado al final de la muestra
+            muestra = codecs.getincrementaldecoder("utf-8-sig")().decode(muestra, final=False)
+            codificacion = "utf-8-sig"
+        except UnicodeDecodeError:
+            muestra = muestra.decode("latin-1")
+            codificacion = "latin-1"
+
+    try:
+        separador = csv.Sniffer().sniff(muestra.split("\n", 1)[0], delimiters=",;\t|").delimiter
+    except csv.Error:
+        separador = ","
+
+    return separador, codificacion
+
+
+# =====================================================
+# LECTURA POR BLOQUES (todo como texto)
+# =====================================================
+def _celda(valor):
+    """Celda de Excel → texto; los enteros guardados como float (12.0) quedan '12'."""
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _bloques_excel(archivo, filas_por_bloque):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = [_celda(c).lower().strip() for c in next(filas, ())]
+
+        # read_only entrega también las filas vacías: fila n → línea n + 2
+        linea, pendientes = 2, []
+        for fila in filas:
+            pendientes.append([_celda(c) for c in fila[:len(encabezado)]])
+            if len(pendientes) >= filas_por_bloque:
+                yield _con_lineas(pendientes, encabezado, linea)
+                linea += len(pendientes)
+                pendientes = []
+
+        if pendientes or not encabezado:
+            yield _con_lineas(pendientes, encabezado, linea)
+    finally:
+        libro.close()
+
+
+def _con_lineas(filas, encabezado, primera):
+    df = pd.DataFrame(filas, columns=encabezado, dtype=object)
+    df.index = np.arange(primera, primera + len(df))
+    return df
+
+
+def _saltos(valores):
+    """Saltos de línea dentro de cada valor (0 para los nulos)."""
+    return valores.str.count("\n").fillna(0).to_numpy(dtype=np.int64)
+
+
+def _bloques_csv(archivo, filas_por_bloque):
+    separador, codificacion = _dialecto_csv(archivo)
+    lector = pd.read_csv(
+        archivo,
+        sep=separador,
+        encoding=codificacion,
+        dtype=str,
+        keep_default_na=False,
+        # Las líneas en blanco quedan como filas vacías (validar las ignora)
+        # para no correr la numeración
+        skip_blank_lines=False,
+        chunksize=filas_por_bloque,
+    )
+
+    linea = None
+    for df in lector:
+        if linea is None:
+            linea = 2 + int(_saltos(df.columns.to_series()).sum())
+
+        # Una fila ocupa 1 + (saltos en sus campos entre comillas) líneas
+        saltos = sum((_saltos(df[c]) for c in df.columns), np.zeros(len(df), dtype=np.int64))
+        ocupadas = np.cumsum(saltos + 1)
+        df.index = linea + ocupadas - saltos - 1
+        if len(df):
+            linea += int(ocupadas[-1])
+        yield df
+
+
+def leer_por_bloques(archivo, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Itera el archivo en DataFrames de texto de como máximo
+    `filas_por_bloque` filas; las celdas vacías son '' y el índice es la
+    línea del archivo donde empieza cada fila (la del encabezado es la 1).
+    """
+    if formato(archivo) == "xlsx":
+        bloques = _bloques_excel(archivo, filas_por_bloque)
+    else:
+        bloques = _bloques_csv(archivo, filas_por_bloque)
+
+    for df in bloques:
+        df.columns = df.columns.str.lower().str.strip()
+        yield df
+
+
+def vista_previa(archivo, filas=200):
+    df = next(leer_por_bloques(archivo, filas), pd.DataFrame(columns=COLUMNAS))
+    archivo.seek(0)
+    return df
+
+
+# =====================================================
+# VALIDACIÓN
+# =====================================================
+def _texto(serie):
+    """ndarray object de textos sin espacios al borde ('' para los nulos)."""
+    return serie.fillna("").astype(str).str.strip().to_numpy(dtype=object)
+
+
+def validar(df):
+    """
+    (válidas, rechazadas) de un bloque leído por `leer_por_bloques`.
+
+    La línea de cada fila es el índice del bloque. `válidas` tiene linea +
+    COLUMNAS normalizadas; `rechazadas` tiene linea, motivo y valor (el
+    primer problema de cada fila). Las filas con las tres columnas vacías
+    (p. ej. líneas en blanco) se ignoran.
+    """
+    faltantes = [c for c in COLUMNAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+
+    lineas = df.index.to_numpy(dtype=np.int64)
+    asignacion = _texto(df["asignacion"])
+    bloque_texto = _texto(df["bloque"])
+    complejidad = _texto(df["complejidad"].str.replace(r"\s+", " ", regex=True))
+
+    bloque = np.asarray(pd.to_numeric(bloque_texto, errors="coerce"), dtype=float)
+    vacias = (asignacion == "") & (bloque_texto == "") & (complejidad == "")
+
+    with np.errstate(invalid="ignore"):
+        problemas = [
+            (asignacion == "", "asignacion vacía", asignacion),
+            (bloque_texto == "", "bloque vacío", bloque_texto),
+            (np.isnan(bloque), "bloque no numérico", bloque_texto),
+            (bloque % 1 != 0, "bloque no entero", bloque_texto),
+            ((bloque < 0) | (bloque > BLOQUE_MAXIMO), "bloque fuera de rango", bloque_texto),
+            (complejidad == "", "complejidad vacía", complejidad),
+        ]
+    condiciones = [c & ~vacias for c, _, _ in problemas]
+
+    motivo = np.select(condiciones, [m for _, m, _ in problemas], default="")
+    rechazada = motivo != ""
+    valida = ~rechazada & ~vacias
+
+    rechazadas = pd.DataFrame({
+        "linea": lineas[rechazada],
+        "motivo": motivo[rechazada],
+        "valor": np.select(
+            condiciones, [v for _, _, v in problemas], default=""
+        )[rechazada],
+    })
+
+    validas = pd.DataFrame({
+        "linea": lineas[valida],
+        "asignacion": asignacion[valida],
+        "bloque": bloque[valida].astype(np.int64),
+        "complejidad": complejidad[valida],
+    })
+
+    return validas, rechazadas
+
+
+class Rechazos:
+    """Reporte acotado de filas rechazadas: conteo por motivo + las primeras `muestra`."""
+
+    def __init__(self, muestra=MUESTRA_RECHAZOS):
+        self.maximo = muestra
+        self.total = 0
+        self.por_motivo = {}
+        self._muestra = []
+
+    def agregar(self, rechazadas):
+        if rechazadas.empty:
+            return
+
+        self.total += len(rechazadas)
+        for motivo, cantidad in rechazadas["motivo"].value_counts().items():
+            self.por_motivo[motivo] = self.por_motivo.get(motivo, 0) + int(cantidad)
+
+        guardadas = sum(len(m) for m in self._muestra)
+        if guardadas < self.maximo:
+            self._muestra.append(rechazadas.head(self.maximo - guardadas))
+
+    def muestra(self):
+        if not self._muestra:
+            return pd.DataFrame(columns=["linea", "motivo", "valor"])
+        return pd.concat(self._muestra, ignore_index=True)
+
+
+# =====================================================
+# CARGA
+# =====================================================
+def _copiar(cur, df):
+    buffer = io.StringIO()
+    df[["linea"] + COLUMNAS].to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+
+    cur.copy_expert("""
+        COPY staging_asignaciones (linea, asignacion, bloque, complejidad)
+        FROM STDIN WITH (FORMAT csv)
+    """, buffer)
+
+
+def cargar_asignaciones(conn, region, bloques, progreso=None):
+    """
+    Valida y carga los DataFrames de `bloques` en asignaciones para `region`.
+
+    `progreso(bloque, filas_acumuladas)` se invoca después de cada COPY.
+    Devuelve un dict con insertados, omitidos (filas válidas no insertadas:
+    ya_existentes en la región más duplicados_en_archivo), filas (leídas,
+    sin las vacías), rechazadas, rechazos (Rechazos),
+    segundos y filas_por_s. Todo ocurre en una transacción: si algo falla
+    no queda nada a medias.
+    """
+    inicio = time.perf_counter()
+    rechazos = Rechazos()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            CREATE TEMP TABLE staging_asignaciones (
+                linea BIGINT,
+                asignacion TEXT,
+                bloque INTEGER,
+                complejidad TEXT
+            ) ON COMMIT DROP
+        """)
+
+        filas = 0
+        for numero, df in enumerate(bloques, start=1):
+            validas, rechazadas = validar(df)
+            rechazos.agregar(rechazadas)
+            _copiar(cur, validas)
+            filas += len(validas) + len(rechazadas)
+
+            if progreso:
+                progreso(numero, filas)
+
+        cur.execute("""
+            INSERT INTO asignaciones (region, asignacion, bloque, complejidad)
+            SELECT %s, s.asignacion, s.bloque, s.complejidad
+            FROM (
+                SELECT DISTINCT ON (asignacion, bloque)
+                    asignacion, bloque, complejidad
+                FROM staging_asignaciones
+                ORDER BY asignacion, bloque, linea
+            ) s
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM asignaciones a
+                WHERE a.region = %s
+                  AND a.asignacion = s.asignacion
+                  AND a.bloque = s.bloque
+            )
+        """, (region, region))
+        insertados = cur.rowcount
+
+        cur.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT (asignacion, bloque))
+            FROM staging_asignaciones
+        """)
+        copiadas, distintos = cur.fetchone()
+
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "insertados": insertados,
+        "omitidos": copiadas - insertados,
+        "ya_existentes": distintos - insertados,
+        "duplicados_en_archivo": copiadas - distintos,
+        "filas": filas,
+        "rechazadas": rechazos.total,
+        "rechazos": rechazos,
+        "segundos": round(segundos, 2),
+        "filas_por_s": round(filas / segundos) if segundos else 0,
+    }
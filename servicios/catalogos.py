@@ -0,0 +1,193 @@
+"""
+Catálogo compartido de procesos y del árbol región → asignación → bloque.
+
+Se carga con dos consultas y se comparte entre todas las sesiones del
+servidor (st.cache_resource). Cada asignación guarda sus bloques en un
+arreglo int32 ordenado y la complejidad codificada en un arreglo int16 que
+apunta a una lista común de valores, así que cientos de miles de bloques
+ocupan pocos MB. Se recarga completo al vencer el TTL.
+
+El árbol solo cambia con las cargas de asignaciones (las páginas no borran
+bloques ni editan procesos), que ejecuta el pool de trabajadores
+(servicios.trabajos) fuera de cualquier proceso del servidor: cada proceso
+revisa, como mucho cada REVISION_CARGAS_S y al leer, qué trabajos
+carga_asignaciones terminaron desde la última revisión y recarga sus
+regiones. Los formularios ven los bloques nuevos en segundos en todos los
+procesos, no solo en el de la sesión que siguió la carga.
+
+Los lectores trabajan sobre una instantánea inmutable que se reemplaza de
+una sola vez, por lo que no necesitan lock.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+TTL_SEGUNDOS = 300
+REVISION_CARGAS_S = 5.0
+
+
+class _Instantanea:
+    def __init__(self, procesos, arbol, complejidades):
+        self.procesos = procesos            # [(id, nombre)]
+        self.arbol = arbol                  # {region: {asignacion: (bloques, codigos)}}
+        self.complejidades = complejidades  # [texto], índice = código (-1 = NULL)
+
+
+def _arbol_desde(df, complejidades):
+    """
+    Arma {region: {asignacion: (bloques int32, códigos int16)}} desde un
+    DataFrame ordenado. Los valores de complejidad que no están en
+    `complejidades` se agregan al final; NULL queda como código -1.
+    """
+    valores = df["complejidad"]
+    nuevas = pd.unique(valores.dropna())
+    complejidades.extend(nuevas[~pd.Index(nuevas).isin(complejidades)].tolist())
+    codigos = pd.Categorical(valores, categories=complejidades).codes.astype(np.int16)
+
+    bloques = df["bloque"].to_numpy(dtype=np.int32)
+    arbol = {}
+
+    for (region, asignacion), posiciones in df.groupby(["region", "asignacion"], sort=False).indices.items():
+        arbol.setdefault(region, {})[asignacion] = (bloques[posiciones], codigos[posiciones])
+
+    return arbol
+
+
+def _cargas_recientes(conn, segundos):
+    """{id: region} de las cargas que insertaron bloques en los últimos `segundos`."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, parametros->>'region'
+        FROM trabajos
+        WHERE tipo = 'carga_asignaciones'
+          AND estado = 'terminado'
+          AND (resultado->>'insertados')::int > 0
+          AND terminado_en >= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+    """, (segundos,))
+    return dict(cur.fetchall())
+
+
+def _leer_asignaciones(conn, region=None):
+    filtro = "WHERE region = %s" if region is not None else "WHERE region IS NOT NULL"
+    return pd.read_sql(f"""
+        SELECT region, asignacion, bloque, complejidad
+        FROM asignaciones
+        {filtro}
+        ORDER BY region, asignacion, bloque
+    """, conn, params=[region] if region is not None else None)
+
+
+class CatalogoAsignaciones:
+
+    def __init__(self, ttl=TTL_SEGUNDOS, revision=REVISION_CARGAS_S):
+        self.ttl = ttl
+        self.revision = revision
+        self._lock = threading.Lock()
+        self._datos = None
+        self._cargado_en = 0.0
+        self._cargas = set()        # ids de cargas ya reflejadas
+        self._revisado_en = 0.0
+
+    # -------------------------
+    # Carga e invalidación
+    # -------------------------
+    def _vigente(self):
+        return self._datos is not None and time.monotonic() - self._cargado_en < self.ttl
+
+    def _revisar(self):
+        return time.monotonic() - self._revisado_en >= self.revision
+
+    def asegurar(self, conn):
+        """
+        Carga el catálogo si no existe o venció, o recarga las regiones con
+        cargas terminadas desde la última revisión. Devuelve la instantánea.
+        """
+        if not self._vigente():
+            with self._lock:
+                if not self._vigente():
+                    self._cargar(conn)
+        elif self._revisar():
+            with self._lock:
+                if self._datos is not None and self._revisar():
+                    self._revisar_cargas(conn)
+        return self._datos
+
+    def _cargar(self, conn):
+        # Las cargas antes que las asignaciones: una que termine entre las
+        # dos consultas se vuelve a leer en la próxima revisión
+        cargas = _cargas_recientes(conn, 2 * self.ttl)
+
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, nombre
+            FROM procesos
+            WHERE id <> 0
+            ORDER BY id
+        """)
+        procesos = cur.fetchall()
+
+        complejidades = []
+        arbol = _arbol_desde(_leer_asignaciones(conn), complejidades)
+
+        self._datos = _Instantanea(procesos, arbol, complejidades)
+        self._cargado_en = self._revisado_en = time.monotonic()
+        self._cargas = set(cargas)
+
+    def _revisar_cargas(self, conn):
+        # La ventana cubre más que el TTL: si pasó más tiempo sin revisar,
+        # el catálogo ya venció y se recarga completo
+        cargas = _cargas_recientes(conn, 2 * self.ttl)
+
+        for region in {region for id_, region in cargas.items() if id_ not in self._cargas}:
+            self._recargar_region(conn, region)
+
+        self._cargas = set(cargas)
+        self._revisado_en = time.monotonic()
+
+    def _recargar_region(self, conn, region):
+        complejidades = list(self._datos.complejidades)
+        nuevo = _arbol_desde(_leer_asignaciones(conn, region), complejidades)
+
+        arbol = dict(self._datos.arbol)
+        arbol.pop(region, None)
+        arbol.update(nuevo)
+
+        self._datos = _Instantanea(self._datos.procesos, arbol, complejidades)
+
+    # -------------------------
+    # Lecturas
+    # -------------------------
+    def procesos(self, conn):
+        return self.asegurar(conn).procesos
+
+    def regiones(self, conn):
+        return sorted(self.asegurar(conn).arbol)
+
+    def asignaciones(self, conn, region):
+        # El orden de inserción ya es el ORDER BY de la base
+        return list(self.asegurar(conn).arbol.get(region, {}))
+
+    def bloques(self, conn, region, asignacion):
+        datos = self.asegurar(conn).arbol.get(region, {}).get(asignacion)
+        return [] if datos is None else datos[0].tolist()
+
+    def complejidad(self, conn, region, asignacion, bloque):
+        datos = self.asegurar(conn)
+        entrada = datos.arbol.get(region, {}).get(asignacion)
+        if entrada is None:
+            return None
+
+        bloques, codigos = entrada
+        i = int(np.searchsorted(bloques, bloque))
+        if i >= len(bloques) or bloques[i] != bloque:
+            return None
+
+        return None if codigos[i] < 0 else datos.complejidades[codigos[i]]
+
+
+@st.cache_resource
+def catalogo_asignaciones():
+    return CatalogoAsignaciones()
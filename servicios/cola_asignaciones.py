@@ -0,0 +1,144 @@
+"""
+Cola de trabajo de asignaciones.
+
+Cada reclamo toma una asignación completa con un advisory lock por
+(región, asignación) y `pg_try_advisory_xact_lock`: si otro operador ya la
+está tomando, se salta a la siguiente en lugar de esperar. El UPDATE y la
+escritura en asignaciones_historial van en la misma sentencia, de modo que
+cada llamada es atómica y cuesta un solo viaje a la base de datos.
+
+Las candidatas salen de asignaciones_resumen (migración 002): una lectura
+por índice parcial en lugar de agrupar todos los bloques de la región.
+"""
+
+# Espacio de nombres de los advisory locks de la cola (clave 1 de 2)
+LOCK_COLA_ASIGNACIONES = 7001
+
+
+SQL_RECLAMAR_OPERATIVO = """
+    WITH candidatas AS (
+        SELECT asignacion
+        FROM asignaciones_resumen
+        WHERE region = %(region)s
+          AND pendientes_operativo = bloques
+        ORDER BY asignacion
+    ),
+    tomada AS (
+        SELECT asignacion
+        FROM candidatas
+        WHERE pg_try_advisory_xact_lock(
+            %(lock)s, hashtext(%(region)s || '/' || asignacion)
+        )
+        LIMIT 1
+    ),
+    actualizados AS (
+        UPDATE asignaciones a
+        SET operador_actual = %(cedula)s,
+            proceso_actual = 'operativo',
+            estado_actual = 'asignado'
+        FROM tomada t
+        WHERE a.region = %(region)s
+          AND a.asignacion = t.asignacion
+          AND a.estado_actual = 'pendiente'
+        RETURNING a.id, a.asignacion, a.bloque, a.region
+    ),
+    historial AS (
+        INSERT INTO asignaciones_historial
+        (asignacion_id, asignacion, bloque, region, usuario, puesto, proceso, estado)
+        SELECT id, asignacion, bloque, region, %(cedula)s, %(puesto)s, 'operativo', 'asignado'
+        FROM actualizados
+    )
+    SELECT t.asignacion, (SELECT COUNT(*) FROM actualizados)
+    FROM tomada t
+"""
+
+
+SQL_RECLAMAR_QC = """
+    WITH candidatas AS (
+        SELECT r.asignacion
+        FROM asignaciones_resumen r
+        WHERE r.region = %(region)s
+          AND r.finalizados = r.bloques
+          AND NOT EXISTS (
+              SELECT 1
+              FROM asignaciones_historial h
+              WHERE h.asignacion = r.asignacion
+                AND h.region = r.region
+                AND h.usuario = %(cedula)s
+                AND h.proceso = 'operativo'
+                AND h.estado = 'asignado'
+          )
+        ORDER BY r.asignacion
+    ),
+    tomada AS (
+        SELECT asignacion
+        FROM candidatas
+        WHERE pg_try_advisory_xact_lock(
+            %(lock)s, hashtext(%(region)s || '/' || asignacion)
+        )
+        LIMIT 1
+    ),
+    actualizados AS (
+        UPDATE asignaciones a
+        SET qc_actual = %(cedula)s,
+            proceso_actual = 'control_calidad',
+            estado_actual = 'pendienteqc'
+        FROM tomada t
+        WHERE a.region = %(region)s
+          AND a.asignacion = t.asignacion
+          AND a.estado_actual = 'finalizado'
+          AND a.qc_actual IS NULL
+        RETURNING a.id, a.asignacion, a.bloque, a.region
+    ),
+    historial AS (
+        INSERT INTO asignaciones_historial
+        (asignacion_id, asignacion, bloque, region, usuario, puesto, proceso, estado)
+        SELECT id, asignacion, bloque, region, %(cedula)s, %(puesto)s, 'control_calidad', 'asignado'
+        FROM actualizados
+    )
+    SELECT t.asignacion, (SELECT COUNT(*) FROM actualizados)
+    FROM tomada t
+"""
+
+
+def _reclamar(conn, sql, region, cedula, puesto, intentos):
+    """
+    Ejecuta el reclamo hasta `intentos` veces.
+
+    Devuelve (asignacion, bloques) o None si no hay asignaciones elegibles.
+    Un resultado con 0 bloques significa que otro operador confirmó la misma
+    asignación entre el snapshot y el UPDATE; en ese caso se reintenta.
+    """
+    params = {
+        "region": region,
+        "cedula": cedula,
+        "puesto": puesto,
+        "lock": LOCK_COLA_ASIGNACIONES,
+    }
+
+    for _ in range(intentos):
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, params)
+            row = cur.fetchone()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if row is None:
+            return None
+
+        asignacion, bloques = row
+        if bloques > 0:
+            return asignacion, bloques
+
+    return None
+
+
+def reclamar_asignacion_operativa(conn, region, cedula, puesto, intentos=5):
+    return _reclamar(conn, SQL_RECLAMAR_OPERATIVO, region, cedula, puesto, intentos)
+
+
+def reclamar_asignacion_qc(conn, region, cedula, puesto, intentos=5):
+    return _reclamar(conn, SQL_RECLAMAR_QC, region, cedula, puesto, intentos)
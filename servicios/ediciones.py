@@ -0,0 +1,182 @@
+"""
+Aplicación por diferencias de las grillas editables (st.data_editor).
+
+`base_editor` fija el DataFrame original mientras la grilla tiene ediciones
+pendientes, `cambios_editor` compara esa base con la salida del editor
+celda por celda y `aplicar_cambios` envía solo las celdas modificadas en un
+único UPDATE por tabla.
+
+Concurrencia optimista: cada fila lleva el valor original de las columnas
+que cambió y el UPDATE solo la toca si la base todavía tiene ese valor. Si
+alguna fila fue modificada por otro usuario desde que se cargó la grilla,
+no se aplica nada y se lanza `ConflictoEdicion` con los ids afectados.
+"""
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from psycopg2 import sql
+
+
+class ConflictoEdicion(Exception):
+    def __init__(self, ids):
+        self.ids = ids
+        super().__init__(
+            "Registros modificados por otro usuario: " + ", ".join(map(str, ids))
+        )
+
+
+# =====================================================
+# BASE DE LA GRILLA
+# =====================================================
+def base_editor(clave, df):
+    """
+    DataFrame que debe recibir el data_editor `clave`.
+
+    Sin ediciones pendientes es `df` (datos frescos); con ediciones
+    pendientes es el que se mostró cuando empezaron, para que el editor no
+    aplique las celdas editadas sobre filas que cambiaron en la base.
+    """
+    estado = st.session_state.get(clave) or {}
+    pendientes = any(
+        estado.get(k) for k in ("edited_rows", "added_rows", "deleted_rows")
+    )
+
+    clave_base = f"{clave}__base"
+    if not pendientes or clave_base not in st.session_state:
+        st.session_state[clave_base] = df
+
+    return st.session_state[clave_base]
+
+
+def descartar_editor(clave):
+    """Olvida las ediciones y la base del data_editor `clave`."""
+    st.session_state.pop(clave, None)
+    st.session_state.pop(f"{clave}__base", None)
+
+
+# =====================================================
+# DIFERENCIAS
+# =====================================================
+def cambios_editor(original, editado, clave="id"):
+    """
+    Compara la base de la grilla con la salida del editor.
+
+    Devuelve una lista de {"id", "antes", "nuevo"} con solo las columnas
+    modificadas de cada fila; las filas sin cambios no aparecen.
+    """
+    original = original.set_index(clave)
+    editado = editado.set_index(clave).reindex(
+        index=original.index, columns=original.columns
+    )
+
+    iguales = (original == editado) | (original.isna() & editado.isna())
+    distintas = ~iguales.to_numpy()
+
+    cambios = []
+    for fila in np.flatnonzero(distintas.any(axis=1)):
+        columnas = original.columns[distintas[fila]]
+        cambios.append({
+            "id": _valor(original.index[fila]),
+            "antes": {c: _valor(original.iat[fila, original.columns.get_loc(c)]) for c in columnas},
+            "nuevo": {c: _valor(editado.iat[fila, editado.columns.get_loc(c)]) for c in columnas},
+        })
+
+    return cambios
+
+
+def _valor(v):
+    """Valor de pandas/numpy → tipo JSON que Postgres puede convertir."""
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and math.isfinite(v) and v.is_integer():
+        # Columnas enteras con NULL llegan como float64 (3.0)
+        return int(v)
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return v
+
+
+# =====================================================
+# UPDATE POR LOTES
+# =====================================================
+def sql_aplicar(tabla, columnas, clave="id"):
+    """
+    UPDATE de todas las filas cambiadas en una sentencia.
+
+    Los valores llegan como un arreglo JSON y se tipan con
+    jsonb_populate_record(NULL::tabla, ...), así que no hace falta conocer
+    los tipos de cada columna. Cada columna solo se asigna (y se verifica)
+    en las filas que la traen en "nuevo".
+    """
+    t = sql.Identifier(tabla)
+    k = sql.Identifier(clave)
+
+    asignaciones = sql.SQL(", ").join(
+        sql.SQL(
+            "{c} = CASE WHEN v.cambios ? {n} THEN (v.nuevo).{c} ELSE t.{c} END"
+        ).format(c=sql.Identifier(c), n=sql.Literal(c))
+        for c in columnas
+    )
+
+    vigentes = sql.SQL(" AND ").join(
+        sql.SQL(
+            "(NOT v.cambios ? {n} OR t.{c} IS NOT DISTINCT FROM (v.antes).{c})"
+        ).format(c=sql.Identifier(c), n=sql.Literal(c))
+        for c in columnas
+    )
+
+    return sql.SQL("""
+        UPDATE {t} t
+        SET {asignaciones}
+        FROM (
+            SELECT
+                (e->>'id')::bigint AS id,
+                e->'nuevo' AS cambios,
+                jsonb_populate_record(NULL::{t}, e->'nuevo') AS nuevo,
+                jsonb_populate_record(NULL::{t}, e->'antes') AS antes
+            FROM jsonb_array_elements(%s::jsonb) e
+        ) v
+        WHERE t.{k} = v.id
+          AND {vigentes}
+        RETURNING t.{k}
+    """).format(t=t, k=k, asignaciones=asignaciones, vigentes=vigentes)
+
+
+def aplicar_cambios(conn, tabla, cambios, clave="id"):
+    """
+    Aplica `cambios` (salida de `cambios_editor`) en una transacción.
+
+    Devuelve la cantidad de filas actualizadas. Si alguna fila ya no tiene
+    los valores originales, hace rollback y lanza `ConflictoEdicion`.
+    """
+    if not cambios:
+        return 0
+
+    columnas = sorted({c for cambio in cambios for c in cambio["nuevo"]})
+
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            sql_aplicar(tabla, columnas, clave),
+            (json.dumps(cambios, ensure_ascii=False),)
+        )
+        actualizados = {row[0] for row in cur.fetchall()}
+
+        conflictos = sorted(
+            c["id"] for c in cambios if c["id"] not in actualizados
+        )
+        if conflictos:
+            raise ConflictoEdicion(conflictos)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return len(actualizados)
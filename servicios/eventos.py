@@ -0,0 +1,73 @@
+"""
+Registro masivo de eventos.
+
+Todas las personas seleccionadas se escriben con un único INSERT de varias
+filas (execute_values) dentro de una transacción, usando el supervisor que
+ya viene en los datos de personal cargados por la página.
+"""
+from psycopg2.extras import execute_values
+
+SQL_INSERTAR_EVENTOS = """
+    INSERT INTO reportes (
+        tipo_reporte,
+        cedula_personal,
+        cedula_quien_reporta,
+        supervisor_nombre,
+        fecha_reporte,
+        semana,
+        año,
+        horas,
+        proceso_id,
+        zona,
+        produccion,
+        aprobados,
+        rechazados,
+        tipo_evento_id,
+        observaciones,
+        perfil,
+        puesto
+    )
+    VALUES %s
+"""
+
+PLANTILLA_EVENTO = "('evento', %s, %s, %s, %s, %s, %s, %s, 0, 0, 0, 0, 0, %s, %s, %s, %s)"
+
+
+def registrar_eventos(conn, personas, cedula_reporta, fecha_reporte, horas,
+                      tipo_evento_id, observaciones):
+    """
+    `personas` es una lista de dicts con cedula, perfil, puesto y supervisor.
+    Devuelve la cantidad de reportes insertados.
+    """
+    semana = fecha_reporte.isocalendar()[1]
+    año = fecha_reporte.year
+
+    filas = [
+        (
+            p["cedula"],
+            cedula_reporta,
+            p["supervisor"],
+            fecha_reporte,
+            semana,
+            año,
+            horas,
+            tipo_evento_id,
+            observaciones,
+            p["perfil"],
+            p["puesto"],
+        )
+        for p in personas
+    ]
+
+    cur = conn.cursor()
+    try:
+        execute_values(
+            cur, SQL_INSERTAR_EVENTOS, filas,
+            template=PLANTILLA_EVENTO, page_size=max(len(filas), 1)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return len(filas)
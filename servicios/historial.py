@@ -0,0 +1,91 @@
+"""
+Consultas del Historial.
+
+`sql_reportes` es el tramo filtrado de `reportes` (con nombre de la persona
+y del tipo de evento). La página pide las tablas de producción y de eventos
+por separado y por páginas (servicios.paginacion), ordenadas por fecha y
+persona, así que cada rerun escanea solo dos páginas acotadas; el resumen
+diario de horas se lee del rollup horas_diarias (servicios.horas_diarias).
+"""
+import numpy as np
+import pandas as pd
+
+JORNADA_MIN = 8.4
+JORNADA_MAX = 8.6
+
+# Orden de las tablas paginadas (el id desempata)
+ORDEN_REPORTES = ("fecha_reporte", "persona", "id")
+
+COLUMNAS_PRODUCCION = [
+    "id", "fecha_reporte", "persona", "supervisor", "zona", "horas",
+    "produccion", "aprobados", "rechazados", "observaciones",
+]
+
+COLUMNAS_EVENTOS = [
+    "id", "fecha_reporte", "persona", "supervisor", "horas",
+    "tipo_evento", "observaciones",
+]
+
+
+def sql_reportes(where_extra=""):
+    """
+    Tramo filtrado de reportes (sin ORDER BY), con params (fecha_inicio,
+    fecha_fin, *params_extra). `where_extra` es un fragmento
+    ` AND r.<columna> = %s` armado por la página según el perfil.
+    """
+    return f"""
+        SELECT
+            r.id,
+            r.tipo_reporte,
+            r.fecha_reporte,
+            p.nombre_completo AS persona,
+            r.supervisor_nombre AS supervisor,
+            r.zona,
+            r.horas,
+            r.produccion,
+            r.aprobados,
+            r.rechazados,
+            te.nombre AS tipo_evento,
+            r.observaciones
+        FROM reportes r
+        JOIN personal p ON p.cedula = r.cedula_personal
+        LEFT JOIN tipos_evento te ON te.id = r.tipo_evento_id
+        WHERE r.fecha_reporte BETWEEN %s AND %s
+          {where_extra}
+    """
+
+
+def consultar_reportes(conn, fecha_inicio, fecha_fin, where_extra="", params_extra=()):
+    """Todo el tramo en un DataFrame (para rangos acotados y benchmarks)."""
+    return pd.read_sql(
+        sql_reportes(where_extra) + " ORDER BY r.fecha_reporte, persona",
+        conn,
+        params=[fecha_inicio, fecha_fin, *params_extra]
+    )
+
+
+def tabla_produccion(df):
+    return df.loc[df["tipo_reporte"] == "produccion", COLUMNAS_PRODUCCION].reset_index(drop=True)
+
+
+def tabla_eventos(df):
+    return df.loc[df["tipo_reporte"] == "evento", COLUMNAS_EVENTOS].reset_index(drop=True)
+
+
+def resumen_horas(df):
+    horas = (
+        df.groupby(["fecha_reporte", "persona"], sort=True)["horas"]
+        .sum()
+        .reset_index(name="total_horas")
+    )
+
+    return marcar_jornada(horas)
+
+
+def marcar_jornada(horas):
+    total = horas["total_horas"].astype(float)
+    horas["estado"] = np.where(
+        total.between(JORNADA_MIN, JORNADA_MAX), "✅ OK", "⚠️ Revisar"
+    )
+
+    return horas
@@ -0,0 +1,142 @@
+"""
+Rollup diario de horas por persona y supervisor del reporte (tabla
+horas_diarias, migraciones 001 y 008).
+
+Los triggers de `reportes` la mantienen al día; este módulo la lee y ofrece
+la verificación / reconstrucción completa para detectar y corregir deriva.
+Los días de meses archivados (servicios.archivo_reportes) ya no están en
+reportes: el rollup los conserva y la verificación no los toca.
+
+Uso:
+    python -m servicios.horas_diarias --verificar
+    python -m servicios.horas_diarias --reconstruir
+"""
+import argparse
+
+import pandas as pd
+
+from servicios.archivo_reportes import horizonte
+
+SQL_RECALCULO = """
+    SELECT
+        cedula_personal,
+        fecha_reporte,
+        COALESCE(supervisor_nombre, '') AS supervisor_nombre,
+        COALESCE(SUM(horas), 0) AS total_horas,
+        COUNT(*) FILTER (WHERE tipo_reporte = 'produccion') AS reportes_produccion,
+        COUNT(*) FILTER (WHERE tipo_reporte = 'evento') AS reportes_evento
+    FROM reportes
+    WHERE fecha_reporte >= %(desde)s
+    GROUP BY 1, 2, 3
+"""
+
+
+def _desde(conn):
+    """Primer día que sigue en reportes (lo anterior está archivado)."""
+    return horizonte(conn) or "-infinity"
+
+
+def consultar_horas_diarias(conn, fecha_inicio, fecha_fin, where_extra="", params_extra=()):
+    """
+    Horas por persona y día desde el rollup. `where_extra` puede filtrar por
+    h.cedula_personal o h.supervisor_nombre (el supervisor del reporte, como
+    las tablas del Historial).
+    """
+    return pd.read_sql(f"""
+        SELECT
+            h.fecha_reporte,
+            p.nombre_completo AS persona,
+            SUM(h.total_horas) AS total_horas,
+            SUM(h.reportes_produccion) AS reportes_produccion,
+            SUM(h.reportes_evento) AS reportes_evento
+        FROM horas_diarias h
+        JOIN personal p ON p.cedula = h.cedula_personal
+        WHERE h.fecha_reporte BETWEEN %s AND %s
+          {where_extra}
+        GROUP BY h.fecha_reporte, p.cedula, p.nombre_completo
+        ORDER BY h.fecha_reporte, persona
+    """, conn, params=[fecha_inicio, fecha_fin, *params_extra])
+
+
+def verificar(conn):
+    """Filas donde el rollup difiere del recálculo desde reportes."""
+    desde = _desde(conn)
+    return pd.read_sql(f"""
+        SELECT
+            COALESCE(h.cedula_personal, r.cedula_personal) AS cedula_personal,
+            COALESCE(h.fecha_reporte, r.fecha_reporte) AS fecha_reporte,
+            COALESCE(h.supervisor_nombre, r.supervisor_nombre) AS supervisor_nombre,
+            h.total_horas AS horas_rollup,
+            r.total_horas AS horas_reales,
+            h.reportes_produccion AS produccion_rollup,
+            r.reportes_produccion AS produccion_real,
+            h.reportes_evento AS eventos_rollup,
+            r.reportes_evento AS eventos_real
+        FROM (
+            SELECT *
+            FROM horas_diarias
+            WHERE fecha_reporte >= %(desde)s
+        ) h
+        FULL OUTER JOIN ({SQL_RECALCULO}) r
+            ON r.cedula_personal = h.cedula_personal
+           AND r.fecha_reporte = h.fecha_reporte
+           AND r.supervisor_nombre = h.supervisor_nombre
+        WHERE h.total_horas IS DISTINCT FROM r.total_horas
+           OR h.reportes_produccion IS DISTINCT FROM r.reportes_produccion
+           OR h.reportes_evento IS DISTINCT FROM r.reportes_evento
+        ORDER BY 2, 1, 3
+    """, conn, params={"desde": desde})
+
+
+def reconstruir(conn):
+    """
+    Recalcula el rollup (salvo los días archivados) en una transacción;
+    devuelve las filas escritas.
+    """
+    desde = _desde(conn)
+    cur = conn.cursor()
+    try:
+        cur.execute("LOCK TABLE reportes IN SHARE MODE")
+        cur.execute("DELETE FROM horas_diarias WHERE fecha_reporte >= %s", (desde,))
+        cur.execute(f"""
+            INSERT INTO horas_diarias (
+                cedula_personal, fecha_reporte, supervisor_nombre,
+                total_horas, reportes_produccion, reportes_evento
+            )
+            {SQL_RECALCULO}
+        """, {"desde": desde})
+        filas = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return filas
+
+
+def main():
+    from db import conectar_directo
+
+    parser = argparse.ArgumentParser(description="Verificación del rollup horas_diarias")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--verificar", action="store_true")
+    grupo.add_argument("--reconstruir", action="store_true")
+    args = parser.parse_args()
+
+    conn = conectar_directo()
+
+    if args.reconstruir:
+        print(f"✅ Rollup reconstruido: {reconstruir(conn)} filas")
+        return
+
+    deriva = verificar(conn)
+    if deriva.empty:
+        print("✅ horas_diarias coincide con reportes")
+    else:
+        print(f"⚠️ {len(deriva)} filas con deriva")
+        print(deriva.to_string(index=False))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
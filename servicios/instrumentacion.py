@@ -0,0 +1,289 @@
+"""
+Instrumentación de las sentencias SQL de la aplicación.
+
+Las conexiones del pool usan `CursorInstrumentado`, así que todo
+`cur.execute` y `pd.read_sql` de los módulos queda medido sin tocarlos.
+Por sentencia se registra:
+
+- huella: el SQL normalizado (literales, números y parámetros → ?, listas
+  IN/VALUES colapsadas), para agrupar ejecuciones de la misma consulta
+- origen: módulo y función del repositorio que la ejecutó
+- latencia (histograma en memoria), filas devueltas/afectadas y errores
+
+Las sentencias que superan el umbral (`SQL_LENTO_MS` en db_credentials,
+500 ms por defecto) se escriben en el log `servicios.instrumentacion`.
+Las estadísticas viven en el proceso del servidor; la página
+"Rendimiento SQL" las muestra y permite descargarlas en JSON, y
+
+    python -m servicios.instrumentacion volcado.json --top 20
+
+imprime el mismo informe a partir de un volcado.
+"""
+import argparse
+import bisect
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+from psycopg2 import extensions, sql
+
+logger = logging.getLogger(__name__)
+
+RAIZ = str(Path(__file__).resolve().parent.parent)
+ARCHIVOS_INTERNOS = {__file__, str(Path(RAIZ) / "db.py")}
+
+# Límites superiores de los intervalos del histograma (ms); el último es +inf
+LIMITES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+UMBRAL_LENTO_MS = 500
+
+
+# =====================================================
+# HUELLA DE LA SENTENCIA
+# =====================================================
+# Una sola pasada: un -- o /* dentro de un texto no es comentario, y un ' dentro
+# de un comentario no abre un texto
+_TEXTOS_Y_COMENTARIOS = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.S)
+_PARAMETROS = re.compile(r"%\([^)]*\)s|%s")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_TUPLAS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def huella(consulta):
+    """SQL normalizado que identifica a todas las ejecuciones de una consulta."""
+    texto = _TEXTOS_Y_COMENTARIOS.sub(_sin_texto_ni_comentario, consulta)
+    texto = _PARAMETROS.sub("?", texto)
+    texto = _NUMEROS.sub("?", texto)
+    texto = _LISTAS.sub("(...)", texto)
+    texto = _TUPLAS.sub("(...), ...", texto)
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+def _sin_texto_ni_comentario(encontrado):
+    return "?" if encontrado.group().startswith("'") else " "
+
+
+def _texto(consulta, cursor):
+    if isinstance(consulta, bytes):
+        return consulta.decode("utf-8", "replace")
+    if isinstance(consulta, sql.Composable):
+        return consulta.as_string(cursor)
+    return str(consulta)
+
+
+def origen():
+    """`modulo.funcion` del primer marco del repositorio fuera de esta capa."""
+    marco = sys._getframe(2)
+    while marco is not None:
+        archivo = marco.f_code.co_filename
+        if (
+            archivo.startswith(RAIZ)
+            and archivo not in ARCHIVOS_INTERNOS
+            and "site-packages" not in archivo
+        ):
+            return f"{marco.f_globals.get('__name__', '?')}.{marco.f_code.co_name}"
+        marco = marco.f_back
+    return "?"
+
+
+# =====================================================
+# ESTADÍSTICAS
+# =====================================================
+class EstadisticasSQL:
+    """Acumulador en memoria, seguro entre hilos, por (huella, origen)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos = {}
+        self.desde = time.time()
+
+    def registrar(self, huella_sql, origen_sql, segundos, filas, error=False):
+        ms = segundos * 1000
+        intervalo = bisect.bisect_left(LIMITES_MS, ms)
+
+        with self._lock:
+            d = self._datos.get((huella_sql, origen_sql))
+            if d is None:
+                d = self._datos[(huella_sql, origen_sql)] = {
+                    "llamadas": 0, "total_ms": 0.0, "max_ms": 0.0, "filas": 0,
+                    "lentas": 0, "errores": 0, "histograma": [0] * (len(LIMITES_MS) + 1),
+                }
+            d["llamadas"] += 1
+            d["total_ms"] += ms
+            d["max_ms"] = max(d["max_ms"], ms)
+            d["filas"] += max(filas, 0)
+            d["lentas"] += ms >= UMBRAL_LENTO_MS
+            d["errores"] += error
+            d["histograma"][intervalo] += 1
+
+    def volcar(self):
+        """Copia serializable en JSON de todas las estadísticas."""
+        with self._lock:
+            sentencias = [
+                {"huella": h, "origen": o, **d, "histograma": list(d["histograma"])}
+                for (h, o), d in self._datos.items()
+            ]
+        return {
+            "desde": self.desde,
+            "hasta": time.time(),
+            "limites_ms": list(LIMITES_MS),
+            "sentencias": sentencias,
+        }
+
+    def reiniciar(self):
+        with self._lock:
+            self._datos = {}
+            self.desde = time.time()
+
+
+ESTADISTICAS = EstadisticasSQL()
+
+
+def configurar(umbral_lento_ms):
+    global UMBRAL_LENTO_MS
+    UMBRAL_LENTO_MS = umbral_lento_ms
+
+
+# =====================================================
+# ACUMULADO POR HILO (un rerun de Streamlit corre en un hilo)
+# =====================================================
+_local = threading.local()
+
+
+def iniciar_acumulado():
+    """Empieza a sumar el tiempo SQL del hilo actual (ver perfilador)."""
+    _local.acumulado = {"sql_ms": 0.0, "sentencias": 0, "filas": 0}
+
+
+def terminar_acumulado():
+    acumulado = getattr(_local, "acumulado", None)
+    _local.acumulado = None
+    return acumulado or {"sql_ms": 0.0, "sentencias": 0, "filas": 0}
+
+
+def _medir(cursor, consulta, inicio, error):
+    segundos = time.perf_counter() - inicio
+    try:
+        h = huella(_texto(consulta, cursor))
+        o = origen()
+        filas = -1 if error else cursor.rowcount
+        ESTADISTICAS.registrar(h, o, segundos, filas, error)
+
+        acumulado = getattr(_local, "acumulado", None)
+        if acumulado is not None:
+            acumulado["sql_ms"] += segundos * 1000
+            acumulado["sentencias"] += 1
+            acumulado["filas"] += max(filas, 0)
+
+        if segundos * 1000 >= UMBRAL_LENTO_MS:
+            logger.warning(
+                "SQL lenta: %.0f ms, %s filas, %s: %s",
+                segundos * 1000, filas, o, h[:1000]
+            )
+    except Exception:
+        # La instrumentación nunca debe romper la consulta
+        logger.exception("Error registrando estadística SQL")
+
+
+class CursorInstrumentado(extensions.cursor):
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            resultado = super().execute(query, vars)
+        except Exception:
+            _medir(self, query, inicio, error=True)
+            raise
+        _medir(self, query, inicio, error=False)
+        return resultado
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            resultado = super().executemany(query, vars_list)
+        except Exception:
+            _medir(self, query, inicio, error=True)
+            raise
+        _medir(self, query, inicio, error=False)
+        return resultado
+
+    def copy_expert(self, sql, file, size=8192):
+        inicio = time.perf_counter()
+        try:
+            resultado = super().copy_expert(sql, file, size)
+        except Exception:
+            _medir(self, sql, inicio, error=True)
+            raise
+        _medir(self, sql, inicio, error=False)
+        return resultado
+
+
+# =====================================================
+# INFORME
+# =====================================================
+def informe(volcado, orden="total_ms"):
+    """DataFrame con una fila por (huella, origen), ordenado por `orden`."""
+    columnas = [
+        "huella", "origen", "llamadas", "total_ms", "media_ms", "p95_ms",
+        "max_ms", "filas_media", "lentas", "errores",
+    ]
+    sentencias = volcado["sentencias"]
+    if not sentencias:
+        return pd.DataFrame(columns=columnas)
+
+    limites = volcado["limites_ms"] + [float("inf")]
+    df = pd.DataFrame(sentencias)
+    df["media_ms"] = df["total_ms"] / df["llamadas"]
+    df["filas_media"] = df["filas"] / df["llamadas"]
+    df["p95_ms"] = [
+        min(_percentil_histograma(h, limites, 0.95), m)
+        for h, m in zip(df["histograma"], df["max_ms"])
+    ]
+
+    df = df.sort_values(orden, ascending=False, ignore_index=True)
+    return df[columnas].round(
+        {"total_ms": 1, "media_ms": 2, "p95_ms": 1, "max_ms": 1, "filas_media": 1}
+    )
+
+
+def _percentil_histograma(histograma, limites, p):
+    """Límite superior del intervalo donde cae el percentil `p`."""
+    objetivo = p * sum(histograma)
+    acumulado = 0
+    for conteo, limite in zip(histograma, limites):
+        acumulado += conteo
+        if acumulado >= objetivo:
+            return limite
+    return limites[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe de sentencias SQL a partir de un volcado JSON")
+    parser.add_argument("volcado", help="archivo descargado de la página Rendimiento SQL")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--orden", default="total_ms",
+        choices=["total_ms", "media_ms", "p95_ms", "max_ms", "llamadas", "lentas"]
+    )
+    args = parser.parse_args()
+
+    with open(args.volcado, encoding="utf-8") as f:
+        volcado = json.load(f)
+
+    df = informe(volcado, args.orden).head(args.top)
+
+    pd.set_option("display.max_colwidth", 80)
+    pd.set_option("display.width", 250)
+    print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Preprocesamiento offline del mapa de bloques por nivel de detalle (LOD).
+
+A partir de italia.geojson genera en `mapa_lod/`:
+
+- asignaciones.csv: un punto (centroide) y bbox por (región, asignación).
+  Es lo único que se envía en la vista "Todas" (zoom país).
+- regiones.json + region_<n>.geojson: bloques de cada región simplificados
+  (Douglas-Peucker + redondeo de coordenadas) para la vista por región.
+
+La vista de una asignación concreta usa la geometría original.
+
+Uso:
+    python -m servicios.lod_mapa [italia.geojson] [mapa_lod]
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DIRECTORIO_LOD = "mapa_lod"
+
+# Tolerancia en grados (~10 m) y decimales (~1 m) del nivel región
+TOLERANCIA_REGION = 1e-4
+DECIMALES_REGION = 5
+
+
+# =====================================================
+# SIMPLIFICACIÓN
+# =====================================================
+def _douglas_peucker(puntos, tolerancia):
+    """Máscara de puntos conservados de una polilínea (iterativo, sin recursión)."""
+    n = len(puntos)
+    conservar = np.zeros(n, dtype=bool)
+    conservar[0] = conservar[-1] = True
+    pila = [(0, n - 1)]
+
+    while pila:
+        inicio, fin = pila.pop()
+        if fin - inicio < 2:
+            continue
+
+        a, b = puntos[inicio], puntos[fin]
+        segmento = b - a
+        intermedios = puntos[inicio + 1:fin]
+        largo = np.hypot(*segmento)
+
+        if largo == 0:
+            distancias = np.hypot(*(intermedios - a).T)
+        else:
+            relativos = intermedios - a
+            distancias = np.abs(
+                segmento[0] * relativos[:, 1] - segmento[1] * relativos[:, 0]
+            ) / largo
+
+        mayor = int(np.argmax(distancias))
+        if distancias[mayor] > tolerancia:
+            indice = inicio + 1 + mayor
+            conservar[indice] = True
+            pila.append((inicio, indice))
+            pila.append((indice, fin))
+
+    return conservar
+
+
+def simplificar_anillo(anillo, tolerancia, decimales):
+    puntos = np.round(np.asarray(anillo, dtype=float), decimales)
+
+    # Quitar puntos consecutivos repetidos tras el redondeo
+    distintos = np.ones(len(puntos), dtype=bool)
+    distintos[1:] = np.any(puntos[1:] != puntos[:-1], axis=1)
+    puntos = puntos[distintos]
+
+    if len(puntos) > 4:
+        puntos = puntos[_douglas_peucker(puntos, tolerancia)]
+
+    # Un anillo válido necesita al menos 4 posiciones (triángulo cerrado)
+    if len(puntos) < 4:
+        puntos = np.round(np.asarray(anillo, dtype=float), decimales)
+
+    return puntos.tolist()
+
+
+def simplificar_geometria(geometria, tolerancia, decimales):
+    tipo = geometria["type"]
+
+    if tipo == "Polygon":
+        coordenadas = [
+            simplificar_anillo(anillo, tolerancia, decimales)
+            for anillo in geometria["coordinates"]
+        ]
+    elif tipo == "MultiPolygon":
+        coordenadas = [
+            [simplificar_anillo(anillo, tolerancia, decimales) for anillo in poligono]
+            for poligono in geometria["coordinates"]
+        ]
+    else:
+        return geometria
+
+    return {"type": tipo, "coordinates": coordenadas}
+
+
+def _anillo_exterior(geometria):
+    if geometria["type"] == "Polygon":
+        return np.asarray(geometria["coordinates"][0], dtype=float)
+    if geometria["type"] == "MultiPolygon":
+        return np.concatenate([
+            np.asarray(poligono[0], dtype=float) for poligono in geometria["coordinates"]
+        ])
+    return np.asarray([geometria["coordinates"]], dtype=float)
+
+
+# =====================================================
+# PREPROCESAMIENTO
+# =====================================================
+def preprocesar(ruta_geojson, destino=DIRECTORIO_LOD):
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+
+    with open(ruta_geojson, "r", encoding="utf-8") as f:
+        features = json.load(f)["features"]
+
+    filas = []
+    por_region = {}
+
+    for feature in features:
+        props = feature["properties"]
+        region = str(props["region"]).strip()
+        asignacion = str(props["Asignacion"]).strip()
+        bloque = int(props["BLOQUE"])
+
+        anillo = _anillo_exterior(feature["geometry"])
+        filas.append((
+            region, asignacion,
+            anillo[:, 0].min(), anillo[:, 1].min(),
+            anillo[:, 0].max(), anillo[:, 1].max(),
+        ))
+
+        por_region.setdefault(region, []).append({
+            "type": "Feature",
+            "geometry": simplificar_geometria(
+                feature["geometry"], TOLERANCIA_REGION, DECIMALES_REGION
+            ),
+            "properties": {"region": region, "Asignacion": asignacion, "BLOQUE": bloque},
+        })
+
+    bloques = pd.DataFrame(
+        filas, columns=["region", "asignacion", "min_lon", "min_lat", "max_lon", "max_lat"]
+    )
+    asignaciones = bloques.groupby(["region", "asignacion"], sort=True).agg(
+        bloques=("min_lon", "size"),
+        min_lon=("min_lon", "min"),
+        min_lat=("min_lat", "min"),
+        max_lon=("max_lon", "max"),
+        max_lat=("max_lat", "max"),
+    ).reset_index()
+    asignaciones["lon"] = ((asignaciones["min_lon"] + asignaciones["max_lon"]) / 2).round(5)
+    asignaciones["lat"] = ((asignaciones["min_lat"] + asignaciones["max_lat"]) / 2).round(5)
+    asignaciones.to_csv(destino / "asignaciones.csv", index=False)
+
+    indice = {}
+    for numero, (region, feats) in enumerate(sorted(por_region.items())):
+        nombre = f"region_{numero}.geojson"
+        with open(destino / nombre, "w", encoding="utf-8") as f:
+            json.dump({"type": "FeatureCollection", "features": feats}, f, separators=(",", ":"))
+        indice[region] = nombre
+
+    with open(destino / "regiones.json", "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+
+    return len(features), len(asignaciones), len(indice)
+
+
+if __name__ == "__main__":
+    origen = sys.argv[1] if len(sys.argv) > 1 else "italia.geojson"
+    destino = sys.argv[2] if len(sys.argv) > 2 else DIRECTORIO_LOD
+    bloques, asignaciones, regiones = preprocesar(origen, destino)
+    print(f"{bloques} bloques, {asignaciones} asignaciones, {regiones} regiones → {destino}/")
@@ -0,0 +1,311 @@
+"""
+Capa de bloques para el mapa de Dashboards.
+
+El GeoJSON se parsea una sola vez por proceso y se indexa por
+(region, Asignacion, BLOQUE). En cada rerun solo se calculan las columnas de
+estado y color, buscando las claves en el estado en memoria de
+servicios.cambios_asignaciones o con un join vectorizado contra `df_asig`;
+las geometrías cacheadas se reutilizan tal cual, sin copiarlas ni
+modificarlas.
+
+Si existe el preprocesamiento de `servicios.lod_mapa`, el mapa envía solo
+lo que corresponde al nivel de detalle: puntos por asignación en "Todas",
+bloques simplificados de una región, o la geometría original de una
+asignación.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+from pydeck.bindings.json_tools import default_serialize
+import streamlit as st
+
+from servicios.lod_mapa import DIRECTORIO_LOD
+
+RUTA_GEOJSON = "italia.geojson"
+CLAVE = ["region", "asignacion", "bloque"]
+
+COLOR_SIN_ASIGNACION = [220, 220, 220, 140]
+
+# Orden de evaluación igual al del mapa original; el último es el caso por defecto
+PALETA = np.array([
+    [52, 152, 219, 180],   # finalizado / aprobado
+    [241, 196, 15, 180],   # asignado
+    [200, 200, 200, 180],  # pendiente
+    [46, 204, 113, 180],   # proceso
+    [255, 0, 0, 180],      # rechazado N
+    [241, 196, 15, 180],   # otro estado
+    COLOR_SIN_ASIGNACION,  # bloque sin fila en asignaciones
+])
+
+
+class CapaBloques:
+    """Geometrías parseadas + índice de claves, inmutables tras la carga."""
+
+    def __init__(self, geometrias, claves):
+        self.geometrias = geometrias
+        self.claves = claves
+
+    def __len__(self):
+        return len(self.geometrias)
+
+
+def indexar_geojson(geojson):
+    features = geojson["features"]
+
+    claves = pd.DataFrame({
+        "region": [str(f["properties"]["region"]).strip() for f in features],
+        "asignacion": [str(f["properties"]["Asignacion"]).strip() for f in features],
+        "bloque": [int(f["properties"]["BLOQUE"]) for f in features],
+    })
+
+    return CapaBloques([f["geometry"] for f in features], claves)
+
+
+def subcapa(capa, mascara):
+    indices = np.flatnonzero(mascara)
+    geometrias = capa.geometrias
+
+    return CapaBloques(
+        [geometrias[i] for i in indices],
+        capa.claves.iloc[indices].reset_index(drop=True),
+    )
+
+
+@st.cache_resource
+def capa_bloques(ruta=RUTA_GEOJSON):
+    with open(ruta, "r", encoding="utf-8") as f:
+        return indexar_geojson(json.load(f))
+
+
+# =====================================================
+# NIVELES DE DETALLE (requieren python -m servicios.lod_mapa)
+# =====================================================
+@st.cache_resource
+def centroides_asignaciones(directorio=DIRECTORIO_LOD):
+    """Centroide y bbox por (region, asignacion), o None sin preprocesamiento."""
+    ruta = Path(directorio) / "asignaciones.csv"
+    if not ruta.exists():
+        return None
+
+    return pd.read_csv(ruta, dtype={"region": str, "asignacion": str})
+
+
+@st.cache_resource
+def capa_region(region, directorio=DIRECTORIO_LOD):
+    """Bloques simplificados de una región, o None sin preprocesamiento."""
+    indice = Path(directorio) / "regiones.json"
+    if not indice.exists():
+        return None
+
+    with open(indice, "r", encoding="utf-8") as f:
+        archivo = json.load(f).get(region)
+
+    if archivo is None:
+        return None
+
+    with open(Path(directorio) / archivo, "r", encoding="utf-8") as f:
+        return indexar_geojson(json.load(f))
+
+
+def colores_por_estado(estados, sin_asignacion):
+    """Color RGBA por bloque; `sin_asignacion` marca bloques sin fila en asignaciones."""
+    estado = estados.astype("string").str.lower().str.strip()
+
+    indice = np.select(
+        [
+            estado.isin(["finalizado", "aprobado"]).fillna(False).to_numpy(bool),
+            (estado == "asignado").fillna(False).to_numpy(bool),
+            (estado == "pendiente").fillna(False).to_numpy(bool),
+            (estado == "proceso").fillna(False).to_numpy(bool),
+            estado.str.startswith("rechazado").fillna(False).to_numpy(bool),
+            np.asarray(sin_asignacion, dtype=bool),
+        ],
+        [0, 1, 2, 3, 4, 6],
+        default=5,
+    )
+
+    return PALETA[indice]
+
+
+def propiedades_por_bloque(capa, df_asig):
+    """
+    Propiedades por feature (mismo orden que `capa.geometrias`).
+
+    `df_asig` debe tener region, asignacion, bloque, estado_actual,
+    proceso_actual y operador.
+    """
+    estado = df_asig[CLAVE + ["estado_actual", "proceso_actual", "operador"]].copy()
+    estado["asignacion"] = estado["asignacion"].astype(str).str.strip()
+    estado["bloque"] = estado["bloque"].astype(int)
+    estado = estado.drop_duplicates(CLAVE)
+
+    props = capa.claves.merge(estado, on=CLAVE, how="left", sort=False, indicator=True)
+    sin_asignacion = (props.pop("_merge") == "left_only").to_numpy()
+
+    return _con_color(props, sin_asignacion)
+
+
+def propiedades_en_memoria(capa, estado, nombres):
+    """
+    Como `propiedades_por_bloque`, pero busca cada feature por clave en el
+    estado en memoria (servicios.cambios_asignaciones.EstadoBloques) en
+    lugar de unir un DataFrame. `nombres` convierte una Series de cédulas
+    en nombres de operador.
+    """
+    encontrados = estado.en_claves(capa.claves)
+
+    props = capa.claves.copy()
+    props["estado_actual"] = encontrados["estado_actual"]
+    props["proceso_actual"] = encontrados["proceso_actual"]
+    props["operador"] = nombres(encontrados["operador_actual"])
+
+    return _con_color(props, ~encontrados["encontrado"].to_numpy())
+
+
+def _con_color(props, sin_asignacion):
+    props["color"] = colores_por_estado(props["estado_actual"], sin_asignacion).tolist()
+    props = props.rename(columns={"asignacion": "Asignacion", "bloque": "BLOQUE"})
+    props[["estado_actual", "proceso_actual", "operador"]] = (
+        props[["estado_actual", "proceso_actual", "operador"]]
+        .astype(object)
+        .fillna("—")
+    )
+
+    return props
+
+
+def features_mapa(capa, props):
+    """Lista de features GeoJSON que reutiliza las geometrías cacheadas."""
+    columnas = list(props.columns)
+    valores = zip(*(props[c].tolist() for c in columnas))
+
+    return [
+        {"type": "Feature", "geometry": geometria, "properties": dict(zip(columnas, fila))}
+        for geometria, fila in zip(capa.geometrias, valores)
+    ]
+
+
+def predominante_por_asignacion(df_asig):
+    """region, asignacion, estado_actual: el estado con más bloques de cada asignación."""
+    estado = df_asig[["region", "asignacion", "estado_actual"]].copy()
+    estado["asignacion"] = estado["asignacion"].astype(str).str.strip()
+
+    return (
+        estado.groupby(["region", "asignacion", "estado_actual"], sort=False)
+        .size()
+        .reset_index(name="n")
+        .sort_values("n", kind="stable")
+        .drop_duplicates(["region", "asignacion"], keep="last")
+        .drop(columns="n")
+    )
+
+
+def puntos_por_asignacion(centroides, predominante):
+    """
+    Un punto por asignación con su estado predominante (vista "Todas").
+    `predominante` es el de `predominante_por_asignacion` o el de
+    `EstadoBloques.predominante`.
+    """
+    puntos = centroides[["region", "asignacion", "lon", "lat", "bloques"]].merge(
+        predominante, on=["region", "asignacion"], how="left", indicator=True
+    )
+    sin_asignacion = (puntos.pop("_merge") == "left_only").to_numpy()
+
+    puntos["color"] = colores_por_estado(puntos["estado_actual"], sin_asignacion).tolist()
+    puntos["estado_actual"] = puntos["estado_actual"].astype(object).fillna("—")
+
+    return puntos
+
+
+# =====================================================
+# PYDECK
+# =====================================================
+VISTA_ITALIA = {"latitude": 44.2, "longitude": 9.44, "zoom": 6.5}
+
+TOOLTIP_BLOQUES = """
+    <b>Región:</b> {region}<br/>
+    <b>Asignación:</b> {Asignacion}<br/>
+    <b>Bloque:</b> {BLOQUE}<br/>
+    <b>Operador:</b> {operador}<br/>
+    <b>Estado:</b> {estado_actual}<br/>
+    <b>Proceso:</b> {proceso_actual}
+"""
+
+TOOLTIP_ASIGNACIONES = """
+    <b>Región:</b> {region}<br/>
+    <b>Asignación:</b> {asignacion}<br/>
+    <b>Bloques:</b> {bloques}<br/>
+    <b>Estado predominante:</b> {estado_actual}
+"""
+
+
+def vista_para(centroides, mascara=None, zoom=None):
+    """ViewState centrado en el bbox de las asignaciones seleccionadas."""
+    if centroides is None or (mascara is not None and not mascara.any()):
+        return pdk.ViewState(**VISTA_ITALIA)
+
+    sel = centroides if mascara is None else centroides[mascara]
+    return pdk.ViewState(
+        latitude=float((sel["min_lat"].min() + sel["max_lat"].max()) / 2),
+        longitude=float((sel["min_lon"].min() + sel["max_lon"].max()) / 2),
+        zoom=zoom or VISTA_ITALIA["zoom"],
+    )
+
+
+def deck_bloques(features, vista):
+    layer = pdk.Layer(
+        "GeoJsonLayer",
+        data=features,
+        filled=True,
+        get_fill_color="properties.color",
+        stroked=True,
+        get_line_color=[60, 60, 60, 255],
+        line_width_min_pixels=1,
+        pickable=True,
+        auto_highlight=True,
+    )
+    return _deck(layer, vista, TOOLTIP_BLOQUES)
+
+
+def deck_asignaciones(puntos, vista):
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=puntos,
+        get_position=["lon", "lat"],
+        get_fill_color="color",
+        get_radius="bloques",
+        radius_scale=20,
+        radius_min_pixels=2,
+        radius_max_pixels=12,
+        pickable=True,
+        auto_highlight=True,
+    )
+    return _deck(layer, vista, TOOLTIP_ASIGNACIONES)
+
+
+class DeckCompacto(pdk.Deck):
+    """
+    pydeck serializa con indent=2, lo que triplica el payload de geometrías.
+    st.pydeck_chart envía lo que devuelva to_json(), así que se compacta aquí.
+    """
+
+    def to_json(self):
+        return json.dumps(
+            self, sort_keys=True, default=default_serialize, separators=(",", ":")
+        )
+
+
+def _deck(layer, vista, tooltip):
+    return DeckCompacto(
+        layers=[layer],
+        initial_view_state=vista,
+        map_style=None,
+        views=[pdk.View(type="MapView", controller=True)],
+        tooltip={
+            "html": tooltip,
+            "style": {"backgroundColor": "#333", "color": "white"}
+        }
+    )
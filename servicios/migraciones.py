@@ -0,0 +1,109 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada archivo `migraciones/NNN_nombre.sql` se aplica una sola vez, en orden y
+dentro de su propia transacción; las versiones aplicadas quedan en la tabla
+schema_migraciones. Los scripts son idempotentes (IF NOT EXISTS / OR
+REPLACE), así que volver a correrlos a mano tampoco rompe nada.
+
+Uso:
+    python -m servicios.migraciones            # aplica las pendientes
+    python -m servicios.migraciones --estado   # lista aplicadas / pendientes
+"""
+import argparse
+import re
+from pathlib import Path
+
+DIRECTORIO = Path(__file__).resolve().parent.parent / "migraciones"
+PATRON = re.compile(r"^(\d+)_(.+)\.sql$")
+
+# Evita que dos procesos apliquen migraciones a la vez
+LOCK_MIGRACIONES = 7002
+
+
+def disponibles(directorio=DIRECTORIO):
+    migraciones = []
+    for ruta in sorted(Path(directorio).glob("*.sql")):
+        coincidencia = PATRON.match(ruta.name)
+        if coincidencia:
+            migraciones.append((int(coincidencia.group(1)), coincidencia.group(2), ruta))
+    return sorted(migraciones)
+
+
+def _preparar(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migraciones (
+            version INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            aplicada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def aplicadas(conn):
+    cur = conn.cursor()
+    _preparar(cur)
+    cur.execute("SELECT version FROM schema_migraciones")
+    versiones = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return versiones
+
+
+def aplicar(conn, directorio=DIRECTORIO, hasta=None):
+    """Aplica las migraciones pendientes; devuelve la lista de (version, nombre)."""
+    cur = conn.cursor()
+    nuevas = []
+
+    cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_MIGRACIONES,))
+    try:
+        hechas = aplicadas(conn)
+
+        for version, nombre, ruta in disponibles(directorio):
+            if version in hechas or (hasta is not None and version > hasta):
+                continue
+
+            try:
+                cur.execute(ruta.read_text(encoding="utf-8"))
+                cur.execute("""
+                    INSERT INTO schema_migraciones (version, nombre)
+                    VALUES (%s, %s)
+                """, (version, nombre))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            nuevas.append((version, nombre))
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_MIGRACIONES,))
+        conn.commit()
+
+    return nuevas
+
+
+def main():
+    from db import conectar_directo
+
+    parser = argparse.ArgumentParser(description="Migraciones versionadas del esquema")
+    parser.add_argument("--estado", action="store_true", help="Solo listar el estado")
+    parser.add_argument("--hasta", type=int, help="Aplicar hasta esta versión inclusive")
+    args = parser.parse_args()
+
+    conn = conectar_directo()
+
+    if args.estado:
+        hechas = aplicadas(conn)
+        for version, nombre, _ in disponibles():
+            marca = "✅" if version in hechas else "⏳"
+            print(f"{marca} {version:03d} {nombre}")
+        return
+
+    nuevas = aplicar(conn, hasta=args.hasta)
+    if not nuevas:
+        print("Sin migraciones pendientes")
+    for version, nombre in nuevas:
+        print(f"✅ {version:03d} {nombre}")
+
+
+if __name__ == "__main__":
+    main()
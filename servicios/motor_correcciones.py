@@ -0,0 +1,350 @@
+"""
+Aplicación automática de solicitudes de corrección pendientes.
+
+Cada solicitud de `correcciones` pide modificar una columna de un reporte
+(`columna`, `nuevo_valor`) o eliminarlo (`solucion = 'Eliminar'`). El motor:
+
+1. Valida en bloque (pandas, sin recorrer filas) que la columna sea
+   corregible, que el valor se pueda convertir al tipo de la columna en
+   `reportes` y que respete los rangos del formulario.
+2. Detecta conflictos: dos solicitudes con valores distintos para la misma
+   celda, o una modificación y una eliminación sobre el mismo reporte.
+3. Aplica las válidas por lotes, una transacción por lote: un DELETE para
+   las eliminaciones, un UPDATE ... FROM unnest(...) por columna y un
+   UPDATE que marca las solicitudes como 'corregido'.
+
+Las solicitudes rechazadas quedan pendientes y se devuelven con su motivo.
+Los lotes toman las solicitudes con FOR UPDATE SKIP LOCKED, así que dos
+administradores ejecutando el motor a la vez no aplican nada dos veces.
+"""
+import numpy as np
+import pandas as pd
+from psycopg2 import sql
+
+TAMANO_LOTE = 500
+
+# Columnas que ofrece el formulario de solicitud
+COLUMNAS_CORREGIBLES = [
+    "fecha_reporte",
+    "horas",
+    "zona",
+    "produccion",
+    "aprobados",
+    "rechazados",
+    "observaciones",
+]
+
+# Mismos límites que los formularios de captura
+RANGOS = {
+    "horas": (0, 24),
+    "produccion": (0, None),
+    "aprobados": (0, None),
+    "rechazados": (0, None),
+}
+
+TIPOS_ENTEROS = {"smallint": 2**15, "integer": 2**31, "bigint": 2**63}
+TIPOS_NUMERICOS = {"numeric", "double precision", "real"}
+TIPOS_TEXTO = {"text", "character varying", "character"}
+
+
+# =====================================================
+# CONSULTAS
+# =====================================================
+def esquema_reportes(conn):
+    """Tipo (y precisión/longitud) de cada columna corregible de reportes."""
+    df = pd.read_sql("""
+        SELECT
+            column_name AS columna,
+            data_type AS tipo,
+            format_type(a.atttypid, a.atttypmod) AS tipo_sql,
+            numeric_precision AS precision,
+            numeric_scale AS escala,
+            character_maximum_length AS longitud
+        FROM information_schema.columns c
+        JOIN pg_attribute a
+            ON a.attrelid = 'reportes'::regclass
+           AND a.attname = c.column_name
+        WHERE c.table_schema = current_schema()
+          AND c.table_name = 'reportes'
+          AND c.column_name = ANY(%s)
+    """, conn, params=[COLUMNAS_CORREGIBLES])
+
+    return df.set_index("columna")
+
+
+def consultar_pendientes(conn):
+    return pd.read_sql("""
+        SELECT
+            c.id,
+            c.fecha,
+            c.nombre,
+            c.id_asociado,
+            c.columna,
+            c.nuevo_valor,
+            c.solucion,
+            c.tabla
+        FROM correcciones c
+        WHERE c.estado = 'pendiente'
+        ORDER BY c.id_asociado, c.id
+    """, conn)
+
+
+# =====================================================
+# VALIDACIÓN
+# =====================================================
+def validar(df, esquema, existentes):
+    """
+    Valida las solicitudes de `df` (columnas de consultar_pendientes).
+
+    `existentes` es el conjunto de ids de reportes que existen. Devuelve
+    `df` con tres columnas nuevas: `reporte_id` (int), `valor` (texto
+    normalizado, listo para castear en SQL) y `motivo` (None si es válida).
+    """
+    df = df.copy()
+    motivo = pd.Series(None, index=df.index, dtype=object)
+
+    def rechazar(mascara, texto):
+        motivo[mascara & motivo.isna()] = texto
+
+    eliminar = df["solucion"].eq("Eliminar")
+    modificar = df["solucion"].eq("Modificar")
+
+    rechazar(~(eliminar | modificar), "Tipo de acción desconocido")
+    rechazar(df["tabla"].fillna("reportes").ne("reportes"), "Tabla no soportada")
+
+    reporte_id = pd.to_numeric(df["id_asociado"].str.strip(), errors="coerce")
+    rechazar(reporte_id.isna() | (reporte_id % 1 != 0), "ID de reporte inválido")
+    df["reporte_id"] = reporte_id.where(motivo.isna()).astype("Int64")
+
+    # Un reporte ya eliminado satisface una solicitud de eliminación
+    no_existe = ~df["reporte_id"].isin(list(existentes)).fillna(False).astype(bool)
+    rechazar(modificar & no_existe, "El reporte no existe")
+
+    rechazar(modificar & ~df["columna"].isin(COLUMNAS_CORREGIBLES), "Columna no corregible")
+
+    df["valor"] = None
+    for columna, grupo in df[modificar & motivo.isna()].groupby("columna"):
+        valores, errores = convertir(grupo["nuevo_valor"], esquema.loc[columna], columna)
+        df.loc[grupo.index, "valor"] = valores
+        motivo[errores.index[errores.notna()]] = errores.dropna()
+
+    df["motivo"] = motivo
+    marcar_conflictos(df)
+
+    return df
+
+
+def convertir(valores, columna_sql, columna):
+    """
+    Convierte `valores` (texto) al tipo de `columna_sql`.
+    Devuelve (valores normalizados como texto, motivo de error por fila).
+    """
+    texto = valores.fillna("").astype(str).str.strip()
+    errores = pd.Series(None, index=valores.index, dtype=object)
+    tipo = columna_sql["tipo"]
+
+    if tipo in TIPOS_TEXTO:
+        longitud = columna_sql["longitud"]
+        if pd.notna(longitud):
+            errores[texto.str.len() > longitud] = f"Texto de más de {int(longitud)} caracteres"
+        return texto, errores
+
+    if texto.eq("").any():
+        errores[texto.eq("")] = "Valor vacío"
+
+    if tipo == "date":
+        fechas = pd.to_datetime(texto, format="%Y-%m-%d", errors="coerce")
+        fechas = fechas.fillna(pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce"))
+        errores[fechas.isna() & errores.isna()] = "Fecha inválida (use AAAA-MM-DD)"
+        return fechas.dt.strftime("%Y-%m-%d"), errores
+
+    if tipo not in TIPOS_ENTEROS and tipo not in TIPOS_NUMERICOS:
+        errores[:] = f"Tipo de columna no soportado: {tipo}"
+        return texto, errores
+
+    # Se acepta coma decimal ("8,5")
+    numeros = pd.to_numeric(texto.str.replace(",", ".", regex=False), errors="coerce")
+    errores[numeros.isna() & errores.isna()] = "No es un número"
+
+    if tipo in TIPOS_ENTEROS:
+        limite = TIPOS_ENTEROS[tipo]
+        errores[(numeros % 1 != 0) & errores.isna()] = "Debe ser un número entero"
+        errores[(numeros.abs() >= limite) & errores.isna()] = "Número fuera de rango"
+        normalizados = numeros.where(errores.isna()).round().astype("Int64").astype(str)
+    else:
+        precision, escala = columna_sql["precision"], columna_sql["escala"]
+        if tipo == "numeric" and pd.notna(precision):
+            maximo = 10 ** (precision - (escala or 0))
+            errores[(numeros.abs() >= maximo) & errores.isna()] = "Número fuera de rango"
+        normalizados = numeros.astype(str)
+
+    minimo, maximo = RANGOS.get(columna, (None, None))
+    if minimo is not None:
+        errores[(numeros < minimo) & errores.isna()] = f"Debe ser ≥ {minimo}"
+    if maximo is not None:
+        errores[(numeros > maximo) & errores.isna()] = f"Debe ser ≤ {maximo}"
+
+    return normalizados, errores
+
+
+def marcar_conflictos(df):
+    """
+    Marca como conflicto (en `motivo`) las solicitudes válidas que chocan:
+    - valores distintos para la misma celda (reporte, columna)
+    - modificación y eliminación del mismo reporte
+    Las solicitudes repetidas con el mismo valor no son conflicto.
+    """
+    validas = df[df["motivo"].isna()]
+
+    modificaciones = validas[validas["solucion"].eq("Modificar")]
+    valores_por_celda = modificaciones.groupby(["reporte_id", "columna"])["valor"].transform("nunique")
+    celda = valores_por_celda.index[valores_por_celda > 1]
+    df.loc[celda, "motivo"] = "Conflicto: otra solicitud pide un valor distinto para la misma celda"
+
+    eliminados = validas.loc[validas["solucion"].eq("Eliminar"), "reporte_id"]
+    ambos = validas.index[validas["reporte_id"].isin(eliminados) & validas["solucion"].eq("Modificar")]
+    ambos = ambos.union(
+        validas.index[validas["reporte_id"].isin(modificaciones["reporte_id"]) & validas["solucion"].eq("Eliminar")]
+    )
+    df.loc[ambos.difference(celda), "motivo"] = "Conflicto: el reporte tiene solicitudes de modificar y de eliminar"
+
+
+# =====================================================
+# APLICACIÓN
+# =====================================================
+def revisar(conn):
+    """Vista previa: todas las pendientes validadas, sin modificar nada."""
+    df = consultar_pendientes(conn)
+    if df.empty:
+        return validar_vacio(df)
+
+    return validar(df, esquema_reportes(conn), reportes_existentes(conn, df))
+
+
+def validar_vacio(df):
+    return df.assign(reporte_id=pd.Series(dtype="Int64"), valor=None, motivo=None)
+
+
+def reportes_existentes(conn, df):
+    ids = pd.to_numeric(df["id_asociado"].str.strip(), errors="coerce").dropna()
+    ids = ids[ids % 1 == 0].astype(np.int64).unique().tolist()
+
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM reportes WHERE id = ANY(%s)", (ids,))
+    return {row[0] for row in cur.fetchall()}
+
+
+def lotes(df, tamano):
+    """
+    Parte `df` (ordenado por id_asociado) en lotes de ~`tamano` filas sin
+    separar las solicitudes de un mismo reporte.
+    """
+    if df.empty:
+        return
+
+    inicio = 0
+    cortes = np.flatnonzero(df["id_asociado"].to_numpy()[1:] != df["id_asociado"].to_numpy()[:-1]) + 1
+
+    for corte in list(cortes) + [len(df)]:
+        if corte - inicio >= tamano or corte == len(df):
+            yield df.iloc[inicio:corte]
+            inicio = corte
+
+
+def aplicar(conn, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Aplica todas las solicitudes pendientes válidas.
+
+    Devuelve (resumen, rechazadas) donde `resumen` cuenta solicitudes
+    aplicadas, reportes modificados y eliminados, y `rechazadas` es un
+    DataFrame con id, id_asociado, columna, nuevo_valor y motivo.
+    """
+    esquema = esquema_reportes(conn)
+    pendientes = consultar_pendientes(conn)
+    conn.rollback()
+
+    resumen = {"aplicadas": 0, "modificados": 0, "eliminados": 0}
+    rechazadas = []
+    procesadas = 0
+
+    for lote in lotes(pendientes, tamano_lote):
+        parcial, rechazo = aplicar_lote(conn, lote["id"].tolist(), esquema)
+        for clave in resumen:
+            resumen[clave] += parcial[clave]
+        rechazadas.append(rechazo)
+
+        procesadas += len(lote)
+        if progreso:
+            progreso(procesadas, len(pendientes))
+
+    columnas = ["id", "id_asociado", "columna", "nuevo_valor", "motivo"]
+    rechazadas = [r for r in rechazadas if not r.empty]
+    rechazadas = (
+        pd.concat(rechazadas, ignore_index=True)[columnas]
+        if rechazadas else pd.DataFrame(columns=columnas)
+    )
+
+    return resumen, rechazadas
+
+
+def aplicar_lote(conn, ids, esquema):
+    """Valida y aplica un lote de solicitudes en una sola transacción."""
+    cur = conn.cursor()
+    try:
+        # Solo las que siguen pendientes y nadie más está procesando
+        cur.execute("""
+            SELECT id, fecha, nombre, id_asociado, columna, nuevo_valor, solucion, tabla
+            FROM correcciones
+            WHERE id = ANY(%s)
+              AND estado = 'pendiente'
+            FOR UPDATE SKIP LOCKED
+        """, (ids,))
+        df = pd.DataFrame(
+            cur.fetchall(), columns=[d[0] for d in cur.description]
+        )
+
+        resumen = {"aplicadas": 0, "modificados": 0, "eliminados": 0}
+        if df.empty:
+            conn.rollback()
+            return resumen, validar_vacio(df)
+
+        df = validar(df, esquema, reportes_existentes(conn, df))
+        validas = df[df["motivo"].isna()]
+
+        eliminar = validas.loc[validas["solucion"].eq("Eliminar"), "reporte_id"]
+        if not eliminar.empty:
+            cur.execute(
+                "DELETE FROM reportes WHERE id = ANY(%s)",
+                (eliminar.astype(int).unique().tolist(),)
+            )
+            resumen["eliminados"] = cur.rowcount
+
+        modificar = validas[validas["solucion"].eq("Modificar")].drop_duplicates(["reporte_id", "columna"])
+        modificados = set()
+        for columna, grupo in modificar.groupby("columna"):
+            cur.execute(sql.SQL("""
+                UPDATE reportes r
+                SET {col} = v.valor::{tipo}
+                FROM unnest(%s::bigint[], %s::text[]) AS v(id, valor)
+                WHERE r.id = v.id
+                RETURNING r.id
+            """).format(
+                col=sql.Identifier(columna),
+                tipo=sql.SQL(esquema.loc[columna, "tipo_sql"]),
+            ), (grupo["reporte_id"].astype(int).tolist(), grupo["valor"].tolist()))
+            modificados.update(row[0] for row in cur.fetchall())
+        resumen["modificados"] = len(modificados)
+
+        cur.execute("""
+            UPDATE correcciones
+            SET estado = 'corregido'
+            WHERE id = ANY(%s)
+        """, (validas["id"].astype(int).tolist(),))
+        resumen["aplicadas"] = cur.rowcount
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return resumen, df[df["motivo"].notna()]
@@ -0,0 +1,124 @@
+"""
+Paginación keyset para tablas grandes.
+
+En lugar de traer todo el rango a un DataFrame, cada rerun pide solo una
+página ordenada por (fecha_reporte, id) a partir de la última clave vista:
+
+    ... WHERE (fecha_reporte, id) > (%s, %s) ORDER BY fecha_reporte, id LIMIT n
+
+`orden` permite columnas intermedias, p. ej. (fecha_reporte, persona, id):
+el índice sigue dando el orden por fecha y el resto se ordena por día.
+
+Las claves de inicio de las páginas ya visitadas se guardan en
+session_state para poder volver atrás. El total se obtiene con COUNT(*)
+cuando el planner estima pocas filas y con la estimación del planner si no,
+y se vuelve a contar al volver a la primera página o pasados TOTAL_TTL_S
+(para que las altas y bajas de la sesión se reflejen sin cambiar filtros).
+"""
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+FILAS_POR_PAGINA = 200
+LIMITE_CONTEO_EXACTO = 50_000
+TOTAL_TTL_S = 30.0
+ORDEN = ("fecha_reporte", "id")
+
+
+def consultar_pagina(conn, consulta, params, despues_de=None, tamano=FILAS_POR_PAGINA,
+                     descendente=False, orden=ORDEN):
+    """
+    Una página de `consulta` (que debe exponer las columnas de `orden`, que
+    terminan en una única como id). Devuelve (df, hay_mas).
+    """
+    comparador, sentido = ("<", "DESC") if descendente else (">", "ASC")
+    columnas = [f"q.{columna}" for columna in orden]
+    filtro = ""
+    params = list(params)
+
+    if despues_de is not None:
+        marcadores = ", ".join(["%s"] * len(columnas))
+        filtro = f"WHERE ({', '.join(columnas)}) {comparador} ({marcadores})"
+        params.extend(despues_de)
+
+    df = pd.read_sql(f"""
+        SELECT *
+        FROM ({consulta}) q
+        {filtro}
+        ORDER BY {', '.join(f'{columna} {sentido}' for columna in columnas)}
+        LIMIT %s
+    """, conn, params=[*params, tamano + 1])
+
+    return df.iloc[:tamano], len(df) > tamano
+
+
+def contar(conn, consulta, params):
+    """Devuelve (total, es_exacto)."""
+    cur = conn.cursor()
+    cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM ({consulta}) q", params)
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimado = int(plan[0]["Plan"]["Plan Rows"])
+
+    if estimado > LIMITE_CONTEO_EXACTO:
+        return estimado, False
+
+    cur.execute(f"SELECT COUNT(*) FROM ({consulta}) q", params)
+    return cur.fetchone()[0], True
+
+
+def paginar(conn, clave, consulta, params, tamano=FILAS_POR_PAGINA, descendente=False,
+            orden=ORDEN):
+    """
+    Muestra los controles de navegación y devuelve el DataFrame de la página
+    actual. `clave` identifica la tabla en session_state.
+    """
+    firma = (consulta, tuple(str(p) for p in params), tamano, descendente, orden)
+    estado = st.session_state.get(clave)
+
+    # Cambió el filtro → volver a la primera página
+    if estado is None or estado["firma"] != firma:
+        estado = {"firma": firma, "inicios": [None], "pagina": 0, "total": None}
+        st.session_state[clave] = estado
+
+    if estado["total"] is None or time.monotonic() - estado["contado_en"] >= TOTAL_TTL_S:
+        estado["total"] = contar(conn, consulta, params)
+        estado["contado_en"] = time.monotonic()
+
+    pagina = estado["pagina"]
+    df, hay_mas = consultar_pagina(
+        conn, consulta, params, estado["inicios"][pagina], tamano, descendente, orden
+    )
+
+    total, exacto = estado["total"]
+    desde = pagina * tamano + (1 if len(df) else 0)
+    hasta = pagina * tamano + len(df)
+
+    col1, col2, col3 = st.columns([1, 4, 1])
+    with col1:
+        if st.button("⬅️ Anterior", key=f"{clave}_anterior", disabled=pagina == 0):
+            estado["pagina"] -= 1
+            if estado["pagina"] == 0:
+                estado["total"] = None
+            st.rerun()
+    with col2:
+        st.caption(
+            f"Página {pagina + 1} · filas {desde:,}–{hasta:,} de "
+            f"{'' if exacto else '~'}{total:,}"
+        )
+    with col3:
+        if st.button("Siguiente ➡️", key=f"{clave}_siguiente", disabled=not hay_mas):
+            siguiente = tuple(
+                valor.item() if isinstance(valor, np.generic) else valor
+                for valor in df.iloc[-1][list(orden)]
+            )
+            del estado["inicios"][pagina + 1:]
+            estado["inicios"].append(siguiente)
+            estado["pagina"] += 1
+            st.rerun()
+
+    return df
@@ -0,0 +1,260 @@
+"""
+Particiones mensuales de reportes (migración 004).
+
+- Conversión en línea de una tabla con datos: crea reportes_particionada
+  con sus meses e instala el trigger espejo (reportes → reportes_particionada),
+  copia lo existente por lotes de ids (cada lote en su transacción, sin
+  frenar a las páginas), compara los conteos y hace el cambio de nombre con
+  un bloqueo corto.
+- Mantenimiento: crea por adelantado las particiones de los próximos meses
+  (lo que caiga fuera de rango queda en reportes_fuera_de_rango hasta que
+  se cree su mes).
+
+Uso:
+    python -m servicios.particiones_reportes --estado
+    python -m servicios.particiones_reportes --migrar [--lote 50000]
+    python -m servicios.particiones_reportes --mantener [--meses 3]
+    python -m servicios.particiones_reportes --limpiar   # borra reportes_anterior
+"""
+import argparse
+import re
+import time
+from datetime import date
+
+import pandas as pd
+
+LOTE = 50_000
+MESES_ADELANTE = 3
+
+PATRON_LIMITES = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+def _meses(desde, hasta):
+    """Primer día de cada mes entre `desde` y `hasta` (inclusive)."""
+    actual = date(desde.year, desde.month, 1)
+    while actual <= hasta:
+        yield actual
+        actual = date(actual.year + actual.month // 12, actual.month % 12 + 1, 1)
+
+
+def es_particionada(conn, tabla="reportes"):
+    cur = conn.cursor()
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (tabla,))
+    fila = cur.fetchone()
+    conn.rollback()
+    return fila is not None and fila[0] == "p"
+
+
+def particiones(conn, tabla="reportes"):
+    """Particiones de `tabla` con su rango [desde, hasta), filas estimadas y tamaño."""
+    df = pd.read_sql("""
+        SELECT
+            c.relname AS particion,
+            pg_get_expr(c.relpartbound, c.oid) AS limites,
+            c.reltuples::bigint AS filas_estimadas,
+            pg_total_relation_size(c.oid) AS bytes
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY 1
+    """, conn, params=[tabla])
+    conn.rollback()
+
+    limites = df["limites"].str.extract(PATRON_LIMITES)
+    df["desde"] = pd.to_datetime(limites[0]).dt.date
+    df["hasta"] = pd.to_datetime(limites[1]).dt.date
+    return df.drop(columns="limites")
+
+
+def asegurar_particiones(conn, desde, hasta, tabla="reportes"):
+    """
+    Crea las particiones mensuales que falten entre `desde` y `hasta`.
+    No hace nada si `tabla` no está particionada. Devuelve los meses creados.
+    """
+    if not es_particionada(conn, tabla):
+        return []
+
+    creados = []
+    cur = conn.cursor()
+    try:
+        for mes in _meses(pd.Timestamp(desde).date(), pd.Timestamp(hasta).date()):
+            cur.execute("SELECT reportes_crear_particion(%s::regclass, %s)", (tabla, mes))
+            if cur.fetchone()[0]:
+                creados.append(mes)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return creados
+
+
+def mantener(conn, meses=MESES_ADELANTE, hoy=None):
+    """Particiones desde el mes actual hasta `meses` más adelante."""
+    hoy = hoy or date.today()
+    hasta = pd.Timestamp(hoy) + pd.DateOffset(months=meses)
+    return asegurar_particiones(conn, hoy, hasta.date())
+
+
+# =====================================================
+# CONVERSIÓN EN LÍNEA
+# =====================================================
+def copiar_lote(conn, desde_id, hasta_id):
+    """
+    Copia los ids (desde_id, hasta_id] que falten en reportes_particionada.
+    FOR SHARE retiene las filas del lote hasta el commit: una edición
+    concurrente espera y su espejo se aplica después de la copia, o la
+    copia ve la versión ya editada.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT 1
+            FROM reportes
+            WHERE id > %s AND id <= %s
+            FOR SHARE
+        """, (desde_id, hasta_id))
+        cur.execute("""
+            INSERT INTO reportes_particionada
+            SELECT *
+            FROM reportes
+            WHERE id > %s AND id <= %s
+            ON CONFLICT DO NOTHING
+        """, (desde_id, hasta_id))
+        copiadas = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return copiadas
+
+
+def conteos(conn):
+    """(filas en reportes, filas en reportes_particionada) en la misma instantánea."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT
+            (SELECT count(*) FROM reportes),
+            (SELECT count(*) FROM reportes_particionada)
+    """)
+    fila = cur.fetchone()
+    conn.rollback()
+    return fila
+
+
+def migrar(conn, lote=LOTE, pausa=0.0, progreso=print):
+    """
+    Convierte reportes en tabla particionada sin detener la aplicación.
+    Se puede relanzar si se interrumpe: retoma con la tabla nueva tal cual.
+    Devuelve un dict con filas copiadas, lotes y segundos por etapa.
+    """
+    if es_particionada(conn):
+        progreso("reportes ya está particionada")
+        return None
+
+    tiempos = {}
+    inicio = time.perf_counter()
+    cur = conn.cursor()
+
+    # Los meses de los datos existentes y los que vienen
+    cur.execute("SELECT min(fecha_reporte), max(fecha_reporte) FROM reportes")
+    fecha_min, fecha_max = cur.fetchone()
+    hoy = date.today()
+    desde = min(fecha_min or hoy, hoy)
+    hasta = (pd.Timestamp(max(fecha_max or hoy, hoy)) + pd.DateOffset(months=MESES_ADELANTE)).date()
+
+    cur.execute("SELECT to_regclass('reportes_particionada') IS NOT NULL")
+    if cur.fetchone()[0]:
+        asegurar_particiones(conn, desde, hasta, tabla="reportes_particionada")
+    else:
+        cur.execute("SELECT reportes_preparar_particionada(%s, %s)", (desde, hasta))
+        conn.commit()
+    progreso(f"Particiones: {len(particiones(conn, 'reportes_particionada'))}")
+    tiempos["particiones_s"] = round(time.perf_counter() - inicio, 2)
+
+    # El trigger ya está: los ids posteriores llegan por el espejo
+    cur.execute("SELECT min(id), max(id) FROM reportes")
+    id_min, id_max = cur.fetchone()
+    conn.rollback()
+
+    # Copia por lotes
+    inicio = time.perf_counter()
+    copiadas = lotes = 0
+    if id_min is not None:
+        actual = id_min - 1
+        while actual < id_max:
+            copiadas += copiar_lote(conn, actual, min(actual + lote, id_max))
+            lotes += 1
+            actual += lote
+            if lotes % 20 == 0:
+                progreso(f"  {copiadas} filas copiadas (id ≤ {min(actual, id_max)} de {id_max})")
+            if pausa:
+                time.sleep(pausa)
+    tiempos["copia_s"] = round(time.perf_counter() - inicio, 2)
+
+    cur.execute("ANALYZE reportes_particionada")
+    conn.commit()
+
+    anteriores, nuevas = conteos(conn)
+    if anteriores != nuevas:
+        raise RuntimeError(
+            f"Conteos distintos: reportes={anteriores}, reportes_particionada={nuevas}"
+        )
+
+    inicio = time.perf_counter()
+    try:
+        cur.execute("SET LOCAL lock_timeout = '10s'")
+        cur.execute("SELECT reportes_activar_particionada()")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    tiempos["cambio_s"] = round(time.perf_counter() - inicio, 3)
+
+    progreso(f"✅ reportes particionada ({copiadas} filas copiadas en {lotes} lotes)")
+    return {"filas": anteriores, "copiadas": copiadas, "lotes": lotes, **tiempos}
+
+
+def limpiar(conn):
+    """Elimina reportes_anterior (lo que quedó de la conversión)."""
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS reportes_anterior")
+    conn.commit()
+
+
+def main():
+    from db import conectar_directo
+
+    parser = argparse.ArgumentParser(description="Particiones mensuales de reportes")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--estado", action="store_true")
+    grupo.add_argument("--migrar", action="store_true")
+    grupo.add_argument("--mantener", action="store_true")
+    grupo.add_argument("--limpiar", action="store_true")
+    parser.add_argument("--lote", type=int, default=LOTE, help="Ids por lote de copia")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos entre lotes")
+    parser.add_argument("--meses", type=int, default=MESES_ADELANTE,
+                        help="Meses a crear por adelantado (--mantener)")
+    args = parser.parse_args()
+
+    conn = conectar_directo()
+
+    if args.migrar:
+        migrar(conn, lote=args.lote, pausa=args.pausa)
+    elif args.mantener:
+        creados = mantener(conn, meses=args.meses)
+        print(f"✅ {len(creados)} particiones nuevas")
+        for mes in creados:
+            print(f"   reportes_{mes:%Y_%m}")
+    elif args.limpiar:
+        limpiar(conn)
+        print("✅ reportes_anterior eliminada")
+    elif not es_particionada(conn):
+        print("⏳ reportes sin particionar (python -m servicios.particiones_reportes --migrar)")
+    else:
+        print(particiones(conn).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Perfilado opcional de cada rerun del router (app.py).
+
+Se activa en secrets.toml:
+
+    [perfilado]
+    ACTIVO = true
+    MUESTRA = 0.05          # fracción de reruns con cProfile + tracemalloc
+    DIRECTORIO = "perfiles"
+
+Por cada rerun se agrega una línea a `DIRECTORIO/reruns-AAAAMMDD.jsonl` con
+la página, la versión desplegada (APP_VERSION o el commit de git), el
+tiempo total, el tiempo SQL y las sentencias (servicios.instrumentacion).
+En los reruns muestreados se agrega el desglose del tiempo por capa
+(sql / pandas / streamlit / app / otros), las funciones del repositorio más
+costosas, el pico de memoria y las líneas que más memoria asignaron; el
+perfil completo queda en `DIRECTORIO/prof/*.prof` (pstats / snakeviz).
+
+Para comparar versiones:
+
+    python -m servicios.perfilador perfiles/
+    python -m servicios.perfilador perfiles/ --comparar 1a2b3c4 5d6e7f8
+"""
+import argparse
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import subprocess
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from servicios import instrumentacion
+
+logger = logging.getLogger(__name__)
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Prefijos de archivo / nombre de función → capa del desglose
+CAPAS = (
+    ("sql", ("psycopg2", "servicios/instrumentacion.py")),
+    ("pandas", ("pandas", "numpy", "pyarrow")),
+    ("streamlit", ("streamlit", "pydeck", "altair", "tornado")),
+)
+
+_escritura = threading.Lock()
+_memoria = threading.Lock()
+
+
+def configuracion():
+    try:
+        config = st.secrets.get("perfilado", {})
+    except Exception:
+        config = {}
+
+    return {
+        "activo": bool(config.get("ACTIVO", False)),
+        "muestra": float(config.get("MUESTRA", 0.05)),
+        "directorio": Path(config.get("DIRECTORIO", "perfiles")),
+    }
+
+
+@lru_cache(maxsize=1)
+def version():
+    """Versión desplegada: APP_VERSION o el commit actual."""
+    if os.environ.get("APP_VERSION"):
+        return os.environ["APP_VERSION"]
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ, capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except Exception:
+        return "desconocida"
+
+
+# =====================================================
+# PERFILADO DE UN RERUN
+# =====================================================
+@contextmanager
+def perfilar_rerun(pagina):
+    """
+    Mide el rerun de `pagina`. No hace nada si el perfilado está apagado.
+    También registra reruns cortados por st.stop() / st.rerun().
+    """
+    config = configuracion()
+    if not config["activo"]:
+        yield
+        return
+
+    # Se lee antes: tras st.stop() cualquier llamada a st.* vuelve a cortar
+    perfil_usuario = (st.session_state.get("usuario") or {}).get("perfil")
+
+    muestreado = random.random() < config["muestra"]
+    perfil = cProfile.Profile() if muestreado else None
+
+    # tracemalloc es global al proceso: solo un rerun a la vez lo usa
+    memoria = muestreado and not tracemalloc.is_tracing() and _memoria.acquire(blocking=False)
+    if memoria:
+        tracemalloc.start()
+
+    instrumentacion.iniciar_acumulado()
+    inicio = time.perf_counter()
+    if perfil:
+        perfil.enable()
+
+    try:
+        yield
+    finally:
+        if perfil:
+            perfil.disable()
+        total_ms = (time.perf_counter() - inicio) * 1000
+        sql = instrumentacion.terminar_acumulado()
+
+        try:
+            _registrar(
+                config, pagina, perfil_usuario, muestreado, total_ms, sql,
+                perfil, memoria
+            )
+        except Exception:
+            # El perfilado nunca debe romper la página
+            logger.exception("Error guardando el perfil del rerun")
+        finally:
+            if memoria:
+                tracemalloc.stop()
+                _memoria.release()
+
+
+def _registrar(config, pagina, perfil_usuario, muestreado, total_ms, sql, perfil, memoria):
+    registro = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "version": version(),
+        "pagina": pagina,
+        "perfil_usuario": perfil_usuario,
+        "total_ms": round(total_ms, 2),
+        "sql_ms": round(sql["sql_ms"], 2),
+        "resto_ms": round(total_ms - sql["sql_ms"], 2),
+        "sentencias": sql["sentencias"],
+        "filas": sql["filas"],
+        "muestreado": muestreado,
+    }
+
+    if memoria:
+        registro.update(_memoria_rerun())
+
+    if perfil:
+        registro.update(_desglose(perfil))
+        registro["prof"] = _guardar_prof(perfil, config["directorio"], pagina)
+
+    _guardar(registro, config["directorio"])
+
+
+def _capa(archivo, funcion):
+    texto = f"{archivo} {funcion}".replace("\\", "/")
+    for capa, marcas in CAPAS:
+        if any(m in texto for m in marcas):
+            return capa
+    if texto.startswith(str(RAIZ)):
+        return "app"
+    return "otros"
+
+
+def _desglose(perfil):
+    """Tiempo propio (tottime) por capa y las funciones del repo más costosas."""
+    estadisticas = pstats.Stats(perfil)
+    capas = {}
+    propias = []
+
+    for (archivo, linea, funcion), (_, _, tottime, cumtime, _) in estadisticas.stats.items():
+        capa = _capa(archivo, funcion)
+        capas[capa] = capas.get(capa, 0.0) + tottime * 1000
+
+        if capa == "app":
+            relativo = Path(archivo).relative_to(RAIZ).as_posix()
+            propias.append((cumtime * 1000, f"{relativo}:{linea}({funcion})"))
+
+    propias.sort(reverse=True)
+    return {
+        "desglose_ms": {c: round(ms, 2) for c, ms in sorted(capas.items())},
+        "funciones": [{"funcion": f, "acumulado_ms": round(ms, 2)} for ms, f in propias[:15]],
+    }
+
+
+def _memoria_rerun(lineas=10):
+    _, pico = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics("lineno")[:lineas]
+    return {
+        "memoria_pico_kb": round(pico / 1024, 1),
+        "asignaciones": [
+            {"linea": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "kb": round(s.size / 1024, 1)}
+            for s in top
+        ],
+    }
+
+
+def _guardar_prof(perfil, directorio, pagina):
+    carpeta = directorio / "prof"
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    nombre = "".join(c if c.isalnum() else "_" for c in pagina)
+    ruta = carpeta / f"{datetime.now():%Y%m%d_%H%M%S_%f}_{nombre}.prof"
+    perfil.dump_stats(ruta)
+    return str(ruta)
+
+
+def _guardar(registro, directorio):
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / f"reruns-{datetime.now():%Y%m%d}.jsonl"
+
+    linea = json.dumps(registro, ensure_ascii=False, default=str)
+    with _escritura, open(ruta, "a", encoding="utf-8") as f:
+        f.write(linea + "\n")
+
+
+# =====================================================
+# INFORME / COMPARACIÓN DE VERSIONES
+# =====================================================
+def leer(directorio):
+    archivos = sorted(Path(directorio).glob("reruns-*.jsonl"))
+    if not archivos:
+        return pd.DataFrame()
+
+    return pd.concat(
+        (pd.read_json(a, lines=True, dtype={"version": str}) for a in archivos),
+        ignore_index=True
+    )
+
+
+def resumen_por_version(df):
+    """p50 / p95 del tiempo total y SQL por (versión, página)."""
+    return (
+        df.groupby(["version", "pagina"])
+        .agg(
+            reruns=("total_ms", "size"),
+            total_p50=("total_ms", "median"),
+            total_p95=("total_ms", lambda s: s.quantile(0.95)),
+            sql_p50=("sql_ms", "median"),
+            sentencias=("sentencias", "mean"),
+        )
+        .round(1)
+        .reset_index()
+    )
+
+
+def comparar(df, base, nueva, tolerancia=0.10):
+    """
+    Diferencia de p50 por página entre dos versiones; marca como regresión
+    las páginas cuyo tiempo total creció más que `tolerancia`.
+    """
+    resumen = resumen_por_version(df[df["version"].isin([base, nueva])])
+    tabla = resumen.pivot(index="pagina", columns="version", values=["total_p50", "sql_p50", "sentencias"])
+
+    resultado = pd.DataFrame({
+        f"total_p50_{base}": tabla[("total_p50", base)],
+        f"total_p50_{nueva}": tabla[("total_p50", nueva)],
+        f"sql_p50_{base}": tabla[("sql_p50", base)],
+        f"sql_p50_{nueva}": tabla[("sql_p50", nueva)],
+        f"sentencias_{base}": tabla[("sentencias", base)],
+        f"sentencias_{nueva}": tabla[("sentencias", nueva)],
+    })
+    cambio = resultado[f"total_p50_{nueva}"] / resultado[f"total_p50_{base}"] - 1
+    resultado["cambio_%"] = (cambio * 100).round(1)
+    resultado["regresion"] = cambio > tolerancia
+
+    return resultado.sort_values("cambio_%", ascending=False).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen de los perfiles de rerun")
+    parser.add_argument("directorio", nargs="?", default="perfiles")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVA"))
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    args = parser.parse_args()
+
+    df = leer(args.directorio)
+    if df.empty:
+        print(f"No hay perfiles en {args.directorio}/")
+        raise SystemExit(1)
+
+    pd.set_option("display.width", 250)
+
+    if args.comparar:
+        resultado = comparar(df, *args.comparar, tolerancia=args.tolerancia)
+        print(resultado.to_string(index=False))
+        if resultado["regresion"].any():
+            print(f"⚠️ Páginas más lentas: {', '.join(resultado.loc[resultado['regresion'], 'pagina'])}")
+            raise SystemExit(1)
+    else:
+        print(resumen_por_version(df).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
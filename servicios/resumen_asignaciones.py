@@ -0,0 +1,147 @@
+"""
+Resumen de estados por asignación (tabla asignaciones_resumen, migración 002).
+
+Los triggers de `asignaciones` mantienen, por (región, asignación), el total
+de bloques y cuántos están pendientes, pendientes en el proceso operativo,
+asignados y finalizados. "Toda la asignación está en X" es `X = bloques`, y
+cada lista tiene su índice parcial. Este módulo la lee y ofrece la
+verificación / reconstrucción completa para detectar y corregir deriva.
+
+Uso:
+    python -m servicios.resumen_asignaciones --verificar
+    python -m servicios.resumen_asignaciones --reconstruir
+"""
+import argparse
+
+import pandas as pd
+from psycopg2 import sql
+
+# Columnas del resumen que se pueden pedir completas
+CONTEOS = ("pendientes", "pendientes_operativo", "asignados", "finalizados")
+
+SQL_RECALCULO = """
+    SELECT
+        region,
+        asignacion,
+        COUNT(*) AS bloques,
+        COUNT(*) FILTER (WHERE estado_actual = 'pendiente') AS pendientes,
+        COUNT(*) FILTER (WHERE estado_actual = 'pendiente'
+                           AND proceso_actual = 'operativo') AS pendientes_operativo,
+        COUNT(*) FILTER (WHERE estado_actual = 'asignado') AS asignados,
+        COUNT(*) FILTER (WHERE estado_actual = 'finalizado') AS finalizados
+    FROM asignaciones
+    GROUP BY region, asignacion
+"""
+
+
+def regiones(conn):
+    """
+    Regiones con asignaciones, en orden. Recorre la clave primaria del
+    resumen saltando de región en región (un sondeo por región) en lugar de
+    un DISTINCT sobre todos los bloques.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        WITH RECURSIVE r AS (
+            SELECT min(region) AS region
+            FROM asignaciones_resumen
+            UNION ALL
+            SELECT (
+                SELECT min(s.region)
+                FROM asignaciones_resumen s
+                WHERE s.region > r.region
+            )
+            FROM r
+            WHERE r.region IS NOT NULL
+        )
+        SELECT region
+        FROM r
+        WHERE region IS NOT NULL
+    """)
+    return [row[0] for row in cur.fetchall()]
+
+
+def asignaciones_completas(conn, region, conteo):
+    """Asignaciones de `region` con todos sus bloques en `conteo` (ver CONTEOS)."""
+    if conteo not in CONTEOS:
+        raise ValueError(f"Conteo desconocido: {conteo}")
+
+    cur = conn.cursor()
+    cur.execute(sql.SQL("""
+        SELECT asignacion
+        FROM asignaciones_resumen
+        WHERE region = %s
+          AND {conteo} = bloques
+        ORDER BY asignacion
+    """).format(conteo=sql.Identifier(conteo)), (region,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def verificar(conn):
+    """Filas donde el resumen difiere del recálculo desde asignaciones."""
+    columnas = ("bloques",) + CONTEOS
+    diferencias = " OR ".join(f"s.{c} IS DISTINCT FROM r.{c}" for c in columnas)
+    comparadas = ",\n".join(f"s.{c} AS {c}_resumen, r.{c} AS {c}_real" for c in columnas)
+
+    return pd.read_sql(f"""
+        SELECT
+            COALESCE(s.region, r.region) AS region,
+            COALESCE(s.asignacion, r.asignacion) AS asignacion,
+            {comparadas}
+        FROM asignaciones_resumen s
+        FULL OUTER JOIN ({SQL_RECALCULO}) r
+            ON r.region = s.region
+           AND r.asignacion = s.asignacion
+        WHERE {diferencias}
+        ORDER BY 1, 2
+    """, conn)
+
+
+def reconstruir(conn):
+    """Recalcula el resumen completo en una transacción; devuelve las filas escritas."""
+    cur = conn.cursor()
+    try:
+        cur.execute("LOCK TABLE asignaciones IN SHARE MODE")
+        cur.execute("DELETE FROM asignaciones_resumen")
+        cur.execute(f"""
+            INSERT INTO asignaciones_resumen (
+                region, asignacion, bloques, pendientes,
+                pendientes_operativo, asignados, finalizados
+            )
+            {SQL_RECALCULO}
+        """)
+        filas = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return filas
+
+
+def main():
+    from db import conectar_directo
+
+    parser = argparse.ArgumentParser(description="Verificación del resumen asignaciones_resumen")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--verificar", action="store_true")
+    grupo.add_argument("--reconstruir", action="store_true")
+    args = parser.parse_args()
+
+    conn = conectar_directo()
+
+    if args.reconstruir:
+        print(f"✅ Resumen reconstruido: {reconstruir(conn)} filas")
+        return
+
+    deriva = verificar(conn)
+    if deriva.empty:
+        print("✅ asignaciones_resumen coincide con asignaciones")
+    else:
+        print(f"⚠️ {len(deriva)} asignaciones con deriva")
+        print(deriva.to_string(index=False))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
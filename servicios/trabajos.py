@@ -0,0 +1,772 @@
+"""
+Trabajos en segundo plano (migración 006).
+
+Las operaciones largas ya no corren en el hilo del script de Streamlit: la
+página encola un trabajo (una fila de `trabajos`) y un pool de procesos
+trabajadores lo ejecuta con sus propias conexiones. La página solo
+consulta el estado de la fila (`seguimiento`, un st.fragment que se
+re-ejecuta mientras el trabajo siga activo), así que ni la interfaz ni la
+conexión del rerun quedan tomadas, y cerrar la pestaña no pierde el
+trabajo: al volver, la página retoma el último del usuario.
+
+- Cada trabajador toma el pendiente más antiguo con FOR UPDATE SKIP LOCKED
+  y espera los nuevos con LISTEN trabajos (más un sondeo, por los
+  reintentos diferidos).
+- Mientras ejecuta, un hilo renueva el latido cada LATIDO_S. Un trabajo
+  en curso sin latido por VENCIDO_S (el proceso murió) vuelve a la cola,
+  o queda fallido si ya no tiene intentos.
+- Progreso: la función del trabajo llama a `contexto.progreso(avance,
+  mensaje)`; se escribe como mucho una vez por PROGRESO_S.
+- Cancelación: la página marca `cancelar`. El trabajador lo ve en el
+  siguiente progreso o latido, corta la sentencia en curso y hace
+  rollback de la transacción abierta (lo ya confirmado queda).
+- Reintentos: un error vuelve a encolar el trabajo con espera exponencial
+  (REINTENTO_BASE_S · 2^(intento-1)) hasta `max_intentos`; `ErrorDefinitivo`
+  (p. ej. un archivo mal formado) lo da por fallido de inmediato. Desde la
+  página se puede reintentar a mano uno fallido o cancelado.
+- Los archivos subidos se copian a un directorio compartido por la app y
+  los trabajadores; se borran al terminar la carga o al purgar trabajos
+  viejos. Configuración en secrets.toml:
+
+    [trabajos]
+    DIRECTORIO = "trabajos/archivos"
+    PROCESOS = 2
+    RETENCION_DIAS = 7        # trabajos finalizados que se conservan
+    SONDEO_PAGINA_S = 2
+
+Uso:
+    python -m servicios.trabajos [--procesos 2]
+    python -m servicios.trabajos --estado
+    python -m servicios.trabajos --purgar 7
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+import streamlit as st
+from psycopg2.extras import Json
+
+CANAL = "trabajos"
+
+ACTIVOS = ("pendiente", "en_curso")
+FINALES = ("terminado", "fallido", "cancelado")
+
+ETIQUETAS = {
+    "pendiente": "⏳ En cola",
+    "en_curso": "⚙️ En curso",
+    "terminado": "✅ Terminado",
+    "fallido": "❌ Falló",
+    "cancelado": "🚫 Cancelado",
+}
+
+MAX_INTENTOS = 3
+REINTENTO_BASE_S = 30
+LATIDO_S = 10.0
+VENCIDO_S = 120.0
+PROGRESO_S = 1.0
+SONDEO_S = 5.0
+PURGA_S = 3600.0
+ESPERA_MAXIMA_S = 30.0
+ESPERA_AL_DETENER_S = 30.0
+
+LOTE_DESASIGNAR = 2000
+
+
+def configuracion():
+    try:
+        config = st.secrets.get("trabajos", {})
+    except Exception:
+        config = {}
+
+    return {
+        "directorio": Path(config.get("DIRECTORIO", "trabajos/archivos")),
+        "procesos": int(config.get("PROCESOS", 2)),
+        "retencion_dias": int(config.get("RETENCION_DIAS", 7)),
+        "sondeo_pagina_s": float(config.get("SONDEO_PAGINA_S", 2)),
+    }
+
+
+class Cancelado(Exception):
+    """Se pidió cancelar el trabajo."""
+
+
+class ErrorDefinitivo(Exception):
+    """Error que no se arregla reintentando (p. ej. un archivo mal formado)."""
+
+
+# =====================================================
+# TIPOS DE TRABAJO
+# =====================================================
+TIPOS = {}
+
+
+def tipo_trabajo(nombre):
+    """Registra la función que ejecuta los trabajos `nombre`: f(contexto, **parametros) → resultado."""
+    def registrar(funcion):
+        TIPOS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def _registros(df):
+    """Filas de un DataFrame como lista de dicts serializable a JSON (NaN → null)."""
+    return json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+
+
+# Escalares de NumPy en los resultados → tipos de JSON
+_json = partial(json.dumps, default=lambda valor: valor.item() if hasattr(valor, "item") else str(valor))
+
+
+@tipo_trabajo("carga_asignaciones")
+def _carga_asignaciones(contexto, region, ruta):
+    from servicios.carga_asignaciones import cargar_asignaciones, leer_por_bloques
+
+    tamano = max(os.path.getsize(ruta), 1)
+
+    with open(ruta, "rb") as archivo:
+        def progreso(numero, filas):
+            contexto.progreso(
+                min(archivo.tell() / tamano, 0.99),
+                f"Bloque {numero}: {filas:,} filas leídas"
+            )
+
+        try:
+            resultado = cargar_asignaciones(
+                contexto.conn, region, leer_por_bloques(archivo), progreso=progreso
+            )
+        except ValueError as e:
+            raise ErrorDefinitivo(str(e)) from e
+
+    _borrar_archivo(ruta)
+
+    rechazos = resultado.pop("rechazos")
+    return {
+        **resultado,
+        "region": region,
+        "rechazos_por_motivo": rechazos.por_motivo,
+        "rechazos": _registros(rechazos.muestra()),
+    }
+
+
+@tipo_trabajo("correcciones")
+def _correcciones(contexto):
+    # Una transacción por lote: al cancelar quedan aplicados los lotes ya confirmados
+    from servicios import motor_correcciones
+
+    resumen, rechazadas = motor_correcciones.aplicar(
+        contexto.conn,
+        progreso=lambda hechas, total: contexto.progreso(
+            hechas / total, f"{hechas:,} de {total:,} solicitudes"
+        )
+    )
+    return {**resumen, "pendientes": len(rechazadas), "rechazadas": _registros(rechazadas)}
+
+
+@tipo_trabajo("desasignar")
+def _desasignar(contexto, region, asignacion):
+    """
+    Devuelve a pendiente los bloques asignados de una asignación, por lotes
+    en una sola transacción. Los que avanzaron mientras el trabajo esperaba
+    en la cola (proceso, QC, finalizado...) no se tocan y se informan en
+    `omitidos` por estado.
+    """
+    cur = contexto.conn.cursor()
+    cur.execute("""
+        SELECT id, estado_actual
+        FROM asignaciones
+        WHERE asignacion = %s
+          AND region = %s
+        ORDER BY id
+        FOR UPDATE
+    """, (asignacion, region))
+    filas = cur.fetchall()
+    ids = [id_ for id_, estado in filas if estado == "asignado"]
+    omitidos = Counter(estado or "sin estado" for _, estado in filas if estado != "asignado")
+
+    for inicio in range(0, len(ids), LOTE_DESASIGNAR):
+        lote = ids[inicio:inicio + LOTE_DESASIGNAR]
+        cur.execute("""
+            UPDATE asignaciones
+            SET operador_actual = NULL,
+                estado_actual = 'pendiente'
+            WHERE id = ANY(%s)
+        """, (lote,))
+        hechos = inicio + len(lote)
+        contexto.progreso(hechos / len(ids), f"{hechos:,} de {len(ids):,} bloques")
+
+    contexto.conn.commit()
+    return {
+        "region": region,
+        "asignacion": asignacion,
+        "bloques": len(ids),
+        "omitidos": dict(omitidos),
+    }
+
+
+# =====================================================
+# COLA (lo que usan las páginas)
+# =====================================================
+COLUMNAS = [
+    "id", "tipo", "parametros", "estado", "progreso", "mensaje", "resultado",
+    "error", "intentos", "max_intentos", "cancelar", "creado_por", "trabajador",
+    "creado_en", "disponible_en", "iniciado_en", "terminado_en",
+]
+
+
+def encolar(conn, tipo, parametros=None, creado_por=None, max_intentos=MAX_INTENTOS):
+    """Crea un trabajo pendiente y devuelve su id."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO trabajos (tipo, parametros, creado_por, max_intentos)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id
+    """, (tipo, Json(parametros or {}), _usuario(creado_por), max_intentos))
+    trabajo_id = cur.fetchone()[0]
+    conn.commit()
+    return trabajo_id
+
+
+def _usuario(cedula):
+    return None if cedula is None else str(cedula)
+
+
+def guardar_archivo(archivo):
+    """Copia un archivo subido al directorio compartido con los trabajadores; devuelve la ruta."""
+    directorio = configuracion()["directorio"]
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    ruta = directorio / f"{uuid.uuid4().hex}{Path(getattr(archivo, 'name', '')).suffix}"
+    archivo.seek(0)
+    with open(ruta, "wb") as destino:
+        shutil.copyfileobj(archivo, destino, 1 << 20)
+    return str(ruta.resolve())
+
+
+def _borrar_archivo(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+def consultar(conn, trabajo_id):
+    """El trabajo como dict, o None si no existe."""
+    cur = conn.cursor()
+    cur.execute(f"SELECT {', '.join(COLUMNAS)} FROM trabajos WHERE id = %s", (trabajo_id,))
+    fila = cur.fetchone()
+    return None if fila is None else dict(zip(COLUMNAS, fila))
+
+
+def ultimo(conn, tipos, creado_por, horas=24):
+    """
+    Id del último trabajo de `tipos` creado por el usuario que siga activo
+    o haya terminado en las últimas `horas`, o None.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id
+        FROM trabajos
+        WHERE creado_por = %s
+          AND tipo = ANY(%s)
+          AND (terminado_en IS NULL
+               OR terminado_en > CURRENT_TIMESTAMP - %s * INTERVAL '1 hour')
+        ORDER BY id DESC
+        LIMIT 1
+    """, (_usuario(creado_por), list(tipos), horas))
+    fila = cur.fetchone()
+    return None if fila is None else fila[0]
+
+
+def listar(conn, limite=50):
+    return pd.read_sql("""
+        SELECT id, tipo, estado, round(progreso::numeric * 100) AS "%%", mensaje,
+               intentos, creado_por, trabajador, creado_en, terminado_en, error
+        FROM trabajos
+        ORDER BY id DESC
+        LIMIT %s
+    """, conn, params=(limite,))
+
+
+def cancelar(conn, trabajo_id):
+    """
+    Un pendiente se cancela en el acto; uno en curso queda marcado y lo
+    cancela su trabajador. Devuelve si había algo que cancelar.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET cancelar = TRUE,
+            estado = CASE WHEN estado = 'pendiente' THEN 'cancelado' ELSE estado END,
+            terminado_en = CASE WHEN estado = 'pendiente' THEN CURRENT_TIMESTAMP END
+        WHERE id = %s
+          AND estado IN ('pendiente', 'en_curso')
+    """, (trabajo_id,))
+    conn.commit()
+    return cur.rowcount > 0
+
+
+def reintentar(conn, trabajo_id):
+    """Vuelve a encolar un trabajo fallido o cancelado, con todos sus intentos."""
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = 'pendiente',
+            intentos = 0,
+            cancelar = FALSE,
+            progreso = 0,
+            mensaje = NULL,
+            resultado = NULL,
+            error = NULL,
+            disponible_en = CURRENT_TIMESTAMP,
+            terminado_en = NULL
+        WHERE id = %s
+          AND estado IN ('fallido', 'cancelado')
+    """, (trabajo_id,))
+    conn.commit()
+    return cur.rowcount > 0
+
+
+def purgar(conn, dias):
+    """Borra los trabajos finalizados hace más de `dias` días (y sus archivos)."""
+    cur = conn.cursor()
+    cur.execute("""
+        DELETE FROM trabajos
+        WHERE estado IN ('terminado', 'fallido', 'cancelado')
+          AND terminado_en < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'
+        RETURNING parametros
+    """, (dias,))
+    borrados = cur.fetchall()
+    conn.commit()
+
+    for (parametros,) in borrados:
+        if parametros.get("ruta"):
+            _borrar_archivo(parametros["ruta"])
+    return len(borrados)
+
+
+# =====================================================
+# SEGUIMIENTO EN LAS PÁGINAS
+# =====================================================
+def seguimiento(clave, tipos, creado_por, al_terminar=None):
+    """
+    Muestra el trabajo cuyo id guarda st.session_state[clave] (si no hay,
+    retoma el último de `tipos` del usuario): estado, progreso y botones
+    para cancelar o reintentar. Mientras esté activo se vuelve a consultar
+    cada SONDEO_PAGINA_S en un st.fragment; al terminar hace un rerun
+    completo para que la página vea los datos nuevos.
+
+    `al_terminar(trabajo, primera)` muestra el resultado; `primera` es True
+    la primera vez que esta sesión lo ve terminado. Devuelve el trabajo.
+    """
+    from db import get_connection
+
+    conn = get_connection()
+    if clave not in st.session_state:
+        st.session_state[clave] = ultimo(conn, tipos, creado_por)
+
+    if st.session_state[clave] is None:
+        return None
+
+    trabajo = consultar(conn, st.session_state[clave])
+    if trabajo is None:
+        st.session_state[clave] = None
+        return None
+
+    activo = trabajo["estado"] in ACTIVOS
+    sondeo = configuracion()["sondeo_pagina_s"] if activo else None
+    st.fragment(_seguimiento, run_every=sondeo)(clave, activo, al_terminar)
+    return trabajo
+
+
+def _seguimiento(clave, activo, al_terminar):
+    from db import conexion_por_rerun, get_connection
+
+    # En las re-ejecuciones del fragmento no hay rerun que devuelva la conexión
+    trabajo_id = st.session_state.get(clave)
+    if trabajo_id is None:
+        return
+
+    with conexion_por_rerun():
+        conn = get_connection()
+        trabajo = consultar(conn, trabajo_id)
+
+        # Empezó o terminó desde el último rerun completo: cambia el sondeo
+        if trabajo is None or (trabajo["estado"] in ACTIVOS) != activo:
+            st.rerun()
+
+        estado = trabajo["estado"]
+        texto = f"{ETIQUETAS[estado]} · trabajo #{trabajo['id']}"
+        if trabajo["mensaje"]:
+            texto += f" · {trabajo['mensaje']}"
+        st.progress(min(max(float(trabajo["progreso"]), 0.0), 1.0), text=texto)
+
+        if estado == "pendiente" and trabajo["intentos"]:
+            st.caption(
+                f"Reintento {trabajo['intentos'] + 1} de {trabajo['max_intentos']} "
+                f"después de: {trabajo['error']}"
+            )
+        elif estado == "pendiente":
+            st.caption("Esperando un trabajador libre (python -m servicios.trabajos)")
+
+        if activo:
+            if trabajo["cancelar"]:
+                st.caption("🛑 Cancelación pedida, esperando al trabajador…")
+            elif st.button("🛑 Cancelar", key=f"{clave}_cancelar"):
+                cancelar(conn, trabajo["id"])
+                st.rerun(scope="fragment")
+            return
+
+        if estado == "fallido":
+            st.error(trabajo["error"])
+
+        if estado == "cancelado" and trabajo["iniciado_en"]:
+            st.caption("Se deshizo lo que no estaba confirmado al momento de cancelar")
+
+        if estado == "terminado" and al_terminar:
+            vistos = st.session_state.setdefault("trabajos_vistos", set())
+            primera = trabajo["id"] not in vistos
+            vistos.add(trabajo["id"])
+            al_terminar(trabajo, primera)
+
+        col1, col2 = st.columns(2)
+        if estado in ("fallido", "cancelado") and col1.button("🔁 Reintentar", key=f"{clave}_reintentar"):
+            reintentar(conn, trabajo["id"])
+            st.rerun()
+        if col2.button("✖️ Cerrar", key=f"{clave}_cerrar"):
+            st.session_state[clave] = None
+            st.rerun()
+
+
+# =====================================================
+# TRABAJADORES
+# =====================================================
+class Contexto:
+    """Lo que recibe la función de un trabajo: su conexión y el reporte de progreso."""
+
+    def __init__(self, conn, control, trabajo):
+        self.conn = conn
+        self.id = trabajo["id"]
+        self.intento = trabajo["intentos"]
+        self.cancelado = False
+
+        self._control = control      # autocommit, compartida con el hilo de latido
+        self._lock = threading.Lock()
+        self._ultimo = 0.0
+
+    def progreso(self, avance, mensaje=None):
+        """Guarda el avance (0..1); lanza Cancelado si se pidió cancelar."""
+        ahora = time.monotonic()
+        if not self.cancelado and ahora - self._ultimo >= PROGRESO_S:
+            self._ultimo = ahora
+            self._actualizar(
+                "progreso = %s, mensaje = COALESCE(%s, mensaje), latido = CURRENT_TIMESTAMP",
+                (float(avance), mensaje)
+            )
+
+        if self.cancelado:
+            raise Cancelado()
+
+    def latir(self):
+        """Desde el hilo de latido: si se pidió cancelar, corta la sentencia en curso."""
+        self._actualizar("latido = CURRENT_TIMESTAMP", ())
+        if self.cancelado:
+            self.conn.cancel()
+
+    def _actualizar(self, asignaciones, params):
+        with self._lock:
+            cur = self._control.cursor()
+            cur.execute(
+                f"UPDATE trabajos SET {asignaciones} WHERE id = %s RETURNING cancelar",
+                (*params, self.id)
+            )
+            fila = cur.fetchone()
+        self.cancelado = self.cancelado or fila is None or fila[0]
+
+
+def _latir(contexto, parar):
+    while not parar.wait(LATIDO_S):
+        try:
+            contexto.latir()
+        except psycopg2.Error:
+            # Sin latido el trabajo se recupera como vencido; el error real
+            # (conexión caída) lo verá el trabajador al terminar
+            return
+
+
+def recuperar_vencidos(control):
+    """Trabajos en curso cuyo trabajador dejó de latir: a la cola o fallidos."""
+    cur = control.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = CASE
+                WHEN cancelar THEN 'cancelado'
+                WHEN intentos < max_intentos THEN 'pendiente'
+                ELSE 'fallido'
+            END,
+            error = 'El trabajador ' || coalesce(trabajador, '?') || ' dejó de responder',
+            terminado_en = CASE
+                WHEN cancelar OR intentos >= max_intentos THEN CURRENT_TIMESTAMP
+            END,
+            disponible_en = CURRENT_TIMESTAMP
+        WHERE estado = 'en_curso'
+          AND latido < CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+        RETURNING id
+    """, (VENCIDO_S,))
+    return [fila[0] for fila in cur.fetchall()]
+
+
+def reclamar(control, trabajador):
+    """Toma el pendiente más antiguo disponible, o None."""
+    cur = control.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = 'en_curso',
+            intentos = intentos + 1,
+            trabajador = %s,
+            iniciado_en = CURRENT_TIMESTAMP,
+            latido = CURRENT_TIMESTAMP,
+            progreso = 0,
+            mensaje = NULL
+        WHERE id = (
+            SELECT id
+            FROM trabajos
+            WHERE estado = 'pendiente'
+              AND disponible_en <= CURRENT_TIMESTAMP
+            ORDER BY disponible_en, id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, tipo, parametros, intentos, max_intentos
+    """, (trabajador,))
+    fila = cur.fetchone()
+    return None if fila is None else dict(zip(
+        ["id", "tipo", "parametros", "intentos", "max_intentos"], fila
+    ))
+
+
+def ejecutar(conn, control, trabajo, trabajador):
+    """Ejecuta un trabajo reclamado y guarda cómo terminó. Devuelve el estado final."""
+    contexto = Contexto(conn, control, trabajo)
+    parar = threading.Event()
+    latido = threading.Thread(target=_latir, args=(contexto, parar), daemon=True)
+    latido.start()
+
+    resultado = error = None
+    espera = 0
+    try:
+        if trabajo["tipo"] not in TIPOS:
+            raise ErrorDefinitivo(f"Tipo de trabajo desconocido: {trabajo['tipo']}")
+        resultado = TIPOS[trabajo["tipo"]](contexto, **trabajo["parametros"])
+        estado = "terminado"
+
+    except Exception as e:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            conn.close()
+
+        error = f"{type(e).__name__}: {e}".strip()
+        if isinstance(e, Cancelado) or contexto.cancelado:
+            estado, error = "cancelado", None
+        elif isinstance(e, ErrorDefinitivo) or trabajo["intentos"] >= trabajo["max_intentos"]:
+            estado = "fallido"
+        else:
+            estado = "pendiente"
+            espera = REINTENTO_BASE_S * 2 ** (trabajo["intentos"] - 1)
+
+        if estado != "cancelado":
+            traceback.print_exc(file=sys.stderr)
+
+    finally:
+        parar.set()
+        latido.join()
+
+    # Solo si sigue siendo suyo (no se recuperó como vencido mientras tanto)
+    cur = control.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = %(estado)s,
+            resultado = %(resultado)s,
+            error = %(error)s,
+            progreso = CASE WHEN %(estado)s = 'terminado' THEN 1 ELSE progreso END,
+            mensaje = CASE WHEN %(estado)s = 'pendiente' THEN NULL ELSE mensaje END,
+            disponible_en = CURRENT_TIMESTAMP + %(espera)s * INTERVAL '1 second',
+            terminado_en = CASE WHEN %(estado)s = 'pendiente' THEN NULL ELSE CURRENT_TIMESTAMP END,
+            latido = NULL
+        WHERE id = %(id)s
+          AND estado = 'en_curso'
+          AND trabajador = %(trabajador)s
+    """, {
+        "estado": estado,
+        "resultado": None if resultado is None else Json(resultado, dumps=_json),
+        "error": error,
+        "espera": espera,
+        "id": trabajo["id"],
+        "trabajador": trabajador,
+    })
+    return estado
+
+
+class Parada:
+    """
+    Bandera que levantan las señales de parada. Solo asigna un atributo en
+    el manejador: nada de locks compartidos entre procesos, que un hijo
+    muerto a mitad de camino dejaría tomados.
+    """
+
+    def __init__(self, *senales):
+        self.pedida = False
+        for senal in senales:
+            signal.signal(senal, self._pedir)
+
+    def _pedir(self, *_):
+        self.pedida = True
+
+    def esperar(self, segundos):
+        """Duerme hasta `segundos`, o menos si se pide parar."""
+        fin = time.monotonic() + segundos
+        while not self.pedida and time.monotonic() < fin:
+            time.sleep(max(min(0.2, fin - time.monotonic()), 0))
+
+
+def trabajador():
+    """
+    Proceso trabajador: reclama y ejecuta trabajos hasta recibir SIGTERM,
+    que lo deja terminar el trabajo en curso.
+    """
+    from db import conectar_directo
+
+    # Ctrl+C lo atiende el proceso principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    parada = Parada(signal.SIGTERM)
+    nombre = f"{socket.gethostname()}:{os.getpid()}"
+    espera = 1.0
+
+    while not parada.pedida:
+        conn = control = None
+        try:
+            conn = conectar_directo()
+            control = conectar_directo()
+            control.autocommit = True
+            control.cursor().execute(f"LISTEN {CANAL}")
+
+            while not parada.pedida:
+                recuperar_vencidos(control)
+                trabajo = reclamar(control, nombre)
+
+                if trabajo is None:
+                    if select.select([control], [], [], SONDEO_S) != ([], [], []):
+                        control.poll()
+                        control.notifies.clear()
+                    continue
+
+                print(f"[{nombre}] trabajo {trabajo['id']} ({trabajo['tipo']}), "
+                      f"intento {trabajo['intentos']}", flush=True)
+                estado = ejecutar(conn, control, trabajo, nombre)
+                print(f"[{nombre}] trabajo {trabajo['id']}: {estado}", flush=True)
+
+                espera = 1.0
+                if conn.closed:
+                    conn = conectar_directo()
+
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            parada.esperar(espera)
+            espera = min(espera * 2, ESPERA_MAXIMA_S)
+
+        finally:
+            for c in (conn, control):
+                if c is not None and not c.closed:
+                    c.close()
+
+
+def supervisar(procesos, retencion_dias):
+    """
+    Mantiene `procesos` trabajadores vivos (reinicia los que mueren) y purga
+    los trabajos viejos cada hora. Con SIGINT/SIGTERM pide a los
+    trabajadores que terminen el trabajo en curso; pasados
+    ESPERA_AL_DETENER_S los mata, y sus trabajos vuelven a la cola al
+    vencer el latido.
+    """
+    from db import conectar_directo
+
+    parada = Parada(signal.SIGINT, signal.SIGTERM)
+    hijos = [None] * procesos
+    ultima_purga = 0.0
+
+    while not parada.pedida:
+        for i, hijo in enumerate(hijos):
+            if hijo is None or not hijo.is_alive():
+                if hijo is not None:
+                    print(f"⚠️ trabajador {i} terminó (código {hijo.exitcode}), se reinicia",
+                          file=sys.stderr, flush=True)
+                hijos[i] = multiprocessing.Process(target=trabajador, name=f"trabajador-{i}")
+                hijos[i].start()
+
+        if time.monotonic() - ultima_purga > PURGA_S:
+            ultima_purga = time.monotonic()
+            try:
+                conn = conectar_directo()
+                try:
+                    purgar(conn, retencion_dias)
+                finally:
+                    conn.close()
+            except psycopg2.Error:
+                traceback.print_exc(file=sys.stderr)
+
+        parada.esperar(1.0)
+
+    for hijo in hijos:
+        if hijo.is_alive():
+            hijo.terminate()
+
+    limite = time.monotonic() + ESPERA_AL_DETENER_S
+    for hijo in hijos:
+        hijo.join(max(limite - time.monotonic(), 0))
+        if hijo.is_alive():
+            hijo.kill()
+
+
+def main():
+    from db import conectar_directo
+
+    config = configuracion()
+
+    parser = argparse.ArgumentParser(description="Trabajos en segundo plano")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--estado", action="store_true", help="Lista los últimos trabajos")
+    grupo.add_argument("--purgar", type=int, metavar="DIAS",
+                       help="Borra los trabajos finalizados hace más de DIAS días")
+    parser.add_argument("--procesos", type=int, default=config["procesos"])
+    args = parser.parse_args()
+
+    if args.estado:
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(listar(conectar_directo()).to_string(index=False))
+    elif args.purgar is not None:
+        print(f"✅ {purgar(conectar_directo(), args.purgar)} trabajos borrados")
+    else:
+        print(f"▶️ {args.procesos} trabajadores (Ctrl+C para detener)", flush=True)
+        supervisar(args.procesos, config["retencion_dias"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Transiciones de estado de bloques del flujo operativo.
+
+Máquina de estados:
+    asignado → proceso → finalizado
+    rechazado N → corregido (vuelve a control de calidad)
+
+`aplicar_transicion` cambia cualquier cantidad de bloques con un único
+UPDATE ... WHERE bloque = ANY(array) y escribe el historial con un
+INSERT ... SELECT sobre las filas realmente modificadas. El estado de
+origen se valida en el mismo UPDATE, así que una selección vieja de la UI
+no puede aplicar una transición ilegal: esos bloques simplemente no se
+tocan y no aparecen en el resultado.
+"""
+
+# nuevo estado → patrón LIKE del estado de origen permitido
+ORIGEN_POR_DESTINO = {
+    "proceso": "asignado",
+    "finalizado": "proceso",
+    "corregido": "rechazado%",
+}
+
+
+def siguientes_estados(estado_actual):
+    """Estados a los que puede pasar un bloque desde `estado_actual`."""
+    if estado_actual.startswith("rechazado"):
+        return ["corregido"]
+    return [
+        destino
+        for destino, origen in ORIGEN_POR_DESTINO.items()
+        if origen == estado_actual
+    ]
+
+
+SQL_TRANSICION = """
+    WITH cambiados AS (
+        UPDATE asignaciones a
+        SET estado_actual = %(destino)s,
+            proceso_actual = CASE
+                WHEN %(destino)s = 'corregido' THEN 'control_calidad'
+                ELSE a.proceso_actual
+            END
+        WHERE a.region = %(region)s
+          AND a.asignacion = %(asignacion)s
+          AND a.bloque = ANY(%(bloques)s)
+          AND a.operador_actual = %(cedula)s
+          AND a.estado_actual LIKE %(origen)s
+        RETURNING a.id, a.asignacion, a.bloque, a.region
+    ),
+    historial AS (
+        INSERT INTO asignaciones_historial
+        (asignacion_id, asignacion, bloque, region, usuario, puesto, proceso, estado)
+        SELECT id, asignacion, bloque, region, %(cedula)s, %(puesto)s, 'operativo', %(destino)s
+        FROM cambiados
+    )
+    SELECT bloque
+    FROM cambiados
+    ORDER BY bloque
+"""
+
+
+def aplicar_transicion(conn, region, asignacion, bloques, destino, cedula, puesto):
+    """
+    Pasa `bloques` (del operador `cedula`) a `destino` en una transacción.
+    Devuelve la lista de bloques efectivamente modificados.
+    """
+    if destino not in ORIGEN_POR_DESTINO:
+        raise ValueError(f"Estado destino no permitido: {destino}")
+
+    cur = conn.cursor()
+    try:
+        cur.execute(SQL_TRANSICION, {
+            "region": region,
+            "asignacion": asignacion,
+            "bloques": [int(b) for b in bloques],
+            "destino": destino,
+            "origen": ORIGEN_POR_DESTINO[destino],
+            "cedula": cedula,
+            "puesto": puesto,
+        })
+        cambiados = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return cambiados
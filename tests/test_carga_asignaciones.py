@@ -0,0 +1,86 @@
+import io
+
+import pandas as pd
+import pytest
+
+from servicios.carga_asignaciones import leer_por_bloques, validar
+
+
+def rechazos(contenido, filas_por_bloque=100):
+    bloques = leer_por_bloques(io.BytesIO(contenido), filas_por_bloque)
+    return pd.concat([validar(df)[1] for df in bloques], ignore_index=True)
+
+
+def test_validar_motivos():
+    df = pd.DataFrame(
+        {
+            "asignacion": ["A", "", "A", "A", "A", "A", "A", ""],
+            "bloque": ["1", "2", "", "x", "3.5", "-4", " 7 ", ""],
+            "complejidad": ["alta", "alta", "alta", "alta", "alta", "alta", "", ""],
+        },
+        index=range(2, 10),
+    )
+
+    validas, rechazadas = validar(df)
+
+    assert validas[["linea", "asignacion", "bloque"]].values.tolist() == [[2, "A", 1]]
+    assert rechazadas[["linea", "motivo"]].values.tolist() == [
+        [3, "asignacion vacía"],
+        [4, "bloque vacío"],
+        [5, "bloque no numérico"],
+        [6, "bloque no entero"],
+        [7, "bloque fuera de rango"],
+        [8, "complejidad vacía"],
+    ]
+
+
+def test_validar_faltan_columnas():
+    with pytest.raises(ValueError, match="complejidad"):
+        validar(pd.DataFrame({"asignacion": ["A"], "bloque": ["1"]}))
+
+
+@pytest.mark.parametrize("filas_por_bloque", [100, 2, 1])
+def test_csv_lineas_fisicas(filas_por_bloque):
+    contenido = (
+        b"asignacion,bloque,complejidad\n"
+        b"A,1,alta\n"
+        b"\n"
+        b"A,x,alta\n"
+        b'A,2,"dos\nlineas"\n'
+        b"A,-3,baja\n"
+    )
+
+    assert rechazos(contenido, filas_por_bloque)[["linea", "motivo"]].values.tolist() == [
+        [4, "bloque no numérico"],
+        [7, "bloque fuera de rango"],
+    ]
+
+
+def test_csv_separador_y_codificacion():
+    contenido = "Asignacion;Bloque;Complejidad\nÑ1;1;baja\nÑ1;;baja\n".encode("latin-1")
+
+    bloques = list(leer_por_bloques(io.BytesIO(contenido)))
+    validas, rechazadas = validar(bloques[0])
+
+    assert validas["asignacion"].tolist() == ["Ñ1"]
+    assert rechazadas[["linea", "motivo"]].values.tolist() == [[3, "bloque vacío"]]
+
+
+def test_xlsx_lineas_fisicas():
+    openpyxl = pytest.importorskip("openpyxl")
+
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.append(["asignacion", "bloque", "complejidad"])
+    hoja.append(["A", 1, "alta"])
+    hoja.append([])
+    hoja.append(["A", 2.5, "alta"])
+    hoja["A6"] = "A"
+    hoja["C6"] = "baja"
+    archivo = io.BytesIO()
+    libro.save(archivo)
+
+    assert rechazos(archivo.getvalue(), 2)[["linea", "motivo"]].values.tolist() == [
+        [4, "bloque no entero"],
+        [6, "bloque vacío"],
+    ]
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from servicios.catalogos import _arbol_desde
+
+
+def test_arbol_desde_agrega_solo_complejidades_nuevas():
+    df = pd.DataFrame({
+        "region": ["R1", "R1", "R1", "R2"],
+        "asignacion": ["A", "A", "B", "A"],
+        "bloque": [1, 2, 1, 7],
+        "complejidad": ["media", "alta", None, "baja"],
+    })
+    complejidades = ["alta", "baja"]
+
+    arbol = _arbol_desde(df, complejidades)
+
+    assert complejidades == ["alta", "baja", "media"]
+    bloques, codigos = arbol["R1"]["A"]
+    assert bloques.dtype == np.int32 and codigos.dtype == np.int16
+    assert bloques.tolist() == [1, 2]
+    assert codigos.tolist() == [2, 0]
+    assert arbol["R1"]["B"][1].tolist() == [-1]
+    assert arbol["R2"]["A"][1].tolist() == [1]
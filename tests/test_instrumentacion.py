@@ -0,0 +1,28 @@
+from servicios.instrumentacion import huella
+
+
+def test_texto_con_marcas_de_comentario():
+    assert huella("SELECT a FROM t WHERE b = 'x -- y' AND c = %s") == (
+        "SELECT a FROM t WHERE b = ? AND c = ?"
+    )
+    assert huella("SELECT a FROM t WHERE b = '/* no */' AND c = 1") == (
+        "SELECT a FROM t WHERE b = ? AND c = ?"
+    )
+
+
+def test_textos_distintos_misma_huella():
+    assert huella("SELECT 1 FROM t WHERE b = 'x -- y' AND c = 2") == huella(
+        "SELECT 1 FROM t WHERE b = 'otro' AND c = 3"
+    )
+
+
+def test_comentarios():
+    assert huella("SELECT a -- ver 'b'\nFROM t /* it's */ WHERE c = 'it''s'") == (
+        "SELECT a FROM t WHERE c = ?"
+    )
+
+
+def test_listas_y_parametros():
+    assert huella("SELECT * FROM t WHERE id IN (1, 2, 3) AND x = %(x)s") == (
+        "SELECT * FROM t WHERE id IN (...) AND x = ?"
+    )